@@ -0,0 +1,4 @@
+"""Benchmarks dos caminhos críticos de análise, risco e persistência
+
+Uso: `python -m benchmarks --help`.
+"""
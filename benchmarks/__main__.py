@@ -0,0 +1,56 @@
+import argparse
+import logging
+import sys
+
+from benchmarks import bench_analysis, bench_persistence, bench_risk  # noqa: F401 (registram os benchmarks)
+from benchmarks.runner import DEFAULT_THRESHOLD, compare, format_duration, load_report, run_all, save_report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmarks dos caminhos críticos do bot')
+    parser.add_argument('-k', '--filter', help='executa só os benchmarks cujo nome contém o texto')
+    parser.add_argument('--quick', action='store_true', help='pula os benchmarks lentos e usa menos repetições')
+    parser.add_argument('-o', '--output', help='grava o relatório JSON neste arquivo')
+    parser.add_argument('--baseline', help='relatório JSON de referência para comparação')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='aumento relativo da mediana considerado regressão (padrão: 0.20)')
+    parser.add_argument('--record', nargs='+', metavar='SYMBOL',
+                        help='grava klines reais destes símbolos em benchmarks/fixtures e sai')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.record:
+        from binance.client import Client
+        from benchmarks.fixtures import record
+        for path in record(Client(), args.record):
+            print(f'📥 {path}')
+        return 0
+
+    report = run_all(
+        args.filter, quick=args.quick,
+        progress=lambda name, result: print(f'{name:<55} {format_duration(result["median_s"]):>12}', flush=True)
+    )
+    if args.output:
+        save_report(report, args.output)
+        print(f'💾 Relatório salvo em {args.output}')
+
+    if not args.baseline:
+        return 0
+
+    rows = compare(report, load_report(args.baseline), args.threshold)
+    print(f'\n{"benchmark":<55} {"base":>12} {"atual":>12} {"razão":>7}  estado')
+    for row in rows:
+        ratio = f'{row["ratio"]:.2f}' if row['ratio'] is not None else '-'
+        print(f'{row["name"]:<55} {format_duration(row["baseline_s"]):>12} '
+              f'{format_duration(row["current_s"]):>12} {ratio:>7}  {row["status"]}')
+    regressions = [row['name'] for row in rows if row['status'] == 'regression']
+    if regressions:
+        print(f'\n❌ {len(regressions)} regressão(ões) acima de {args.threshold:.0%}: {", ".join(regressions)}')
+        return 1
+    print('\n✅ Nenhuma regressão')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
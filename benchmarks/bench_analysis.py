@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+from benchmarks.fixtures import synthetic_klines, universe
+from benchmarks.runner import benchmark
+from src.analysis import indicators
+from src.analysis.technical_analyzer import TechnicalAnalyzer
+
+UNIVERSE_SIZES = (50, 500, 5000)
+
+INDICATORS = (
+    'calculate_rsi', 'calculate_macd', 'calculate_bollinger_bands', 'calculate_stochastic',
+    'calculate_atr', 'calculate_volume_profile', 'calculate_support_resistance', 'calculate_moving_averages'
+)
+
+
+def analyzer_config():
+    return SimpleNamespace(timeframes=['15m', '1h', '4h'], stop_loss_ratio=1.0, risk_reward_ratio=2.0)
+
+
+def _dataframe():
+    analyzer = TechnicalAnalyzer(analyzer_config())
+    return analyzer._prepare_dataframe(synthetic_klines(1, 100))
+
+
+@benchmark('analysis.prepare_dataframe', setup=lambda: (TechnicalAnalyzer(analyzer_config()), synthetic_klines(1, 100)))
+def prepare_dataframe(analyzer, klines):
+    analyzer._prepare_dataframe(klines)
+
+
+def _register_indicator(name):
+    func = getattr(indicators, name)
+    benchmark(f'analysis.indicators.{name}', setup=lambda: (func, _dataframe()))(lambda f, df: f(df))
+
+
+for _name in INDICATORS:
+    _register_indicator(_name)
+
+
+def analyze_universe(analyzer, symbols):
+    for symbol, klines in symbols.items():
+        analyzer.analyze_symbol(symbol, klines)
+
+
+def _register_universe(size):
+    benchmark(
+        f'analysis.analyze_symbol.universe_{size}',
+        setup=lambda: (TechnicalAnalyzer(analyzer_config()), universe(size)),
+        repeat=5 if size <= 50 else 3 if size <= 500 else 1,
+        slow=size > 50
+    )(analyze_universe)
+
+
+for _size in UNIVERSE_SIZES:
+    _register_universe(_size)
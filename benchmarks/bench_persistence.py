@@ -0,0 +1,34 @@
+from benchmarks.fixtures import scratch_dir
+from benchmarks.runner import benchmark
+from src.models.position import Position
+from src.utils.persistence import DataPersistence
+
+SIZES = (10, 100)
+
+
+def _positions(count):
+    return {
+        f'SYM{i}USDT': Position(f'SYM{i}USDT', 'BUY', 1.5, 100.0 + i, 101.0 + i, stop_loss=95.0 + i,
+                                take_profit=110.0 + i, risk_amount=5.0)
+        for i in range(count)
+    }
+
+
+def _setup(count):
+    persistence = DataPersistence(scratch_dir('persistence-'), max_backups=2)
+    positions = _positions(count)
+    persistence.save_positions(positions)
+    return persistence, positions
+
+
+def _register(count):
+    benchmark(f'persistence.save_positions.{count}', setup=lambda: _setup(count))(
+        lambda persistence, positions: persistence.save_positions(positions))
+    benchmark(f'persistence.load_positions.{count}', setup=lambda: _setup(count))(
+        lambda persistence, positions: persistence.load_positions())
+    benchmark(f'persistence.append_event.{count}', setup=lambda: _setup(count))(
+        lambda persistence, positions: persistence.append_event('update', 'SYM0USDT', positions['SYM0USDT']))
+
+
+for _count in SIZES:
+    _register(_count)
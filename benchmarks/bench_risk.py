@@ -0,0 +1,79 @@
+import logging
+import os
+from types import SimpleNamespace
+
+from benchmarks.fixtures import scratch_dir, synthetic_universe
+from benchmarks.runner import benchmark
+from src.models.enums import SignalStrength
+from src.models.position import Position
+from src.models.signal import MarketSignal
+from src.risk.risk_manager import RiskManager
+
+POSITIONS = 50
+
+_state = {}
+
+
+def risk_manager():
+    """RiskManager com `POSITIONS` posições e correlação alimentada, em diretório temporário"""
+    if 'manager' in _state:
+        return _state['manager']
+    data_dir = scratch_dir('risk-')
+    config = SimpleNamespace(
+        max_positions=POSITIONS + 10,
+        max_portfolio_correlation=0.95,
+        persistence_dir=data_dir,
+        ledger_path=os.path.join(data_dir, 'ledger.db')
+    )
+    manager = RiskManager(config)
+    manager.persistence_writer.stop()
+    manager.update_capital(100_000.0, 80_000.0)
+
+    symbols = synthetic_universe(POSITIONS + 1, timeframes=('1h',))
+    for i, (symbol, klines) in enumerate(symbols.items()):
+        manager.correlation_engine.update(symbol, klines['1h'])
+        if i < POSITIONS:
+            price = float(klines['1h'][-1][4])
+            position = Position(symbol, 'BUY', 10.0, price, price * 1.01, stop_loss=price * 0.97,
+                                take_profit=price * 1.06, risk_amount=30.0)
+            position.calculate_unrealized_pnl()
+            manager.positions[symbol] = position
+
+    candidate = list(symbols)[-1]
+    price = float(symbols[candidate]['1h'][-1][4])
+    signal = MarketSignal(candidate, SignalStrength.STRONG, 0.8, price, price * 0.97, price * 1.06, price * 0.03)
+    _state['manager'] = manager, signal
+    return manager, signal
+
+
+@benchmark('risk.calculate_position_size', setup=risk_manager)
+def calculate_position_size(manager, signal):
+    manager._calculate_position_size(signal)
+
+
+@benchmark('risk.can_open_position', setup=risk_manager)
+def can_open_position(manager, signal):
+    manager.can_open_position(signal)
+
+
+@benchmark('risk.portfolio_correlation', setup=risk_manager)
+def portfolio_correlation(manager, signal):
+    manager._check_portfolio_correlation(signal, 10.0)
+
+
+@benchmark('risk.positions_summary', setup=risk_manager)
+def positions_summary(manager, signal):
+    manager.get_positions_summary()
+
+
+@benchmark('risk.check_capital_protection', setup=risk_manager)
+def check_capital_protection(manager, signal):
+    manager.check_capital_protection()
+
+
+@benchmark('risk.update_risk_metrics', setup=risk_manager)
+def update_risk_metrics(manager, signal):
+    manager.update_risk_metrics()
+
+
+logging.getLogger('src.risk').setLevel(logging.WARNING)
@@ -0,0 +1,90 @@
+import glob
+import json
+import os
+import tempfile
+from typing import Dict, List
+
+import numpy as np
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+TIMEFRAME_MS = {'15m': 900_000, '1h': 3_600_000, '4h': 14_400_000, '1d': 86_400_000}
+
+START_MS = 1_700_000_000_000
+
+# Diretórios temporários dos benchmarks (removidos ao fim do processo)
+_SCRATCH = tempfile.TemporaryDirectory(prefix='benchmarks-')
+
+
+def scratch_dir(prefix: str) -> str:
+    return tempfile.mkdtemp(prefix=prefix, dir=_SCRATCH.name)
+
+
+def synthetic_klines(seed: int, count: int = 100, timeframe: str = '1h', price: float = 100.0) -> List[List]:
+    """Klines no formato da API da Binance, com passeio aleatório reprodutível"""
+    rng = np.random.default_rng(seed)
+    step = TIMEFRAME_MS.get(timeframe, 3_600_000)
+    returns = rng.normal(0.0002, 0.01, count)
+    closes = price * np.exp(np.cumsum(returns))
+    opens = np.concatenate(([price], closes[:-1]))
+    spread = np.abs(rng.normal(0, 0.004, count)) * closes
+    highs = np.maximum(opens, closes) + spread
+    lows = np.minimum(opens, closes) - spread
+    volumes = rng.lognormal(8, 0.5, count)
+
+    klines = []
+    for i in range(count):
+        open_time = START_MS + i * step
+        klines.append([
+            open_time, f'{opens[i]:.8f}', f'{highs[i]:.8f}', f'{lows[i]:.8f}', f'{closes[i]:.8f}',
+            f'{volumes[i]:.8f}', open_time + step - 1, f'{volumes[i] * closes[i]:.8f}',
+            int(volumes[i] / 10), f'{volumes[i] / 2:.8f}', f'{volumes[i] * closes[i] / 2:.8f}', '0'
+        ])
+    return klines
+
+
+def synthetic_universe(size: int, timeframes=('15m', '1h', '4h'), count: int = 100) -> Dict[str, Dict[str, List]]:
+    """`size` símbolos com klines em cada timeframe (mesmo formato de `fetch_klines`)"""
+    return {
+        f'SYM{i}USDT': {
+            timeframe: synthetic_klines(i * 31 + j, count, timeframe, price=10.0 + i % 500)
+            for j, timeframe in enumerate(timeframes)
+        }
+        for i in range(size)
+    }
+
+
+def recorded_universe() -> Dict[str, Dict[str, List]]:
+    """Klines gravados da Binance com `python -m benchmarks record` (vazio se não houver)"""
+    universe = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.json'))):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        universe[data['symbol']] = data['klines']
+    return universe
+
+
+def universe(size: int) -> Dict[str, Dict[str, List]]:
+    """Universo para os benchmarks: símbolos gravados primeiro, completados com sintéticos"""
+    recorded = recorded_universe()
+    symbols = dict(list(recorded.items())[:size])
+    if len(symbols) < size:
+        for symbol, klines in synthetic_universe(size - len(symbols)).items():
+            symbols[symbol] = klines
+    return symbols
+
+
+def record(client, symbols: List[str], timeframes=('15m', '1h', '4h'), limit: int = 100) -> List[str]:
+    """Grava klines reais de cada símbolo em `fixtures/<símbolo>.json`"""
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    paths = []
+    for symbol in symbols:
+        klines = {
+            timeframe: client.get_klines(symbol=symbol, interval=timeframe, limit=limit)
+            for timeframe in timeframes
+        }
+        path = os.path.join(FIXTURES_DIR, f'{symbol}.json')
+        with open(path, 'w') as f:
+            json.dump({'symbol': symbol, 'klines': klines}, f)
+        paths.append(path)
+    return paths
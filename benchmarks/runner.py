@@ -0,0 +1,165 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Aumento relativo da mediana considerado regressão
+DEFAULT_THRESHOLD = 0.20
+
+# Duração mínima de uma amostra: funções rápidas são repetidas até atingi-la
+MIN_SAMPLE_TIME = 0.05
+
+REGISTRY: Dict[str, 'Benchmark'] = {}
+
+
+class Benchmark:
+    """Função medida com preparação fora do tempo cronometrado
+
+    `setup()` monta os dados (fixtures) e devolve os argumentos de `func`;
+    cada amostra executa `func(*args)` quantas vezes forem necessárias para
+    durar pelo menos `MIN_SAMPLE_TIME` e registra o tempo por chamada.
+    """
+
+    def __init__(self, name: str, func: Callable, setup: Optional[Callable] = None,
+                 repeat: int = 5, slow: bool = False):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.repeat = repeat
+        self.slow = slow
+
+    def run(self, repeat: Optional[int] = None) -> Dict[str, Any]:
+        args = self.setup() if self.setup else ()
+        func = self.func
+
+        # Calibração: chamadas por amostra (se uma chamada já basta, ela vale como amostra)
+        started = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - started
+        number = max(1, int(MIN_SAMPLE_TIME / elapsed)) if elapsed > 0 else 1000
+        samples = [elapsed] if number == 1 else []
+
+        while len(samples) < (repeat or self.repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                func(*args)
+            samples.append((time.perf_counter() - started) / number)
+
+        samples.sort()
+        median = statistics.median(samples)
+        return {
+            'median_s': median,
+            'min_s': samples[0],
+            'max_s': samples[-1],
+            'mean_s': statistics.fmean(samples),
+            'stdev_s': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            'ops_per_s': 1 / median if median else None,
+            'repeat': len(samples),
+            'number': number
+        }
+
+
+def benchmark(name: str, setup: Optional[Callable] = None, repeat: int = 5, slow: bool = False):
+    """Registra uma função de benchmark (`slow` fica de fora no modo rápido)"""
+    def register(func):
+        REGISTRY[name] = Benchmark(name, func, setup, repeat, slow)
+        return func
+    return register
+
+
+def run_all(pattern: Optional[str] = None, quick: bool = False,
+            progress: Optional[Callable[[str, Dict], None]] = None) -> Dict[str, Any]:
+    """Executa os benchmarks registrados e devolve o relatório completo"""
+    results = {}
+    for name, bench in sorted(REGISTRY.items()):
+        if pattern and pattern not in name:
+            continue
+        if quick and bench.slow:
+            continue
+        result = bench.run(repeat=2 if quick else None)
+        results[name] = result
+        if progress:
+            progress(name, result)
+    return {'meta': environment(quick), 'results': results}
+
+
+def environment(quick: bool = False) -> Dict[str, Any]:
+    """Máquina, versões e commit em que os números foram obtidos"""
+    import numpy
+    import pandas
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'quick': quick
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """Compara as medianas com a linha de base
+
+    Cada linha traz a razão atual/base e o estado: `regression` (mais lento
+    que `1 + threshold`), `improvement` (mais rápido que `1 - threshold`),
+    `ok`, `new` ou `missing` (benchmark que sumiu do relatório atual).
+    """
+    rows = []
+    current_results = current.get('results', {})
+    baseline_results = baseline.get('results', {})
+    for name in sorted(set(current_results) | set(baseline_results)):
+        now = current_results.get(name)
+        base = baseline_results.get(name)
+        if base is None:
+            rows.append({'name': name, 'status': 'new', 'current_s': now['median_s'], 'baseline_s': None, 'ratio': None})
+            continue
+        if now is None:
+            rows.append({'name': name, 'status': 'missing', 'current_s': None, 'baseline_s': base['median_s'], 'ratio': None})
+            continue
+        ratio = now['median_s'] / base['median_s'] if base['median_s'] else float('inf')
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 - threshold:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append({'name': name, 'status': status, 'current_s': now['median_s'],
+                     'baseline_s': base['median_s'], 'ratio': ratio})
+    return rows
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_report(report: Dict[str, Any], path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '-'
+    if seconds < 1e-3:
+        return f'{seconds * 1e6:.1f} µs'
+    if seconds < 1:
+        return f'{seconds * 1e3:.2f} ms'
+    return f'{seconds:.2f} s'
@@ -12,6 +12,10 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 try:
     from config.trading_config import TradingConfig
     from src.bot.trading_bot import BinanceTradingBot
+    from src.bot.sharding import ShardWorker, ROLE_WORKER
+    from src.bot.service import BotService
+    from src.analysis.pipeline import AnalysisPipeline
+    from binance.client import Client
 except ImportError as e:
     print(f"❌ Erro importando módulos: {e}")
     print("💡 Certifique-se de que todos os arquivos estão no lugar correto")
@@ -32,6 +36,11 @@ def main():
         api_key = os.getenv('API_KEY')
         api_secret = os.getenv('API_SECRET')
         
+        # Worker de análise: só dados públicos de mercado, sem chaves obrigatórias
+        if os.getenv('SHARD_ROLE') == ROLE_WORKER:
+            run_worker(TradingConfig(api_key=api_key, api_secret=api_secret), logger)
+            return
+        
         if not api_key or not api_secret:
             logger.error("❌ API_KEY e API_SECRET devem estar configurados no arquivo .env")
             logger.info("📝 Crie um arquivo .env na raiz do projeto com:")
@@ -53,21 +62,31 @@ def main():
         logger.info(f"📈 Risk/Reward: {config.risk_reward_ratio}")
         logger.info(f"🛡️ Modo Testnet: {config.testnet}")
         
-        # Iniciar o bot de trading
-        trading_bot = BinanceTradingBot(config)
-        logger.info("🤖 Bot criado com sucesso")
-        
-        # Executar o bot
-        trading_bot.run()
+        # Executar o bot em processo próprio (instância única), publicando o
+        # estado para o servidor web; o bot só é criado após obter o lock
+        service = BotService(config, lambda: BinanceTradingBot(config))
+        if not service.run():
+            sys.exit(1)
         
     except KeyboardInterrupt:
         logger.info("\n🛑 Interrompido pelo usuário")
-        if 'trading_bot' in locals():
-            trading_bot.stop()
+        if 'service' in locals():
+            service.stop()
     except Exception as e:
         logger.error(f"❌ Erro: {e}")
         logger.exception("Detalhes do erro:")
         sys.exit(1)
 
+def run_worker(config, logger):
+    """Executa um worker de análise conectado ao coordenador (SHARD_ADDRESS)"""
+    logger.info(f"🧩 Iniciando worker de análise para o coordenador {config.shard_address}")
+    client = Client(config.api_key, config.api_secret, testnet=config.testnet)
+    worker = ShardWorker(config, AnalysisPipeline(config, client), config.shard_address, config.shard_authkey)
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        logger.info("\n🛑 Worker interrompido pelo usuário")
+        worker.stop()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -11,6 +11,7 @@ setup(
         "python-dotenv",
         "pandas",
         "numpy",
+        "pyarrow",
         "ta",
         "gunicorn",
         "eventlet"
@@ -0,0 +1,212 @@
+from typing import Dict, Iterable, List, Optional
+import heapq
+import logging
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.indicators import calculate_atr
+
+logger = logging.getLogger(__name__)
+
+# Score mínimo de um sinal MODERATE (TechnicalAnalyzer._score_to_strength)
+SIGNAL_THRESHOLD = 0.5
+
+# Distância do limiar a partir da qual o score não acelera mais a cadência
+THRESHOLD_BAND = 0.2
+
+# Limites de cada fator multiplicativo de urgência
+FACTOR_MIN = 0.5
+FACTOR_MAX = 3.0
+
+# Candles recentes comparados com a média anterior para o fator de volume
+RECENT_CANDLES = 3
+VOLUME_LOOKBACK = 20
+
+
+class CadenceController:
+    """Intervalo de reanálise adaptativo por símbolo
+
+    Cada análise atualiza o intervalo do símbolo: `base_interval` dividido pela
+    urgência, que é o produto de três fatores limitados a [0.5, 3]:
+
+    - volatilidade: ATR percentual do símbolo sobre a mediana dos símbolos
+      acompanhados (ativos parados reanalisam menos);
+    - volume: volume dos últimos candles sobre a média anterior;
+    - proximidade: quanto mais perto do limiar MODERATE ficou o último score,
+      maior a chance do sinal virar na próxima análise.
+
+    O resultado fica entre `min_interval` e `max_interval`, e os próximos
+    vencimentos são mantidos em um heap (entradas antigas são descartadas
+    preguiçosamente).
+    """
+
+    def __init__(self, config):
+        self.base_interval = getattr(config, 'cadence_base_interval', 1800.0)
+        self.min_interval = getattr(config, 'cadence_min_interval', 300.0)
+        self.max_interval = getattr(config, 'cadence_max_interval', 14400.0)
+        self.timeframe = getattr(config, 'cadence_timeframe', '1h')
+
+        self._heap: List[tuple] = []
+        self._due: Dict[str, float] = {}
+        self._intervals: Dict[str, float] = {}
+        self._factors: Dict[str, Dict[str, float]] = {}
+        self._atr_pct: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Atualização
+    # ------------------------------------------------------------------
+
+    def update(self, symbol: str, klines: Optional[List] = None, score: Optional[float] = None,
+               now: Optional[float] = None) -> float:
+        """Recalcula o intervalo do símbolo após uma análise e agenda a próxima"""
+        now = time.time() if now is None else now
+        atr_pct, volume_ratio = self._klines_metrics(klines)
+
+        with self._lock:
+            if atr_pct is not None:
+                self._atr_pct[symbol] = atr_pct
+            factors = {
+                'volatility': self._volatility_factor(symbol),
+                'volume': self._clip(volume_ratio) if volume_ratio is not None else 1.0,
+                'proximity': self._proximity_factor(score)
+            }
+            urgency = factors['volatility'] * factors['volume'] * factors['proximity']
+            interval = min(self.max_interval, max(self.min_interval, self.base_interval / urgency))
+
+            self._factors[symbol] = factors
+            self._intervals[symbol] = interval
+            self._schedule(symbol, now + interval)
+        return interval
+
+    def schedule(self, symbol: str, due: float, interval: Optional[float] = None):
+        """Registra um vencimento calculado em outro processo (worker de análise)"""
+        with self._lock:
+            if interval is not None:
+                self._intervals[symbol] = interval
+            self._schedule(symbol, due)
+
+    def remove(self, symbol: str):
+        """Deixa de acompanhar o símbolo (a próxima análise é imediata)"""
+        with self._lock:
+            self._due.pop(symbol, None)
+            self._intervals.pop(symbol, None)
+            self._factors.pop(symbol, None)
+            self._atr_pct.pop(symbol, None)
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def is_due(self, symbol: str, now: Optional[float] = None) -> bool:
+        """Símbolos nunca analisados estão sempre vencidos"""
+        due = self._due.get(symbol)
+        return due is None or due <= (time.time() if now is None else now)
+
+    def next_due(self, symbol: str) -> Optional[float]:
+        return self._due.get(symbol)
+
+    def interval(self, symbol: str) -> Optional[float]:
+        return self._intervals.get(symbol)
+
+    def due_symbols(self, now: Optional[float] = None, limit: Optional[int] = None,
+                    allowed: Optional[set] = None) -> List[str]:
+        """Símbolos acompanhados já vencidos, do mais atrasado para o mais recente
+
+        Lê o heap só até o primeiro vencimento futuro (ou até `limit`
+        símbolos de `allowed`), sem percorrer todo o universo.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            popped = []
+            selected = []
+            while self._heap and self._heap[0][0] <= now and (limit is None or len(selected) < limit):
+                entry = heapq.heappop(self._heap)
+                if self._due.get(entry[1]) != entry[0]:
+                    continue
+                popped.append(entry)
+                if allowed is None or entry[1] in allowed:
+                    selected.append(entry[1])
+            # Continuam vencidos até serem reanalisados
+            for entry in popped:
+                heapq.heappush(self._heap, entry)
+            return selected
+
+    def order(self, symbols: Iterable[str], now: Optional[float] = None,
+              limit: Optional[int] = None) -> List[str]:
+        """Símbolos vencidos: nunca analisados primeiro (na ordem recebida), depois pelo heap de vencimentos"""
+        symbols = list(symbols)
+        fresh = [s for s in symbols if s not in self._due]
+        if limit is not None and len(fresh) >= limit:
+            return fresh[:limit]
+        remaining = None if limit is None else limit - len(fresh)
+        return fresh + self.due_symbols(now, limit=remaining, allowed=set(symbols))
+
+    def get_stats(self, now: Optional[float] = None) -> Dict:
+        now = time.time() if now is None else now
+        with self._lock:
+            intervals = sorted(self._intervals.values())
+            fastest = sorted(self._intervals.items(), key=lambda item: item[1])[:5]
+            return {
+                'tracked': len(self._due),
+                'due': sum(1 for due in self._due.values() if due <= now),
+                'interval_min': intervals[0] if intervals else None,
+                'interval_median': intervals[len(intervals) // 2] if intervals else None,
+                'interval_max': intervals[-1] if intervals else None,
+                'fastest': [
+                    {'symbol': symbol, 'interval': interval, **self._factors.get(symbol, {})}
+                    for symbol, interval in fastest
+                ]
+            }
+
+    # ------------------------------------------------------------------
+    # Auxiliares
+    # ------------------------------------------------------------------
+
+    def _schedule(self, symbol: str, due: float):
+        self._due[symbol] = due
+        heapq.heappush(self._heap, (due, symbol))
+        # Entradas substituídas acumulam no heap; reconstrói quando dominam
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self._heap = [(due, symbol) for symbol, due in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def _klines_metrics(self, klines: Optional[List]):
+        """ATR percentual e razão de volume recente/anterior dos candles"""
+        if not klines or len(klines) < RECENT_CANDLES + 2:
+            return None, None
+        try:
+            data = np.asarray([k[2:6] for k in klines], dtype=float)
+        except (TypeError, ValueError):
+            return None, None
+        df = pd.DataFrame(data, columns=['high', 'low', 'close', 'volume'])
+
+        close = df['close'].iloc[-1]
+        atr = calculate_atr(df)
+        atr_pct = atr / close if close > 0 and pd.notna(atr) else None
+
+        volume = df['volume'].to_numpy()
+        previous = volume[-(RECENT_CANDLES + VOLUME_LOOKBACK):-RECENT_CANDLES]
+        baseline = previous.mean() if len(previous) else 0.0
+        volume_ratio = volume[-RECENT_CANDLES:].mean() / baseline if baseline > 0 else None
+        return atr_pct, volume_ratio
+
+    def _volatility_factor(self, symbol: str) -> float:
+        atr_pct = self._atr_pct.get(symbol)
+        if atr_pct is None:
+            return 1.0
+        median = float(np.median(list(self._atr_pct.values())))
+        return self._clip(atr_pct / median) if median > 0 else 1.0
+
+    def _proximity_factor(self, score: Optional[float]) -> float:
+        if score is None:
+            return 1.0
+        closeness = max(0.0, 1.0 - abs(score - SIGNAL_THRESHOLD) / THRESHOLD_BAND)
+        return 1.0 + (FACTOR_MAX - 1.0) * closeness
+
+    @staticmethod
+    def _clip(value: float) -> float:
+        return min(FACTOR_MAX, max(FACTOR_MIN, value))
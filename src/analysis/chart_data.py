@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.downsample import aggregate_ohlcv, bucket_last, lttb
+from src.analysis.indicators import indicator_series
+from src.data.kline_store import INTERVAL_MS, KlineStore
+
+logger = logging.getLogger(__name__)
+
+# Candles lidos por ponto desenhado, no máximo, antes de subir para um intervalo maior
+OVERSAMPLE = 4
+
+MAX_WIDTH = 4000
+
+
+def parse_indicators(spec: Optional[str]) -> List[Tuple[str, int]]:
+    """`"sma:20,ema:50,bb:20"` -> [('sma', 20), ('ema', 50), ('bb', 20)]"""
+    indicators = []
+    for item in (spec or '').split(','):
+        item = item.strip().lower()
+        if not item:
+            continue
+        name, _, period = item.partition(':')
+        if name not in ('sma', 'ema', 'rsi', 'bb'):
+            raise ValueError(f"Indicador desconhecido: {name}")
+        indicators.append((name, int(period) if period else 20))
+    return indicators
+
+
+def choose_interval(start_ms: int, end_ms: int, width: int, minimum: str = '1m') -> str:
+    """Menor intervalo (a partir de `minimum`) que cobre o período com até `width * OVERSAMPLE` candles"""
+    floor = INTERVAL_MS.get(minimum, INTERVAL_MS['1m'])
+    budget = max(1, width * OVERSAMPLE)
+    candidates = [name for name, step in sorted(INTERVAL_MS.items(), key=lambda item: item[1]) if step >= floor]
+    for name in candidates:
+        if (end_ms - start_ms) / INTERVAL_MS[name] <= budget:
+            return name
+    return candidates[-1]
+
+
+def _to_list(values: np.ndarray) -> List:
+    """Array -> lista JSON (NaN vira null)"""
+    values = np.asarray(values, dtype=float)
+    if not np.isnan(values).any():
+        return values.tolist()
+    return [None if np.isnan(v) else v for v in values.tolist()]
+
+
+class ChartDataService:
+    """Séries para os gráficos do dashboard, reduzidas no servidor
+
+    Lê candles do histórico local, calcula as sobreposições de indicadores
+    na resolução original (com candles extras de aquecimento antes do
+    início) e agrega tudo para no máximo `width` pontos: OHLC agregado para
+    preço e LTTB para a curva de patrimônio. Períodos longos usam
+    automaticamente um intervalo maior, limitando a quantidade lida do banco
+    (sem cliente da Binance, só se esse intervalo já estiver gravado). Os
+    resultados ficam em um cache LRU cuja chave inclui o último candle
+    gravado, então um candle novo invalida só os gráficos do símbolo.
+    """
+
+    def __init__(self, store: KlineStore, client=None, cache_size: int = 128, max_width: int = MAX_WIDTH):
+        self.store = store
+        self.client = client
+        self.cache_size = cache_size
+        self.max_width = max_width
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def candles(self, symbol: str, start_ms: int, end_ms: int, width: int,
+                interval: str = '1m', indicators: Sequence[Tuple[str, int]] = ()) -> Dict[str, Any]:
+        """OHLCV e indicadores de `symbol` em [start_ms, end_ms) com até `width` pontos"""
+        if interval not in INTERVAL_MS:
+            raise ValueError(f"Intervalo inválido: {interval}")
+        if end_ms <= start_ms:
+            raise ValueError("Período vazio")
+        width = max(2, min(int(width), self.max_width))
+        chosen = choose_interval(start_ms, end_ms, width, minimum=interval)
+        if self.client is not None or self.store.bounds(symbol, chosen) is not None:
+            # Sem acesso à Binance, só sobe de intervalo se ele já estiver no histórico
+            interval = chosen
+        step = INTERVAL_MS[interval]
+        warmup = max((period for _, period in indicators), default=0) * step
+        load_start = start_ms - warmup
+
+        if self.client is not None:
+            try:
+                self.store.backfill(self.client, symbol, interval, load_start, min(end_ms, int(time.time() * 1000)))
+            except Exception as e:
+                logger.warning(f"Erro completando histórico de {symbol} {interval}: {e}")
+
+        key = ('candles', symbol, interval, start_ms, end_ms, width, tuple(indicators),
+               self.store.revision(symbol, interval))
+        return self._cached(key, lambda: self._build_candles(symbol, interval, start_ms, end_ms,
+                                                             load_start, width, indicators))
+
+    def equity(self, start_ms: int, end_ms: int, width: int) -> Dict[str, Any]:
+        """Curva de patrimônio em [start_ms, end_ms) reduzida por LTTB"""
+        width = max(3, min(int(width), self.max_width))
+        key = ('equity', start_ms, end_ms, width, self.store.last_equity_ts())
+
+        def build():
+            ts, values = self.store.get_equity(start_ms / 1000, end_ms / 1000)
+            x, y = lttb(ts * 1000, values, width)
+            return {
+                'start': start_ms,
+                'end': end_ms,
+                'source_points': len(ts),
+                'points': len(x),
+                't': np.asarray(x, dtype=np.int64).tolist(),
+                'equity': _to_list(y)
+            }
+        return self._cached(key, build)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'entries': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+    def _build_candles(self, symbol, interval, start_ms, end_ms, load_start, width, indicators):
+        data = self.store.get_klines(symbol, interval, load_start, end_ms)
+        visible = data['t'] >= start_ms
+
+        overlays = {}
+        if indicators and len(data['t']):
+            frame = pd.DataFrame({'close': data['c']})
+            for name, period in indicators:
+                for label, series in indicator_series(frame, name, period).items():
+                    overlays[label] = series.to_numpy()[visible]
+
+        candles = aggregate_ohlcv({column: values[visible] for column, values in data.items()}, width)
+        return {
+            'symbol': symbol,
+            'interval': interval,
+            'start': start_ms,
+            'end': end_ms,
+            'source_points': int(visible.sum()),
+            'points': len(candles['t']),
+            'candles': {
+                't': candles['t'].astype(np.int64).tolist(),
+                **{column: _to_list(candles[column]) for column in ('o', 'h', 'l', 'c', 'v')}
+            },
+            'overlays': {label: _to_list(bucket_last(values, width)) for label, values in overlays.items()}
+        }
+
+    def _cached(self, key, build):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+        result = build()
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
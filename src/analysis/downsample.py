@@ -0,0 +1,76 @@
+from typing import Dict
+
+import numpy as np
+
+
+def bucket_bounds(length: int, buckets: int) -> np.ndarray:
+    """Índices iniciais de `buckets` fatias contíguas e do mesmo tamanho (±1)"""
+    buckets = max(1, min(buckets, length))
+    return np.linspace(0, length, buckets + 1).astype(np.int64)[:-1]
+
+
+def aggregate_ohlcv(data: Dict[str, np.ndarray], buckets: int) -> Dict[str, np.ndarray]:
+    """Agrega candles em `buckets` candles maiores
+
+    Abertura do primeiro candle, máxima e mínima do grupo, fechamento do
+    último e volume somado; o horário é o do primeiro candle do grupo. Com
+    menos candles do que `buckets` os dados voltam inalterados.
+    """
+    length = len(data['t'])
+    if length <= buckets:
+        return data
+    starts = bucket_bounds(length, buckets)
+    ends = np.append(starts[1:], length) - 1
+    return {
+        't': data['t'][starts],
+        'o': data['o'][starts],
+        'h': np.maximum.reduceat(data['h'], starts),
+        'l': np.minimum.reduceat(data['l'], starts),
+        'c': data['c'][ends],
+        'v': np.add.reduceat(data['v'], starts)
+    }
+
+
+def bucket_last(values: np.ndarray, buckets: int) -> np.ndarray:
+    """Último valor de cada fatia (alinha indicadores com `aggregate_ohlcv`)"""
+    length = len(values)
+    if length <= buckets:
+        return values
+    starts = bucket_bounds(length, buckets)
+    return values[np.append(starts[1:], length) - 1]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int):
+    """Largest-Triangle-Three-Buckets: reduz uma linha a `threshold` pontos
+
+    Mantém o primeiro e o último ponto e, de cada fatia intermediária, o
+    ponto que forma o maior triângulo com o escolhido na fatia anterior e a
+    média da seguinte, preservando picos e vales visíveis no gráfico.
+    """
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return x, y
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, length - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = length - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else length
+        next_start = end if end < next_end else length - 1
+        avg_x = x[next_start:next_end].mean() if next_end > next_start else x[-1]
+        avg_y = y[next_start:next_end].mean() if next_end > next_start else y[-1]
+
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+
+    return x[selected], y[selected]
@@ -5,14 +5,7 @@ from typing import Dict, List, Tuple
 def calculate_rsi(df: pd.DataFrame, period: int = 14) -> float:
     """Calcula o RSI (Relative Strength Index)"""
     try:
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        current_rsi = rsi.iloc[-1]
+        current_rsi = rsi_series(df['close'], period).iloc[-1]
         
         # Converter RSI para score (0-1)
         if current_rsi > 70:  # Sobrecomprado
@@ -214,4 +207,36 @@ def calculate_moving_averages(df: pd.DataFrame) -> Dict:
             'price_above_ma_50': True,
             'ma_9_above_ma_21': True,
             'ma_21_above_ma_50': True
-        }
\ No newline at end of file
+        }
+
+def rsi_series(close: pd.Series, period: int = 14) -> pd.Series:
+    """Série completa do RSI (0-100)"""
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+def indicator_series(df: pd.DataFrame, name: str, period: int) -> Dict[str, pd.Series]:
+    """Séries de um indicador para sobreposição em gráficos
+    
+    `sma`, `ema` e `rsi` geram uma série; `bb` gera as bandas superior,
+    média e inferior (2 desvios, como em `calculate_bollinger_bands`).
+    """
+    close = df['close']
+    if name == 'sma':
+        return {f'sma_{period}': close.rolling(window=period).mean()}
+    if name == 'ema':
+        return {f'ema_{period}': close.ewm(span=period, adjust=False).mean()}
+    if name == 'rsi':
+        return {f'rsi_{period}': rsi_series(close, period)}
+    if name == 'bb':
+        rolling_mean = close.rolling(window=period).mean()
+        rolling_std = close.rolling(window=period).std()
+        return {
+            f'bb_{period}_upper': rolling_mean + (rolling_std * 2.0),
+            f'bb_{period}_middle': rolling_mean,
+            f'bb_{period}_lower': rolling_mean - (rolling_std * 2.0)
+        }
+    raise ValueError(f"Indicador desconhecido: {name}")
@@ -0,0 +1,123 @@
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+import logging
+import time
+
+from src.analysis.cadence import CadenceController
+from src.analysis.prescreen import Prescreener
+from src.analysis.technical_analyzer import TechnicalAnalyzer
+from src.bot.scheduler import TIMEFRAME_SECONDS, last_candle_close
+from src.models.signal import MarketSignal
+from src.utils.tracing import Tracer
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisPipeline:
+    """Análise completa de símbolos, sem estado de posições ou ordens
+
+    Reúne o que a varredura precisa por símbolo: klines em múltiplos
+    timeframes (só candles fechados, com cache por fechamento), análise
+    técnica, cadência adaptativa e o controle de quando reanalisar. É usado
+    pelo bot no modo local e pelos workers de análise no modo distribuído.
+    """
+
+    def __init__(self, config, client=None,
+                 on_klines: Optional[Callable[[str, Dict[str, List]], None]] = None,
+                 tracer: Optional[Tracer] = None):
+        self.config = config
+        self.client = client
+        self.on_klines = on_klines
+        self.tracer = tracer or Tracer(enabled=False)
+        self.technical_analyzer = TechnicalAnalyzer(config)
+        self.prescreener = Prescreener(config)
+        self.cadence = CadenceController(config)
+        self.last_analysis_time: Dict[str, datetime] = {}
+        self._kline_cache: Dict[tuple, tuple] = {}
+
+    def should_skip(self, symbol: str) -> bool:
+        """Verifica se deve pular a análise de um símbolo"""
+        if symbol not in self.last_analysis_time:
+            return False
+
+        # Intervalo adaptativo do símbolo ainda não venceu
+        if not self.cadence.is_due(symbol):
+            return True
+
+        # Só reanalisar depois que algum candle fechar (nada novo antes disso)
+        timeframes = [tf for tf in self.config.timeframes if tf in TIMEFRAME_SECONDS]
+        if not timeframes:
+            return (datetime.now() - self.last_analysis_time[symbol]).total_seconds() < 300
+        last_close = max(last_candle_close(tf, time.time()) for tf in timeframes)
+        return self.last_analysis_time[symbol].timestamp() >= last_close
+
+    def scan(self, symbols: Iterable[str]) -> List[MarketSignal]:
+        """Analisa os símbolos vencidos e retorna os sinais por confiança (maior primeiro)"""
+        signals = []
+        for symbol in symbols:
+            if self.should_skip(symbol):
+                continue
+            try:
+                logger.debug(f"🔍 Analisando {symbol}...")
+                signal = self.analyze(symbol)
+                if signal:
+                    signals.append(signal)
+
+                # Atualizar tempo da última análise
+                self.last_analysis_time[symbol] = datetime.now()
+
+            except Exception as e:
+                logger.error(f"❌ Erro analisando {symbol}: {e}")
+
+        signals.sort(key=lambda s: s.confidence, reverse=True)
+        return signals
+
+    def analyze(self, symbol: str) -> Optional[MarketSignal]:
+        """Analisa um símbolo específico"""
+        try:
+            with self.tracer.span('analysis.fetch_klines'):
+                klines_data = self.fetch_klines(symbol)
+            if self.on_klines:
+                self.on_klines(symbol, klines_data)
+
+            # Análise técnica
+            with self.tracer.span('analysis.analyze_symbol'):
+                signal = self.technical_analyzer.analyze_symbol(symbol, klines_data)
+
+            # Próxima análise conforme volatilidade, volume e proximidade do limiar
+            cadence_klines = klines_data.get(self.cadence.timeframe) or next(iter(klines_data.values()), None)
+            interval = self.cadence.update(symbol, cadence_klines, self.technical_analyzer.last_scores.get(symbol))
+            logger.debug(f"⏲️ Próxima análise de {symbol} em {interval / 60:.0f} min")
+
+            if signal:
+                logger.info(f"📊 Sinal encontrado para {symbol}: {signal.strength.name} (confiança: {signal.confidence:.2%})")
+
+            return signal
+
+        except Exception as e:
+            logger.error(f"❌ Erro na análise de {symbol}: {e}")
+            return None
+
+    def fetch_klines(self, symbol: str) -> Dict[str, List]:
+        """Candles fechados de cada timeframe; os sem candle novo desde a última consulta vêm do cache"""
+        klines_data = {}
+        now = time.time()
+
+        for timeframe in self.config.timeframes:
+            last_close = last_candle_close(timeframe, now) if timeframe in TIMEFRAME_SECONDS else None
+            cached = self._kline_cache.get((symbol, timeframe))
+            if cached and last_close is not None and cached[0] == last_close:
+                klines_data[timeframe] = cached[1]
+                continue
+
+            klines = self.client.get_klines(
+                symbol=symbol,
+                interval=timeframe,
+                limit=101
+            )
+            klines = [k for k in klines if k[6] < now * 1000][-100:]
+            klines_data[timeframe] = klines
+            if last_close is not None:
+                self._kline_cache[(symbol, timeframe)] = (last_close, klines)
+
+        return klines_data
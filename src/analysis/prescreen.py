@@ -0,0 +1,90 @@
+from typing import Dict, Iterable, List, Optional
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Tokens alavancados ficam fora da seleção (mesmo critério de get_top_volume_symbols)
+EXCLUDED_KEYWORDS = ('DOWN', 'UP', 'BEAR', 'BULL')
+
+# Peso de cada fator no score (percentis entre os símbolos elegíveis)
+WEIGHTS = {'change': 0.4, 'volume_surge': 0.35, 'volatility': 0.25}
+
+# Suavização da média de volume usada como referência para o surto
+VOLUME_EMA_ALPHA = 0.2
+
+
+class Prescreener:
+    """Pré-seleção vetorizada sobre o snapshot de 24h de todos os símbolos
+
+    Calcula para todo o universo, de uma vez, a variação de preço (absoluta), o
+    surto de volume (volume atual sobre a média dos snapshots anteriores) e a
+    volatilidade do dia ((máxima - mínima) / preço médio). Cada fator vira um
+    percentil entre os elegíveis e o score é a soma ponderada; só os melhores
+    seguem para a análise completa em múltiplos timeframes.
+    """
+
+    def __init__(self, config):
+        self.quote_asset = 'USDT'
+        self.min_volume = getattr(config, 'min_volume_usdt', 1000000)
+        self.top_k = getattr(config, 'prescreen_top_k', 10)
+        self._volume_baseline = pd.Series(dtype='float64')
+
+    def screen(self, tickers: List[Dict], exclude: Iterable[str] = ()) -> pd.DataFrame:
+        """Retorna os símbolos elegíveis ordenados pelo score (maior primeiro)"""
+        columns = ['symbol', 'score', 'change', 'volume_surge', 'volatility', 'quote_volume']
+        if not tickers:
+            return pd.DataFrame(columns=columns)
+
+        df = pd.DataFrame(tickers)
+        if 'symbol' not in df or 'quoteVolume' not in df:
+            return pd.DataFrame(columns=columns)
+
+        numeric = {
+            'priceChangePercent': 'change_pct', 'quoteVolume': 'quote_volume',
+            'highPrice': 'high', 'lowPrice': 'low', 'weightedAvgPrice': 'avg_price'
+        }
+        for source, target in numeric.items():
+            df[target] = pd.to_numeric(df[source], errors='coerce') if source in df else np.nan
+
+        symbols = df['symbol'].astype(str)
+        excluded_pattern = '|'.join(EXCLUDED_KEYWORDS)
+        mask = (
+            symbols.str.endswith(self.quote_asset)
+            & ~symbols.str.slice(0, -len(self.quote_asset)).str.contains(excluded_pattern)
+            & (df['quote_volume'] >= self.min_volume)
+            & (df['avg_price'] > 0)
+            & ~symbols.isin(set(exclude))
+        )
+        df = df.loc[mask].set_index('symbol')
+
+        # Surto de volume em relação à média dos snapshots anteriores
+        baseline = self._volume_baseline.reindex(df.index)
+        df['volume_surge'] = (df['quote_volume'] / baseline).fillna(1.0)
+        self._update_baseline(df['quote_volume'])
+
+        df['change'] = df['change_pct'].abs()
+        df['volatility'] = (df['high'] - df['low']) / df['avg_price']
+        df = df.replace([np.inf, -np.inf], np.nan).dropna(subset=['change', 'volatility'])
+        if df.empty:
+            return pd.DataFrame(columns=columns)
+
+        df['score'] = sum(df[factor].rank(pct=True) * weight for factor, weight in WEIGHTS.items())
+        ranked = df.sort_values(['score', 'quote_volume'], ascending=False).reset_index()
+        return ranked[columns]
+
+    def candidates(self, tickers: List[Dict], exclude: Iterable[str] = (), top_k: Optional[int] = None) -> List[str]:
+        """Símbolos com maior score (até `top_k`)"""
+        ranked = self.screen(tickers, exclude)
+        top_k = self.top_k if top_k is None else top_k
+        selected = ranked['symbol'].head(top_k).tolist()
+        if selected:
+            logger.info(f"🧮 Pré-seleção: {len(ranked)} elegíveis → {', '.join(selected)}")
+        return selected
+
+    def _update_baseline(self, volumes: pd.Series):
+        previous = self._volume_baseline.reindex(volumes.index)
+        updated = previous * (1 - VOLUME_EMA_ALPHA) + volumes * VOLUME_EMA_ALPHA
+        self._volume_baseline = updated.fillna(volumes).combine_first(self._volume_baseline)
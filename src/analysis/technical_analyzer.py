@@ -24,6 +24,8 @@ class TechnicalAnalyzer:
         self.macd_signal = getattr(config, 'macd_signal', 9)
         self.bb_period = getattr(config, 'bb_period', 20)
         self.bb_std = getattr(config, 'bb_std', 2)
+        # Último score combinado de cada símbolo (com ou sem sinal)
+        self.last_scores = {}
         
     def analyze_symbol(self, symbol: str, klines_data: dict) -> Optional[MarketSignal]:
         """Análise técnica completa de um símbolo"""
@@ -76,6 +78,7 @@ class TechnicalAnalyzer:
         
         if total_weight > 0:
             final_score = total_score / total_weight
+            self.last_scores[symbol] = final_score
             strength = self._score_to_strength(final_score)
             
             main_df = self._prepare_dataframe(klines_data['1h'])
@@ -1,10 +1,19 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
-from flask_socketio import SocketIO, emit
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for
+from flask_socketio import SocketIO, emit, join_room
+import hmac
 import json
 import threading
+import time
 from datetime import datetime
 from src.config.settings import Settings
-from src.bot.trading_bot import TradingBot
+from src.bot.service import BotClient
+from src.utils.trade_ledger import TradeLedger
+from src.utils.position_delta import PositionDeltaTracker
+from src.utils.snapshot_cache import SnapshotCache
+from src.utils.metrics import family, render_prometheus, snapshot_families
+from src.utils.profiler import collapsed_text, flamegraph_svg, profile_request
+from src.analysis.chart_data import ChartDataService, parse_indicators
+from src.data.kline_store import KlineStore
 import os
 from dotenv import load_dotenv
 
@@ -34,10 +43,35 @@ def create_app():
         manage_session=False
     )
     
-    # Instância global do bot
-    app.trading_bot = None
-    app.bot_thread = None
+    # O bot roda em processo próprio; o servidor web só lê o snapshot publicado
+    # por ele (memória compartilhada) e envia comandos pelo canal de controle
+    app.bot = BotClient(Settings())
     app.connected_clients = set()
+    app.ledger = None
+    app.position_tracker = PositionDeltaTracker()
+    app.push_task = None
+    app.snapshot_cache = SnapshotCache()
+    app.charts = None
+    positions_room = 'positions'
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    
+    def bot_snapshot():
+        """Último snapshot do bot, ou None se o processo não estiver vivo"""
+        if not app.bot.reader.is_alive(app.bot.max_age):
+            return None
+        return app.bot.snapshot()
+    
+    def snapshot_version():
+        """Versão dos dados do bot: sequência do snapshot e se o processo está vivo"""
+        return (app.bot.seq or 0, int(app.bot.reader.is_alive(app.bot.max_age)))
+    
+    def cached_json(key, version, build):
+        """Resposta JSON pré-serializada por versão, com ETag e 304 em GET condicional"""
+        body, etag = app.snapshot_cache.get(key, version, build)
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
     
     @app.route('/')
     def dashboard():
@@ -54,29 +88,21 @@ def create_app():
     def positions():
         """Página de posições"""
         # Exemplo: obtenha as posições do seu bot
-        positions = []
-        if hasattr(app, 'trading_bot') and app.trading_bot:
-            # Supondo que app.trading_bot.risk_manager.positions seja um dict
-            positions = list(app.trading_bot.risk_manager.positions.values())
+        snapshot = bot_snapshot()
+        positions = snapshot['positions'] if snapshot else []
         return render_template('positions.html', positions=positions)
     
     @app.route('/api/start-bot', methods=['POST'])
     def start_bot():
-        """Iniciar o bot de trading"""
-        global trading_bot, bot_thread
-        
+        """Iniciar o processo do bot (o lock de instância impede duplicatas)"""
         try:
-            if app.trading_bot and app.trading_bot.is_running:
+            if app.bot.is_running():
                 return jsonify({'error': 'Bot já está rodando'}), 400
             
-            settings = Settings()
-            app.trading_bot = TradingBot(settings)
-            
-            # Executar bot em thread separada
-            app.bot_thread = threading.Thread(target=app.trading_bot.run)
-            app.bot_thread.daemon = True
-            app.bot_thread.start()
-            
+            app.bot.spawn(
+                os.path.join(project_dir, 'main.py'),
+                log_path=os.path.join(project_dir, 'logs', 'bot.log')
+            )
             return jsonify({'message': 'Bot iniciado com sucesso'})
         
         except Exception as e:
@@ -85,49 +111,109 @@ def create_app():
     @app.route('/api/stop-bot', methods=['POST'])
     def stop_bot():
         """Parar o bot de trading"""
-        global trading_bot
-        
         try:
-            if app.trading_bot:
-                app.trading_bot.stop()
+            reply = app.bot.request('stop')
+            if reply.get('ok'):
                 return jsonify({'message': 'Bot parado com sucesso'})
-            else:
-                return jsonify({'error': 'Bot não está rodando'}), 400
+            return jsonify({'error': reply.get('error', 'Bot não está rodando')}), 400
         
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
     @app.route('/api/status')
     def bot_status():
-        """Status do bot"""
-        global trading_bot
-        
-        if app.trading_bot:
-            # Calcular P&L diário
-            daily_pnl = 0
-            active_positions = 0
-            
-            if hasattr(app.trading_bot, 'risk_manager'):
-                positions = app.trading_bot.risk_manager.positions
-                active_positions = len(positions)
-                
-                # Somar P&L de todas as posições
-                daily_pnl = sum(pos.unrealized_pnl for pos in positions.values()) if positions else 0
-            
-            return jsonify({
-                'running': app.trading_bot.is_running if hasattr(app.trading_bot, 'is_running') else False,
-                'positions': active_positions,
-                'balance': app.trading_bot.get_balance() if hasattr(app.trading_bot, 'get_balance') else 0,
-                'daily_pnl': daily_pnl,
-                'last_update': datetime.now().isoformat()
-            })
-        else:
-            return jsonify({
+        """Status do bot (snapshot publicado pelo processo do bot)"""
+        def build():
+            snapshot = bot_snapshot()
+            if snapshot:
+                return {
+                    'running': snapshot['running'],
+                    'positions': snapshot['active_positions'],
+                    'balance': snapshot['balance'],
+                    'daily_pnl': snapshot['daily_pnl'],
+                    'risk': snapshot['risk'],
+                    'persistence': snapshot['persistence'],
+                    'errors': snapshot['errors']
+                }
+            return {
                 'running': False,
                 'positions': 0,
-                'balance': 0,
-                'last_update': datetime.now().isoformat()
-            })
+                'balance': 0
+            }
+        return cached_json('status', snapshot_version(), build)
+    
+    @app.route('/api/positions')
+    def positions_api():
+        """Posições abertas"""
+        def build():
+            snapshot = bot_snapshot()
+            return snapshot['positions'] if snapshot else []
+        return cached_json('positions', snapshot_version(), build)
+    
+    @app.route('/api/signals')
+    def signals_api():
+        """Sinais recentes das varreduras (mais recente primeiro)"""
+        def build():
+            snapshot = bot_snapshot()
+            return list(reversed(snapshot.get('signals', []))) if snapshot else []
+        return cached_json('signals', snapshot_version(), build)
+    
+    @app.route('/api/tracing')
+    def tracing_api():
+        """Latências por etapa do ciclo e por chamada à corretora (p50/p95/p99)"""
+        def build():
+            snapshot = bot_snapshot()
+            tracing = snapshot['status'].get('tracing') if snapshot else None
+            return tracing or {'enabled': False, 'spans': {}}
+        return cached_json('tracing', snapshot_version(), build)
+    
+    @app.route('/metrics')
+    def metrics():
+        """Métricas no formato do Prometheus (lidas do snapshot, sem tocar no bot)"""
+        families = snapshot_families(bot_snapshot())
+        families.append(family('websocket_clients', 'gauge', 'Clientes Socket.IO conectados',
+                               [[{}, len(app.connected_clients)]]))
+        return Response(render_prometheus(families), mimetype='text/plain; version=0.0.4; charset=utf-8')
+    
+    @app.route('/api/admin/profile', methods=['POST'])
+    def profile_bot():
+        """Perfil por amostragem do processo do bot por N segundos
+        
+        Corpo JSON: `seconds`, `interval`, `threads` (prefixos de nome),
+        `allocations` (top-N do tracemalloc, com `top`) e `format`: `json`,
+        `collapsed` (pilhas para flamegraph.pl/speedscope) ou `svg`.
+        Exige ADMIN_TOKEN configurado e o mesmo valor no cabeçalho `X-Admin-Token`.
+        """
+        token = Settings().admin_token
+        if not token:
+            return jsonify({'error': 'Perfil desativado: defina ADMIN_TOKEN'}), 403
+        if not hmac.compare_digest(request.headers.get('X-Admin-Token', '').encode(), token.encode()):
+            return jsonify({'error': 'Não autorizado'}), 401
+        
+        try:
+            params = profile_request(request.get_json(silent=True) or {})
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        reply = app.bot.request(
+            'profile',
+            timeout=params['seconds'] + 30,
+            seconds=params['seconds'],
+            interval=params['interval'],
+            threads=params['threads'],
+            allocations=params['allocations'],
+            top=params['top']
+        )
+        if not reply.get('ok'):
+            return jsonify({'error': reply.get('error')}), 409
+        
+        profile = reply['profile']
+        output = params['format']
+        if output == 'collapsed':
+            return Response(collapsed_text(profile['stacks']), mimetype='text/plain')
+        if output == 'svg':
+            return Response(flamegraph_svg(profile['stacks']), mimetype='image/svg+xml')
+        return jsonify(profile)
     
     @app.route('/api/close-position', methods=['POST'])
     def close_position():
@@ -138,34 +224,133 @@ def create_app():
             
             if not symbol:
                 return jsonify({'error': 'Símbolo não informado'}), 400
-                
-            if not app.trading_bot:
-                return jsonify({'error': 'Bot não está ativo'}), 400
             
-            app.trading_bot._close_position(symbol, "Encerramento manual")
+            reply = app.bot.request('close_position', symbol=symbol, reason="Encerramento manual")
+            if not reply.get('ok'):
+                return jsonify({'error': reply.get('error', 'Bot não está ativo')}), 400
             return jsonify({'message': f'Posição {symbol} encerrada com sucesso'})
             
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
+    def get_ledger():
+        """Banco de trades em modo leitura (o bot grava no próprio processo)"""
+        if app.ledger is None:
+            app.ledger = TradeLedger(Settings().ledger_path, read_only=True)
+        return app.ledger
+    
+    @app.route('/api/trades')
+    def trades_api():
+        """Histórico de posições encerradas (paginado)"""
+        try:
+            limit = min(request.args.get('limit', 100, type=int), 1000)
+            offset = request.args.get('offset', 0, type=int)
+            trades = get_ledger().get_trades(
+                symbol=request.args.get('symbol'),
+                start=request.args.get('start'),
+                end=request.args.get('end'),
+                limit=limit,
+                offset=offset
+            )
+            return jsonify({'trades': trades, 'limit': limit, 'offset': offset})
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/analytics')
+    def analytics_api():
+        """PnL por dia, por símbolo e taxa de acerto"""
+        try:
+            ledger = get_ledger()
+            symbol = request.args.get('symbol')
+            start = request.args.get('start')
+            end = request.args.get('end')
+            return jsonify({
+                'summary': ledger.win_rate(symbol=symbol, start=start, end=end),
+                'pnl_by_day': ledger.pnl_by_day(symbol=symbol, start=start, end=end),
+                'pnl_by_symbol': ledger.pnl_by_symbol(start=start, end=end)
+            })
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    def get_charts():
+        """Séries dos gráficos a partir do histórico local (lacunas vêm da API pública da Binance)"""
+        if app.charts is None:
+            settings = Settings()
+            try:
+                from binance.client import Client
+                client = Client(requests_params={'timeout': 10}, ping=False)
+            except Exception as e:
+                print(f"Histórico de candles sem acesso à Binance: {e}")
+                client = None
+            app.charts = ChartDataService(
+                KlineStore(settings.kline_store_path),
+                client=client,
+                cache_size=settings.chart_cache_size
+            )
+        return app.charts
+    
+    def time_range_ms(default_days=7):
+        """Período `start`/`end` da query (epoch em ms ou ISO); padrão: últimos dias"""
+        def parse(value):
+            if value is None:
+                return None
+            if value.isdigit():
+                return int(value)
+            return int(datetime.fromisoformat(value).timestamp() * 1000)
+        
+        end = parse(request.args.get('end')) or int(time.time() * 1000)
+        start = parse(request.args.get('start')) or end - default_days * 86_400_000
+        return start, end
+    
+    @app.route('/api/chart/<symbol>')
+    def chart_api(symbol):
+        """Candles e indicadores reduzidos à largura do gráfico (`width` em pixels)"""
+        try:
+            start, end = time_range_ms()
+            return jsonify(get_charts().candles(
+                symbol.upper(),
+                start,
+                end,
+                width=request.args.get('width', 800, type=int),
+                interval=request.args.get('interval', '1m'),
+                indicators=parse_indicators(request.args.get('indicators'))
+            ))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/equity-curve')
+    def equity_curve_api():
+        """Curva de patrimônio reduzida à largura do gráfico"""
+        try:
+            start, end = time_range_ms(default_days=30)
+            return jsonify(get_charts().equity(start, end, width=request.args.get('width', 800, type=int)))
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
     @app.route('/api/settings', methods=['GET', 'POST'])
     def settings_api():
         """Gerenciar configurações"""
-        settings = Settings()
-        
         if request.method == 'POST':
             # Atualizar configurações (implementar conforme necessário)
             return jsonify({'message': 'Configurações atualizadas'})
         
-        return jsonify({
-            'risk_reward_ratio': settings.risk_reward_ratio,
-            'stop_loss_ratio': settings.stop_loss_ratio,
-            'capital_protection_threshold': settings.capital_protection_threshold,
-            'max_daily_loss': settings.max_daily_loss,
-            'timeframes': settings.timeframes,
-            'min_volume_usdt': settings.min_volume_usdt,
-            'max_positions': settings.max_positions
-        })
+        def build():
+            settings = Settings()
+            return {
+                'risk_reward_ratio': settings.risk_reward_ratio,
+                'stop_loss_ratio': settings.stop_loss_ratio,
+                'capital_protection_threshold': settings.capital_protection_threshold,
+                'max_daily_loss': settings.max_daily_loss,
+                'timeframes': settings.timeframes,
+                'min_volume_usdt': settings.min_volume_usdt,
+                'max_positions': settings.max_positions
+            }
+        
+        # Configurações vêm do ambiente: fixas durante a vida do processo (a ETag
+        # deriva do conteúdo, então muda entre reinícios com valores diferentes)
+        return cached_json('settings', 0, build)
     
     # SocketIO Events
     @socketio.on('connect')
@@ -181,20 +366,25 @@ def create_app():
                 'clientCount': len(app.connected_clients)
             })
             
-            # Enviar estado atual se o bot estiver rodando
-            if app.trading_bot and hasattr(app.trading_bot, 'risk_manager'):
-                positions = list(app.trading_bot.risk_manager.positions.values())
-                daily_pnl = sum(pos.unrealized_pnl for pos in positions)
-                emit('update_positions', {
-                    'positions': [pos.to_dict() for pos in positions],
-                    'active_positions': len(positions),
-                    'daily_pnl': daily_pnl,
-                    'timestamp': datetime.now().isoformat()
-                })
+            # Estado completo uma vez; depois só deltas para a sala de posições
+            join_room(positions_room)
+            refresh_positions()
+            emit('positions_snapshot', app.position_tracker.snapshot())
+            start_position_push()
                 
         except Exception as e:
             print(f'Erro ao enviar status inicial: {e}')
     
+    @socketio.on('positions_resync')
+    def handle_positions_resync(data=None):
+        """Cliente fora de sincronia: deltas perdidos ou snapshot completo"""
+        version = (data or {}).get('version')
+        reply = app.position_tracker.resync(version)
+        if reply['type'] == 'snapshot':
+            emit('positions_snapshot', reply['snapshot'])
+        elif reply['delta']:
+            emit('positions_delta', reply['delta'])
+    
     @socketio.on('disconnect')
     def handle_disconnect(sid=None):
         """Handler para desconexão de cliente"""
@@ -221,18 +411,42 @@ def create_app():
         if hasattr(request, 'sid'):
             print(f'Client SID: {request.sid}')
     
-    def emit_to_all_clients(event, data):
-        """Emite evento para todos os clientes conectados com tratamento de erro"""
-        disconnected = set()
-        for sid in app.connected_clients:
+    def emit_to_all_clients(event, data, room=positions_room):
+        """Emite evento para a sala inteira em uma única chamada"""
+        try:
+            socketio.emit(event, data, to=room)
+        except Exception as e:
+            print(f'Erro ao emitir {event}: {e}')
+    
+    def refresh_positions():
+        """Aplica o snapshot do bot ao estado versionado; retorna o delta (ou None)"""
+        snapshot = bot_snapshot()
+        if snapshot is None:
+            # Processo do bot parado: nenhuma posição sendo acompanhada
+            snapshot = {'running': False, 'positions': [], 'active_positions': 0, 'daily_pnl': 0, 'balance': 0}
+        return app.position_tracker.update(snapshot['positions'], snapshot, version=app.bot.seq)
+    
+    def position_push_loop():
+        """Lê o snapshot no máximo POSITION_PUSH_RATE vezes por segundo e difunde só o que mudou"""
+        interval = 1.0 / max(0.1, Settings().position_push_rate)
+        last_seq = None
+        while app.connected_clients:
+            seq = app.bot.seq
             try:
-                emit(event, data, room=sid)
+                # Sequência inalterada: nada a fazer além de checar o heartbeat
+                if seq != last_seq or not app.bot.reader.is_alive(app.bot.max_age):
+                    last_seq = seq
+                    delta = refresh_positions()
+                    if delta:
+                        emit_to_all_clients('positions_delta', delta)
             except Exception as e:
-                print(f'Erro ao emitir para cliente {sid}: {e}')
-                disconnected.add(sid)
-        
-        # Remover clientes desconectados
-        app.connected_clients.difference_update(disconnected)
+                print(f'Erro no envio de posições: {e}')
+            socketio.sleep(interval)
+        app.push_task = None
+    
+    def start_position_push():
+        if app.push_task is None:
+            app.push_task = socketio.start_background_task(position_push_loop)
     
     # Adicionar função helper ao app
     app.emit_to_all_clients = emit_to_all_clients
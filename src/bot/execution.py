@@ -0,0 +1,323 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from src.bot.order_manager import ManagedOrder, OrderManager
+from src.models.enums import ExecutionStatus
+
+logger = logging.getLogger(__name__)
+
+ALGO_MARKET = 'market'
+ALGO_TWAP = 'twap'
+ALGO_ICEBERG = 'iceberg'
+ALGORITHMS = (ALGO_MARKET, ALGO_TWAP, ALGO_ICEBERG)
+
+# Fatias seguidas sem execução antes de desistir da ordem-mãe
+MAX_CHILD_FAILURES = 2
+
+# Ordens-mãe concluídas mantidas para as estatísticas
+STATS_HISTORY = 100
+
+
+class ParentOrder:
+    """Ordem-mãe executada em fatias (ordens-filhas a mercado)"""
+
+    def __init__(self, symbol: str, side: str, quantity: float, algo: str, purpose: str,
+                 key: str, reference_price: float):
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.algo = algo
+        self.purpose = purpose
+        self.key = key
+        self.arrival_price = reference_price
+        self.children: List[ManagedOrder] = []
+        self.status = ExecutionStatus.RUNNING
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.done = threading.Event()
+        self._cancel = threading.Event()
+
+    @property
+    def executed_quantity(self) -> float:
+        return sum(child.executed_quantity for child in self.children)
+
+    @property
+    def remaining(self) -> float:
+        return max(0.0, self.quantity - self.executed_quantity)
+
+    @property
+    def progress(self) -> float:
+        return self.executed_quantity / self.quantity if self.quantity else 0.0
+
+    @property
+    def vwap(self) -> Optional[float]:
+        filled = [(child.vwap, child.executed_quantity) for child in self.children
+                  if child.vwap and child.executed_quantity > 0]
+        quantity = sum(qty for _, qty in filled)
+        if quantity <= 0:
+            return None
+        return sum(price * qty for price, qty in filled) / quantity
+
+    @property
+    def simulated(self) -> bool:
+        return any(child.simulated for child in self.children)
+
+    @property
+    def is_final(self) -> bool:
+        return self.status != ExecutionStatus.RUNNING
+
+    def slippage_bps(self) -> Optional[float]:
+        """Custo em relação ao preço de chegada, em pontos-base (positivo = pior)"""
+        vwap = self.vwap
+        if vwap is None or not self.arrival_price:
+            return None
+        direction = 1 if self.side == 'BUY' else -1
+        return (vwap - self.arrival_price) / self.arrival_price * 10000 * direction
+
+    def stats(self) -> Dict:
+        end = self.finished_at or time.time()
+        slippage = self.slippage_bps()
+        return {
+            'symbol': self.symbol,
+            'side': self.side,
+            'algo': self.algo,
+            'purpose': self.purpose,
+            'status': self.status.value,
+            'quantity': self.quantity,
+            'executed_quantity': self.executed_quantity,
+            'progress': self.progress,
+            'children': len(self.children),
+            'vwap': self.vwap,
+            'arrival_price': self.arrival_price,
+            'slippage_bps': slippage,
+            'duration': end - self.started_at,
+            'error': self.error
+        }
+
+    def __str__(self) -> str:
+        return (f"Parent({self.algo} {self.symbol} {self.side} {self.quantity}, {self.status.value}, "
+                f"exec {self.executed_quantity} em {len(self.children)} fatias)")
+
+
+class ExecutionEngine:
+    """Execução fatiada de ordens grandes sobre o OrderManager
+
+    - TWAP: divide a ordem em `twap_slices` fatias espaçadas ao longo de
+      `twap_duration` segundos;
+    - iceberg: fatias de até `iceberg_child_notional` USDT, limitadas também à
+      profundidade visível no livro dentro do slippage aceito, enviadas assim
+      que a anterior termina (após `iceberg_child_delay` para o livro se refazer).
+
+    Cada fatia é uma ordem a mercado com client id derivado da ordem-mãe
+    (`<chave>:<índice>`), então reenvios continuam idempotentes. Ordens-mãe
+    podem rodar em segundo plano (entradas) ou na thread chamadora (saídas).
+    """
+
+    def __init__(self, order_manager: OrderManager, market_data, config, order_books=None):
+        self.order_manager = order_manager
+        self.market_data = market_data
+        self.order_books = order_books
+        self.algo = getattr(config, 'execution_algo', ALGO_MARKET)
+        self.min_notional = getattr(config, 'sliced_execution_min_notional', 1000.0)
+        self.twap_duration = getattr(config, 'twap_duration', 60.0)
+        self.twap_slices = max(1, getattr(config, 'twap_slices', 5))
+        self.iceberg_child_notional = getattr(config, 'iceberg_child_notional', 250.0)
+        self.iceberg_child_delay = getattr(config, 'iceberg_child_delay', 0.2)
+        self.max_slippage = getattr(config, 'max_slippage', 0.1)
+        if self.algo not in ALGORITHMS:
+            logger.warning(f"Algoritmo de execução desconhecido '{self.algo}', usando ordens a mercado")
+            self.algo = ALGO_MARKET
+        # Saídas têm algoritmo próprio (opt-in): fatiar um stop atrasa a proteção
+        self.exit_algo = getattr(config, 'exit_execution_algo', ALGO_MARKET)
+        if self.exit_algo not in ALGORITHMS:
+            logger.warning(f"Algoritmo de saída desconhecido '{self.exit_algo}', usando ordens a mercado")
+            self.exit_algo = ALGO_MARKET
+
+        self.active: Dict[str, ParentOrder] = {}
+        self.completed = deque(maxlen=STATS_HISTORY)
+        self._lock = threading.Lock()
+
+    def should_slice(self, notional: float, algo: str = None) -> bool:
+        """Se uma ordem deste valor deve ser fatiada"""
+        return (algo or self.algo) != ALGO_MARKET and notional >= self.min_notional
+
+    def execute(self, symbol: str, side: str, quantity: float, purpose: str, key: str,
+                reference_price: float, algo: str = None,
+                on_child: Optional[Callable[[ParentOrder, ManagedOrder], None]] = None,
+                on_complete: Optional[Callable[[ParentOrder], None]] = None,
+                background: bool = True) -> ParentOrder:
+        """Inicia uma ordem-mãe; em segundo plano retorna imediatamente"""
+        algo = algo or self.algo
+        if algo == ALGO_MARKET:
+            algo = ALGO_ICEBERG
+        parent = ParentOrder(symbol, side, quantity, algo, purpose, key, reference_price)
+
+        with self._lock:
+            if symbol in self.active:
+                raise RuntimeError(f"Execução fatiada já em andamento para {symbol}")
+            self.active[symbol] = parent
+
+        logger.info(f"✂️ Execução {algo.upper()} iniciada: {symbol} {side} {quantity}")
+        if background:
+            threading.Thread(target=self._run, args=(parent, on_child, on_complete),
+                             name=f'exec-{symbol}', daemon=True).start()
+        else:
+            self._run(parent, on_child, on_complete)
+        return parent
+
+    def cancel(self, symbol: str, timeout: float = 30.0) -> Optional[ParentOrder]:
+        """Interrompe a ordem-mãe ativa do símbolo (a fatia em curso termina normalmente)"""
+        parent = self.active.get(symbol)
+        if parent is None:
+            return None
+        parent._cancel.set()
+        parent.done.wait(timeout)
+        return parent
+
+    def stop(self, timeout: float = 30.0):
+        """Interrompe todas as ordens-mãe em andamento"""
+        for symbol in list(self.active):
+            self.cancel(symbol, timeout)
+
+    def wait(self, parent: ParentOrder, timeout: float = None) -> ParentOrder:
+        parent.done.wait(timeout)
+        return parent
+
+    def get_stats(self) -> Dict:
+        completed = list(self.completed)
+        slippages = [p['slippage_bps'] for p in completed if p['slippage_bps'] is not None]
+        return {
+            'algo': self.algo,
+            'active': [parent.stats() for parent in list(self.active.values())],
+            'completed': len(completed),
+            'children': sum(p['children'] for p in completed),
+            'avg_slippage_bps': sum(slippages) / len(slippages) if slippages else None,
+            'recent': completed[-10:]
+        }
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+
+    def _run(self, parent: ParentOrder, on_child, on_complete):
+        try:
+            self._slice(parent, on_child)
+        except Exception as e:
+            logger.error(f"❌ Erro na execução fatiada de {parent.symbol}: {e}")
+            parent.error = str(e)
+            parent.status = ExecutionStatus.FAILED
+        finally:
+            parent.finished_at = time.time()
+            with self._lock:
+                self.active.pop(parent.symbol, None)
+            stats = parent.stats()
+            self.completed.append(stats)
+            slippage = stats['slippage_bps']
+            logger.info(
+                f"✂️ Execução {parent.algo.upper()} de {parent.symbol} {parent.status.value}: "
+                f"{stats['executed_quantity']}/{parent.quantity} em {stats['children']} fatias, "
+                f"VWAP {stats['vwap']}, slippage "
+                f"{'n/d' if slippage is None else f'{slippage:.1f} bps'}, {stats['duration']:.1f}s"
+            )
+            parent.done.set()
+            if on_complete:
+                try:
+                    on_complete(parent)
+                except Exception as e:
+                    logger.error(f"Erro no callback de conclusão de {parent.symbol}: {e}")
+
+    def _slice(self, parent: ParentOrder, on_child):
+        rules = self.market_data.get_quantization_table().get(parent.symbol)
+        interval = self.twap_duration / self.twap_slices
+        failures = 0
+        index = 0
+
+        while not parent._cancel.is_set():
+            quantity_str = self._child_quantity(parent, rules, index)
+            if quantity_str is None:
+                break
+
+            child = self.order_manager.market_order(
+                parent.symbol, parent.side, quantity_str,
+                purpose=parent.purpose,
+                key=f"{parent.key}:{index}",
+                reference_price=self._price(parent)
+            )
+            child = self.order_manager.wait(child)
+            parent.children.append(child)
+            index += 1
+            if on_child:
+                try:
+                    on_child(parent, child)
+                except Exception as e:
+                    logger.error(f"Erro no callback de fatia de {parent.symbol}: {e}")
+
+            if child.executed_quantity <= 0:
+                failures += 1
+                if failures >= MAX_CHILD_FAILURES:
+                    parent.error = child.error or f"Fatia {child.client_order_id} sem execução"
+                    parent.status = ExecutionStatus.FAILED
+                    return
+            else:
+                failures = 0
+
+            # Próxima fatia: no horário do TWAP ou após a reposição do livro
+            if parent.algo == ALGO_TWAP:
+                delay = parent.started_at + index * interval - time.time()
+            else:
+                delay = self.iceberg_child_delay
+            if delay > 0 and parent.remaining > 0:
+                parent._cancel.wait(delay)
+
+        parent.status = ExecutionStatus.CANCELED if parent._cancel.is_set() else ExecutionStatus.COMPLETED
+
+    def _child_quantity(self, parent: ParentOrder, rules, index: int) -> Optional[str]:
+        """Quantidade da próxima fatia, já ajustada ao step (None quando não há mais o que enviar)"""
+        remaining = parent.remaining
+        price = self._price(parent)
+
+        if parent.algo == ALGO_TWAP:
+            target = remaining / max(1, self.twap_slices - index)
+        else:
+            target = self.iceberg_child_notional / price if price else remaining
+            book = self.order_books.get_book(parent.symbol) if self.order_books else None
+            if book is not None:
+                depth = book.available_quantity(parent.side, self.max_slippage)
+                if depth > 0:
+                    target = min(target, depth)
+
+        # Cada fatia precisa respeitar a quantidade e o notional mínimos; uma
+        # sobra menor que isso vai junto com a fatia atual
+        minimum = 0.0
+        if rules is not None:
+            minimum = rules.market_min_qty_units / rules.qty_scale
+            if price and rules.min_notional_market:
+                minimum = max(minimum, rules.min_notional / price)
+        if remaining < minimum:
+            # Resíduo que a corretora não aceita como ordem
+            return None
+        target = max(target, minimum)
+        if remaining - target < minimum * 1.05:
+            target = remaining
+        target = min(target, remaining)
+
+        quantity_str = rules.format_quantity(target) if rules is not None else str(target)
+        if float(quantity_str) <= 0:
+            return None
+        return quantity_str
+
+    def _price(self, parent: ParentOrder) -> float:
+        """Melhor preço do lado consumido; sem livro, o da última fatia ou o de chegada"""
+        book = self.order_books.get_book(parent.symbol) if self.order_books else None
+        if book is not None:
+            price = book.best_ask() if parent.side == 'BUY' else book.best_bid()
+            if price:
+                return price
+        for child in reversed(parent.children):
+            if child.vwap:
+                return child.vwap
+        return parent.arrival_price
@@ -0,0 +1,76 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MassCloseExecutor:
+    """Encerra várias posições em paralelo (proteção de capital)
+
+    Para cada símbolo, em uma thread própria: cancela as ordens de proteção
+    (OCO) ainda abertas e envia a venda a mercado, aguardando a execução. Os
+    limites de taxa da API ficam com o limitador compartilhado usado pelas
+    funções de cancelamento/envio; aqui só se controla o paralelismo.
+
+    `close_fn` pode retornar sem vender (encerramento já em andamento em outra
+    thread); com `is_open_fn`, só conta como encerrado o símbolo que saiu da
+    carteira.
+    """
+
+    def __init__(self, cancel_fn: Callable[[str], None], close_fn: Callable[[str, str], None],
+                 max_workers: int = 8, is_open_fn: Optional[Callable[[str], bool]] = None):
+        self.cancel_fn = cancel_fn
+        self.close_fn = close_fn
+        self.is_open_fn = is_open_fn
+        self.max_workers = max(1, max_workers)
+        self.last_report: Optional[Dict] = None
+
+    def close_all(self, symbols: Iterable[str], reason: str) -> Dict:
+        """Encerra os símbolos informados; retorna o relatório com as latências"""
+        symbols = list(dict.fromkeys(symbols))
+        report = {
+            'reason': reason,
+            'requested': len(symbols),
+            'closed': [],
+            'failed': {},
+            'latency': {},
+            'total_latency': 0.0
+        }
+        if not symbols:
+            return report
+
+        logger.warning(f"🚨 Encerrando {len(symbols)} posições em paralelo: {reason}")
+        started = time.monotonic()
+        workers = min(self.max_workers, len(symbols))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mass-close') as pool:
+            futures = {pool.submit(self._close_one, symbol, reason, started): symbol for symbol in symbols}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    report['latency'][symbol] = future.result()
+                    report['closed'].append(symbol)
+                except Exception as e:
+                    report['latency'][symbol] = time.monotonic() - started
+                    report['failed'][symbol] = str(e)
+
+        report['total_latency'] = time.monotonic() - started
+        self.last_report = report
+        logger.warning(
+            f"🚨 Encerramento em massa: {len(report['closed'])}/{len(symbols)} posições em "
+            f"{report['total_latency'] * 1000:.0f} ms"
+            + (f" | falhas: {', '.join(report['failed'])}" if report['failed'] else '')
+        )
+        return report
+
+    def _close_one(self, symbol: str, reason: str, started: float) -> float:
+        try:
+            self.cancel_fn(symbol)
+        except Exception as e:
+            # Tenta vender mesmo assim: a OCO pode já ter sido executada ou cancelada
+            logger.warning(f"Erro cancelando proteção de {symbol}: {e}")
+        self.close_fn(symbol, reason)
+        if self.is_open_fn is not None and self.is_open_fn(symbol):
+            raise RuntimeError(f"Posição de {symbol} continua aberta")
+        return time.monotonic() - started
@@ -0,0 +1,423 @@
+import hashlib
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from binance import ThreadedWebsocketManager
+from binance.exceptions import BinanceAPIException
+from requests.exceptions import RequestException
+
+from src.models.enums import OrderStatus
+from src.utils.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATUSES = {OrderStatus.FILLED, OrderStatus.CANCELED, OrderStatus.REJECTED, OrderStatus.EXPIRED}
+
+# Transições válidas da máquina de estados (atualizações fora de ordem são ignoradas)
+TRANSITIONS = {
+    OrderStatus.NEW: {
+        OrderStatus.PARTIALLY_FILLED, OrderStatus.FILLED, OrderStatus.CANCELED,
+        OrderStatus.PENDING_CANCEL, OrderStatus.REJECTED, OrderStatus.EXPIRED
+    },
+    OrderStatus.PARTIALLY_FILLED: {
+        OrderStatus.PARTIALLY_FILLED, OrderStatus.FILLED, OrderStatus.CANCELED,
+        OrderStatus.PENDING_CANCEL, OrderStatus.EXPIRED
+    },
+    OrderStatus.PENDING_CANCEL: {OrderStatus.CANCELED, OrderStatus.FILLED, OrderStatus.EXPIRED},
+}
+
+# Código da Binance para ordem inexistente na consulta
+UNKNOWN_ORDER = -2013
+
+# Erros em que o resultado do envio é desconhecido (podem ser retentados após consulta)
+RETRYABLE_CODES = {-1000, -1001, -1007}
+
+# Ordens finalizadas ficam em memória por este tempo (segundos)
+ORDER_RETENTION = 24 * 3600
+
+
+def parse_status(value: str) -> OrderStatus:
+    """Converte o status da Binance (inclui variantes como EXPIRED_IN_MATCH)"""
+    if value == 'EXPIRED_IN_MATCH':
+        return OrderStatus.EXPIRED
+    return OrderStatus(value)
+
+
+class ManagedOrder:
+    """Ordem acompanhada pelo OrderManager, com execuções deduplicadas por tradeId"""
+
+    def __init__(self, symbol: str, side: str, quantity: float, client_order_id: str,
+                 purpose: str = 'entry', simulated: bool = False):
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.client_order_id = client_order_id
+        self.purpose = purpose
+        self.simulated = simulated
+        self.order_id: Optional[int] = None
+        self.status = OrderStatus.NEW
+        self.fills: Dict[str, Dict] = {}
+        self.reported_quantity = 0.0
+        self.reported_quote = 0.0
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.transact_time: Optional[int] = None
+        self.error: Optional[str] = None
+        # Envio sem confirmação da corretora (rede/timeout): pode ter sido executado
+        self.unknown = False
+        self.done = threading.Event()
+
+    @property
+    def is_final(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+    @property
+    def executed_quantity(self) -> float:
+        filled = sum(fill['qty'] for fill in self.fills.values())
+        # Respostas ACK/consultas trazem apenas os acumulados, sem execuções individuais
+        return max(filled, self.reported_quantity)
+
+    @property
+    def vwap(self) -> Optional[float]:
+        """Preço médio ponderado por volume de todas as execuções"""
+        quantity = sum(fill['qty'] for fill in self.fills.values())
+        if quantity > 0 and quantity >= self.reported_quantity:
+            return sum(fill['price'] * fill['qty'] for fill in self.fills.values()) / quantity
+        if self.reported_quantity > 0 and self.reported_quote > 0:
+            return self.reported_quote / self.reported_quantity
+        return None
+
+    def transition(self, status: OrderStatus) -> bool:
+        """Aplica uma mudança de status se for válida na máquina de estados"""
+        if status == self.status:
+            return True
+        if status not in TRANSITIONS.get(self.status, set()):
+            logger.debug(f"Transição ignorada para {self.client_order_id}: {self.status.value} -> {status.value}")
+            return False
+        self.status = status
+        self.updated_at = time.time()
+        if self.is_final:
+            self.done.set()
+        return True
+
+    def add_fill(self, trade_id, price: float, qty: float, commission: float = 0.0,
+                 commission_asset: str = None):
+        key = str(trade_id) if trade_id is not None else f'fill-{len(self.fills)}'
+        if key not in self.fills:
+            self.fills[key] = {
+                'tradeId': trade_id, 'price': price, 'qty': qty,
+                'commission': commission, 'commissionAsset': commission_asset
+            }
+
+    def as_response(self) -> Dict:
+        """Representação no formato da resposta FULL da Binance (usada pelo ledger)"""
+        return {
+            'symbol': self.symbol,
+            'orderId': self.order_id,
+            'clientOrderId': self.client_order_id,
+            'transactTime': self.transact_time or int(self.updated_at * 1000),
+            'type': 'MARKET',
+            'side': self.side,
+            'status': self.status.value,
+            'origQty': str(self.quantity),
+            'executedQty': str(self.executed_quantity),
+            'fills': [
+                {
+                    'tradeId': fill['tradeId'], 'price': str(fill['price']), 'qty': str(fill['qty']),
+                    'commission': str(fill['commission']), 'commissionAsset': fill['commissionAsset']
+                }
+                for fill in self.fills.values()
+            ]
+        }
+
+    def __str__(self) -> str:
+        return (f"Order({self.client_order_id}, {self.symbol} {self.side} {self.quantity}, "
+                f"{self.status.value}, exec {self.executed_quantity})")
+
+
+class OrderManager:
+    """Envio e acompanhamento de ordens a mercado
+
+    - `newClientOrderId` determinístico por intenção (símbolo, lado, finalidade, chave):
+      repetir o mesmo pedido devolve a ordem já registrada em vez de enviar outra;
+    - falhas de rede ou respostas ambíguas são resolvidas consultando a ordem pelo
+      `origClientOrderId` antes de qualquer reenvio, evitando ordens duplicadas;
+    - as execuções chegam pelo user data stream (`executionReport`) e também pela
+      resposta REST; são deduplicadas por tradeId, e o VWAP considera todas elas;
+    - o status segue a máquina de estados de `OrderStatus`.
+
+    Com `simulated=True` (testnet) as ordens são executadas localmente ao preço de
+    referência informado.
+    """
+
+    def __init__(self, client, config, simulated: bool = False,
+                 on_update: Optional[Callable[[ManagedOrder], None]] = None,
+                 rate_limiter: Optional[TokenBucket] = None,
+                 on_account_update: Optional[Callable[[Dict], None]] = None,
+                 metrics=None):
+        self.client = client
+        self.config = config
+        self.simulated = simulated
+        self.on_update = on_update
+        self.on_account_update = on_account_update
+        self.rate_limiter = rate_limiter
+        self.max_retries = getattr(config, 'order_max_retries', 3)
+        self.retry_delay = getattr(config, 'order_retry_delay', 0.5)
+        self.fill_timeout = getattr(config, 'order_fill_timeout', 10.0)
+        self.orders: Dict[str, ManagedOrder] = {}
+        self._lock = threading.RLock()
+        self._manager: Optional[ThreadedWebsocketManager] = None
+        self._stream_active = False
+        self.orders_total = self.rejections_total = None
+        if metrics is not None:
+            self.orders_total = metrics.counter('orders_total', 'Ordens enviadas', ('side', 'purpose'))
+            self.rejections_total = metrics.counter('order_rejections_total', 'Ordens rejeitadas', ('side',))
+
+    # ------------------------------------------------------------------
+    # User data stream
+    # ------------------------------------------------------------------
+
+    def start_stream(self):
+        """Inicia o user data stream para confirmação das execuções"""
+        if self.simulated or self._manager is not None:
+            return
+        try:
+            self._manager = ThreadedWebsocketManager(
+                api_key=self.config.api_key,
+                api_secret=self.config.api_secret,
+                testnet=getattr(self.config, 'testnet', True)
+            )
+            self._manager.daemon = True
+            self._manager.start()
+            self._manager.start_user_socket(callback=self.handle_user_event)
+            self._stream_active = True
+            logger.info("📡 User data stream iniciado")
+        except Exception as e:
+            logger.error(f"Erro iniciando user data stream: {e}")
+            self._manager = None
+
+    def stop_stream(self):
+        manager, self._manager = self._manager, None
+        self._stream_active = False
+        if manager is not None:
+            try:
+                manager.stop()
+            except Exception as e:
+                logger.error(f"Erro parando user data stream: {e}")
+
+    def handle_user_event(self, msg: Dict):
+        """Callback do user data stream"""
+        if msg.get('e') == 'error':
+            logger.error(f"Erro no user data stream: {msg.get('m')}")
+            return
+        if msg.get('e') in ('outboundAccountPosition', 'balanceUpdate'):
+            if self.on_account_update:
+                try:
+                    self.on_account_update(msg)
+                except Exception as e:
+                    logger.error(f"Erro no callback de conta: {e}")
+            return
+        if msg.get('e') != 'executionReport':
+            return
+
+        with self._lock:
+            order = self.orders.get(msg.get('c')) or self.orders.get(msg.get('C'))
+            if order is None:
+                return
+            order.unknown = False
+            order.order_id = msg.get('i', order.order_id)
+            if msg.get('x') == 'TRADE' and float(msg.get('l', 0)) > 0:
+                order.add_fill(
+                    msg.get('t'), float(msg['L']), float(msg['l']),
+                    float(msg.get('n') or 0), msg.get('N')
+                )
+            order.reported_quantity = max(order.reported_quantity, float(msg.get('z', 0)))
+            order.reported_quote = max(order.reported_quote, float(msg.get('Z', 0)))
+            order.transact_time = msg.get('T', order.transact_time)
+            try:
+                order.transition(parse_status(msg['X']))
+            except (KeyError, ValueError):
+                pass
+        self._notify(order)
+
+    # ------------------------------------------------------------------
+    # Ordens
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def client_order_id(symbol: str, side: str, purpose: str, key: str) -> str:
+        """ID determinístico da intenção (limite da Binance: 36 caracteres)"""
+        digest = hashlib.sha1(f"{symbol}:{side}:{purpose}:{key}".encode()).hexdigest()[:20]
+        return f"bot{purpose[0]}{side[0]}{digest}"
+
+    def market_order(self, symbol: str, side: str, quantity: str, purpose: str, key: str,
+                     reference_price: float = None) -> ManagedOrder:
+        """Envia (ou recupera) uma ordem a mercado sem aguardar a execução
+
+        Uma ordem da mesma intenção ainda aberta ou com execuções é reutilizada.
+        Se o resultado do envio anterior é desconhecido, a ordem é consultada na
+        corretora antes de qualquer reenvio. Só uma ordem finalizada sem
+        execuções (rejeitada pela corretora, expirada ou cancelada) é reenviada,
+        sempre com um novo sufixo de tentativa no client id.
+        """
+        base_id = self.client_order_id(symbol, side, purpose, key)
+
+        with self._lock:
+            client_order_id = base_id
+            order = self.orders.get(client_order_id)
+            attempt = 1
+            while True:
+                if order is not None and order.unknown:
+                    self._reconcile(order)
+                if order is None or not self._unfilled(order):
+                    break
+                attempt += 1
+                client_order_id = f"{base_id}-{attempt}"
+                order = self.orders.get(client_order_id)
+            if order is not None:
+                logger.info(f"Ordem {client_order_id} já enviada ({order.status.value}), reutilizando")
+                return order
+            order = ManagedOrder(symbol, side, float(quantity), client_order_id, purpose, self.simulated)
+            self._prune()
+            self.orders[client_order_id] = order
+        if self.orders_total is not None:
+            self.orders_total.labels(side, purpose).inc()
+
+        if self.simulated:
+            order.add_fill(f'sim-{client_order_id}', float(reference_price), float(quantity))
+            order.transition(OrderStatus.FILLED)
+            self._notify(order)
+            return order
+
+        # Com o stream ativo basta o ACK; as execuções chegam pelo executionReport
+        response_type = 'ACK' if self._stream_active else 'FULL'
+        for attempt in range(1, self.max_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                response = self.client.create_order(
+                    symbol=symbol,
+                    side=side,
+                    type='MARKET',
+                    quantity=quantity,
+                    newClientOrderId=client_order_id,
+                    newOrderRespType=response_type
+                )
+                self._apply_response(order, response)
+                return order
+            except BinanceAPIException as e:
+                # Pode ser duplicidade de um envio anterior que chegou à corretora
+                if self._recover(order):
+                    return order
+                if e.code in RETRYABLE_CODES:
+                    if attempt < self.max_retries:
+                        logger.warning(f"Envio de {client_order_id} com resultado desconhecido (tentativa {attempt}): {e}")
+                        time.sleep(self.retry_delay * attempt)
+                        continue
+                    self._mark_unknown(order, str(e))
+                    return order
+                logger.error(f"❌ Ordem {client_order_id} rejeitada: {e}")
+                order.error = str(e)
+                self._reject(order)
+                return order
+            except (RequestException, TimeoutError, ConnectionError) as e:
+                logger.warning(f"Falha de rede enviando {client_order_id} (tentativa {attempt}): {e}")
+                if self._recover(order):
+                    return order
+                time.sleep(self.retry_delay * attempt)
+
+        self._mark_unknown(order, 'Falha de rede após retentativas')
+        return order
+
+    def wait(self, order: ManagedOrder, timeout: float = None) -> ManagedOrder:
+        """Aguarda o estado final da ordem (stream, com consulta REST como reserva)"""
+        timeout = self.fill_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while not order.is_final:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"Tempo esgotado aguardando {order}")
+                break
+            if order.done.wait(min(remaining, 1.0)):
+                break
+            self._recover(order)
+        return order
+
+    def _recover(self, order: ManagedOrder) -> bool:
+        """Consulta a ordem pelo client id; retorna True se ela existe na corretora"""
+        return self._query(order) is True
+
+    def _query(self, order: ManagedOrder) -> Optional[bool]:
+        """True se a ordem existe na corretora, False se ela confirma que não existe, None se a consulta falhou"""
+        try:
+            response = self.client.get_order(symbol=order.symbol, origClientOrderId=order.client_order_id)
+        except BinanceAPIException as e:
+            if e.code == UNKNOWN_ORDER:
+                return False
+            logger.warning(f"Erro consultando {order.client_order_id}: {e}")
+            return None
+        except Exception as e:
+            logger.warning(f"Erro consultando {order.client_order_id}: {e}")
+            return None
+        order.unknown = False
+        self._apply_response(order, response)
+        return True
+
+    def _mark_unknown(self, order: ManagedOrder, error: str):
+        """Envio sem resposta: a ordem fica aberta até ser conciliada com a corretora"""
+        logger.error(f"❌ Resultado de {order.client_order_id} desconhecido: {error}")
+        order.error = error
+        order.unknown = True
+        self._notify(order)
+
+    def _reconcile(self, order: ManagedOrder):
+        """Resolve uma ordem de resultado desconhecido antes de reutilizar ou reenviar a intenção"""
+        found = self._query(order)
+        if found is False:
+            # A corretora confirma que a ordem não chegou: pode ser reenviada
+            order.unknown = False
+            self._reject(order)
+
+    def _apply_response(self, order: ManagedOrder, response: Dict):
+        with self._lock:
+            order.order_id = response.get('orderId', order.order_id)
+            order.transact_time = response.get('transactTime') or response.get('updateTime') or order.transact_time
+            for fill in response.get('fills') or []:
+                order.add_fill(
+                    fill.get('tradeId'), float(fill['price']), float(fill['qty']),
+                    float(fill.get('commission') or 0), fill.get('commissionAsset')
+                )
+            order.reported_quantity = max(order.reported_quantity, float(response.get('executedQty') or 0))
+            order.reported_quote = max(order.reported_quote, float(response.get('cummulativeQuoteQty') or 0))
+            if response.get('status'):
+                order.transition(parse_status(response['status']))
+        self._notify(order)
+
+    @staticmethod
+    def _unfilled(order: ManagedOrder) -> bool:
+        """Ordem finalizada sem nenhuma execução (pode ser reenviada com novo client id)"""
+        return order.is_final and not order.unknown and order.executed_quantity <= 0
+
+    def _reject(self, order: ManagedOrder):
+        order.transition(OrderStatus.REJECTED)
+        if self.rejections_total is not None:
+            self.rejections_total.labels(order.side).inc()
+        self._notify(order)
+
+    def _notify(self, order: ManagedOrder):
+        if self.on_update:
+            try:
+                self.on_update(order)
+            except Exception as e:
+                logger.error(f"Erro no callback de ordem: {e}")
+
+    def _prune(self):
+        cutoff = time.time() - ORDER_RETENTION
+        for client_order_id in [cid for cid, o in self.orders.items() if o.is_final and o.updated_at < cutoff]:
+            del self.orders[client_order_id]
+
+    def get_open_orders(self) -> List[ManagedOrder]:
+        with self._lock:
+            return [order for order in self.orders.values() if not order.is_final]
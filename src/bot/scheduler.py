@@ -0,0 +1,309 @@
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Duração dos candles da Binance em segundos
+TIMEFRAME_SECONDS = {
+    '1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800,
+    '1h': 3600, '2h': 7200, '4h': 14400, '6h': 21600, '8h': 28800, '12h': 43200,
+    '1d': 86400, '3d': 259200, '1w': 604800
+}
+
+# Candles semanais abrem na segunda-feira; o epoch Unix caiu numa quinta
+WEEK_OFFSET = 4 * 86400
+
+# Amostras de atraso guardadas por tarefa
+LATENESS_SAMPLES = 200
+
+
+def candle_period(timeframe: str) -> int:
+    """Duração de um candle em segundos"""
+    try:
+        return TIMEFRAME_SECONDS[timeframe]
+    except KeyError:
+        raise ValueError(f"Timeframe não suportado: {timeframe}")
+
+
+def last_candle_close(timeframe: str, now: float) -> float:
+    """Instante (epoch, segundos) do fechamento do último candle concluído"""
+    period = candle_period(timeframe)
+    offset = WEEK_OFFSET if timeframe == '1w' else 0
+    return math.floor((now - offset) / period) * period + offset
+
+
+def next_candle_close(timeframe: str, now: float) -> float:
+    """Instante (epoch, segundos) do próximo fechamento de candle"""
+    return last_candle_close(timeframe, now) + candle_period(timeframe)
+
+
+class ScheduledTask:
+    """Tarefa do agendador: por intervalo, por fechamento de candle e/ou por evento"""
+
+    def __init__(self, name: str, callback: Callable, interval: Optional[float] = None,
+                 timeframes: Iterable[str] = (), offset: float = 0.0, jitter: float = 0.0,
+                 deadline: Optional[float] = None, min_interval: float = 0.0):
+        self.name = name
+        self.callback = callback
+        self.interval = interval
+        self.timeframes = list(timeframes)
+        self.offset = offset
+        self.jitter = jitter
+        self.deadline = deadline
+        self.min_interval = min_interval
+
+        self.next_run: Optional[float] = None
+        self.nominal_run: Optional[float] = None
+        self.triggered_at: Optional[float] = None
+        self.running = False
+        self.last_start: Optional[float] = None
+
+        self.runs = 0
+        self.errors = 0
+        self.skipped = 0
+        self.deadline_misses = 0
+        self.triggers = 0
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._lateness: List[float] = []
+
+    def schedule(self, now: float, rng: random.Random):
+        """Calcula a próxima execução periódica (intervalo ou fechamento de candle)"""
+        candidates = []
+        if self.interval:
+            base = self.last_start if self.last_start is not None else now
+            next_run = base + self.interval
+            if next_run <= now:
+                # Execução mais longa que o intervalo: o próximo ciclo conta a partir de agora
+                next_run = now + self.interval
+            candidates.append(next_run)
+        for timeframe in self.timeframes:
+            candidates.append(next_candle_close(timeframe, now) + self.offset)
+        if not candidates:
+            self.next_run = self.nominal_run = None
+            return
+        self.nominal_run = min(candidates)
+        self.next_run = self.nominal_run + (rng.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+
+    def due_at(self) -> Optional[float]:
+        """Próximo instante em que a tarefa deve rodar (None se não houver)"""
+        due = self.next_run
+        if self.triggered_at is not None:
+            earliest = self.triggered_at
+            if self.last_start is not None:
+                earliest = max(earliest, self.last_start + self.min_interval)
+            due = earliest if due is None else min(due, earliest)
+        return due
+
+    def closed_timeframes(self, now: float) -> List[str]:
+        """Timeframes cujo candle fechou no instante agendado"""
+        if self.nominal_run is None:
+            return []
+        reference = self.nominal_run - self.offset
+        return [tf for tf in self.timeframes
+                if abs(last_candle_close(tf, reference + 1e-6) - reference) < 1e-6]
+
+    def record_lateness(self, lateness: float):
+        self._lateness.append(lateness)
+        if len(self._lateness) > LATENESS_SAMPLES:
+            del self._lateness[0]
+
+    def stats(self) -> Dict:
+        samples = sorted(self._lateness)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else None
+        return {
+            'runs': self.runs,
+            'errors': self.errors,
+            'skipped': self.skipped,
+            'triggers': self.triggers,
+            'deadline_misses': self.deadline_misses,
+            'running': self.running,
+            'next_run': self.next_run,
+            'last_duration': self.last_duration,
+            'lateness_avg': sum(samples) / len(samples) if samples else None,
+            'lateness_p95': p95,
+            'lateness_max': samples[-1] if samples else None,
+            'last_error': self.last_error
+        }
+
+
+class Scheduler:
+    """Agendador de etapas do bot orientado a tempo e eventos
+
+    Cada tarefa roda em um pool de threads e nunca em paralelo consigo mesma:
+    se ainda estiver rodando quando vencer de novo, a execução periódica é
+    pulada e um evento pendente é mantido para depois. Eventos disparados em
+    sequência são agrupados respeitando `min_interval`.
+
+    `jitter` atrasa aleatoriamente as execuções periódicas (evita que todos os
+    bots batam na API no mesmo segundo após o fechamento do candle); o atraso
+    real em relação ao horário agendado e o tempo até a conclusão são
+    medidos, e execuções que passam de `deadline` segundos são registradas.
+    """
+
+    def __init__(self, max_workers: int = 4, seed: Optional[int] = None):
+        self.tasks: Dict[str, ScheduledTask] = {}
+        self._rng = random.Random(seed)
+        self._condition = threading.Condition()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._max_workers = max_workers
+
+    # ------------------------------------------------------------------
+    # Registro de tarefas
+    # ------------------------------------------------------------------
+
+    def add_interval(self, name: str, callback: Callable[[], None], interval: float,
+                     jitter: float = 0.0, deadline: Optional[float] = None,
+                     run_immediately: bool = False) -> ScheduledTask:
+        """Tarefa periódica a cada `interval` segundos"""
+        task = ScheduledTask(name, callback, interval=interval, jitter=jitter, deadline=deadline)
+        return self._add(task, run_immediately)
+
+    def add_candle_close(self, name: str, callback: Callable[[List[str]], None], timeframes: Iterable[str],
+                         offset: float = 2.0, jitter: float = 0.0, deadline: Optional[float] = None,
+                         run_immediately: bool = False) -> ScheduledTask:
+        """Tarefa executada `offset` segundos após cada fechamento de candle dos timeframes
+
+        O callback recebe a lista de timeframes que acabaram de fechar.
+        """
+        timeframes = list(timeframes)
+        for timeframe in timeframes:
+            candle_period(timeframe)
+        task = ScheduledTask(name, callback, timeframes=timeframes, offset=offset,
+                             jitter=jitter, deadline=deadline)
+        return self._add(task, run_immediately)
+
+    def add_event(self, name: str, callback: Callable[[], None], min_interval: float = 0.0,
+                  interval: Optional[float] = None, deadline: Optional[float] = None,
+                  run_immediately: bool = False) -> ScheduledTask:
+        """Tarefa disparada por `trigger`, com intervalo periódico opcional como reserva"""
+        task = ScheduledTask(name, callback, interval=interval, deadline=deadline, min_interval=min_interval)
+        return self._add(task, run_immediately)
+
+    def _add(self, task: ScheduledTask, run_immediately: bool) -> ScheduledTask:
+        with self._condition:
+            if task.name in self.tasks:
+                raise ValueError(f"Tarefa já registrada: {task.name}")
+            task.schedule(time.time(), self._rng)
+            task.triggered_at = time.time() if run_immediately else None
+            self.tasks[task.name] = task
+            self._condition.notify()
+        return task
+
+    def trigger(self, name: str):
+        """Solicita a execução de uma tarefa (seguro para chamar de qualquer thread)"""
+        with self._condition:
+            task = self.tasks.get(name)
+            if task is None:
+                return
+            task.triggers += 1
+            if task.triggered_at is None:
+                task.triggered_at = time.time()
+                self._condition.notify()
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._pool = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='scheduler')
+            self._thread = threading.Thread(target=self._loop, name='scheduler', daemon=True)
+            self._thread.start()
+        logger.info(f"⏱️ Agendador iniciado com {len(self.tasks)} tarefas")
+
+    def stop(self, timeout: float = 10.0):
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        logger.info("⏱️ Agendador parado")
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def get_stats(self) -> Dict[str, Dict]:
+        with self._condition:
+            return {name: task.stats() for name, task in self.tasks.items()}
+
+    # ------------------------------------------------------------------
+    # Despacho
+    # ------------------------------------------------------------------
+
+    def _loop(self):
+        with self._condition:
+            while self._running:
+                now = time.time()
+                wait = None
+                for task in self.tasks.values():
+                    # Eventos de uma tarefa em execução esperam a conclusão dela
+                    due = task.next_run if task.running else task.due_at()
+                    if due is None:
+                        continue
+                    if due <= now:
+                        self._dispatch(task, due, now)
+                        due = task.next_run if task.running else task.due_at()
+                        if due is None:
+                            continue
+                    remaining = max(0.0, due - now)
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._condition.wait(wait)
+
+    def _dispatch(self, task: ScheduledTask, due: float, now: float):
+        """Envia a tarefa ao pool (chamado com o lock adquirido)"""
+        periodic = task.next_run is not None and task.next_run <= now
+        if task.running:
+            task.skipped += 1
+            logger.warning(f"⏱️ {task.name} ainda em execução; ciclo agendado pulado")
+            task.schedule(now, self._rng)
+            return
+
+        args = (task.closed_timeframes(now),) if task.timeframes and periodic else ()
+        if task.timeframes and not periodic:
+            # Disparo manual de tarefa por candle: considera todos os timeframes
+            args = (list(task.timeframes),)
+        reference = task.nominal_run if periodic and task.nominal_run is not None else due
+        task.record_lateness(max(0.0, now - due))
+        task.triggered_at = None
+        task.running = True
+        task.last_start = now
+        task.schedule(now, self._rng)
+        self._pool.submit(self._execute, task, args, reference)
+
+    def _execute(self, task: ScheduledTask, args: tuple, reference: float):
+        started = time.time()
+        try:
+            task.callback(*args)
+        except Exception as e:
+            task.errors += 1
+            task.last_error = str(e)
+            logger.error(f"❌ Erro na tarefa {task.name}: {e}")
+        finally:
+            finished = time.time()
+            with self._condition:
+                task.runs += 1
+                task.running = False
+                task.last_duration = finished - started
+                if task.deadline is not None and finished - reference > task.deadline:
+                    task.deadline_misses += 1
+                    logger.warning(
+                        f"⏱️ {task.name} concluída {finished - reference:.1f}s após o horário "
+                        f"(prazo {task.deadline:.1f}s)"
+                    )
+                self._condition.notify()
@@ -0,0 +1,334 @@
+import fcntl
+import logging
+import os
+import secrets
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client as ConnectionClient, Listener
+from typing import Any, Callable, Dict, Optional
+
+from src.bot.sharding import parse_address
+from src.utils.profiler import ProfilerBusy, SamplingProfiler, profile_request
+from src.utils.shared_state import SnapshotPublisher, SnapshotReader
+
+logger = logging.getLogger(__name__)
+
+# Heartbeats perdidos até o web considerar o processo do bot parado
+STALE_PUBLISHES = 5
+
+# Tempo máximo de espera por uma resposta do canal de controle
+CONTROL_TIMEOUT = 30.0
+
+
+def default_control_address() -> str:
+    return os.path.join(tempfile.gettempdir(), 'binance-bot.sock')
+
+
+def default_lock_path() -> str:
+    return os.path.join(tempfile.gettempdir(), 'binance-bot.lock')
+
+
+def control_authkey(config, address) -> bytes:
+    """Chave do canal de controle (o Listener desserializa o que recebe)
+
+    Usa BOT_CONTROL_AUTHKEY quando definida. Em TCP ela é obrigatória; no
+    socket Unix, sem chave configurada, bot e web compartilham uma chave
+    aleatória gravada ao lado do socket, legível só pelo dono (0600).
+    """
+    authkey = getattr(config, 'bot_control_authkey', '')
+    if authkey:
+        return authkey.encode()
+    if isinstance(address, tuple):
+        raise ValueError("BOT_CONTROL_AUTHKEY é obrigatório com canal de controle TCP")
+    return _host_authkey(f'{address}.key')
+
+
+def _host_authkey(path: str) -> bytes:
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        info = os.fstat(fd)
+        if info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+            raise PermissionError(f"Chave do canal de controle {path} precisa pertencer ao usuário e ter modo 0600")
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        key = os.read(fd, 128).strip()
+        if not key:
+            key = secrets.token_hex(32).encode()
+            os.write(fd, key)
+        return key
+    finally:
+        os.close(fd)
+
+
+class InstanceLock:
+    """Lock exclusivo de arquivo: garante um único processo do bot por máquina"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_lock_path()
+        self._fd: Optional[int] = None
+
+    def acquire(self) -> bool:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class BotService:
+    """Processo dedicado do bot: snapshots compartilhados e canal de controle
+
+    O bot roda sozinho neste processo. Uma thread publica a cada
+    `publish_interval` um snapshot (status, posições, risco) na memória
+    compartilhada, que os workers do servidor web leem sem locks e sem tocar
+    nas threads de trading. Comandos (parar, encerrar posição) chegam por um
+    socket local autenticado (`control_authkey`); o lock de instância impede dois bots ao mesmo tempo, e o
+    bot só é criado (`bot_factory`) depois que o lock foi obtido.
+    """
+
+    def __init__(self, config, bot_factory: Callable[[], Any], publisher: Optional[SnapshotPublisher] = None):
+        self.config = config
+        self.bot_factory = bot_factory
+        self.bot = None
+        self.publish_interval = getattr(config, 'state_publish_interval', 1.0)
+        self.control_address = parse_address(getattr(config, 'bot_control_address', '') or default_control_address())
+        self.authkey = control_authkey(config, self.control_address)
+        self.lock = InstanceLock(getattr(config, 'bot_lock_path', '') or None)
+        self.publisher = publisher
+        self.stop_event = threading.Event()
+        self._listener: Optional[Listener] = None
+        self.profiler = SamplingProfiler()
+        self.commands: Dict[str, Callable[[Dict], Dict]] = {
+            'ping': lambda message: {'ok': True, 'pid': os.getpid()},
+            'stop': self._command_stop,
+            'close_position': self._command_close_position,
+            'profile': self._command_profile,
+        }
+
+    def run(self) -> bool:
+        """Executa o bot até receber `stop` (bloqueia); False se já houver outro processo"""
+        if not self.lock.acquire():
+            logger.error(f"❌ Outro processo do bot já está rodando (lock {self.lock.path})")
+            return False
+        try:
+            if self.publisher is None:
+                self.publisher = SnapshotPublisher(
+                    getattr(self.config, 'bot_state_path', '') or None,
+                    capacity=getattr(self.config, 'bot_state_size', 4 * 1024 * 1024)
+                )
+            self.bot = self.bot_factory()
+            self._start_control()
+            self.bot.start()
+            threading.Thread(target=self._publish_loop, name='state-publisher', daemon=True).start()
+            logger.info(f"📡 Estado publicado em {self.publisher.path} a cada {self.publish_interval}s")
+            while not self.stop_event.wait(1.0):
+                if not self.bot.is_running:
+                    break
+        finally:
+            self.stop_event.set()
+            if self.bot is not None:
+                if self.bot.is_running:
+                    self.bot.stop()
+                self.publish()
+            self._stop_control()
+            self.lock.release()
+        return True
+
+    def stop(self):
+        self.stop_event.set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado atual do bot para os leitores (somas já calculadas)"""
+        bot = self.bot
+        positions = list(bot.risk_manager.positions.values())
+        status = bot.get_status()
+        # O carimbo de hora do status mudaria o snapshot a cada publicação
+        status.pop('last_update', None)
+        return {
+            'running': bot.is_running,
+            'pid': os.getpid(),
+            'positions': [position.to_dict() for position in positions],
+            'active_positions': len(positions),
+            'daily_pnl': sum(position.unrealized_pnl for position in positions),
+            'balance': bot.get_balance(),
+            'risk': bot.risk_manager.risk_metrics,
+            'persistence': bot.risk_manager.persistence_writer.get_stats(),
+            'status': status,
+            'errors': [str(error) for error in bot.execution_errors[-10:]],
+            'signals': list(getattr(bot, 'recent_signals', [])),
+            'last_update': datetime.now().isoformat()
+        }
+
+    def publish(self):
+        try:
+            self.publisher.publish(self.snapshot())
+        except Exception as e:
+            logger.error(f"Erro publicando snapshot do bot: {e}")
+
+    # ------------------------------------------------------------------
+    # Publicação e controle
+    # ------------------------------------------------------------------
+
+    def _publish_loop(self):
+        while not self.stop_event.is_set():
+            started = time.time()
+            self.bot.risk_manager.update_risk_metrics()
+            self.publish()
+            self.stop_event.wait(max(0.0, self.publish_interval - (time.time() - started)))
+
+    def _start_control(self):
+        family = 'AF_INET' if isinstance(self.control_address, tuple) else 'AF_UNIX'
+        if family == 'AF_UNIX' and os.path.exists(self.control_address):
+            # Sobra de um processo anterior (o lock de instância já é nosso)
+            os.unlink(self.control_address)
+        if family == 'AF_UNIX':
+            # Socket acessível apenas pelo dono desde a criação
+            umask = os.umask(0o177)
+            try:
+                self._listener = Listener(self.control_address, family=family, authkey=self.authkey)
+            finally:
+                os.umask(umask)
+            os.chmod(self.control_address, 0o600)
+        else:
+            self._listener = Listener(self.control_address, family=family, authkey=self.authkey)
+        threading.Thread(target=self._control_loop, name='bot-control', daemon=True).start()
+        logger.info(f"🎛️ Canal de controle em {self._listener.address}")
+
+    def _stop_control(self):
+        if self._listener is not None:
+            try:
+                self._listener.close()
+            except OSError:
+                pass
+            self._listener = None
+
+    def _control_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                conn = self._listener.accept()
+            except AuthenticationError:
+                logger.warning("🎛️ Conexão de controle recusada (autenticação)")
+                continue
+            except (OSError, AttributeError):
+                return
+            threading.Thread(target=self._serve, args=(conn,), name='bot-control-conn', daemon=True).start()
+
+    def _serve(self, conn):
+        try:
+            message = conn.recv()
+            handler = self.commands.get(message.get('command'))
+            if handler is None:
+                reply = {'ok': False, 'error': f"Comando desconhecido: {message.get('command')}"}
+            else:
+                try:
+                    reply = handler(message)
+                except Exception as e:
+                    logger.error(f"Erro executando comando {message.get('command')}: {e}")
+                    reply = {'ok': False, 'error': str(e)}
+            conn.send(reply)
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _command_stop(self, message: Dict) -> Dict:
+        logger.info("🛑 Parada solicitada pelo canal de controle")
+        self.stop_event.set()
+        return {'ok': True}
+
+    def _command_close_position(self, message: Dict) -> Dict:
+        symbol = message.get('symbol')
+        if symbol not in self.bot.risk_manager.positions:
+            return {'ok': False, 'error': f'Posição {symbol} não encontrada'}
+        self.bot._close_position(symbol, message.get('reason') or "Encerramento manual")
+        self.publish()
+        return {'ok': True}
+
+    def _command_profile(self, message: Dict) -> Dict:
+        """Amostra as pilhas das threads do bot (e opcionalmente as alocações) por N segundos"""
+        try:
+            params = profile_request(message)
+            profile = self.profiler.capture(
+                params['seconds'],
+                interval=params['interval'],
+                threads=params['threads'],
+                allocations=params['allocations'],
+                top=params['top']
+            )
+        except (ProfilerBusy, ValueError) as e:
+            return {'ok': False, 'error': str(e)}
+        return {'ok': True, 'profile': profile}
+
+
+class BotClient:
+    """Acesso do servidor web ao processo do bot: snapshot e comandos"""
+
+    def __init__(self, settings):
+        self.reader = SnapshotReader(getattr(settings, 'bot_state_path', '') or None)
+        self.max_age = getattr(settings, 'state_publish_interval', 1.0) * STALE_PUBLISHES
+        self.control_address = parse_address(getattr(settings, 'bot_control_address', '') or default_control_address())
+        self.authkey = control_authkey(settings, self.control_address)
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """Último snapshot publicado (None se o bot nunca rodou)"""
+        result = self.reader.read()
+        return result[1] if result else None
+
+    @property
+    def seq(self) -> Optional[int]:
+        header = self.reader.header()
+        return header['seq'] if header else None
+
+    def is_running(self) -> bool:
+        """Processo vivo (heartbeat recente) e bot em execução"""
+        if not self.reader.is_alive(self.max_age):
+            return False
+        snapshot = self.snapshot()
+        return bool(snapshot and snapshot.get('running'))
+
+    def request(self, command: str, timeout: float = CONTROL_TIMEOUT, **params) -> Dict:
+        """Envia um comando ao processo do bot e espera a resposta por até `timeout` segundos"""
+        try:
+            conn = ConnectionClient(self.control_address, authkey=self.authkey)
+        except AuthenticationError:
+            return {'ok': False, 'error': 'Chave do canal de controle recusada'}
+        except (OSError, EOFError):
+            return {'ok': False, 'error': 'Bot não está ativo'}
+        try:
+            conn.send({'command': command, **params})
+            if not conn.poll(timeout):
+                return {'ok': False, 'error': 'Bot não respondeu'}
+            return conn.recv()
+        finally:
+            conn.close()
+
+    def spawn(self, entrypoint: str, log_path: Optional[str] = None) -> subprocess.Popen:
+        """Inicia o processo do bot em segundo plano (o lock de instância barra duplicatas)"""
+        log = open(log_path, 'ab') if log_path else subprocess.DEVNULL
+        try:
+            return subprocess.Popen(
+                [sys.executable, entrypoint],
+                cwd=os.path.dirname(os.path.abspath(entrypoint)),
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                start_new_session=True
+            )
+        finally:
+            if log_path:
+                log.close()
@@ -0,0 +1,418 @@
+import hashlib
+import itertools
+import logging
+import os
+import socket
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client as ConnectionClient, Connection, Listener
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+ROLE_STANDALONE = 'standalone'
+ROLE_COORDINATOR = 'coordinator'
+ROLE_WORKER = 'worker'
+ROLES = (ROLE_STANDALONE, ROLE_COORDINATOR, ROLE_WORKER)
+
+# Intervalo de heartbeat dos workers; sem notícias por HEARTBEAT_MISSES intervalos o worker é descartado
+HEARTBEAT_INTERVAL = 5.0
+HEARTBEAT_MISSES = 3
+
+# Espera entre tentativas de conexão do worker ao coordenador
+RECONNECT_DELAY = 5.0
+
+Address = Union[Tuple[str, int], str]
+
+
+def parse_address(address: str) -> Address:
+    """`host:porta` vira endereço TCP; qualquer outro valor é o caminho de um socket Unix"""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return (host or '0.0.0.0', int(port))
+    return address
+
+
+def shard_owner(symbol: str, workers: Iterable[str]) -> Optional[str]:
+    """Worker responsável pelo símbolo (rendezvous hashing)
+
+    Cada símbolo fica com o worker de maior hash(worker, símbolo): quando um
+    worker entra ou sai, só os símbolos dele mudam de dono, e os caches de
+    klines e a cadência dos demais continuam válidos.
+    """
+    best, best_weight = None, None
+    for worker in workers:
+        weight = hashlib.md5(f'{worker}:{symbol}'.encode()).digest()
+        if best_weight is None or weight > best_weight:
+            best, best_weight = worker, weight
+    return best
+
+
+def partition(symbols: Iterable[str], workers: Iterable[str]) -> Dict[str, List[str]]:
+    """Distribui os símbolos entre os workers, mantendo a ordem recebida"""
+    workers = list(workers)
+    shards: Dict[str, List[str]] = {worker: [] for worker in workers}
+    if not workers:
+        return shards
+    for symbol in symbols:
+        shards[shard_owner(symbol, workers)].append(symbol)
+    return shards
+
+
+class _WorkerLink:
+    """Conexão do coordenador com um worker"""
+
+    def __init__(self, worker_id: str, conn: Connection, info: Dict):
+        self.worker_id = worker_id
+        self.conn = conn
+        self.info = info
+        self.connected_at = time.time()
+        self.last_seen = time.time()
+        self.scans = 0
+        self.late = 0
+        self.send_lock = threading.Lock()
+
+    def send(self, message: Dict):
+        with self.send_lock:
+            self.conn.send(message)
+
+
+class ShardCoordinator:
+    """Coordenador da análise distribuída
+
+    Aceita workers (TCP ou socket Unix, autenticados por `authkey`) e, a cada
+    varredura, envia a cada um os candidatos do seu shard. Os workers só
+    analisam e devolvem sinais; posições, risco e ordens ficam exclusivamente
+    no processo do coordenador, então os limites globais continuam valendo.
+    Workers que não respondem dentro de `scan_timeout` são ignorados naquele
+    ciclo, e os que param de mandar heartbeat são descartados.
+    """
+
+    def __init__(self, address: str, authkey: str, scan_timeout: float = 30.0):
+        if not authkey:
+            raise ValueError("SHARD_AUTHKEY é obrigatório no modo coordenador")
+        self.address = parse_address(address)
+        self.authkey = authkey.encode()
+        self.scan_timeout = scan_timeout
+
+        self.workers: Dict[str, _WorkerLink] = {}
+        self._cycles = itertools.count(1)
+        self._pending: Dict[int, Dict] = {}
+        self._condition = threading.Condition()
+        self._listener: Optional[Listener] = None
+        self._running = False
+        self.last_scan: Optional[Dict] = None
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self):
+        if self._running:
+            return
+        family = 'AF_INET' if isinstance(self.address, tuple) else 'AF_UNIX'
+        if family == 'AF_UNIX' and os.path.exists(self.address):
+            os.unlink(self.address)
+        self._listener = Listener(self.address, family=family, authkey=self.authkey)
+        self._running = True
+        threading.Thread(target=self._accept_loop, name='shard-accept', daemon=True).start()
+        logger.info(f"🧩 Coordenador de shards ouvindo em {self._listener.address}")
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        with self._condition:
+            links = list(self.workers.values())
+            self.workers.clear()
+            self._condition.notify_all()
+        for link in links:
+            try:
+                link.send({'type': 'stop'})
+            except (OSError, EOFError):
+                pass
+            link.conn.close()
+        try:
+            self._listener.close()
+        except OSError:
+            pass
+        logger.info("🧩 Coordenador de shards parado")
+
+    @property
+    def worker_ids(self) -> List[str]:
+        with self._condition:
+            self._drop_silent_workers()
+            return sorted(self.workers)
+
+    # ------------------------------------------------------------------
+    # Varredura distribuída
+    # ------------------------------------------------------------------
+
+    def scan(self, symbols: List[str], correlation_timeframe: Optional[str] = None,
+             timeout: Optional[float] = None) -> Dict:
+        """Analisa os símbolos nos workers e reúne os resultados
+
+        Retorna `signals` (por confiança), `analyzed` (símbolo -> próxima
+        análise prevista pelo worker), `correlation` (klines do timeframe de
+        correlação) e os símbolos sem resposta em `missing`.
+        """
+        timeout = self.scan_timeout if timeout is None else timeout
+        cycle = next(self._cycles)
+        started = time.time()
+
+        with self._condition:
+            self._drop_silent_workers()
+            shards = partition(symbols, sorted(self.workers))
+            pending = {'expected': set(), 'replies': {}}
+            self._pending[cycle] = pending
+
+        for worker_id, shard in shards.items():
+            if not shard:
+                continue
+            link = self.workers.get(worker_id)
+            try:
+                link.send({'type': 'scan', 'cycle': cycle, 'symbols': shard,
+                           'correlation_timeframe': correlation_timeframe})
+                pending['expected'].add(worker_id)
+            except (OSError, EOFError, AttributeError) as e:
+                logger.warning(f"🧩 Falha enviando varredura ao worker {worker_id}: {e}")
+                self._remove_worker(worker_id)
+
+        deadline = started + timeout
+        with self._condition:
+            while self._running and any(worker_id in self.workers and worker_id not in pending['replies']
+                                        for worker_id in pending['expected']):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            self._pending.pop(cycle, None)
+            replies = dict(pending['replies'])
+
+        result = {'signals': [], 'analyzed': {}, 'correlation': {}, 'missing': []}
+        for worker_id in pending['expected']:
+            reply = replies.get(worker_id)
+            link = self.workers.get(worker_id)
+            if reply is None:
+                result['missing'].extend(shards[worker_id])
+                if link:
+                    link.late += 1
+                logger.warning(f"🧩 Worker {worker_id} não respondeu à varredura {cycle} em {timeout:.0f}s")
+                continue
+            if link:
+                link.scans += 1
+            result['signals'].extend(reply.get('signals', []))
+            result['analyzed'].update(reply.get('analyzed', {}))
+            result['correlation'].update(reply.get('correlation', {}))
+
+        result['signals'].sort(key=lambda s: s.confidence, reverse=True)
+        self.last_scan = {
+            'cycle': cycle,
+            'workers': len(pending['expected']),
+            'symbols': len(symbols),
+            'analyzed': len(result['analyzed']),
+            'signals': len(result['signals']),
+            'missing': len(result['missing']),
+            'duration': time.time() - started
+        }
+        logger.info(
+            f"🧩 Varredura {cycle}: {len(symbols)} símbolos em {len(pending['expected'])} workers, "
+            f"{len(result['analyzed'])} analisados, {len(result['signals'])} sinais "
+            f"({self.last_scan['duration']:.1f}s)"
+        )
+        return result
+
+    def get_stats(self) -> Dict:
+        with self._condition:
+            workers = {
+                worker_id: {
+                    'host': link.info.get('host'),
+                    'pid': link.info.get('pid'),
+                    'connected_at': link.connected_at,
+                    'last_seen': link.last_seen,
+                    'scans': link.scans,
+                    'late': link.late
+                }
+                for worker_id, link in self.workers.items()
+            }
+        return {'address': str(self.address), 'workers': workers, 'last_scan': self.last_scan}
+
+    # ------------------------------------------------------------------
+    # Conexões
+    # ------------------------------------------------------------------
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn = self._listener.accept()
+            except Exception as e:
+                if self._running:
+                    logger.warning(f"🧩 Conexão de worker recusada: {e}")
+                continue
+            threading.Thread(target=self._serve, args=(conn,), name='shard-link', daemon=True).start()
+
+    def _serve(self, conn: Connection):
+        link = None
+        try:
+            hello = conn.recv()
+            if not isinstance(hello, dict) or hello.get('type') != 'hello':
+                conn.close()
+                return
+            link = _WorkerLink(hello['worker_id'], conn, hello)
+            with self._condition:
+                previous = self.workers.pop(link.worker_id, None)
+                self.workers[link.worker_id] = link
+            if previous is not None:
+                previous.conn.close()
+            link.send({'type': 'welcome', 'heartbeat_interval': HEARTBEAT_INTERVAL})
+            logger.info(f"🧩 Worker {link.worker_id} conectado ({len(self.workers)} ativos)")
+
+            while self._running:
+                message = conn.recv()
+                link.last_seen = time.time()
+                if message.get('type') == 'result':
+                    with self._condition:
+                        pending = self._pending.get(message.get('cycle'))
+                        if pending is not None:
+                            pending['replies'][link.worker_id] = message
+                            self._condition.notify_all()
+        except (EOFError, OSError):
+            pass
+        except Exception as e:
+            logger.error(f"🧩 Erro na conexão com worker: {e}")
+        finally:
+            if link is not None:
+                self._remove_worker(link.worker_id, link)
+            conn.close()
+
+    def _remove_worker(self, worker_id: str, link: Optional[_WorkerLink] = None):
+        with self._condition:
+            current = self.workers.get(worker_id)
+            if current is None or (link is not None and current is not link):
+                return
+            del self.workers[worker_id]
+            self._condition.notify_all()
+        logger.warning(f"🧩 Worker {worker_id} desconectado ({len(self.workers)} ativos)")
+
+    def _drop_silent_workers(self):
+        """Descarta workers sem heartbeat (chamado com o lock adquirido)"""
+        limit = time.time() - HEARTBEAT_INTERVAL * HEARTBEAT_MISSES
+        for worker_id, link in list(self.workers.items()):
+            if link.last_seen < limit:
+                del self.workers[worker_id]
+                link.conn.close()
+                logger.warning(f"🧩 Worker {worker_id} sem heartbeat; descartado")
+
+
+class ShardWorker:
+    """Worker de análise: recebe símbolos do coordenador e devolve sinais
+
+    Não tem RiskManager nem envia ordens; usa apenas endpoints públicos de
+    mercado pelo `AnalysisPipeline`. Reconecta sozinho se o coordenador cair.
+    """
+
+    def __init__(self, config, pipeline, address: str, authkey: str, worker_id: Optional[str] = None):
+        if not authkey:
+            raise ValueError("SHARD_AUTHKEY é obrigatório no modo worker")
+        self.config = config
+        self.pipeline = pipeline
+        self.address = parse_address(address)
+        self.authkey = authkey.encode()
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        self.stop_event = threading.Event()
+        self._conn: Optional[Connection] = None
+        self._send_lock = threading.Lock()
+
+    def run(self):
+        """Conecta e atende varreduras até `stop` (bloqueia)"""
+        while not self.stop_event.is_set():
+            try:
+                self._conn = ConnectionClient(self.address, authkey=self.authkey)
+            except AuthenticationError:
+                logger.error("🧩 Coordenador recusou a autenticação; verifique SHARD_AUTHKEY")
+                self.stop_event.wait(RECONNECT_DELAY)
+                continue
+            except (OSError, EOFError) as e:
+                logger.warning(f"🧩 Coordenador indisponível em {self.address}: {e}")
+                self.stop_event.wait(RECONNECT_DELAY)
+                continue
+
+            conn = self._conn
+            try:
+                self._session()
+            except (EOFError, OSError):
+                if not self.stop_event.is_set():
+                    logger.warning("🧩 Conexão com o coordenador perdida; reconectando")
+            except Exception:
+                # Conexão fechada por `stop` durante a leitura
+                if not self.stop_event.is_set():
+                    raise
+            finally:
+                conn.close()
+                self._conn = None
+            if not self.stop_event.is_set():
+                self.stop_event.wait(RECONNECT_DELAY)
+
+    def stop(self):
+        self.stop_event.set()
+        conn = self._conn
+        if conn is not None:
+            conn.close()
+
+    def _session(self):
+        self._send({'type': 'hello', 'worker_id': self.worker_id,
+                    'host': socket.gethostname(), 'pid': os.getpid()})
+        welcome = self._conn.recv()
+        interval = welcome.get('heartbeat_interval', HEARTBEAT_INTERVAL)
+        logger.info(f"🧩 Worker {self.worker_id} conectado ao coordenador {self.address}")
+
+        connected = threading.Event()
+        connected.set()
+        threading.Thread(target=self._heartbeat, args=(interval, connected),
+                         name='shard-heartbeat', daemon=True).start()
+        try:
+            while not self.stop_event.is_set():
+                message = self._conn.recv()
+                kind = message.get('type')
+                if kind == 'stop':
+                    logger.info("🧩 Coordenador encerrou; parando worker")
+                    self.stop_event.set()
+                elif kind == 'scan':
+                    self._send(self._scan(message))
+        finally:
+            connected.clear()
+
+    def _scan(self, message: Dict) -> Dict:
+        started = time.time()
+        symbols = message.get('symbols', [])
+        correlation_timeframe = message.get('correlation_timeframe')
+        correlation = {}
+
+        def keep_correlation(symbol, klines_data):
+            if correlation_timeframe in klines_data:
+                correlation[symbol] = klines_data[correlation_timeframe]
+
+        self.pipeline.on_klines = keep_correlation
+        before = dict(self.pipeline.last_analysis_time)
+        signals = self.pipeline.scan(symbols)
+        analyzed = {
+            symbol: self.pipeline.cadence.next_due(symbol)
+            for symbol in symbols
+            if self.pipeline.last_analysis_time.get(symbol) is not before.get(symbol)
+        }
+        logger.info(f"🧩 Varredura {message.get('cycle')}: {len(analyzed)}/{len(symbols)} analisados, "
+                    f"{len(signals)} sinais ({time.time() - started:.1f}s)")
+        return {'type': 'result', 'cycle': message.get('cycle'), 'signals': signals,
+                'analyzed': analyzed, 'correlation': correlation, 'duration': time.time() - started}
+
+    def _heartbeat(self, interval: float, connected: threading.Event):
+        while connected.is_set() and not self.stop_event.wait(interval):
+            try:
+                self._send({'type': 'heartbeat'})
+            except (OSError, EOFError):
+                return
+
+    def _send(self, message: Dict):
+        with self._send_lock:
+            self._conn.send(message)
@@ -0,0 +1,134 @@
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from binance.exceptions import BinanceAPIException
+
+Level = Tuple[float, float]
+
+
+class SimulatedExchange:
+    """Motor de casamento local com a interface de ordens do python-binance
+
+    Ordens a mercado consomem os níveis do livro configurado, gerando uma
+    execução por nível (com tradeId), como a resposta FULL da Binance. A
+    liquidez consumida volta aos poucos (`replenish_rate`, fração por segundo),
+    o que permite comparar a execução fatiada com uma ordem única. Sem
+    liquidez suficiente a ordem termina EXPIRED com execução parcial.
+    """
+
+    def __init__(self, replenish_rate: float = 0.0):
+        self.replenish_rate = replenish_rate
+        self.orders: Dict[str, Dict] = {}
+        self.order_times: List[float] = []
+        self._books: Dict[str, Dict[str, List[List[float]]]] = {}
+        self._original: Dict[str, Dict[str, List[Level]]] = {}
+        self._updated: Dict[str, float] = {}
+        self._order_ids = itertools.count(1)
+        self._trade_ids = itertools.count(1)
+        self._update_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def set_book(self, symbol: str, bids: Sequence[Level], asks: Sequence[Level]):
+        """Define o livro do símbolo (níveis preço/quantidade)"""
+        with self._lock:
+            self._original[symbol] = {
+                'bids': sorted(bids, reverse=True),
+                'asks': sorted(asks)
+            }
+            self._books[symbol] = {
+                side: [[price, qty] for price, qty in levels]
+                for side, levels in self._original[symbol].items()
+            }
+            self._updated[symbol] = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Interface do Client
+    # ------------------------------------------------------------------
+
+    def create_order(self, symbol: str, side: str, type: str, quantity, newClientOrderId: str = None,
+                     newOrderRespType: str = 'FULL', **params) -> Dict:
+        if type != 'MARKET':
+            raise BinanceAPIException(None, 400, '{"code": -1116, "msg": "Invalid orderType."}')
+        with self._lock:
+            client_order_id = newClientOrderId or f'sim{next(self._order_ids)}'
+            if client_order_id in self.orders:
+                raise BinanceAPIException(None, 400, '{"code": -2010, "msg": "Duplicate order sent."}')
+            if symbol not in self._books:
+                raise BinanceAPIException(None, 400, '{"code": -1121, "msg": "Invalid symbol."}')
+
+            self._replenish(symbol)
+            levels = self._books[symbol]['asks' if side == 'BUY' else 'bids']
+            remaining = float(quantity)
+            fills = []
+            for level in levels:
+                if remaining <= 0:
+                    break
+                take = min(level[1], remaining)
+                if take <= 0:
+                    continue
+                level[1] -= take
+                remaining -= take
+                fills.append({
+                    'price': str(level[0]), 'qty': str(take), 'commission': '0',
+                    'commissionAsset': 'BNB', 'tradeId': next(self._trade_ids)
+                })
+
+            executed = float(quantity) - max(remaining, 0.0)
+            quote = sum(float(fill['price']) * float(fill['qty']) for fill in fills)
+            response = {
+                'symbol': symbol, 'orderId': next(self._order_ids), 'clientOrderId': client_order_id,
+                'transactTime': int(time.time() * 1000), 'type': 'MARKET', 'side': side,
+                'origQty': str(quantity), 'executedQty': str(executed), 'cummulativeQuoteQty': str(quote),
+                'status': 'FILLED' if remaining <= 1e-12 else 'EXPIRED', 'fills': fills
+            }
+            self.orders[client_order_id] = response
+            self.order_times.append(time.monotonic())
+
+        if newOrderRespType == 'ACK':
+            return {key: response[key] for key in ('symbol', 'orderId', 'clientOrderId', 'transactTime')}
+        return response
+
+    def get_order(self, symbol: str, origClientOrderId: str) -> Dict:
+        with self._lock:
+            if origClientOrderId not in self.orders:
+                raise BinanceAPIException(None, 400, '{"code": -2013, "msg": "Order does not exist."}')
+            response = dict(self.orders[origClientOrderId])
+        response.pop('fills', None)
+        return response
+
+    def get_order_book(self, symbol: str, limit: int = 100) -> Dict:
+        with self._lock:
+            self._replenish(symbol)
+            book = self._books[symbol]
+            return {
+                'lastUpdateId': next(self._update_ids),
+                'bids': [[str(p), str(q)] for p, q in book['bids'] if q > 0][:limit],
+                'asks': [[str(p), str(q)] for p, q in book['asks'] if q > 0][:limit]
+            }
+
+    def get_symbol_ticker(self, symbol: str) -> Dict:
+        price = self.best_price(symbol, 'BUY')
+        return {'symbol': symbol, 'price': str(price)}
+
+    # ------------------------------------------------------------------
+    # Auxiliares
+    # ------------------------------------------------------------------
+
+    def best_price(self, symbol: str, side: str) -> Optional[float]:
+        """Melhor preço para uma ordem do lado informado"""
+        with self._lock:
+            self._replenish(symbol)
+            levels = self._books[symbol]['asks' if side == 'BUY' else 'bids']
+            return next((price for price, qty in levels if qty > 0), None)
+
+    def _replenish(self, symbol: str):
+        if self.replenish_rate <= 0:
+            return
+        now = time.monotonic()
+        fraction = min(1.0, (now - self._updated[symbol]) * self.replenish_rate)
+        self._updated[symbol] = now
+        for side, levels in self._books[symbol].items():
+            for level, (_, original_qty) in zip(levels, self._original[symbol][side]):
+                level[1] += (original_qty - level[1]) * fraction
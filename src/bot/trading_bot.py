@@ -1,49 +1,44 @@
 import sys
-import decimal
 import os
 import time
 import logging
+from collections import deque
 from datetime import datetime
 from typing import Dict, List, Optional, Any
-from threading import Thread, Event
+from threading import Thread, Event, Lock
 from binance.client import Client
 from binance.exceptions import BinanceAPIException, BinanceOrderException
 
 # Imports dos módulos locais
 from src.models.signal import MarketSignal
 from src.models.position import Position
-from src.models.enums import SignalStrength
-from src.analysis.technical_analyzer import TechnicalAnalyzer
+from src.models.enums import SignalStrength, OrderStatus, PositionStatus
+from src.analysis.pipeline import AnalysisPipeline
 from src.risk.risk_manager import RiskManager
+from src.risk.trigger_engine import TriggerEngine
+from src.bot.order_manager import OrderManager
+from src.bot.mass_close import MassCloseExecutor
+from src.bot.execution import ExecutionEngine, ParentOrder
+from src.bot.scheduler import Scheduler, TIMEFRAME_SECONDS
+from src.bot.sharding import ShardCoordinator, ROLE_COORDINATOR
 from src.data.market_data import MarketDataProvider
+from src.data.price_stream import PriceStream
+from src.data.order_book import OrderBookManager
+from src.data.kline_store import KlineStore
+from src.utils.analytics_export import AnalyticsExporter
+from src.utils.rate_limiter import TokenBucket
+from src.utils.metrics import MetricsRegistry
+from src.utils.tracing import Tracer, TracedClient
 
 logger = logging.getLogger(__name__)
 
+# Sinais recentes mantidos para o painel
+RECENT_SIGNALS = 50
+
+# Idade máxima do preço do stream para dispensar a consulta REST no monitoramento (segundos)
+STREAM_PRICE_MAX_AGE = 5.0
+
 class BinanceTradingBot:
-    def _get_min_notional(self, symbol: str) -> float:
-        """Obtém o valor mínimo de notional exigido para o símbolo."""
-        try:
-            info = self.client.get_symbol_info(symbol)
-            for f in info['filters']:
-                if f['filterType'] == 'MIN_NOTIONAL':
-                    return float(f['minNotional'])
-        except Exception as e:
-            logger.error(f"Erro ao buscar MIN_NOTIONAL do símbolo {symbol}: {e}")
-        return 0.0
-    def _get_lot_size_info(self, symbol: str):
-        """Obtém stepSize, minQty e maxQty do símbolo."""
-        try:
-            info = self.client.get_symbol_info(symbol)
-            for f in info['filters']:
-                if f['filterType'] == 'LOT_SIZE':
-                    step_size = float(f['stepSize'])
-                    min_qty = float(f['minQty'])
-                    max_qty = float(f['maxQty'])
-                    precision = abs(decimal.Decimal(str(step_size)).as_tuple().exponent)
-                    return step_size, min_qty, max_qty, precision
-        except Exception as e:
-            logger.error(f"Erro ao buscar LOT_SIZE do símbolo {symbol}: {e}")
-        return 1e-6, 1e-6, 1e6, 6  # valores padrão
     """Bot de trading automatizado para Binance"""
     
     def __init__(self, config):
@@ -54,13 +49,71 @@ class BinanceTradingBot:
         
         # Estado do bot
         self.symbols_to_analyze = []
-        self.last_analysis_time = {}
         self.execution_errors = []
+        self.recent_signals = deque(maxlen=RECENT_SIGNALS)
         self.market_data = None
+        self.order_manager = None
+        self.price_stream = None
+        self.order_books = None
+        self.execution = None
+        self.scheduler = None
+        self._stream_updates: Dict[str, float] = {}
+        self._closing_symbols = set()
+        self._close_lock = Lock()
+        
+        # Limite de envio de ordens/cancelamentos compartilhado entre as threads
+        self.order_rate_limiter = TokenBucket(getattr(config, 'order_rate_limit', 10))
+        self.mass_close = MassCloseExecutor(
+            self._cancel_protective_orders,
+            self._close_position,
+            max_workers=getattr(config, 'mass_close_workers', 8),
+            is_open_fn=lambda symbol: symbol in self.risk_manager.positions
+        )
+        
+        # Spans e histogramas de latência por etapa e por chamada à corretora
+        self.tracer = Tracer(enabled=getattr(config, 'enable_tracing', True))
+        
+        # Contadores e medidores exportados em /metrics (atualizados sem locks)
+        self.metrics = MetricsRegistry()
+        self.scans_total = self.metrics.counter('scans_total', 'Varreduras de sinais executadas')
+        self.symbols_analyzed_total = self.metrics.counter(
+            'symbols_analyzed_total', 'Símbolos enviados para a análise completa')
+        self.signals_total = self.metrics.counter(
+            'signals_total', 'Sinais encontrados por força e se foram executados', ('strength', 'executed'))
+        self.api_weight_used = self.metrics.gauge('api_weight_used_1m', 'Peso de API da Binance usado no minuto')
         
         # Inicializar componentes
-        self.technical_analyzer = TechnicalAnalyzer(config)
         self.risk_manager = RiskManager(config, self)
+        self.analysis = AnalysisPipeline(config, on_klines=self._on_klines, tracer=self.tracer)
+        self.technical_analyzer = self.analysis.technical_analyzer
+        self.prescreener = self.analysis.prescreener
+        self.cadence = self.analysis.cadence
+        self.last_analysis_time = self.analysis.last_analysis_time
+        
+        # Análise distribuída: workers analisam, este processo decide e executa
+        self.shard_coordinator = None
+        if getattr(config, 'shard_role', 'standalone') == ROLE_COORDINATOR:
+            self.shard_coordinator = ShardCoordinator(
+                getattr(config, 'shard_address', '127.0.0.1:7400'),
+                getattr(config, 'shard_authkey', ''),
+                scan_timeout=getattr(config, 'shard_scan_timeout', 30.0)
+            )
+        self.trigger_engine = TriggerEngine(
+            self._on_trigger,
+            trailing_stop_pct=getattr(config, 'trailing_stop_pct', 0.0)
+        )
+        
+        # Histórico local de candles e patrimônio para os gráficos do dashboard
+        self.kline_store = KlineStore(getattr(config, 'kline_store_path', None))
+        self._last_equity_point = 0.0
+        
+        # Exportação de trades, sinais e patrimônio em Parquet
+        self.analytics = None
+        if getattr(config, 'enable_analytics_export', True):
+            self.analytics = AnalyticsExporter(
+                export_dir=getattr(config, 'analytics_export_dir', None),
+                equity_interval=getattr(config, 'equity_snapshot_interval', 300)
+            )
         
         # Inicializar cliente Binance por último
         self._initialize_client()
@@ -71,11 +124,11 @@ class BinanceTradingBot:
             if not self.config.api_key or not self.config.api_secret:
                 raise ValueError("API Key e Secret são obrigatórios")
             
-            self.client = Client(
+            self.client = TracedClient(Client(
                 api_key=self.config.api_key,
                 api_secret=self.config.api_secret,
                 testnet=getattr(self.config, 'testnet', True)  # Usar testnet por padrão
-            )
+            ), self.tracer, weight_gauge=self.api_weight_used)
             
             # Testar conexão
             account_info = self.client.get_account()
@@ -83,6 +136,42 @@ class BinanceTradingBot:
             
             # Inicializar market data provider
             self.market_data = MarketDataProvider(self.client, self.config)
+            self.analysis.client = self.client
+            
+            # Envio e acompanhamento de ordens (simuladas no testnet)
+            self.order_manager = OrderManager(
+                self.client,
+                self.config,
+                simulated=getattr(self.config, 'testnet', True),
+                on_update=self._on_order_update,
+                rate_limiter=self.order_rate_limiter,
+                on_account_update=lambda msg: self._trigger('capital'),
+                metrics=self.metrics
+            )
+            
+            # Restaurar posições salvas com preços, exchange info e saldos em lote
+            self.risk_manager.rehydrate_positions(
+                self.client,
+                self.market_data,
+                reconcile=not getattr(self.config, 'testnet', True)
+            )
+            
+            # Livros de ofertas locais para spread e profundidade na entrada
+            if getattr(self.config, 'enable_order_book', True):
+                self.order_books = OrderBookManager(self.config, self.client)
+                self.risk_manager.order_books = self.order_books
+            
+            # Execução fatiada (TWAP/iceberg) para ordens grandes
+            self.execution = ExecutionEngine(
+                self.order_manager,
+                self.market_data,
+                self.config,
+                order_books=self.order_books
+            )
+            
+            # Stream de preços para os gatilhos de SL/TP em tempo real
+            if getattr(self.config, 'enable_price_stream', True):
+                self.price_stream = PriceStream(self.config, self._on_price_update)
             
             # Atualizar informações de capital
             self._update_capital_info()
@@ -121,10 +210,25 @@ class BinanceTradingBot:
             
             # Obter símbolos para análise
             self._update_symbols_list()
-            
-            # Thread principal do bot
-            bot_thread = Thread(target=self._main_loop, daemon=True)
-            bot_thread.start()
+            if self.shard_coordinator:
+                self.shard_coordinator.start()
+            if self.order_books:
+                self.order_books.start()
+            
+            # Registrar gatilhos das posições existentes e iniciar stream de preços
+            for position in list(self.risk_manager.positions.values()):
+                self.trigger_engine.register_position(position)
+            if self.price_stream:
+                self.price_stream.start()
+                self._sync_price_stream()
+            
+            # Confirmação de execuções pelo user data stream
+            if self.order_manager:
+                self.order_manager.start_stream()
+            
+            # Etapas disparadas por fechamento de candle, preços e eventos da conta
+            self.scheduler = self._build_scheduler()
+            self.scheduler.start()
             
             logger.info("✅ Bot iniciado com sucesso")
             
@@ -137,12 +241,29 @@ class BinanceTradingBot:
         """Para o bot de trading"""
         logger.info("🛑 Parando Bot de Trading...")
         
-        # Salvar estado das posições antes de parar
+        # Gravar eventos pendentes e salvar estado das posições antes de parar
         if hasattr(self, 'risk_manager'):
-            self.risk_manager._save_positions()
+            self.risk_manager.persistence_writer.stop()
+            self.risk_manager.ledger.flush()
+        if self.analytics:
+            self.analytics.close()
+        if self.execution:
+            self.execution.stop()
         
         self.is_running = False
         self.stop_event.set()
+        if self.scheduler:
+            self.scheduler.stop()
+        
+        if self.price_stream:
+            self.price_stream.stop()
+        if self.order_manager:
+            self.order_manager.stop_stream()
+        if self.order_books:
+            self.order_books.stop()
+        if self.shard_coordinator:
+            self.shard_coordinator.stop()
+        
         logger.info("✅ Bot parado")
     
     def run(self):
@@ -172,42 +293,54 @@ class BinanceTradingBot:
                 self.stop()
             logger.info("🏁 Execução finalizada")
     
-    def _main_loop(self):
-        """Loop principal do bot"""
-        logger.info("🔄 Iniciando loop principal do bot")
+    def _build_scheduler(self) -> Scheduler:
+        """Agenda cada etapa do bot pelo seu próprio gatilho"""
+        scheduler = Scheduler()
         
-        while self.is_running and not self.stop_event.is_set():
-            try:
-                logger.info("📊 Executando ciclo de análise...")
-                
-                # Atualizar informações de capital
-                self._update_capital_info()
-                
-                # Verificar posições existentes
-                self._monitor_positions()
-                
-                # Verificar proteção de capital
-                self._check_risk_protection()
-                
-                # Procurar novos sinais se possível abrir posições
-                if self.risk_manager.can_open_position():
-                    logger.info("🔍 Procurando novos sinais de trading...")
-                    self._scan_for_signals()
-                else:
-                    logger.info("⏸️ Máximo de posições atingido ou proteção ativa")
-                
-                logger.info(f"⏰ Aguardando próximo ciclo (60 segundos)...")
-                
-                # Aguardar antes da próxima iteração
-                if self.stop_event.wait(60):  # 1 minuto entre ciclos
-                    break
-                    
-            except Exception as e:
-                logger.error(f"❌ Erro no loop principal: {e}")
-                logger.info("⏳ Aguardando 30 segundos antes de tentar novamente...")
-                time.sleep(30)  # Aguardar 30s em caso de erro
+        # Capital: eventos da conta e execuções de ordens, com atualização periódica de reserva
+        scheduler.add_event(
+            'capital', self.tracer.wrap('cycle.capital', self._update_capital_info),
+            min_interval=1.0,
+            interval=getattr(self.config, 'capital_refresh_interval', 300.0),
+            deadline=10.0
+        )
+        
+        # Monitoramento e proteção: a cada atualização de preço (agrupadas), com reserva periódica
+        scheduler.add_event(
+            'monitor', self.tracer.wrap('cycle.monitor', self._run_monitor_cycle),
+            min_interval=getattr(self.config, 'monitor_min_interval', 1.0),
+            interval=getattr(self.config, 'monitor_interval', 60.0),
+            deadline=10.0,
+            run_immediately=True
+        )
         
-        logger.info("🏁 Loop principal finalizado")
+        # Busca de sinais logo após o fechamento dos candles de cada timeframe
+        timeframes = [tf for tf in self.config.timeframes if tf in TIMEFRAME_SECONDS]
+        scheduler.add_candle_close(
+            'scan', self.tracer.wrap('cycle.scan', self._run_scan_cycle), timeframes,
+            offset=getattr(self.config, 'scan_candle_offset', 2.0),
+            jitter=getattr(self.config, 'scheduler_jitter', 1.0),
+            deadline=getattr(self.config, 'scan_deadline', 120.0),
+            run_immediately=True
+        )
+        return scheduler
+    
+    def _run_monitor_cycle(self):
+        """Posições, proteção de capital e snapshot de patrimônio"""
+        with self.tracer.span('monitor.positions'):
+            self._monitor_positions()
+        with self.tracer.span('monitor.risk_protection'):
+            self._check_risk_protection()
+        with self.tracer.span('monitor.equity_snapshot'):
+            self._record_equity_snapshot()
+    
+    def _run_scan_cycle(self, closed_timeframes: List[str]):
+        """Procura novos sinais após o fechamento de candles"""
+        if not self.risk_manager.can_open_position():
+            logger.info("⏸️ Máximo de posições atingido ou proteção ativa")
+            return
+        logger.info(f"🔍 Procurando novos sinais de trading (candles fechados: {', '.join(closed_timeframes) or '-'})...")
+        self._scan_for_signals()
     
     def _update_symbols_list(self):
         """Atualiza lista de símbolos para análise"""
@@ -224,6 +357,8 @@ class BinanceTradingBot:
             )
             
             self.symbols_to_analyze = symbols
+            if self.order_books:
+                self.order_books.set_symbols(symbols)
             logger.info(f"📈 Símbolos para análise: {len(symbols)} ({', '.join(symbols[:5])}{'...' if len(symbols) > 5 else ''})")
             
         except Exception as e:
@@ -233,154 +368,204 @@ class BinanceTradingBot:
             logger.info(f"📈 Usando símbolos padrão: {self.symbols_to_analyze}")
     
     def _scan_for_signals(self):
-        """Escaneia símbolos em busca de sinais de trading"""
-        signals_found = 0
+        """Escaneia símbolos em busca de sinais de trading
+        
+        Duas etapas: a pré-seleção vetorizada sobre o snapshot de 24h escolhe os
+        candidatos, e só eles passam pela análise completa (localmente ou nos
+        workers de análise). Os sinais obtidos são executados em ordem de
+        confiança (uma posição por ciclo).
+        """
+        workers = self.shard_coordinator.worker_ids if self.shard_coordinator else []
+        with self.tracer.span('scan.select_candidates'):
+            candidates = self._select_candidates(max(1, len(workers)))
+        self.scans_total.inc()
+        self.symbols_analyzed_total.inc(len(candidates))
+        
+        with self.tracer.span('scan.analyze'):
+            if workers:
+                signals = self._scan_sharded(candidates)
+            else:
+                signals = self.analysis.scan(candidates)
+        
+        executed_symbol = None
         
-        for symbol in self.symbols_to_analyze:
+        for signal in signals:
+            executed = False
             try:
-                # Verificar se já analisou recentemente
-                if self._should_skip_analysis(symbol):
-                    continue
-                
-                logger.debug(f"🔍 Analisando {symbol}...")
-                
-                # Analisar símbolo
-                signal = self._analyze_symbol(symbol)
-                
-                if signal and self.risk_manager.can_open_position(signal):
+                if executed_symbol is None and self.risk_manager.can_open_position(signal):
                     # Executar ordem
-                    if self._execute_signal(signal):
-                        logger.info(f"✅ Sinal executado para {symbol}")
-                        signals_found += 1
-                        break  # Uma posição por ciclo
-                
-                # Atualizar tempo da última análise
-                self.last_analysis_time[symbol] = datetime.now()
-                
+                    with self.tracer.span('scan.execute_signal'):
+                        executed = self._execute_signal(signal)
             except Exception as e:
-                logger.error(f"❌ Erro analisando {symbol}: {e}")
+                logger.error(f"❌ Erro executando sinal de {signal.symbol}: {e}")
+            
+            if self.analytics:
+                self.analytics.record_signal(signal, executed)
+            self.signals_total.labels(signal.strength.name, str(executed).lower()).inc()
+            self.recent_signals.append(self._signal_summary(signal, executed))
+            
+            if executed:
+                executed_symbol = signal.symbol
+                logger.info(f"✅ Sinal executado para {signal.symbol} (confiança: {signal.confidence:.2%})")
         
-        if signals_found == 0:
-            logger.info("📊 Nenhum sinal de trading encontrado neste ciclo")
+        if executed_symbol is None:
+            logger.info(f"📊 Nenhum sinal de trading executado neste ciclo ({len(signals)} sinais encontrados)")
+    
+    @staticmethod
+    def _signal_summary(signal: MarketSignal, executed: bool) -> Dict[str, Any]:
+        """Resumo do sinal para o painel (sem os dados detalhados da análise)"""
+        summary = signal.to_dict()
+        summary.pop('analysis_data', None)
+        summary['executed'] = executed
+        return summary
+    
+    def _scan_sharded(self, candidates: List[str]) -> List[MarketSignal]:
+        """Análise nos workers; correlação e cadência voltam para o estado deste processo"""
+        result = self.shard_coordinator.scan(
+            candidates,
+            correlation_timeframe=self.risk_manager.correlation_engine.timeframe
+        )
+        for symbol, klines in result['correlation'].items():
+            self.risk_manager.correlation_engine.update(symbol, klines)
+        analyzed_at = datetime.now()
+        for symbol, next_due in result['analyzed'].items():
+            self.last_analysis_time[symbol] = analyzed_at
+            if next_due is not None:
+                self.cadence.schedule(symbol, next_due)
+        return result['signals']
+    
+    def _select_candidates(self, shards: int = 1) -> List[str]:
+        """Símbolos que passam pela análise completa neste ciclo (top-K por shard de análise)"""
+        top_k = getattr(self.config, 'prescreen_top_k', 10) * shards
+        exclude = set(self.risk_manager.positions) | set(self._closing_symbols)
+        exclude.update(symbol for symbol in self.last_analysis_time if self._should_skip_analysis(symbol))
+        
+        tickers = self.market_data.get_ticker_snapshot() if self.market_data else []
+        candidates = self.prescreener.candidates(tickers, exclude=exclude, top_k=top_k) if tickers else []
+        if not candidates:
+            # Sem snapshot: segue a lista por volume
+            candidates = self.cadence.order((s for s in self.symbols_to_analyze if s not in exclude), limit=top_k)
+        return candidates
     
     def _should_skip_analysis(self, symbol: str) -> bool:
         """Verifica se deve pular a análise de um símbolo"""
-        if symbol not in self.last_analysis_time:
-            return False
-        
-        # Analisar no máximo a cada 5 minutos
-        time_diff = datetime.now() - self.last_analysis_time[symbol]
-        return time_diff.total_seconds() < 300
+        return self.analysis.should_skip(symbol)
     
     def _analyze_symbol(self, symbol: str) -> Optional[MarketSignal]:
         """Analisa um símbolo específico"""
+        return self.analysis.analyze(symbol)
+    
+    def _on_klines(self, symbol: str, klines_data: Dict[str, List]):
+        """Alimentar a matriz de correlação e o histórico local com os candles já obtidos"""
+        correlation_klines = klines_data.get(self.risk_manager.correlation_engine.timeframe)
+        if correlation_klines:
+            self.risk_manager.correlation_engine.update(symbol, correlation_klines)
         try:
-            # Obter dados de múltiplos timeframes
-            klines_data = {}
-            
-            for timeframe in self.config.timeframes:
-                klines = self.client.get_klines(
-                    symbol=symbol,
-                    interval=timeframe,
-                    limit=100
-                )
-                klines_data[timeframe] = klines
-            
-            # Análise técnica
-            signal = self.technical_analyzer.analyze_symbol(symbol, klines_data)
-            
-            if signal:
-                logger.info(f"📊 Sinal encontrado para {symbol}: {signal.strength.name} (confiança: {signal.confidence:.2%})")
-            
-            return signal
-            
+            for timeframe, klines in klines_data.items():
+                self.kline_store.upsert_klines(symbol, timeframe, klines)
         except Exception as e:
-            logger.error(f"❌ Erro na análise de {symbol}: {e}")
-            return None
+            logger.error(f"Erro gravando candles de {symbol}: {e}")
     
     def _execute_signal(self, signal: MarketSignal) -> bool:
         """Executa um sinal de trading"""
         try:
             logger.info(f"🎯 Executando sinal para {signal.symbol}")
             
-            # Calcular tamanho da posição
+            if self.execution and signal.symbol in self.execution.active:
+                logger.warning(f"Entrada em {signal.symbol} já em execução")
+                return False
+            
+            # Livro local: spread e preço de execução sem chamada REST
+            book = self.order_books.get_book(signal.symbol) if self.order_books else None
+            spread = book.spread_pct() if book is not None else None
+            if spread is not None and spread > self.config.max_spread:
+                logger.warning(
+                    f"❌ Spread de {signal.symbol} acima do limite: {spread:.3f}% > {self.config.max_spread}%"
+                )
+                return False
+            
+            # Calcular tamanho da posição (limitado pela profundidade do livro)
             position_size = self.risk_manager._calculate_position_size(signal)
-            step_size, min_qty, max_qty, precision = self._get_lot_size_info(signal.symbol)
-            # Ajustar para múltiplo de step_size e dentro dos limites
-            position_size = max(min_qty, min(position_size, max_qty))
-            # Arredondar para múltiplo de step_size
-            position_size = float(decimal.Decimal(str(position_size)).quantize(decimal.Decimal(str(step_size))))
-            # Formatar quantity como string decimal simples
-            quantity_str = format(position_size, f'.{precision}f').rstrip('0').rstrip('.')
-
-            # Verificar notional mínimo
-            min_notional = self._get_min_notional(signal.symbol)
-            # Usar preço de mercado para cálculo do notional
-            try:
-                ticker = self.client.get_symbol_ticker(symbol=signal.symbol)
-                market_price = float(ticker['price'])
-            except Exception:
-                market_price = signal.entry_price
-            notional = position_size * market_price
-            if notional < min_notional:
-                logger.warning(f"❌ Notional ({notional}) menor que o mínimo ({min_notional}) para {signal.symbol}")
+            
+            rules = self.market_data.get_quantization_table().get(signal.symbol)
+            if rules is None:
+                logger.warning(f"❌ Regras de negociação indisponíveis para {signal.symbol}")
                 return False
-
-            if position_size < min_qty or position_size > max_qty or position_size <= 0:
-                logger.warning(f"❌ Tamanho de posição inválido para {signal.symbol}: {position_size}")
+            
+            # Usar preço de mercado para cálculo do notional
+            market_price = book.best_ask() if book is not None else None
+            if market_price is None:
+                try:
+                    ticker = self.client.get_symbol_ticker(symbol=signal.symbol)
+                    market_price = float(ticker['price'])
+                except Exception:
+                    market_price = signal.entry_price
+            
+            # Ajustar ao step/limites do símbolo e validar o notional
+            sized = rules.size_order(position_size, market_price)
+            if not sized.valid:
+                logger.warning(f"❌ Tamanho de posição inválido para {signal.symbol}: {sized.reason}")
                 return False
+            position_size = sized.quantity
+            quantity_str = sized.quantity_str
+            
+            # Entradas grandes são fatiadas em segundo plano; a posição é criada na
+            # primeira execução e cresce a cada fatia
+            if self.execution and self.execution.should_slice(sized.notional):
+                self.execution.execute(
+                    signal.symbol, 'BUY', position_size,
+                    purpose='entry',
+                    key=signal.timestamp.isoformat(),
+                    reference_price=market_price,
+                    on_child=lambda parent, child: self._on_entry_child(signal, parent, child),
+                    on_complete=lambda parent: self._on_entry_complete(signal, parent)
+                )
+                signal.execute()
+                return True
 
-            # No testnet, simular execução da ordem
+            # Enviar ordem (simulada no testnet); o ID é derivado do sinal, então
+            # uma repetição do mesmo sinal não gera uma segunda compra
             if self.config.testnet:
                 logger.info(f"🧪 TESTNET: Simulando ordem de compra para {signal.symbol}")
-                logger.info(f"   Quantidade: {position_size}")
-                logger.info(f"   Preço estimado: {signal.entry_price}")
-
-                # Simular ordem executada
-                success = self.risk_manager.add_position(
-                    symbol=signal.symbol,
-                    side='BUY',
-                    size=position_size,
-                    entry_price=signal.entry_price,
-                    stop_loss=signal.stop_loss,
-                    take_profit=signal.take_profit,
-                    risk_amount=signal.risk_amount
-                )
-
-                if success:
-                    signal.execute()
-                    logger.info(f"✅ Posição simulada criada para {signal.symbol}")
-
-                return success
-
-            else:
-                # Executar ordem real
-                order = self.client.order_market_buy(
-                    symbol=signal.symbol,
-                    quantity=quantity_str
-                )
-
-                if order['status'] == 'FILLED':
-                    # Registrar posição
-                    executed_price = float(order['fills'][0]['price']) if order['fills'] else signal.entry_price
-
-                    success = self.risk_manager.add_position(
-                        symbol=signal.symbol,
-                        side='BUY',
-                        size=position_size,
-                        entry_price=executed_price,
-                        stop_loss=signal.stop_loss,
-                        take_profit=signal.take_profit,
-                        risk_amount=signal.risk_amount
-                    )
-
-                    if success:
-                        # Configurar stop loss e take profit
-                        self._set_stop_loss_take_profit(signal.symbol, signal.stop_loss, signal.take_profit)
-                        signal.execute()
-                        return True
-
+            order = self.order_manager.market_order(
+                signal.symbol, 'BUY', quantity_str,
+                purpose='entry',
+                key=signal.timestamp.isoformat(),
+                reference_price=signal.entry_price
+            )
+            order = self.order_manager.wait(order)
+            
+            executed_quantity = order.executed_quantity
+            if executed_quantity <= 0:
+                logger.warning(f"❌ Ordem de compra de {signal.symbol} sem execução: {order}")
                 return False
+            if order.status != OrderStatus.FILLED:
+                logger.warning(f"⚠️ Compra parcial em {signal.symbol}: {executed_quantity}/{position_size}")
+            
+            executed_price = order.vwap or signal.entry_price
+            self.risk_manager.ledger.record_order(
+                signal.symbol, 'BUY', order.as_response(), price=executed_price, simulated=order.simulated
+            )
+            
+            # Registrar posição com a quantidade realmente executada
+            success = self.risk_manager.add_position(
+                symbol=signal.symbol,
+                side='BUY',
+                size=executed_quantity,
+                entry_price=executed_price,
+                stop_loss=signal.stop_loss,
+                take_profit=signal.take_profit,
+                risk_amount=signal.risk_amount
+            )
+            
+            if success:
+                # Configurar stop loss e take profit
+                self._set_stop_loss_take_profit(signal.symbol, signal.stop_loss, signal.take_profit)
+                signal.execute()
+                self._track_position(signal.symbol)
+                logger.info(f"✅ Posição criada para {signal.symbol} a {executed_price} (VWAP)")
+            
+            return success
             
         except BinanceAPIException as e:
             logger.error(f"❌ Erro da API Binance executando {signal.symbol}: {e}")
@@ -389,6 +574,48 @@ class BinanceTradingBot:
             logger.error(f"❌ Erro executando sinal {signal.symbol}: {e}")
             return False
     
+    def _record_child_order(self, parent: ParentOrder, child):
+        """Registra no ledger uma fatia executada de uma ordem-mãe"""
+        if child.executed_quantity > 0:
+            self.risk_manager.ledger.record_order(
+                child.symbol, child.side, child.as_response(), price=child.vwap, simulated=child.simulated
+            )
+    
+    def _on_entry_child(self, signal: MarketSignal, parent: ParentOrder, child):
+        """Cria ou aumenta a posição a cada fatia executada da entrada"""
+        self._record_child_order(parent, child)
+        if child.executed_quantity <= 0:
+            return
+        
+        position = self.risk_manager.positions.get(signal.symbol)
+        if position is None:
+            self.risk_manager.add_position(
+                symbol=signal.symbol,
+                side='BUY',
+                size=parent.executed_quantity,
+                entry_price=parent.vwap,
+                stop_loss=signal.stop_loss,
+                take_profit=signal.take_profit,
+                risk_amount=signal.risk_amount
+            )
+        else:
+            position.size = parent.executed_quantity
+            position.entry_price = parent.vwap
+            position.update_price(child.vwap)
+            self.risk_manager._record_event('update', signal.symbol, position)
+    
+    def _on_entry_complete(self, signal: MarketSignal, parent: ParentOrder):
+        """Protege a posição montada pela execução fatiada"""
+        position = self.risk_manager.positions.get(signal.symbol)
+        if position is None or position.status == PositionStatus.CLOSING:
+            return
+        self._set_stop_loss_take_profit(signal.symbol, signal.stop_loss, signal.take_profit)
+        self._track_position(signal.symbol)
+        logger.info(
+            f"✅ Posição montada em {signal.symbol}: {parent.executed_quantity} a {parent.vwap} (VWAP, "
+            f"{len(parent.children)} fatias)"
+        )
+    
     def _set_stop_loss_take_profit(self, symbol: str, stop_loss: float, take_profit: float):
         """Configura stop loss e take profit"""
         try:
@@ -405,12 +632,15 @@ class BinanceTradingBot:
             ticker = self.client.get_symbol_ticker(symbol=symbol)
             current_price = float(ticker['price'])
             
-            self.client.order_oco_sell(
+            # Quantidade e preços ajustados ao step/tick do símbolo
+            rules = self.market_data.get_quantization_table().get(symbol)
+            
+            oco = self.client.order_oco_sell(
                 symbol=symbol,
-                quantity=position.size,
-                price=str(take_profit),  # Take Profit Limit Price
-                stopPrice=str(stop_loss * 1.01),  # Stop Price
-                stopLimitPrice=str(stop_loss),  # Stop Limit Price
+                quantity=rules.format_quantity(position.size, market=False),
+                price=rules.format_price(take_profit),  # Take Profit Limit Price
+                stopPrice=rules.format_price(stop_loss * 1.01),  # Stop Price
+                stopLimitPrice=rules.format_price(stop_loss),  # Stop Limit Price
                 stopLimitTimeInForce='GTC',
                 listClientOrderId=f"tp_sl_{symbol}_{int(time.time())}",  # ID único para a ordem
                 limitClientOrderId=f"tp_{symbol}_{int(time.time())}",    # ID para Take Profit
@@ -425,6 +655,8 @@ class BinanceTradingBot:
                 belowType="LOWER",   # Stop Loss abaixo do preço atual
             )
             
+            position.protective_order_id = oco.get('orderListId')
+            self.risk_manager._record_event('update', symbol, position)
             logger.info(f"✅ Stop Loss e Take Profit configurados para {symbol}")
             
         except Exception as e:
@@ -437,23 +669,32 @@ class BinanceTradingBot:
         
         logger.debug(f"👁️ Monitorando {len(self.risk_manager.positions)} posições...")
         
+        # Exchange info em cache, em vez de uma chamada por posição
+        symbols_info = self.market_data.get_exchange_info()
+        
         for symbol in list(self.risk_manager.positions.keys()):
             try:
                 # Verificar se o símbolo ainda existe
-                symbol_info = self.client.get_symbol_info(symbol)
-                if symbol_info is None:
+                if symbols_info and symbol not in symbols_info:
                     logger.warning(f"Símbolo {symbol} não mais disponível, fechando posição")
                     self._close_position(symbol, "Símbolo indisponível")
                     continue
                 
                 try:
-                    # Obter preço atual
-                    ticker = self.client.get_symbol_ticker(symbol=symbol)
-                    current_price = float(ticker['price'])
+                    # Preço do stream se recente; senão, consulta REST
+                    if time.time() - self._stream_updates.get(symbol, 0) <= STREAM_PRICE_MAX_AGE:
+                        current_price = self.risk_manager.positions[symbol].current_price
+                    else:
+                        ticker = self.client.get_symbol_ticker(symbol=symbol)
+                        current_price = float(ticker['price'])
                     
                     # Atualizar PnL
                     self.risk_manager.update_position_pnl(symbol, current_price)
                     
+                    # Rearmar gatilhos em tempo real que tenham falhado
+                    if symbol not in self.trigger_engine.symbols():
+                        self.trigger_engine.register_position(self.risk_manager.positions[symbol])
+                    
                     # Verificar se deve fechar
                     should_close, reason = self.risk_manager.should_close_position(symbol)
                     
@@ -463,49 +704,220 @@ class BinanceTradingBot:
                 except BinanceAPIException as e:
                     if e.code == -1121:  # Invalid symbol
                         logger.error(f"Símbolo {symbol} inválido, removendo posição")
-                        del self.risk_manager.positions[symbol]
+                        self.risk_manager.remove_position(symbol)
+                        self.trigger_engine.unregister_position(symbol)
                     else:
                         logger.error(f"❌ Erro da API Binance para {symbol}: {e}")
                 
             except Exception as e:
                 logger.error(f"❌ Erro monitorando posição {symbol}: {e}")
+        
+        # Recalcular risco da carteira com os preços atualizados
+        metrics = self.risk_manager.update_risk_metrics()
+        if metrics:
+            logger.debug(
+                f"VaR {metrics['confidence']:.0%} ({metrics['horizon']}): "
+                f"{metrics['historical_var']:.2f} USDT | ES: {metrics['historical_es']:.2f} USDT"
+            )
     
     def _check_risk_protection(self):
         """Verifica proteção de risco"""
         positions_to_close = self.risk_manager.check_capital_protection()
+        if not positions_to_close:
+            return
         
-        for symbol in positions_to_close:
-            self._close_position(symbol, "Proteção de capital")
+        # Todas as vendas saem ao mesmo tempo, em vez de uma por vez
+        report = self.mass_close.close_all(positions_to_close, "Proteção de capital")
+        for symbol, error in report['failed'].items():
+            self.execution_errors.append({
+                'symbol': symbol,
+                'error': f"Falha no encerramento por proteção de capital: {error}",
+                'timestamp': datetime.now().isoformat()
+            })
+    
+    def _cancel_protective_orders(self, symbol: str):
+        """Cancela a OCO de SL/TP da posição, liberando o saldo para a venda a mercado"""
+        position = self.risk_manager.positions.get(symbol)
+        if not position or position.protective_order_id is None or self.config.testnet:
+            return
+        
+        self.order_rate_limiter.acquire()
+        try:
+            self.client.v3_delete_order_list(symbol=symbol, orderListId=position.protective_order_id)
+            logger.info(f"OCO de {symbol} cancelada")
+        except BinanceAPIException as e:
+            # -2011: a OCO já foi executada ou cancelada
+            if e.code != -2011:
+                raise
+        position.protective_order_id = None
+        self.risk_manager._record_event('update', symbol, position)
     
     def _close_position(self, symbol: str, reason: str):
         """Encerrar uma posição"""
+        # Evitar fechamento duplicado (gatilho em tempo real x monitoramento)
+        with self._close_lock:
+            if symbol in self._closing_symbols:
+                logger.debug(f"Fechamento de {symbol} já em andamento")
+                return
+            self._closing_symbols.add(symbol)
+        
         try:
+            # Uma entrada fatiada ainda em andamento é interrompida antes da venda
+            if self.execution and self.execution.cancel(symbol):
+                logger.info(f"Entrada fatiada de {symbol} interrompida para encerramento")
+            
             position = self.risk_manager.positions.get(symbol)
             if position:
-                self.logger.info(f"Encerrando posição em {symbol} por {reason}")
-                order = self.client.order_market_sell(
-                    symbol=symbol,
-                    quantity=str(position.size)
-                )
-                self.logger.info(f"Posição encerrada: {order}")
-                del self.risk_manager.positions[symbol]
+                logger.info(f"Encerrando posição em {symbol} por {reason}")
+                
+                # A OCO ativa bloqueia o saldo da venda
+                self._cancel_protective_orders(symbol)
                 
-                # Emitir atualização via WebSocket
-                if hasattr(self, 'app') and hasattr(self.app, 'emit_to_all_clients'):
-                    try:
-                        positions = list(self.risk_manager.positions.values())
-                        daily_pnl = sum(pos.unrealized_pnl for pos in positions)
-                        self.app.emit_to_all_clients('update_positions', {
-                            'positions': [pos.to_dict() for pos in positions],
-                            'active_positions': len(positions),
-                            'daily_pnl': daily_pnl,
-                            'timestamp': datetime.now().isoformat()
-                        })
-                    except Exception as e:
-                        logger.error(f"Erro ao emitir atualização WebSocket: {e}")
+                # A posição só é removida depois que a venda for confirmada
+                position.status = PositionStatus.CLOSING
+                self.risk_manager._record_event('update', symbol, position)
+                
+                quantity = position.size
+                rules = self.market_data.get_quantization_table().get(symbol)
+                quantity_str = rules.format_quantity(quantity) if rules else str(quantity)
+                if float(quantity_str) <= 0:
+                    # Resíduo abaixo do step não pode ser vendido
+                    logger.warning(f"Quantidade de {symbol} ({quantity}) abaixo do step, removendo resíduo")
+                    self.risk_manager.remove_position(symbol, position.unrealized_pnl, reason=reason)
+                    self.trigger_engine.unregister_position(symbol)
+                    self._sync_price_stream()
+                    return
+                exit_key = f"{position.timestamp.isoformat()}:{quantity}"
+                if self.execution and self.execution.should_slice(quantity * position.current_price,
+                                                                  self.execution.exit_algo):
+                    # Saída grande com algoritmo de saída configurado: fatias na própria thread
+                    order = self.execution.execute(
+                        symbol, 'SELL', float(quantity_str),
+                        purpose='exit',
+                        key=exit_key,
+                        reference_price=position.current_price,
+                        algo=self.execution.exit_algo,
+                        on_child=self._record_child_order,
+                        background=False
+                    )
+                else:
+                    order = self.order_manager.market_order(
+                        symbol, 'SELL', quantity_str,
+                        purpose='exit',
+                        key=exit_key,
+                        reference_price=position.current_price
+                    )
+                    order = self.order_manager.wait(order)
+                    if order.executed_quantity > 0:
+                        self.risk_manager.ledger.record_order(
+                            symbol, 'SELL', order.as_response(),
+                            price=order.vwap or position.current_price, simulated=order.simulated
+                        )
+                logger.info(f"Ordem de encerramento: {order}")
+                
+                executed_quantity = order.executed_quantity
+                if executed_quantity <= 0:
+                    position.status = PositionStatus.OPEN
+                    self.risk_manager._record_event('update', symbol, position)
+                    raise RuntimeError(f"Venda de {symbol} não executada ({order.status.value}: {order.error})")
+                
+                # Calcular PnL realizado pelo preço médio de execução
+                exit_price = order.vwap or position.current_price
+                
+                # Sobra abaixo do step (não vendável) não conta como execução parcial
+                if executed_quantity < float(quantity_str) * (1 - 1e-9):
+                    # Execução parcial: mantém o restante aberto para nova tentativa
+                    position.size = quantity - executed_quantity
+                    position.status = PositionStatus.OPEN
+                    position.update_price(exit_price)
+                    self.risk_manager._record_event('update', symbol, position)
+                    raise RuntimeError(f"Venda parcial de {symbol}: {executed_quantity}/{quantity}")
+                
+                position.update_price(exit_price)
+                realized_pnl = position.unrealized_pnl
+                self.risk_manager.remove_position(symbol, realized_pnl, exit_price=exit_price, reason=reason)
+                if self.analytics:
+                    self.analytics.record_trade(position, exit_price, realized_pnl, reason)
+                self.trigger_engine.unregister_position(symbol)
+                self._sync_price_stream()
         except Exception as e:
-            self.logger.error(f"Erro ao encerrar posição: {e}")
+            logger.error(f"Erro ao encerrar posição: {e}")
             raise e
+        finally:
+            with self._close_lock:
+                self._closing_symbols.discard(symbol)
+    
+    def _track_position(self, symbol: str):
+        """Registra os gatilhos de uma nova posição e a inclui no stream de preços"""
+        position = self.risk_manager.positions.get(symbol)
+        if position:
+            self.trigger_engine.register_position(position)
+            self._sync_price_stream()
+    
+    def _sync_price_stream(self):
+        """Mantém o stream de preços alinhado com as posições abertas"""
+        if self.price_stream:
+            self.price_stream.set_symbols(self.risk_manager.positions.keys())
+    
+    def _on_price_update(self, symbol: str, price: float):
+        """Callback do stream de preços (executa na thread do WebSocket)"""
+        position = self.risk_manager.positions.get(symbol)
+        if position is None:
+            return
+        position.update_price(price)
+        self._stream_updates[symbol] = time.time()
+        self.trigger_engine.on_price(symbol, price)
+        self._trigger('monitor')
+    
+    def _on_order_update(self, order):
+        """Callback do OrderManager: execuções alteram o saldo"""
+        if order.is_final:
+            self._trigger('capital')
+    
+    def _trigger(self, task: str):
+        if self.scheduler:
+            self.scheduler.trigger(task)
+    
+    def _on_trigger(self, symbol: str, reason: str):
+        """Dispara o fechamento sem bloquear a thread do stream"""
+        Thread(target=self._close_triggered_position, args=(symbol, reason), daemon=True).start()
+    
+    def _record_equity_snapshot(self):
+        """Registra capital, PnL e exposição atuais (curva de patrimônio e exportação analítica)"""
+        now = time.time()
+        try:
+            if now - self._last_equity_point >= getattr(self.config, 'equity_snapshot_interval', 300):
+                self._last_equity_point = now
+                unrealized_pnl = self.risk_manager.get_total_unrealized_pnl()
+                self.kline_store.record_equity(
+                    now,
+                    self.risk_manager.total_capital + unrealized_pnl,
+                    total_capital=self.risk_manager.total_capital,
+                    unrealized_pnl=unrealized_pnl
+                )
+        except Exception as e:
+            logger.error(f"Erro gravando curva de patrimônio: {e}")
+        if not self.analytics:
+            return
+        try:
+            positions = list(self.risk_manager.positions.values())
+            self.analytics.record_equity(
+                total_capital=self.risk_manager.total_capital,
+                available_capital=self.risk_manager.available_capital,
+                unrealized_pnl=self.risk_manager.get_total_unrealized_pnl(),
+                daily_pnl=self.risk_manager.daily_pnl,
+                open_positions=len(positions),
+                exposure=sum(pos.size * pos.current_price for pos in positions)
+            )
+        except Exception as e:
+            logger.error(f"Erro registrando snapshot de patrimônio: {e}")
+    
+    def _close_triggered_position(self, symbol: str, reason: str):
+        try:
+            self._close_position(symbol, reason)
+        except Exception as e:
+            # Os gatilhos são rearmados no próximo ciclo de monitoramento
+            logger.error(f"❌ Erro fechando {symbol} por gatilho: {e}")
     
     def get_status(self) -> Dict[str, Any]:
         """Retorna status do bot"""
@@ -515,6 +927,12 @@ class BinanceTradingBot:
             'symbols_analyzed': len(self.symbols_to_analyze),
             'last_update': datetime.now().isoformat(),
             'errors': self.execution_errors[-10:],  # Últimos 10 erros
+            'execution': self.execution.get_stats() if self.execution else None,
+            'scheduler': self.scheduler.get_stats() if self.scheduler else None,
+            'cadence': self.cadence.get_stats(),
+            'sharding': self.shard_coordinator.get_stats() if self.shard_coordinator else None,
+            'tracing': self.tracer.get_stats(),
+            'metrics': self.metrics.collect(),
             'config': {
                 'testnet': self.config.testnet,
                 'max_positions': self.config.max_positions,
@@ -15,6 +15,54 @@ class Settings:
         self.risk_reward_ratio = float(os.getenv("RISK_REWARD_RATIO", "4.0"))
         self.stop_loss_ratio = float(os.getenv("STOP_LOSS_RATIO", "3.0"))
         self.capital_protection_threshold = float(os.getenv("CAPITAL_PROTECTION_THRESHOLD", "0.85"))
+        self.max_portfolio_correlation = float(os.getenv("MAX_PORTFOLIO_CORRELATION", "0.7"))
+        self.correlation_timeframe = os.getenv("CORRELATION_TIMEFRAME", "1h")
+        self.correlation_window = int(os.getenv("CORRELATION_WINDOW", "99"))
+        self.correlation_min_periods = int(os.getenv("CORRELATION_MIN_PERIODS", "20"))
+        self.var_confidence = float(os.getenv("VAR_CONFIDENCE", "0.95"))
+        self.ledger_path = os.getenv("LEDGER_PATH") or None
+        self.persistence_queue_size = int(os.getenv("PERSISTENCE_QUEUE_SIZE", "1000"))
+        self.persistence_flush_interval = float(os.getenv("PERSISTENCE_FLUSH_INTERVAL", "0.05"))
+        self.enable_analytics_export = os.getenv("ENABLE_ANALYTICS_EXPORT", "True").lower() == "true"
+        self.analytics_export_dir = os.getenv("ANALYTICS_EXPORT_DIR") or None
+        self.equity_snapshot_interval = float(os.getenv("EQUITY_SNAPSHOT_INTERVAL", "300"))
+        self.order_rate_limit = float(os.getenv("ORDER_RATE_LIMIT", "10"))
+        self.mass_close_workers = int(os.getenv("MASS_CLOSE_WORKERS", "8"))
+        self.enable_order_book = os.getenv("ENABLE_ORDER_BOOK", "True").lower() == "true"
+        self.max_slippage = float(os.getenv("MAX_SLIPPAGE", "0.1"))
+        self.execution_algo = os.getenv("EXECUTION_ALGO", "market")
+        self.exit_execution_algo = os.getenv("EXIT_EXECUTION_ALGO", "market")
+        self.sliced_execution_min_notional = float(os.getenv("SLICED_EXECUTION_MIN_NOTIONAL", "1000"))
+        self.twap_duration = float(os.getenv("TWAP_DURATION", "60"))
+        self.twap_slices = int(os.getenv("TWAP_SLICES", "5"))
+        self.iceberg_child_notional = float(os.getenv("ICEBERG_CHILD_NOTIONAL", "250"))
+        self.scan_candle_offset = float(os.getenv("SCAN_CANDLE_OFFSET", "2"))
+        self.scheduler_jitter = float(os.getenv("SCHEDULER_JITTER", "1.0"))
+        self.scan_deadline = float(os.getenv("SCAN_DEADLINE", "120"))
+        self.monitor_interval = float(os.getenv("MONITOR_INTERVAL", "60"))
+        self.monitor_min_interval = float(os.getenv("MONITOR_MIN_INTERVAL", "1.0"))
+        self.capital_refresh_interval = float(os.getenv("CAPITAL_REFRESH_INTERVAL", "300"))
+        self.prescreen_top_k = int(os.getenv("PRESCREEN_TOP_K", "10"))
+        self.cadence_base_interval = float(os.getenv("CADENCE_BASE_INTERVAL", "1800"))
+        self.cadence_min_interval = float(os.getenv("CADENCE_MIN_INTERVAL", "300"))
+        self.cadence_max_interval = float(os.getenv("CADENCE_MAX_INTERVAL", "14400"))
+        self.cadence_timeframe = os.getenv("CADENCE_TIMEFRAME", "1h")
+        self.shard_role = os.getenv("SHARD_ROLE", "standalone")
+        self.shard_address = os.getenv("SHARD_ADDRESS", "127.0.0.1:7400")
+        self.shard_authkey = os.getenv("SHARD_AUTHKEY", "")
+        self.shard_scan_timeout = float(os.getenv("SHARD_SCAN_TIMEOUT", "30"))
+        self.bot_state_path = os.getenv("BOT_STATE_PATH") or None
+        self.bot_state_size = int(os.getenv("BOT_STATE_SIZE", "4194304"))
+        self.state_publish_interval = float(os.getenv("STATE_PUBLISH_INTERVAL", "1.0"))
+        self.bot_control_address = os.getenv("BOT_CONTROL_ADDRESS") or None
+        self.bot_control_authkey = os.getenv("BOT_CONTROL_AUTHKEY") or None
+        self.bot_lock_path = os.getenv("BOT_LOCK_PATH") or None
+        self.position_push_rate = float(os.getenv("POSITION_PUSH_RATE", "2.0"))
+        self.kline_store_path = os.getenv("KLINE_STORE_PATH") or None
+        self.chart_cache_size = int(os.getenv("CHART_CACHE_SIZE", "128"))
+        self.enable_tracing = os.getenv("ENABLE_TRACING", "true").lower() == "true"
+        self.persistence_dir = os.getenv("PERSISTENCE_DIR") or None
+        self.admin_token = os.getenv("ADMIN_TOKEN") or None
         self.max_daily_loss = float(os.getenv("MAX_DAILY_LOSS", "0.05"))
         self.max_risk_per_trade = float(os.getenv("MAX_RISK_PER_TRADE", "0.02"))
         
@@ -35,6 +83,10 @@ class Settings:
         self.min_confidence = float(os.getenv("MIN_CONFIDENCE", "0.6"))
         self.max_spread = float(os.getenv("MAX_SPREAD", "0.5"))
         
+        # Gatilhos em tempo real
+        self.enable_price_stream = os.getenv("ENABLE_PRICE_STREAM", "True").lower() == "true"
+        self.trailing_stop_pct = float(os.getenv("TRAILING_STOP_PCT", "0.0"))
+        
         # Configurações do ambiente
         self.testnet = os.getenv("TESTNET", "True").lower() == "true"
         self.debug_mode = os.getenv("DEBUG_MODE", "False").lower() == "true"
@@ -59,6 +111,16 @@ class Settings:
         if self.max_positions <= 0:
             errors.append("MAX_POSITIONS deve ser maior que 0")
         
+        if self.shard_role not in ('standalone', 'coordinator', 'worker'):
+            errors.append("SHARD_ROLE deve ser standalone, coordinator ou worker")
+        elif self.shard_role != 'standalone' and not self.shard_authkey:
+            errors.append("SHARD_AUTHKEY é obrigatório nos modos coordinator e worker")
+        
+        if self.bot_control_address and not self.bot_control_authkey:
+            from src.bot.sharding import parse_address
+            if isinstance(parse_address(self.bot_control_address), tuple):
+                errors.append("BOT_CONTROL_AUTHKEY é obrigatório quando BOT_CONTROL_ADDRESS é TCP (host:porta)")
+        
         if errors:
             raise ValueError("Configurações inválidas: " + ", ".join(errors))
         
@@ -72,6 +134,51 @@ class Settings:
             'risk_reward_ratio': self.risk_reward_ratio,
             'stop_loss_ratio': self.stop_loss_ratio,
             'capital_protection_threshold': self.capital_protection_threshold,
+            'max_portfolio_correlation': self.max_portfolio_correlation,
+            'correlation_timeframe': self.correlation_timeframe,
+            'correlation_window': self.correlation_window,
+            'correlation_min_periods': self.correlation_min_periods,
+            'var_confidence': self.var_confidence,
+            'ledger_path': self.ledger_path,
+            'persistence_queue_size': self.persistence_queue_size,
+            'persistence_flush_interval': self.persistence_flush_interval,
+            'enable_analytics_export': self.enable_analytics_export,
+            'analytics_export_dir': self.analytics_export_dir,
+            'equity_snapshot_interval': self.equity_snapshot_interval,
+            'order_rate_limit': self.order_rate_limit,
+            'mass_close_workers': self.mass_close_workers,
+            'enable_order_book': self.enable_order_book,
+            'max_slippage': self.max_slippage,
+            'execution_algo': self.execution_algo,
+            'exit_execution_algo': self.exit_execution_algo,
+            'sliced_execution_min_notional': self.sliced_execution_min_notional,
+            'twap_duration': self.twap_duration,
+            'twap_slices': self.twap_slices,
+            'iceberg_child_notional': self.iceberg_child_notional,
+            'scan_candle_offset': self.scan_candle_offset,
+            'scheduler_jitter': self.scheduler_jitter,
+            'scan_deadline': self.scan_deadline,
+            'monitor_interval': self.monitor_interval,
+            'monitor_min_interval': self.monitor_min_interval,
+            'capital_refresh_interval': self.capital_refresh_interval,
+            'prescreen_top_k': self.prescreen_top_k,
+            'cadence_base_interval': self.cadence_base_interval,
+            'cadence_min_interval': self.cadence_min_interval,
+            'cadence_max_interval': self.cadence_max_interval,
+            'cadence_timeframe': self.cadence_timeframe,
+            'shard_role': self.shard_role,
+            'shard_address': self.shard_address,
+            'shard_scan_timeout': self.shard_scan_timeout,
+            'bot_state_path': self.bot_state_path,
+            'bot_state_size': self.bot_state_size,
+            'state_publish_interval': self.state_publish_interval,
+            'bot_control_address': self.bot_control_address,
+            'bot_lock_path': self.bot_lock_path,
+            'position_push_rate': self.position_push_rate,
+            'kline_store_path': self.kline_store_path,
+            'chart_cache_size': self.chart_cache_size,
+            'enable_tracing': self.enable_tracing,
+            'persistence_dir': self.persistence_dir,
             'max_daily_loss': self.max_daily_loss,
             'max_risk_per_trade': self.max_risk_per_trade,
             'timeframes': self.timeframes,
@@ -85,6 +192,8 @@ class Settings:
             'bb_std': self.bb_std,
             'min_confidence': self.min_confidence,
             'max_spread': self.max_spread,
+            'enable_price_stream': self.enable_price_stream,
+            'trailing_stop_pct': self.trailing_stop_pct,
             'testnet': self.testnet,
             'debug_mode': self.debug_mode,
             'web_host': self.web_host,
@@ -17,6 +17,53 @@ class TradingConfig:
         self.risk_reward_ratio = settings.risk_reward_ratio
         self.stop_loss_ratio = settings.stop_loss_ratio
         self.capital_protection_threshold = settings.capital_protection_threshold
+        self.max_portfolio_correlation = getattr(settings, 'max_portfolio_correlation', 0.7)
+        self.correlation_timeframe = getattr(settings, 'correlation_timeframe', '1h')
+        self.correlation_window = getattr(settings, 'correlation_window', 99)
+        self.correlation_min_periods = getattr(settings, 'correlation_min_periods', 20)
+        self.var_confidence = getattr(settings, 'var_confidence', 0.95)
+        self.ledger_path = getattr(settings, 'ledger_path', None)
+        self.persistence_queue_size = getattr(settings, 'persistence_queue_size', 1000)
+        self.persistence_flush_interval = getattr(settings, 'persistence_flush_interval', 0.05)
+        self.enable_analytics_export = getattr(settings, 'enable_analytics_export', True)
+        self.analytics_export_dir = getattr(settings, 'analytics_export_dir', None)
+        self.equity_snapshot_interval = getattr(settings, 'equity_snapshot_interval', 300)
+        self.order_rate_limit = getattr(settings, 'order_rate_limit', 10)
+        self.mass_close_workers = getattr(settings, 'mass_close_workers', 8)
+        self.enable_order_book = getattr(settings, 'enable_order_book', True)
+        self.max_slippage = getattr(settings, 'max_slippage', 0.1)
+        self.execution_algo = getattr(settings, 'execution_algo', 'market')
+        self.exit_execution_algo = getattr(settings, 'exit_execution_algo', 'market')
+        self.sliced_execution_min_notional = getattr(settings, 'sliced_execution_min_notional', 1000.0)
+        self.twap_duration = getattr(settings, 'twap_duration', 60.0)
+        self.twap_slices = getattr(settings, 'twap_slices', 5)
+        self.iceberg_child_notional = getattr(settings, 'iceberg_child_notional', 250.0)
+        self.scan_candle_offset = getattr(settings, 'scan_candle_offset', 2.0)
+        self.scheduler_jitter = getattr(settings, 'scheduler_jitter', 1.0)
+        self.scan_deadline = getattr(settings, 'scan_deadline', 120.0)
+        self.monitor_interval = getattr(settings, 'monitor_interval', 60.0)
+        self.monitor_min_interval = getattr(settings, 'monitor_min_interval', 1.0)
+        self.capital_refresh_interval = getattr(settings, 'capital_refresh_interval', 300.0)
+        self.prescreen_top_k = getattr(settings, 'prescreen_top_k', 10)
+        self.cadence_base_interval = getattr(settings, 'cadence_base_interval', 1800.0)
+        self.cadence_min_interval = getattr(settings, 'cadence_min_interval', 300.0)
+        self.cadence_max_interval = getattr(settings, 'cadence_max_interval', 14400.0)
+        self.cadence_timeframe = getattr(settings, 'cadence_timeframe', '1h')
+        self.shard_role = getattr(settings, 'shard_role', 'standalone')
+        self.shard_address = getattr(settings, 'shard_address', '127.0.0.1:7400')
+        self.shard_authkey = getattr(settings, 'shard_authkey', '')
+        self.shard_scan_timeout = getattr(settings, 'shard_scan_timeout', 30.0)
+        self.bot_state_path = getattr(settings, 'bot_state_path', '')
+        self.bot_state_size = getattr(settings, 'bot_state_size', 4194304)
+        self.state_publish_interval = getattr(settings, 'state_publish_interval', 1.0)
+        self.bot_control_address = getattr(settings, 'bot_control_address', '')
+        self.bot_control_authkey = getattr(settings, 'bot_control_authkey', '')
+        self.bot_lock_path = getattr(settings, 'bot_lock_path', '')
+        self.position_push_rate = getattr(settings, 'position_push_rate', 2.0)
+        self.kline_store_path = getattr(settings, 'kline_store_path', None)
+        self.chart_cache_size = getattr(settings, 'chart_cache_size', 128)
+        self.enable_tracing = getattr(settings, 'enable_tracing', True)
+        self.persistence_dir = getattr(settings, 'persistence_dir', None)
         self.max_daily_loss = settings.max_daily_loss
         
         # Configurações de trading
@@ -39,6 +86,10 @@ class TradingConfig:
         # Configurações de risco por trade
         self.max_risk_per_trade = getattr(settings, 'max_risk_per_trade', 0.02)
         
+        # Gatilhos em tempo real
+        self.enable_price_stream = getattr(settings, 'enable_price_stream', True)
+        self.trailing_stop_pct = getattr(settings, 'trailing_stop_pct', 0.0)
+        
         # Configurações do ambiente
         self.testnet = getattr(settings, 'testnet', True)
         self.debug_mode = getattr(settings, 'debug_mode', False)
@@ -62,6 +113,51 @@ class TradingConfig:
             'risk_reward_ratio': self.risk_reward_ratio,
             'stop_loss_ratio': self.stop_loss_ratio,
             'capital_protection_threshold': self.capital_protection_threshold,
+            'max_portfolio_correlation': self.max_portfolio_correlation,
+            'correlation_timeframe': self.correlation_timeframe,
+            'correlation_window': self.correlation_window,
+            'correlation_min_periods': self.correlation_min_periods,
+            'var_confidence': self.var_confidence,
+            'ledger_path': self.ledger_path,
+            'persistence_queue_size': self.persistence_queue_size,
+            'persistence_flush_interval': self.persistence_flush_interval,
+            'enable_analytics_export': self.enable_analytics_export,
+            'analytics_export_dir': self.analytics_export_dir,
+            'equity_snapshot_interval': self.equity_snapshot_interval,
+            'order_rate_limit': self.order_rate_limit,
+            'mass_close_workers': self.mass_close_workers,
+            'enable_order_book': self.enable_order_book,
+            'max_slippage': self.max_slippage,
+            'execution_algo': self.execution_algo,
+            'exit_execution_algo': self.exit_execution_algo,
+            'sliced_execution_min_notional': self.sliced_execution_min_notional,
+            'twap_duration': self.twap_duration,
+            'twap_slices': self.twap_slices,
+            'iceberg_child_notional': self.iceberg_child_notional,
+            'scan_candle_offset': self.scan_candle_offset,
+            'scheduler_jitter': self.scheduler_jitter,
+            'scan_deadline': self.scan_deadline,
+            'monitor_interval': self.monitor_interval,
+            'monitor_min_interval': self.monitor_min_interval,
+            'capital_refresh_interval': self.capital_refresh_interval,
+            'prescreen_top_k': self.prescreen_top_k,
+            'cadence_base_interval': self.cadence_base_interval,
+            'cadence_min_interval': self.cadence_min_interval,
+            'cadence_max_interval': self.cadence_max_interval,
+            'cadence_timeframe': self.cadence_timeframe,
+            'shard_role': self.shard_role,
+            'shard_address': self.shard_address,
+            'shard_scan_timeout': self.shard_scan_timeout,
+            'bot_state_path': self.bot_state_path,
+            'bot_state_size': self.bot_state_size,
+            'state_publish_interval': self.state_publish_interval,
+            'bot_control_address': self.bot_control_address,
+            'bot_lock_path': self.bot_lock_path,
+            'position_push_rate': self.position_push_rate,
+            'kline_store_path': self.kline_store_path,
+            'chart_cache_size': self.chart_cache_size,
+            'enable_tracing': self.enable_tracing,
+            'persistence_dir': self.persistence_dir,
             'max_daily_loss': self.max_daily_loss,
             'timeframes': self.timeframes,
             'min_volume_usdt': self.min_volume_usdt,
@@ -75,6 +171,8 @@ class TradingConfig:
             'min_confidence': self.min_confidence,
             'max_spread': self.max_spread,
             'max_risk_per_trade': self.max_risk_per_trade,
+            'enable_price_stream': self.enable_price_stream,
+            'trailing_stop_pct': self.trailing_stop_pct,
             'testnet': self.testnet,
             'debug_mode': self.debug_mode
         }
\ No newline at end of file
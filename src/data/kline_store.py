@@ -0,0 +1,205 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KLINE_STORE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'data', 'persistence', 'klines.db'
+)
+
+# Limite de candles por requisição de klines da Binance
+FETCH_LIMIT = 1000
+
+INTERVAL_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000,
+    '8h': 28_800_000, '12h': 43_200_000, '1d': 86_400_000, '3d': 259_200_000, '1w': 604_800_000
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS klines (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    open_time INTEGER NOT NULL,
+    open REAL NOT NULL,
+    high REAL NOT NULL,
+    low REAL NOT NULL,
+    close REAL NOT NULL,
+    volume REAL NOT NULL,
+    PRIMARY KEY (symbol, interval, open_time)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS equity (
+    ts REAL PRIMARY KEY,
+    equity REAL NOT NULL,
+    total_capital REAL,
+    unrealized_pnl REAL
+);
+"""
+
+COLUMNS = ('t', 'o', 'h', 'l', 'c', 'v')
+
+
+class KlineStore:
+    """Histórico local de candles e da curva de patrimônio (SQLite)
+
+    Os candles ficam em uma tabela sem rowid ordenada por (símbolo,
+    intervalo, abertura), então um intervalo de tempo é lido com uma única
+    busca no índice e devolvido em arrays numpy. O bot grava os candles que
+    já busca para a análise; lacunas no período pedido (nas pontas ou entre
+    janelas gravadas) são completadas pela API da Binance quando há um
+    cliente disponível. O banco
+    usa WAL para o servidor web ler enquanto o bot grava.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or DEFAULT_KLINE_STORE_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Candles
+    # ------------------------------------------------------------------
+
+    def upsert_klines(self, symbol: str, interval: str, klines: List) -> int:
+        """Grava candles no formato da API (listas) ou já convertidos"""
+        rows = [
+            (symbol, interval, int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5]))
+            for k in klines
+        ]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO klines (symbol, interval, open_time, open, high, low, close, volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def get_klines(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> Dict[str, np.ndarray]:
+        """Candles com abertura em [start_ms, end_ms), como arrays por coluna"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT open_time, open, high, low, close, volume FROM klines "
+                "WHERE symbol = ? AND interval = ? AND open_time >= ? AND open_time < ? ORDER BY open_time",
+                (symbol, interval, int(start_ms), int(end_ms))
+            ).fetchall()
+        if not rows:
+            return {column: np.empty(0) for column in COLUMNS}
+        matrix = np.array(rows, dtype=float)
+        data = {column: matrix[:, i] for i, column in enumerate(COLUMNS)}
+        data['t'] = data['t'].astype(np.int64)
+        return data
+
+    def bounds(self, symbol: str, interval: str):
+        """Primeira e última abertura gravadas (ou None)"""
+        with self._lock:
+            first, last = self._conn.execute(
+                "SELECT MIN(open_time), MAX(open_time) FROM klines WHERE symbol = ? AND interval = ?",
+                (symbol, interval)
+            ).fetchone()
+        return (first, last) if first is not None else None
+
+    def revision(self, symbol: str, interval: str):
+        """Primeira e última abertura e total de candles: muda a cada candle novo, inclusive em lacunas"""
+        with self._lock:
+            return tuple(self._conn.execute(
+                "SELECT MIN(open_time), MAX(open_time), COUNT(*) FROM klines WHERE symbol = ? AND interval = ?",
+                (symbol, interval)
+            ).fetchone())
+
+    def missing_ranges(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> List[tuple]:
+        """Trechos [início, fim) de [start_ms, end_ms) sem candles gravados"""
+        step = INTERVAL_MS[interval]
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT open_time FROM klines WHERE symbol = ? AND interval = ? "
+                "AND open_time >= ? AND open_time < ? ORDER BY open_time",
+                (symbol, interval, int(start_ms), int(end_ms))
+            ).fetchall()
+        if not rows:
+            return [(start_ms, end_ms)]
+
+        times = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        gaps = []
+        if times[0] - start_ms >= step:
+            gaps.append((start_ms, int(times[0])))
+        for i in np.flatnonzero(np.diff(times) > step):
+            gaps.append((int(times[i]) + step, int(times[i + 1])))
+        if end_ms - times[-1] > step:
+            gaps.append((int(times[-1]) + step, end_ms))
+        return gaps
+
+    def backfill(self, client, symbol: str, interval: str, start_ms: int, end_ms: int,
+                 now_ms: Optional[int] = None) -> int:
+        """Busca na Binance os candles de [start_ms, end_ms) que faltam no histórico local
+
+        Só candles já fechados são gravados: o candle em formação mudaria depois
+        de gravado e não seria buscado de novo.
+        """
+        step = INTERVAL_MS.get(interval)
+        if client is None or step is None:
+            return 0
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+
+        fetched = 0
+        for gap_start, gap_end in self.missing_ranges(symbol, interval, start_ms, end_ms):
+            cursor = gap_start
+            while cursor < gap_end:
+                klines = client.get_klines(
+                    symbol=symbol, interval=interval, startTime=int(cursor),
+                    endTime=int(gap_end) - 1, limit=FETCH_LIMIT
+                )
+                closed = [k for k in klines or () if int(k[6]) < now_ms]
+                if not closed:
+                    break
+                fetched += self.upsert_klines(symbol, interval, closed)
+                cursor = int(klines[-1][0]) + step
+                if len(klines) < FETCH_LIMIT or len(closed) < len(klines):
+                    break
+        if fetched:
+            logger.debug(f"📥 {fetched} candles {symbol} {interval} baixados para o histórico local")
+        return fetched
+
+    # ------------------------------------------------------------------
+    # Patrimônio
+    # ------------------------------------------------------------------
+
+    def record_equity(self, ts: float, equity: float, total_capital: float = None, unrealized_pnl: float = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO equity (ts, equity, total_capital, unrealized_pnl) VALUES (?, ?, ?, ?)",
+                (float(ts), float(equity), total_capital, unrealized_pnl)
+            )
+
+    def get_equity(self, start: float, end: float):
+        """Horários (epoch) e patrimônio em [start, end)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ts, equity FROM equity WHERE ts >= ? AND ts < ? ORDER BY ts",
+                (float(start), float(end))
+            ).fetchall()
+        if not rows:
+            return np.empty(0), np.empty(0)
+        matrix = np.array(rows, dtype=float)
+        return matrix[:, 0], matrix[:, 1]
+
+    def last_equity_ts(self) -> Optional[float]:
+        with self._lock:
+            return self._conn.execute("SELECT MAX(ts) FROM equity").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
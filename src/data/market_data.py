@@ -1,6 +1,9 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from binance.client import Client
+from src.utils.quantization import QuantizationTable
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +13,54 @@ class MarketDataProvider:
     def __init__(self, client: Client, config):
         self.client = client
         self.config = config
+        self.exchange_info_ttl = getattr(config, 'exchange_info_ttl', 3600)
+        self._symbols_info: Dict[str, Dict[str, Any]] = {}
+        self._exchange_info_time = 0.0
+        self._exchange_info_lock = threading.Lock()
+        self._quantization: Optional[QuantizationTable] = None
+        self._quantization_source = None
+    
+    def get_exchange_info(self, force: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Informações de todos os símbolos por nome (uma chamada, em cache por `exchange_info_ttl`)"""
+        with self._exchange_info_lock:
+            expired = time.time() - self._exchange_info_time > self.exchange_info_ttl
+            if force or expired or not self._symbols_info:
+                try:
+                    info = self.client.get_exchange_info()
+                    self._symbols_info = {item['symbol']: item for item in info['symbols']}
+                    self._exchange_info_time = time.time()
+                    logger.info(f"Exchange info carregado: {len(self._symbols_info)} símbolos")
+                except Exception as e:
+                    logger.error(f"Erro obtendo exchange info: {e}")
+            return self._symbols_info
+    
+    def get_symbol_info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Informações de um símbolo a partir do cache de exchange info"""
+        return self.get_exchange_info().get(symbol)
+    
+    def get_quantization_table(self) -> QuantizationTable:
+        """Regras de quantidade/preço pré-computadas (reconstruídas quando o exchange info muda)"""
+        symbols_info = self.get_exchange_info()
+        if self._quantization is None or self._quantization_source is not symbols_info:
+            self._quantization = QuantizationTable(symbols_info)
+            self._quantization_source = symbols_info
+        return self._quantization
+    
+    def get_all_prices(self) -> Dict[str, float]:
+        """Preço atual de todos os símbolos em uma única chamada"""
+        try:
+            return {item['symbol']: float(item['price']) for item in self.client.get_symbol_ticker()}
+        except Exception as e:
+            logger.error(f"Erro obtendo preços: {e}")
+            return {}
+    
+    def get_ticker_snapshot(self) -> List[Dict[str, Any]]:
+        """Estatísticas de 24h de todos os símbolos em uma única chamada"""
+        try:
+            return self.client.get_ticker()
+        except Exception as e:
+            logger.error(f"Erro obtendo estatísticas de 24h: {e}")
+            return []
     
     def get_top_volume_symbols(self, quote_asset: str = 'USDT', 
                               min_volume: float = 1000000, 
@@ -0,0 +1,383 @@
+import logging
+import queue
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from binance import ThreadedWebsocketManager
+
+logger = logging.getLogger(__name__)
+
+# Níveis pedidos no snapshot REST de sincronização
+SNAPSHOT_LIMIT = 500
+
+# Níveis mantidos por lado (os mais distantes do topo são descartados)
+MAX_LEVELS = 1000
+
+# Eventos guardados enquanto o snapshot não chega
+MAX_BUFFERED_EVENTS = 1000
+
+# Livro sem atualização há mais que isso é tratado como indisponível (segundos)
+STALE_AFTER = 30.0
+
+# Validade dos snapshots REST usados como reserva (segundos)
+REST_SNAPSHOT_TTL = 2.0
+
+# Folga relativa para níveis exatamente no limite de slippage (erro do float)
+PRICE_TOLERANCE = 1e-12
+
+
+class BookSide:
+    """Um lado do livro em listas ordenadas (preço crescente) para busca binária"""
+
+    __slots__ = ('prices', 'quantities')
+
+    def __init__(self):
+        self.prices: List[float] = []
+        self.quantities: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def load(self, levels: Iterable[Tuple[str, str]]):
+        book = sorted((float(price), float(qty)) for price, qty in levels if float(qty) > 0)
+        self.prices = [price for price, _ in book]
+        self.quantities = [qty for _, qty in book]
+
+    def update(self, price: float, qty: float):
+        i = bisect_left(self.prices, price)
+        exists = i < len(self.prices) and self.prices[i] == price
+        if qty <= 0:
+            if exists:
+                del self.prices[i]
+                del self.quantities[i]
+        elif exists:
+            self.quantities[i] = qty
+        else:
+            self.prices.insert(i, price)
+            self.quantities.insert(i, qty)
+
+    def trim(self, keep: int, drop_lowest: bool):
+        """Mantém `keep` níveis, descartando os preços mais baixos ou os mais altos"""
+        excess = len(self.prices) - keep
+        if excess <= 0:
+            return
+        if drop_lowest:
+            del self.prices[:excess]
+            del self.quantities[:excess]
+        else:
+            del self.prices[-excess:]
+            del self.quantities[-excess:]
+
+
+class OrderBook:
+    """Espelho local do livro de ofertas de um símbolo
+
+    Sincronizado pelo procedimento da Binance: os eventos do stream de diferenças
+    são guardados até o snapshot REST chegar; descartam-se os eventos com
+    `u <= lastUpdateId` e, a partir daí, cada evento deve começar no máximo em
+    `u anterior + 1`. Uma lacuna invalida o livro e pede nova sincronização.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = BookSide()
+        self.asks = BookSide()
+        self.last_update_id = 0
+        self.synced = False
+        self.updated_at = 0.0
+        self.resyncs = 0
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Sincronização
+    # ------------------------------------------------------------------
+
+    def on_event(self, event: Dict) -> bool:
+        """Aplica (ou guarda) um evento `depthUpdate`; retorna True se precisar de snapshot"""
+        with self._lock:
+            if not self.synced:
+                if len(self._buffer) >= MAX_BUFFERED_EVENTS:
+                    self._buffer.pop(0)
+                self._buffer.append(event)
+                return False
+            if event['u'] <= self.last_update_id:
+                return False
+            if event['U'] > self.last_update_id + 1:
+                logger.warning(
+                    f"Lacuna no livro de {self.symbol} ({self.last_update_id} -> {event['U']}), ressincronizando"
+                )
+                self._invalidate(event)
+                return True
+            self._apply(event)
+            return False
+
+    def load_snapshot(self, snapshot: Dict) -> bool:
+        """Carrega o snapshot REST e aplica os eventos guardados; retorna se sincronizou"""
+        with self._lock:
+            self.bids.load(snapshot.get('bids', []))
+            self.asks.load(snapshot.get('asks', []))
+            self.last_update_id = snapshot['lastUpdateId']
+            self.updated_at = time.time()
+
+            pending = [event for event in self._buffer if event['u'] > self.last_update_id]
+            self._buffer = []
+            if pending and pending[0]['U'] > self.last_update_id + 1:
+                # Snapshot anterior aos eventos guardados: precisa de outro
+                self._buffer = pending
+                self.synced = False
+                return False
+
+            for event in pending:
+                if event['U'] > self.last_update_id + 1:
+                    self._invalidate(event)
+                    return False
+                self._apply(event)
+            self.synced = True
+            return True
+
+    def _apply(self, event: Dict):
+        for price, qty in event.get('b', []):
+            self.bids.update(float(price), float(qty))
+        for price, qty in event.get('a', []):
+            self.asks.update(float(price), float(qty))
+        self.last_update_id = event['u']
+        self.updated_at = time.time()
+        if len(self.bids) > MAX_LEVELS:
+            self.bids.trim(MAX_LEVELS, drop_lowest=True)
+        if len(self.asks) > MAX_LEVELS:
+            self.asks.trim(MAX_LEVELS, drop_lowest=False)
+
+    def _invalidate(self, event: Dict):
+        self.synced = False
+        self.resyncs += 1
+        self._buffer = [event]
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.synced and time.time() - self.updated_at <= STALE_AFTER
+
+    def best_bid(self) -> Optional[float]:
+        with self._lock:
+            return self.bids.prices[-1] if self.bids.prices else None
+
+    def best_ask(self) -> Optional[float]:
+        with self._lock:
+            return self.asks.prices[0] if self.asks.prices else None
+
+    def mid_price(self) -> Optional[float]:
+        with self._lock:
+            if not self.bids.prices or not self.asks.prices:
+                return None
+            return (self.bids.prices[-1] + self.asks.prices[0]) / 2
+
+    def spread_pct(self) -> Optional[float]:
+        """Spread relativo ao preço médio, em percentual"""
+        with self._lock:
+            if not self.bids.prices or not self.asks.prices:
+                return None
+            bid, ask = self.bids.prices[-1], self.asks.prices[0]
+            return (ask - bid) / ((ask + bid) / 2) * 100
+
+    def available_quantity(self, side: str, slippage_pct: float) -> float:
+        """Quantidade executável a mercado sem passar de `slippage_pct`% do melhor preço
+
+        `side` é o lado da ordem: compras consomem as ofertas de venda (asks),
+        vendas consomem as de compra (bids).
+        """
+        with self._lock:
+            if side == 'BUY':
+                if not self.asks.prices:
+                    return 0.0
+                limit = self.asks.prices[0] * (1 + slippage_pct / 100) * (1 + PRICE_TOLERANCE)
+                end = bisect_right(self.asks.prices, limit)
+                return sum(self.asks.quantities[:end])
+            if not self.bids.prices:
+                return 0.0
+            limit = self.bids.prices[-1] * (1 - slippage_pct / 100) * (1 - PRICE_TOLERANCE)
+            start = bisect_left(self.bids.prices, limit)
+            return sum(self.bids.quantities[start:])
+
+    def average_fill_price(self, side: str, quantity: float) -> Optional[float]:
+        """Preço médio estimado para executar `quantity` a mercado (None se faltar profundidade)"""
+        with self._lock:
+            if side == 'BUY':
+                levels = zip(self.asks.prices, self.asks.quantities)
+            else:
+                levels = zip(reversed(self.bids.prices), reversed(self.bids.quantities))
+            remaining, cost = quantity, 0.0
+            for price, qty in levels:
+                take = min(qty, remaining)
+                cost += take * price
+                remaining -= take
+                if remaining <= 0:
+                    return cost / quantity
+            return None
+
+
+class OrderBookManager:
+    """Mantém livros locais dos símbolos acompanhados a partir do stream de diferenças
+
+    Um socket multiplexado `<symbol>@depth@100ms` alimenta os livros; os
+    snapshots REST de sincronização são buscados por uma thread separada para
+    não bloquear o WebSocket. As consultas leem apenas memória.
+    """
+
+    def __init__(self, config, client):
+        self.config = config
+        self.client = client
+        self.books: Dict[str, OrderBook] = {}
+        self.symbols = frozenset()
+        self.messages_received = 0
+        self._manager: Optional[ThreadedWebsocketManager] = None
+        self._socket_name: Optional[str] = None
+        self._lock = threading.Lock()
+        self._sync_queue: 'queue.Queue[Optional[str]]' = queue.Queue()
+        self._sync_pending = set()
+        self._sync_thread: Optional[threading.Thread] = None
+        self._rest_cache: Dict[str, Tuple[float, OrderBook]] = {}
+
+    def start(self):
+        """Inicia o gerenciador de WebSocket e a thread de sincronização"""
+        with self._lock:
+            if self._manager is not None:
+                return
+            self._manager = ThreadedWebsocketManager(
+                api_key=self.config.api_key,
+                api_secret=self.config.api_secret,
+                testnet=getattr(self.config, 'testnet', True)
+            )
+            self._manager.daemon = True
+            self._manager.start()
+            self._sync_thread = threading.Thread(target=self._sync_loop, name='order-book-sync', daemon=True)
+            self._sync_thread.start()
+            logger.info("📚 Livro de ofertas local iniciado")
+
+        if self.symbols:
+            self._restart_socket(self.symbols)
+
+    def stop(self):
+        with self._lock:
+            manager, self._manager = self._manager, None
+            self._socket_name = None
+            sync_thread, self._sync_thread = self._sync_thread, None
+        if sync_thread is not None:
+            self._sync_queue.put(None)
+            sync_thread.join(timeout=5)
+        if manager is not None:
+            try:
+                manager.stop()
+            except Exception as e:
+                logger.error(f"Erro parando stream do livro de ofertas: {e}")
+            logger.info("📚 Livro de ofertas local parado")
+
+    def set_symbols(self, symbols: Iterable[str]):
+        """Atualiza os símbolos espelhados (reinicia o socket se mudarem)"""
+        symbols = frozenset(symbols)
+        if symbols == self.symbols:
+            return
+        self.symbols = symbols
+        for symbol in list(self.books):
+            if symbol not in symbols:
+                del self.books[symbol]
+        for symbol in symbols:
+            self.books.setdefault(symbol, OrderBook(symbol))
+        if self._manager is not None:
+            self._restart_socket(symbols)
+
+    def get_book(self, symbol: str, allow_rest: bool = True) -> Optional[OrderBook]:
+        """Livro sincronizado do símbolo; sem ele, um snapshot REST recente (se permitido)"""
+        book = self.books.get(symbol)
+        if book is not None and book.is_fresh:
+            return book
+        if not allow_rest:
+            return None
+
+        cached = self._rest_cache.get(symbol)
+        if cached and time.time() - cached[0] <= REST_SNAPSHOT_TTL:
+            return cached[1]
+        try:
+            snapshot = self.client.get_order_book(symbol=symbol, limit=100)
+        except Exception as e:
+            logger.warning(f"Erro obtendo livro de ofertas de {symbol}: {e}")
+            return None
+        book = OrderBook(symbol)
+        book.load_snapshot(snapshot)
+        self._rest_cache[symbol] = (time.time(), book)
+        return book
+
+    def get_stats(self) -> Dict:
+        return {
+            'symbols': len(self.symbols),
+            'synced': sum(1 for book in self.books.values() if book.synced),
+            'resyncs': sum(book.resyncs for book in self.books.values()),
+            'messages_received': self.messages_received
+        }
+
+    def _restart_socket(self, symbols: frozenset):
+        with self._lock:
+            if self._manager is None:
+                return
+            if self._socket_name:
+                self._manager.stop_socket(self._socket_name)
+                self._socket_name = None
+            if not symbols:
+                return
+            streams = [f"{symbol.lower()}@depth@100ms" for symbol in sorted(symbols)]
+            try:
+                self._socket_name = self._manager.start_multiplex_socket(
+                    callback=self._handle_message,
+                    streams=streams
+                )
+            except Exception as e:
+                logger.error(f"Erro iniciando socket do livro de ofertas: {e}")
+                return
+        for symbol in symbols:
+            self._request_sync(symbol)
+
+    def _handle_message(self, msg: Dict):
+        """Callback do WebSocket"""
+        data = msg.get('data', msg)
+        if data.get('e') == 'error':
+            logger.error(f"Erro no stream do livro de ofertas: {data.get('m')}")
+            return
+        if data.get('e') != 'depthUpdate':
+            return
+
+        book = self.books.get(data.get('s'))
+        if book is None:
+            return
+        self.messages_received += 1
+        if book.on_event(data):
+            self._request_sync(book.symbol)
+
+    def _request_sync(self, symbol: str):
+        if symbol not in self._sync_pending:
+            self._sync_pending.add(symbol)
+            self._sync_queue.put(symbol)
+
+    def _sync_loop(self):
+        while True:
+            symbol = self._sync_queue.get()
+            if symbol is None:
+                return
+            self._sync_pending.discard(symbol)
+            book = self.books.get(symbol)
+            if book is None or book.synced:
+                continue
+            try:
+                snapshot = self.client.get_order_book(symbol=symbol, limit=SNAPSHOT_LIMIT)
+            except Exception as e:
+                logger.warning(f"Erro obtendo snapshot do livro de {symbol}: {e}")
+                time.sleep(1)
+                self._request_sync(symbol)
+                continue
+            if not book.load_snapshot(snapshot):
+                # Snapshot defasado em relação ao stream: tenta de novo
+                self._request_sync(symbol)
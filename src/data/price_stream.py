@@ -0,0 +1,100 @@
+import logging
+import threading
+from typing import Callable, Iterable, Optional
+
+from binance import ThreadedWebsocketManager
+
+logger = logging.getLogger(__name__)
+
+
+class PriceStream:
+    """Stream de preços em tempo real (aggTrade) via WebSocket da Binance
+
+    Mantém um único socket multiplexado com os símbolos informados em
+    `set_symbols` e repassa cada negócio para `on_price(symbol, price)`.
+    """
+
+    def __init__(self, config, on_price: Callable[[str, float], None]):
+        self.config = config
+        self.on_price = on_price
+        self.symbols = frozenset()
+        self.messages_received = 0
+        self._manager: Optional[ThreadedWebsocketManager] = None
+        self._socket_name: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Inicia o gerenciador de WebSocket"""
+        with self._lock:
+            if self._manager is not None:
+                return
+            self._manager = ThreadedWebsocketManager(
+                api_key=self.config.api_key,
+                api_secret=self.config.api_secret,
+                testnet=getattr(self.config, 'testnet', True)
+            )
+            self._manager.daemon = True
+            self._manager.start()
+            logger.info("📡 Stream de preços iniciado")
+
+        if self.symbols:
+            self._restart_socket(self.symbols)
+
+    def stop(self):
+        """Encerra o stream de preços"""
+        with self._lock:
+            manager, self._manager = self._manager, None
+            self._socket_name = None
+        if manager is not None:
+            try:
+                manager.stop()
+            except Exception as e:
+                logger.error(f"Erro parando stream de preços: {e}")
+            logger.info("📡 Stream de preços parado")
+
+    def set_symbols(self, symbols: Iterable[str]):
+        """Atualiza os símbolos acompanhados (reinicia o socket se mudarem)"""
+        symbols = frozenset(symbols)
+        if symbols == self.symbols:
+            return
+        self.symbols = symbols
+        if self._manager is not None:
+            self._restart_socket(symbols)
+
+    def _restart_socket(self, symbols: frozenset):
+        with self._lock:
+            if self._manager is None:
+                return
+            if self._socket_name:
+                self._manager.stop_socket(self._socket_name)
+                self._socket_name = None
+            if not symbols:
+                return
+            streams = [f"{symbol.lower()}@aggTrade" for symbol in sorted(symbols)]
+            try:
+                self._socket_name = self._manager.start_multiplex_socket(
+                    callback=self._handle_message,
+                    streams=streams
+                )
+                logger.info(f"📡 Acompanhando preços em tempo real: {', '.join(sorted(symbols))}")
+            except Exception as e:
+                logger.error(f"Erro iniciando socket de preços: {e}")
+
+    def _handle_message(self, msg: dict):
+        """Callback do WebSocket"""
+        data = msg.get('data', msg)
+        if data.get('e') == 'error':
+            logger.error(f"Erro no stream de preços: {data.get('m')}")
+            return
+
+        try:
+            symbol = data['s']
+            price = float(data['p'])
+        except (KeyError, TypeError, ValueError):
+            return
+
+        self.messages_received += 1
+        try:
+            self.on_price(symbol, price)
+        except Exception as e:
+            logger.error(f"Erro processando preço de {symbol}: {e}")
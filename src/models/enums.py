@@ -29,4 +29,11 @@ class PositionStatus(Enum):
     """Status da posição"""
     OPEN = "OPEN"
     CLOSED = "CLOSED"
-    CLOSING = "CLOSING"
\ No newline at end of file
+    CLOSING = "CLOSING"
+
+class ExecutionStatus(Enum):
+    """Status de uma ordem-mãe fatiada (TWAP/iceberg)"""
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    CANCELED = "CANCELED"
+    FAILED = "FAILED"
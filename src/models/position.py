@@ -21,6 +21,7 @@ class Position:
         self.timestamp = timestamp or datetime.now()
         self.status = PositionStatus.OPEN
         self.realized_pnl = 0.0
+        self.protective_order_id = None  # orderListId da OCO de SL/TP na Binance
         
     def update_price(self, new_price: float):
         """Atualiza o preço atual e recalcula PnL"""
@@ -75,6 +76,7 @@ class Position:
             'take_profit': self.take_profit,
             'risk_amount': self.risk_amount,
             'status': self.status.value,
+            'protective_order_id': self.protective_order_id,
             'timestamp': self.timestamp.isoformat() if self.timestamp else None
         }
     
@@ -107,5 +109,6 @@ class Position:
         # Atualizar campos adicionais
         position.realized_pnl = data.get('realized_pnl', 0.0)
         position.status = PositionStatus(data.get('status', PositionStatus.OPEN.value))
+        position.protective_order_id = data.get('protective_order_id')
         
         return position
\ No newline at end of file
@@ -0,0 +1,256 @@
+import logging
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from binance.helpers import interval_to_milliseconds
+
+logger = logging.getLogger(__name__)
+
+
+class CorrelationEngine:
+    """Matriz de correlação de retornos em janela móvel para o universo de símbolos
+
+    Os retornos logarítmicos de cada símbolo ficam numa matriz circular (janela x símbolos)
+    alinhada pelo horário de abertura dos candles. Em vez de recalcular a covariância a cada
+    consulta, são mantidas as somas cruzadas necessárias para a correlação par a par
+    (apenas sobre os períodos em comum):
+
+        Q = Rᵀ R        A = Rᵀ M        B = (R∘R)ᵀ M        C = Mᵀ M
+
+    onde M é a máscara de dados presentes. Substituir a coluna de um símbolo custa
+    O(janela x símbolos) e avançar a janela custa O(símbolos²) por candle, ambos vetorizados.
+    Consultar a correlação de um par é O(1).
+    """
+
+    def __init__(self, timeframe: str = '1h', window: int = 99, min_periods: int = 20,
+                 capacity: int = 64):
+        self.timeframe = timeframe
+        self.interval_ms = interval_to_milliseconds(timeframe)
+        self.window = window
+        self.min_periods = min_periods
+        self.version = 0
+
+        self._index: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._last_time: Optional[int] = None
+        self._lock = threading.Lock()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        """Aloca (ou amplia) as matrizes preservando os dados existentes"""
+        old = getattr(self, '_returns', None)
+        n = len(self._symbols)
+
+        returns = np.zeros((self.window, capacity))
+        mask = np.zeros((self.window, capacity))
+        cross = np.zeros((capacity, capacity))
+        sums = np.zeros((capacity, capacity))
+        squares = np.zeros((capacity, capacity))
+        counts = np.zeros((capacity, capacity))
+
+        if old is not None and n:
+            returns[:, :n] = self._returns[:, :n]
+            mask[:, :n] = self._mask[:, :n]
+            cross[:n, :n] = self._cross[:n, :n]
+            sums[:n, :n] = self._sums[:n, :n]
+            squares[:n, :n] = self._squares[:n, :n]
+            counts[:n, :n] = self._counts[:n, :n]
+
+        self._returns, self._mask = returns, mask
+        self._cross, self._sums, self._squares, self._counts = cross, sums, squares, counts
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._symbols)
+
+    def update(self, symbol: str, klines: List, now_ms: Optional[int] = None) -> bool:
+        """Atualiza a série de retornos de um símbolo a partir de klines da Binance
+
+        Apenas candles fechados (horário de fechamento no passado) entram na série;
+        o candle em formação, se vier na lista, é descartado.
+        """
+        if not klines:
+            return False
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+
+        try:
+            closed = [k for k in klines if int(k[6]) < now_ms]
+            times = np.fromiter((int(k[0]) for k in closed), dtype=np.int64, count=len(closed))
+            closes = np.fromiter((float(k[4]) for k in closed), dtype=float, count=len(closed))
+        except (IndexError, TypeError, ValueError) as e:
+            logger.warning(f"Klines inválidos para correlação de {symbol}: {e}")
+            return False
+        if len(closed) < 2:
+            return False
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.diff(np.log(closes))
+        return self.update_returns(symbol, times[1:], returns)
+
+    def update_returns(self, symbol: str, times: np.ndarray, returns: np.ndarray) -> bool:
+        """Substitui a série de retornos de um símbolo (tempos em ms de abertura do candle)"""
+        times = np.asarray(times, dtype=np.int64)
+        returns = np.asarray(returns, dtype=float)
+        valid = np.isfinite(returns)
+        if not valid.any():
+            return False
+        times, returns = times[valid], returns[valid]
+
+        with self._lock:
+            latest = int(times.max())
+            if self._last_time is None or latest > self._last_time:
+                self._advance(latest)
+
+            column, present = self._column_from_series(times, returns)
+            self._set_column(self._ensure_symbol(symbol), column, present)
+            self.version += 1
+        return True
+
+    def correlation(self, symbol_a: str, symbol_b: str) -> Optional[float]:
+        """Correlação dos retornos no período em comum (None se não houver dados suficientes)"""
+        i = self._index.get(symbol_a)
+        j = self._index.get(symbol_b)
+        if i is None or j is None:
+            return None
+        if i == j:
+            return 1.0
+        return self._pair_correlation(i, j)
+
+    def average_correlation(self, exposures: Dict[str, float]) -> float:
+        """Correlação média ponderada entre os pares da carteira
+
+        Calculada como (wᵀ ρ w - Σw²) / ((Σw)² - Σw²): vale 0 para ativos sem correlação
+        e 1 para ativos perfeitamente correlacionados, independente do tamanho das posições.
+        Pares sem dados suficientes são tratados como não correlacionados.
+        """
+        symbols = list(exposures)
+        weights = [abs(exposures[symbol]) for symbol in symbols]
+        total = sum(weights)
+        squares = sum(w * w for w in weights)
+        pair_weight = total * total - squares
+        if pair_weight <= 0:
+            return 0.0
+
+        value = 0.0
+        for a in range(len(symbols)):
+            for b in range(a + 1, len(symbols)):
+                rho = self.correlation(symbols[a], symbols[b])
+                if rho is not None:
+                    value += 2 * weights[a] * weights[b] * rho
+        return value / pair_weight
+
+    def get_returns(self, symbols: List[str]) -> np.ndarray:
+        """Matriz de retornos (janela x símbolos) em ordem cronológica, zero onde não há dados"""
+        return self.get_window(symbols)[0]
+
+    def get_window(self, symbols: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Retornos e máscara de dados presentes (janela x símbolos) em ordem cronológica"""
+        with self._lock:
+            result = np.zeros((self.window, len(symbols)))
+            present = np.zeros((self.window, len(symbols)), dtype=bool)
+            if self._last_time is None:
+                return result, present
+            newest = (self._last_time // self.interval_ms) % self.window
+            rows = (np.arange(1, self.window + 1) + newest) % self.window
+            for column, symbol in enumerate(symbols):
+                index = self._index.get(symbol)
+                if index is not None:
+                    result[:, column] = self._returns[rows, index]
+                    present[:, column] = self._mask[rows, index] > 0
+            return result, present
+
+    def has_data(self, symbol: str) -> bool:
+        """Indica se o símbolo tem retornos suficientes na janela atual"""
+        index = self._index.get(symbol)
+        return index is not None and self._counts.item(index, index) >= self.min_periods
+
+    def _pair_correlation(self, i: int, j: int) -> Optional[float]:
+        # .item() devolve float do Python, bem mais barato que escalares numpy
+        n = self._counts.item(i, j)
+        if n < self.min_periods:
+            return None
+        sum_x, sum_y = self._sums.item(i, j), self._sums.item(j, i)
+        cov = self._cross.item(i, j) - sum_x * sum_y / n
+        var_x = self._squares.item(i, j) - sum_x * sum_x / n
+        var_y = self._squares.item(j, i) - sum_y * sum_y / n
+        if var_x <= 0 or var_y <= 0:
+            return None
+        rho = cov / math.sqrt(var_x * var_y)
+        return max(-1.0, min(1.0, rho))
+
+    def _ensure_symbol(self, symbol: str) -> int:
+        index = self._index.get(symbol)
+        if index is None:
+            index = len(self._symbols)
+            if index >= self._returns.shape[1]:
+                self._allocate(self._returns.shape[1] * 2)
+            self._symbols.append(symbol)
+            self._index[symbol] = index
+        return index
+
+    def _column_from_series(self, times: np.ndarray, returns: np.ndarray):
+        oldest = self._last_time - (self.window - 1) * self.interval_ms
+        inside = (times >= oldest) & (times <= self._last_time)
+        column = np.zeros(self.window)
+        present = np.zeros(self.window)
+        rows = (times[inside] // self.interval_ms) % self.window
+        column[rows] = returns[inside]
+        present[rows] = 1.0
+        return column, present
+
+    def _set_column(self, j: int, column: np.ndarray, present: np.ndarray):
+        """Substitui a coluna j e atualiza as somas cruzadas de forma vetorizada"""
+        n = len(self._symbols)
+        self._returns[:, j] = column
+        self._mask[:, j] = present
+
+        returns = self._returns[:, :n]
+        mask = self._mask[:, :n]
+
+        cross = returns.T @ column
+        self._cross[:n, j] = cross
+        self._cross[j, :n] = cross
+
+        self._sums[:n, j] = returns.T @ present
+        self._sums[j, :n] = column @ mask
+
+        self._squares[:n, j] = (returns * returns).T @ present
+        self._squares[j, :n] = (column * column) @ mask
+
+        counts = mask.T @ present
+        self._counts[:n, j] = counts
+        self._counts[j, :n] = counts
+
+    def _advance(self, latest: int):
+        """Avança a janela até `latest`, removendo das somas os candles que saem dela"""
+        latest = latest - latest % self.interval_ms
+        if self._last_time is None:
+            self._last_time = latest
+            return
+
+        steps = (latest - self._last_time) // self.interval_ms
+        n = len(self._symbols)
+        if steps >= self.window:
+            self._returns[:] = 0
+            self._mask[:] = 0
+            for matrix in (self._cross, self._sums, self._squares, self._counts):
+                matrix[:] = 0
+        elif steps > 0 and n:
+            # As linhas que serão reutilizadas pelos novos candles
+            new_times = self._last_time + self.interval_ms * np.arange(1, steps + 1)
+            rows = (new_times // self.interval_ms) % self.window
+            dropped = self._returns[rows, :n]
+            dropped_mask = self._mask[rows, :n]
+
+            self._cross[:n, :n] -= dropped.T @ dropped
+            self._sums[:n, :n] -= dropped.T @ dropped_mask
+            self._squares[:n, :n] -= (dropped * dropped).T @ dropped_mask
+            self._counts[:n, :n] -= dropped_mask.T @ dropped_mask
+
+            self._returns[rows, :] = 0
+            self._mask[rows, :] = 0
+
+        self._last_time = latest
@@ -0,0 +1,162 @@
+import logging
+import math
+import threading
+from datetime import datetime
+from statistics import NormalDist
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.risk.correlation import CorrelationEngine
+
+logger = logging.getLogger(__name__)
+
+
+class PortfolioRiskCalculator:
+    """VaR e Expected Shortfall da carteira (histórico e paramétrico)
+
+    Os cenários são os retornos da janela do `CorrelationEngine` para os símbolos em
+    carteira. A matriz de cenários (e sua covariância) só é reconstruída quando as
+    posições ou os dados de mercado mudam; a cada variação de preço basta recalcular
+    o vetor de exposições e um produto matriz-vetor. Com as mesmas exposições, o
+    resultado anterior é devolvido sem recálculo.
+
+    Símbolos sem retornos suficientes ficam fora dos cenários (tratá-los como
+    volatilidade zero subestimaria o VaR): a exposição deles aparece em
+    `uncovered_exposure`/`uncovered_symbols`, e `coverage` é a fração coberta.
+
+    `compute` é chamado pelo ciclo de monitoramento e pelo publicador de estado;
+    o cache de cenários é protegido por um lock.
+    """
+
+    def __init__(self, correlation_engine: CorrelationEngine, confidence: float = 0.95):
+        self.correlation_engine = correlation_engine
+        self.confidence = confidence
+
+        normal = NormalDist()
+        self._z = normal.inv_cdf(confidence)
+        self._es_factor = normal.pdf(self._z) / (1 - confidence)
+
+        self._cache_key: Optional[Tuple] = None
+        self._scenarios: Optional[np.ndarray] = None
+        self._mean: Optional[np.ndarray] = None
+        self._covariance: Optional[np.ndarray] = None
+        self._coverage_mask: Optional[np.ndarray] = None
+        self._last_input: Optional[Tuple] = None
+        self._last_metrics: Optional[Dict] = None
+        self._lock = threading.Lock()
+
+    def compute(self, positions: Dict) -> Dict:
+        """Calcula as métricas de risco para as posições abertas"""
+        with self._lock:
+            return self._compute(positions)
+
+    def _compute(self, positions: Dict) -> Dict:
+        symbols = tuple(positions.keys())
+        if not symbols:
+            # Carteira vazia: mesmo resultado (e horário) até a carteira mudar
+            if self._last_input != ():
+                self._last_input, self._last_metrics = (), self._empty_metrics()
+            return self._last_metrics
+
+        self._refresh_scenarios(symbols)
+
+        exposures = np.fromiter(
+            (self._signed_exposure(positions[symbol]) for symbol in symbols),
+            dtype=float, count=len(symbols)
+        )
+        current_input = (self._cache_key, exposures.tobytes())
+        if current_input == self._last_input:
+            return self._last_metrics
+
+        gross = float(np.abs(exposures).sum())
+        covered = exposures[self._coverage_mask]
+        covered_gross = float(np.abs(covered).sum())
+        uncovered = [symbol for symbol, ok in zip(symbols, self._coverage_mask) if not ok]
+
+        historical_var = historical_es = parametric_var = parametric_es = 0.0
+        if len(covered):
+            # Histórico: PnL da carteira coberta em cada cenário
+            pnl = self._scenarios @ covered
+            tail_size = max(1, int(math.ceil(round((1 - self.confidence) * len(pnl), 9))))
+            tail = np.partition(pnl, tail_size - 1)[:tail_size]
+            historical_var = max(0.0, -float(tail.max()))
+            historical_es = max(0.0, -float(tail.mean()))
+
+            # Paramétrico (normal)
+            mean = float(self._mean @ covered)
+            sigma = math.sqrt(max(0.0, float(covered @ self._covariance @ covered)))
+            parametric_var = max(0.0, self._z * sigma - mean)
+            parametric_es = max(0.0, self._es_factor * sigma - mean)
+
+        metrics = {
+            'confidence': self.confidence,
+            'horizon': self.correlation_engine.timeframe,
+            'exposure': gross,
+            'historical_var': historical_var,
+            'historical_es': historical_es,
+            'parametric_var': parametric_var,
+            'parametric_es': parametric_es,
+            'scenarios': int(len(self._scenarios)) if len(covered) else 0,
+            'coverage': covered_gross / gross if gross > 0 else 0.0,
+            'uncovered_exposure': gross - covered_gross,
+            'uncovered_symbols': uncovered,
+            'timestamp': datetime.now().isoformat()
+        }
+        self._last_input, self._last_metrics = current_input, metrics
+        return metrics
+
+    def _refresh_scenarios(self, symbols: Tuple[str, ...]):
+        """Reconstrói a matriz de cenários (só símbolos cobertos) se posições ou dados mudaram
+
+        Um cenário é um candle em que todos os símbolos cobertos têm retorno: preencher
+        com zero o histórico que falta a um símbolo recente subestimaria o VaR. Se a
+        interseção ficar curta demais, o símbolo com menos dados sai da cobertura.
+        """
+        key = (symbols, self.correlation_engine.version)
+        if key == self._cache_key:
+            return
+
+        engine = self.correlation_engine
+        mask = np.array([engine.has_data(s) for s in symbols], dtype=bool)
+        returns, present = engine.get_window([s for s, ok in zip(symbols, mask) if ok])
+        columns = np.flatnonzero(mask)
+        while len(columns):
+            complete = present.all(axis=1)
+            if complete.sum() >= engine.min_periods:
+                break
+            weakest = int(np.argmin(present.sum(axis=0)))
+            mask[columns[weakest]] = False
+            columns = np.delete(columns, weakest)
+            returns = np.delete(returns, weakest, axis=1)
+            present = np.delete(present, weakest, axis=1)
+
+        self._coverage_mask = mask
+        self._scenarios = np.expm1(returns[present.all(axis=1)])
+        self._mean = self._scenarios.mean(axis=0)
+        if len(columns) == 1:
+            self._covariance = np.atleast_2d(np.var(self._scenarios[:, 0], ddof=1))
+        else:
+            self._covariance = np.atleast_2d(np.cov(self._scenarios, rowvar=False)) if len(columns) else None
+        self._cache_key = key
+
+    @staticmethod
+    def _signed_exposure(position) -> float:
+        exposure = position.size * position.current_price
+        return exposure if position.side.upper() in ['BUY', 'LONG'] else -exposure
+
+    def _empty_metrics(self) -> Dict:
+        return {
+            'confidence': self.confidence,
+            'horizon': self.correlation_engine.timeframe,
+            'exposure': 0.0,
+            'historical_var': 0.0,
+            'historical_es': 0.0,
+            'parametric_var': 0.0,
+            'parametric_es': 0.0,
+            'scenarios': 0,
+            'coverage': 0.0,
+            'uncovered_exposure': 0.0,
+            'uncovered_symbols': [],
+            'timestamp': datetime.now().isoformat()
+        }
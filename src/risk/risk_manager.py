@@ -1,5 +1,6 @@
 import sys
 import os
+import time
 from datetime import datetime
 from typing import Dict, List, Optional
 
@@ -10,7 +11,9 @@ sys.path.insert(0, parent_dir)
 
 from models.position import Position
 from models.signal import MarketSignal
-from models.enums import SignalStrength
+from models.enums import SignalStrength, PositionStatus
+from src.risk.correlation import CorrelationEngine
+from src.risk.portfolio_risk import PortfolioRiskCalculator
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,6 +21,9 @@ logger = logging.getLogger(__name__)
 class RiskManager:
     """Gerenciador de risco para operações de trading"""
     
+    # Diferença relativa entre saldo e posição tolerada na reconciliação (comissões, poeira)
+    RECONCILE_TOLERANCE = 0.02
+    
     def __init__(self, config, bot_instance=None):
         self.config = config
         self.bot_instance = bot_instance
@@ -27,17 +33,51 @@ class RiskManager:
         self.daily_trades = 0
         self.daily_pnl = 0
         self.daily_start_capital = 0
+        self.daily_date = datetime.now().date()
         self.max_daily_loss = getattr(config, 'max_daily_loss', 0.05)
         self.max_positions = getattr(config, 'max_positions', 3)
         self.max_risk_per_trade = getattr(config, 'max_risk_per_trade', 0.02)
         self.capital_protection_threshold = getattr(config, 'capital_protection_threshold', 0.85)
+        self.max_portfolio_correlation = getattr(config, 'max_portfolio_correlation', 0.7)
+        self.max_slippage = getattr(config, 'max_slippage', 0.1)
+        
+        # Livros de ofertas locais (definidos pelo bot) para limitar o tamanho pela liquidez
+        self.order_books = None
+        
+        # Correlação entre os retornos do universo analisado
+        self.correlation_engine = CorrelationEngine(
+            timeframe=getattr(config, 'correlation_timeframe', '1h'),
+            window=getattr(config, 'correlation_window', 99),
+            min_periods=getattr(config, 'correlation_min_periods', 20)
+        )
+        
+        # VaR / Expected Shortfall da carteira
+        self.portfolio_risk = PortfolioRiskCalculator(
+            self.correlation_engine,
+            confidence=getattr(config, 'var_confidence', 0.95)
+        )
+        self.risk_metrics: Dict = {}
         
         # Inicializar sistema de persistência
         from src.utils.persistence import DataPersistence
-        self.persistence = DataPersistence()
+        from src.utils.persistence_writer import PersistenceWriter
+        self.persistence = DataPersistence(getattr(config, 'persistence_dir', None))
+        
+        # Gravação assíncrona: o caminho das ordens nunca espera pelo disco
+        self.persistence_writer = PersistenceWriter(
+            self.persistence,
+            snapshot_provider=lambda: dict(self.positions),
+            max_queue=getattr(config, 'persistence_queue_size', 1000),
+            flush_interval=getattr(config, 'persistence_flush_interval', 0.05)
+        )
+        
+        # Histórico de ordens, execuções e posições encerradas
+        from src.utils.trade_ledger import TradeLedger
+        self.ledger = TradeLedger(getattr(config, 'ledger_path', None))
         
         # Carregar posições salvas
         self._load_saved_positions()
+        self.persistence_writer.start()
 
     def add_position(self, symbol: str, side: str, size: float, entry_price: float, 
                      stop_loss: float, take_profit: float, risk_amount: float) -> bool:
@@ -57,10 +97,12 @@ class RiskManager:
             )
             
             self.positions[symbol] = position
+            self._roll_daily_stats()
             self.daily_trades += 1
             
             # Persistir mudanças
-            self._save_positions()
+            self._record_event('open', symbol, position)
+            self.ledger.record_position_open(position)
             
             logger.info(f"✅ Posição adicionada: {symbol}")
             logger.info(f"   Tamanho: {size}")
@@ -121,6 +163,10 @@ class RiskManager:
                 logger.warning(f"Posição já existe para {signal.symbol}")
                 return False
             
+            # Verificar concentração em ativos correlacionados
+            if not self._check_portfolio_correlation(signal, position_size):
+                return False
+            
             return True
             
         except Exception as e:
@@ -156,6 +202,12 @@ class RiskManager:
             # Retornar o menor entre os tamanhos calculados
             final_size = min(max(position_size_risk, position_size_min), max_position_size)
             
+            # Não comprar mais do que o livro absorve dentro do slippage aceito
+            depth_size = self._depth_limited_size(signal.symbol)
+            if depth_size is not None and depth_size < final_size:
+                logger.info(f"Tamanho de {signal.symbol} limitado pela profundidade do livro: {depth_size:.6f}")
+                final_size = depth_size
+            
             logger.info(f"Tamanho calculado para {signal.symbol}: {final_size:.6f}")
             return final_size
             
@@ -163,12 +215,40 @@ class RiskManager:
             logger.error(f"Erro calculando tamanho da posição: {e}")
             return 0
 
+    def _depth_limited_size(self, symbol: str) -> Optional[float]:
+        """Quantidade disponível nas ofertas de venda até `max_slippage`% acima do melhor preço"""
+        if self.order_books is None:
+            return None
+        book = self.order_books.get_book(symbol)
+        if book is None:
+            return None
+        return book.available_quantity('BUY', self.max_slippage)
+
+    def _check_portfolio_correlation(self, signal: MarketSignal, position_size: float) -> bool:
+        """Verifica se a nova posição concentra a carteira em ativos correlacionados"""
+        if not self.positions or self.max_portfolio_correlation >= 1:
+            return True
+        
+        exposures = {symbol: pos.size * pos.current_price for symbol, pos in self.positions.items()}
+        exposures[signal.symbol] = position_size * signal.entry_price
+        
+        correlation = self.correlation_engine.average_correlation(exposures)
+        if correlation > self.max_portfolio_correlation:
+            logger.warning(
+                f"Correlação da carteira acima do limite com {signal.symbol}: "
+                f"{correlation:.2f} > {self.max_portfolio_correlation:.2f}"
+            )
+            return False
+        
+        return True
+
     def _check_daily_loss_limit(self) -> bool:
-        """Verifica se o limite de perda diária foi atingido"""
+        """Verifica se o limite de perda diária foi atingido (lucros não contam)"""
+        self._roll_daily_stats()
         if self.daily_start_capital == 0:
             return False
         
-        current_loss_ratio = abs(self.daily_pnl) / self.daily_start_capital
+        current_loss_ratio = max(0, -self.daily_pnl) / self.daily_start_capital
         return current_loss_ratio >= self.max_daily_loss
 
     def check_capital_protection(self) -> List[str]:
@@ -199,19 +279,24 @@ class RiskManager:
         
         return positions_to_close
 
-    def remove_position(self, symbol: str, realized_pnl: float = 0):
+    def remove_position(self, symbol: str, realized_pnl: float = 0,
+                        exit_price: Optional[float] = None, reason: Optional[str] = None):
         """Remove uma posição e atualiza estatísticas"""
         if symbol in self.positions:
             position = self.positions[symbol]
-            position.close_position(position.current_price, realized_pnl)
+            if exit_price is None:
+                exit_price = position.current_price
+            position.close_position(exit_price, realized_pnl)
+            self.ledger.record_position_close(position, exit_price, realized_pnl, reason)
             
             # Atualizar PnL diário
+            self._roll_daily_stats()
             self.daily_pnl += realized_pnl
             
             del self.positions[symbol]
             
             # Persistir mudanças
-            self._save_positions()
+            self._record_event('close', symbol)
             
             logger.info(f"Posição {symbol} removida. PnL realizado: {realized_pnl:.2f}")
 
@@ -231,6 +316,14 @@ class RiskManager:
         """Retorna o valor total em risco"""
         return sum(position.risk_amount for position in self.positions.values())
 
+    def update_risk_metrics(self) -> Dict:
+        """Recalcula VaR e Expected Shortfall da carteira"""
+        try:
+            self.risk_metrics = self.portfolio_risk.compute(dict(self.positions))
+        except Exception as e:
+            logger.error(f"Erro calculando métricas de risco da carteira: {e}")
+        return self.risk_metrics
+
     def get_positions_summary(self) -> Dict:
         """Retorna resumo das posições"""
         return {
@@ -241,6 +334,8 @@ class RiskManager:
             'daily_pnl': self.daily_pnl,
             'daily_trades': self.daily_trades,
             'available_capital': self.available_capital,
+            'risk_metrics': self.risk_metrics,
+            'persistence': self.persistence_writer.get_stats(),
             'positions': [pos.to_dict() for pos in self.positions.values()]
         }
 
@@ -266,87 +361,116 @@ class RiskManager:
         self.daily_trades = 0
         self.daily_pnl = 0
         self.daily_start_capital = self.total_capital
+        self.daily_date = datetime.now().date()
         logger.info("Estatísticas diárias resetadas")
     
+    def _roll_daily_stats(self):
+        """Reseta as estatísticas diárias na virada do dia"""
+        if datetime.now().date() != self.daily_date:
+            self.reset_daily_stats()
+    
     def _load_saved_positions(self):
-        """Carrega posições salvas do arquivo de persistência"""
+        """Carrega posições salvas do disco (sem chamadas à API)
+        
+        Os preços e a validade das posições são atualizados depois, em lote,
+        por `rehydrate_positions` quando o cliente da Binance estiver disponível.
+        """
         try:
             saved_positions = self.persistence.load_positions()
             if saved_positions:
-                logger.info(f"Carregando {len(saved_positions)} posições salvas...")
-                
-                # Verificar se temos acesso à API da Binance
-                if not hasattr(self, 'binance_client'):
-                    try:
-                        from binance.client import Client
-                        if hasattr(self.config, 'api_key') and hasattr(self.config, 'api_secret'):
-                            self.binance_client = Client(
-                                api_key=self.config.api_key,
-                                api_secret=self.config.api_secret,
-                                testnet=getattr(self.config, 'testnet', True)
-                            )
-                    except Exception as e:
-                        logger.error(f"Erro inicializando cliente Binance no RiskManager: {e}")
-                
-                # Atualizar preços das posições carregadas
-                for symbol in saved_positions:
-                    try:
-                        current_price = None
-                        # Tentar obter preço do bot_instance primeiro
-                        if self.bot_instance and hasattr(self.bot_instance, 'client'):
-                            try:
-                                ticker = self.bot_instance.client.get_symbol_ticker(symbol=symbol)
-                                current_price = float(ticker['price'])
-                            except Exception:
-                                pass
-                        
-                        # Se não conseguiu, tentar com o cliente local
-                        if current_price is None and hasattr(self, 'binance_client'):
-                            try:
-                                ticker = self.binance_client.get_symbol_ticker(symbol=symbol)
-                                current_price = float(ticker['price'])
-                            except Exception:
-                                pass
-                        
-                        # Se conseguiu o preço, atualizar a posição
-                        if current_price is not None:
-                            position = saved_positions[symbol]
-                            
-                            # Verificar se a posição ainda é válida
-                            try:
-                                if self.binance_client:
-                                    symbol_info = self.binance_client.get_symbol_info(symbol)
-                                    if symbol_info is None:
-                                        logger.warning(f"Símbolo {symbol} não encontrado na Binance, removendo posição")
-                                        del saved_positions[symbol]
-                                        continue
-                            except Exception as e:
-                                logger.error(f"Erro verificando símbolo {symbol}: {e}")
-                            
-                            position.current_price = current_price
-                            position.calculate_unrealized_pnl()
-                            logger.info(f"Preço atualizado para {symbol}: {current_price}")
-                        else:
-                            logger.warning(f"Não foi possível obter preço atual para {symbol}, removendo posição")
-                            del saved_positions[symbol]
-                            
-                    except Exception as e:
-                        logger.error(f"Erro processando posição salva {symbol}: {e}")
-                        if symbol in saved_positions:
-                            del saved_positions[symbol]
-                
-                # Atualizar posições apenas se houver alguma válida
-                if saved_positions:
-                    self.positions = saved_positions
-                    logger.info(f"Carregadas {len(self.positions)} posições válidas")
-                else:
-                    logger.warning("Nenhuma posição válida encontrada")
-                
+                self.positions = saved_positions
+                logger.info(f"Carregadas {len(saved_positions)} posições salvas")
         except Exception as e:
             logger.error(f"Erro carregando posições salvas: {e}")
     
+    def rehydrate_positions(self, client, market_data, reconcile: bool = True) -> Dict[str, int]:
+        """Atualiza as posições restauradas com um número constante de chamadas à API
+        
+        Usa um único ticker de todos os símbolos e o exchange info em cache. Com
+        `reconcile`, também compara com os saldos da conta e as OCOs abertas
+        (uma chamada cada), removendo posições encerradas fora do bot e ajustando
+        o tamanho de posições parcialmente vendidas.
+        """
+        result = {'restored': 0, 'removed': 0, 'adjusted': 0}
+        if not self.positions:
+            return result
+        
+        started = time.perf_counter()
+        prices = market_data.get_all_prices()
+        symbols_info = market_data.get_exchange_info()
+        if not prices or not symbols_info:
+            logger.warning("Sem preços/exchange info: posições mantidas sem atualização")
+            result['restored'] = len(self.positions)
+            return result
+        
+        balances, oco_orders = {}, {}
+        if reconcile:
+            try:
+                account = client.get_account()
+                balances = {
+                    item['asset']: float(item['free']) + float(item['locked'])
+                    for item in account['balances']
+                }
+                for oco in client.get_open_oco_orders():
+                    oco_orders[oco['symbol']] = oco['orderListId']
+            except Exception as e:
+                logger.error(f"Erro obtendo saldos/OCOs para reconciliação: {e}")
+                reconcile = False
+        
+        for symbol, position in list(self.positions.items()):
+            info = symbols_info.get(symbol)
+            price = prices.get(symbol)
+            if info is None or info.get('status', 'TRADING') != 'TRADING' or price is None:
+                logger.warning(f"Símbolo {symbol} indisponível na Binance, removendo posição")
+                self._drop_restored_position(symbol)
+                result['removed'] += 1
+                continue
+            
+            position.update_price(price)
+            
+            # Encerramento interrompido: a reconciliação abaixo confirma o que restou
+            if position.status.value == PositionStatus.CLOSING.value:
+                position.status = PositionStatus.OPEN
+            
+            if reconcile:
+                held = balances.get(info['baseAsset'], 0.0)
+                if held < position.size * (1 - self.RECONCILE_TOLERANCE):
+                    if held <= position.size * self.RECONCILE_TOLERANCE:
+                        logger.warning(f"Saldo de {info['baseAsset']} zerado, posição {symbol} encerrada fora do bot")
+                        self._drop_restored_position(symbol)
+                        result['removed'] += 1
+                        continue
+                    logger.warning(f"Ajustando tamanho de {symbol}: {position.size} -> {held}")
+                    position.size = held
+                    position.calculate_unrealized_pnl()
+                    result['adjusted'] += 1
+                
+                if oco_orders.get(symbol) != position.protective_order_id:
+                    position.protective_order_id = oco_orders.get(symbol)
+                    if position.protective_order_id is None:
+                        logger.warning(f"Nenhuma OCO aberta para {symbol}; SL/TP controlados pelo bot")
+                self._record_event('update', symbol, position)
+            
+            result['restored'] += 1
+        
+        elapsed = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"Posições restauradas: {result['restored']} (removidas: {result['removed']}, "
+            f"ajustadas: {result['adjusted']}) em {elapsed:.0f}ms"
+        )
+        return result
+    
+    def _drop_restored_position(self, symbol: str):
+        """Remove uma posição restaurada que não existe mais (sem afetar o PnL diário)"""
+        self.positions.pop(symbol, None)
+        self._record_event('close', symbol)
+    
+    def _record_event(self, op: str, symbol: str, position: Optional[Position] = None):
+        """Enfileira a alteração para o journal (gravação e compactação em segundo plano)"""
+        self.persistence_writer.submit(op, symbol, position)
+    
     def _save_positions(self):
-        """Salva posições atuais no arquivo de persistência"""
+        """Compacta as posições atuais no snapshot de persistência"""
         try:
             success = self.persistence.save_positions(self.positions)
             if success:
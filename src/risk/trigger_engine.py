@@ -0,0 +1,218 @@
+import bisect
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from src.models.position import Position
+
+logger = logging.getLogger(__name__)
+
+# Motivos de fechamento (mesmos textos usados por RiskManager.should_close_position)
+TRIGGER_REASONS = {
+    'stop_loss': "Stop Loss acionado",
+    'take_profit': "Take Profit acionado",
+    'trailing_stop': "Trailing Stop acionado",
+}
+
+
+class Trigger:
+    """Nível de disparo de uma posição"""
+
+    __slots__ = ('symbol', 'kind', 'level')
+
+    def __init__(self, symbol: str, kind: str, level: float):
+        self.symbol = symbol
+        self.kind = kind
+        self.level = level
+
+    @property
+    def reason(self) -> str:
+        return TRIGGER_REASONS.get(self.kind, self.kind)
+
+    def __repr__(self) -> str:
+        return f"Trigger({self.symbol}, {self.kind}, {self.level})"
+
+
+class TriggerBook:
+    """Níveis de disparo ordenados de um símbolo
+
+    Os níveis ficam em duas listas ordenadas: os que disparam quando o preço cai até
+    eles (stop de compra, alvo de venda) e os que disparam quando o preço sobe até eles.
+    Só os extremos (`floor` e `ceiling`) precisam ser comparados a cada atualização;
+    a busca binária só acontece quando um deles é cruzado.
+    """
+
+    def __init__(self):
+        self._below_levels: List[float] = []
+        self._below: List[Trigger] = []
+        self._above_levels: List[float] = []
+        self._above: List[Trigger] = []
+
+    @property
+    def floor(self) -> float:
+        """Maior nível de disparo por queda (-inf se não houver)"""
+        return self._below_levels[-1] if self._below_levels else float('-inf')
+
+    @property
+    def ceiling(self) -> float:
+        """Menor nível de disparo por alta (inf se não houver)"""
+        return self._above_levels[0] if self._above_levels else float('inf')
+
+    def __len__(self) -> int:
+        return len(self._below) + len(self._above)
+
+    def add(self, trigger: Trigger, fires_below: bool):
+        """Insere um nível mantendo a ordenação - O(log n) para a busca"""
+        levels, triggers = self._side(fires_below)
+        index = bisect.bisect_right(levels, trigger.level)
+        levels.insert(index, trigger.level)
+        triggers.insert(index, trigger)
+
+    def remove(self, trigger: Trigger, fires_below: bool) -> bool:
+        """Remove um nível específico"""
+        levels, triggers = self._side(fires_below)
+        index = bisect.bisect_left(levels, trigger.level)
+        while index < len(levels) and levels[index] == trigger.level:
+            if triggers[index] is trigger:
+                del levels[index]
+                del triggers[index]
+                return True
+            index += 1
+        return False
+
+    def crossed(self, price: float) -> List[Trigger]:
+        """Retorna os níveis cruzados pelo preço, na ordem em que seriam atingidos"""
+        fired = []
+        if price <= self.floor:
+            index = bisect.bisect_left(self._below_levels, price)
+            fired.extend(reversed(self._below[index:]))
+        if price >= self.ceiling:
+            index = bisect.bisect_right(self._above_levels, price)
+            fired.extend(self._above[:index])
+        return fired
+
+    def _side(self, fires_below: bool):
+        if fires_below:
+            return self._below_levels, self._below
+        return self._above_levels, self._above
+
+
+class _TrailingState:
+    """Estado do trailing stop de uma posição"""
+
+    __slots__ = ('trigger', 'anchor', 'is_long')
+
+    def __init__(self, trigger: Trigger, anchor: float, is_long: bool):
+        self.trigger = trigger
+        self.anchor = anchor
+        self.is_long = is_long
+
+
+class TriggerEngine:
+    """Motor de disparo de stop loss / take profit / trailing stop em tempo real
+
+    Cada atualização de preço vinda do stream é comparada apenas com os níveis mais
+    próximos do símbolo. Quando um nível é cruzado, todos os gatilhos da posição são
+    removidos e `on_trigger(symbol, reason)` é chamado uma única vez.
+    """
+
+    def __init__(self, on_trigger: Callable[[str, str], None], trailing_stop_pct: float = 0.0):
+        self.on_trigger = on_trigger
+        self.trailing_stop_pct = trailing_stop_pct
+        self._books: Dict[str, TriggerBook] = {}
+        self._trailing: Dict[str, _TrailingState] = {}
+        self._lock = threading.Lock()
+
+    def register_position(self, position: Position):
+        """Cria (ou recria) os gatilhos de uma posição"""
+        is_long = position.side.upper() in ['BUY', 'LONG']
+        book = TriggerBook()
+
+        if position.stop_loss:
+            book.add(Trigger(position.symbol, 'stop_loss', position.stop_loss), fires_below=is_long)
+        if position.take_profit:
+            book.add(Trigger(position.symbol, 'take_profit', position.take_profit), fires_below=not is_long)
+
+        trailing = None
+        if self.trailing_stop_pct > 0:
+            anchor = max(position.entry_price, position.current_price) if is_long \
+                else min(position.entry_price, position.current_price)
+            trigger = Trigger(position.symbol, 'trailing_stop', self._trailing_level(anchor, is_long))
+            book.add(trigger, fires_below=is_long)
+            trailing = _TrailingState(trigger, anchor, is_long)
+
+        with self._lock:
+            self._books[position.symbol] = book
+            if trailing:
+                self._trailing[position.symbol] = trailing
+            else:
+                self._trailing.pop(position.symbol, None)
+
+        logger.debug(f"Gatilhos registrados para {position.symbol}: {len(book)} níveis")
+
+    def unregister_position(self, symbol: str):
+        """Remove todos os gatilhos de uma posição"""
+        with self._lock:
+            self._books.pop(symbol, None)
+            self._trailing.pop(symbol, None)
+
+    def symbols(self) -> List[str]:
+        """Símbolos com gatilhos ativos"""
+        return list(self._books.keys())
+
+    def get_levels(self, symbol: str) -> Dict[str, float]:
+        """Níveis ativos de um símbolo (para diagnóstico)"""
+        book = self._books.get(symbol)
+        if book is None:
+            return {}
+        return {trigger.kind: trigger.level for trigger in book._below + book._above}
+
+    def on_price(self, symbol: str, price: float) -> Optional[Trigger]:
+        """Processa uma atualização de preço e dispara o gatilho cruzado, se houver"""
+        book = self._books.get(symbol)
+        if book is None:
+            return None
+
+        trailing = self._trailing.get(symbol)
+        moves_trailing = trailing is not None and (
+            price > trailing.anchor if trailing.is_long else price < trailing.anchor
+        )
+
+        # Caminho rápido: preço entre os níveis mais próximos
+        if book.floor < price < book.ceiling and not moves_trailing:
+            return None
+
+        with self._lock:
+            if self._books.get(symbol) is not book:
+                return None
+
+            if moves_trailing:
+                self._move_trailing(book, trailing, price)
+
+            fired = book.crossed(price)
+            if not fired:
+                return None
+
+            del self._books[symbol]
+            self._trailing.pop(symbol, None)
+
+        trigger = fired[0]
+        logger.info(f"⚡ {trigger.reason} para {symbol} em {price} (nível {trigger.level})")
+        try:
+            self.on_trigger(symbol, trigger.reason)
+        except Exception as e:
+            logger.error(f"Erro disparando gatilho de {symbol}: {e}")
+        return trigger
+
+    def _move_trailing(self, book: TriggerBook, trailing: _TrailingState, price: float):
+        """Acompanha o novo extremo de preço e reposiciona o trailing stop"""
+        trailing.anchor = price
+        new_level = self._trailing_level(price, trailing.is_long)
+        book.remove(trailing.trigger, fires_below=trailing.is_long)
+        trailing.trigger.level = new_level
+        book.add(trailing.trigger, fires_below=trailing.is_long)
+
+    def _trailing_level(self, anchor: float, is_long: bool) -> float:
+        if is_long:
+            return anchor * (1 - self.trailing_stop_pct)
+        return anchor * (1 + self.trailing_stop_pct)
@@ -0,0 +1,227 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXPORT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'analytics')
+
+DATASETS = ('trades', 'signals', 'equity')
+
+
+class AnalyticsExporter:
+    """Exporta trades, sinais e snapshots de patrimônio em Parquet particionado por dia
+
+    Os registros ficam em memória e são gravados em lote (por quantidade ou tempo)
+    como `<dataset>/date=AAAA-MM-DD/part-*.parquet`, com compressão zstd. O layout
+    segue o particionamento Hive, então notebooks podem ler meses de histórico
+    com `pyarrow.dataset`/`pandas.read_parquet` filtrando por data e colunas.
+
+    O pyarrow é importado apenas na gravação; sem ele a exportação é desativada
+    com um aviso e o bot continua funcionando.
+    """
+
+    def __init__(self, export_dir: str = None, flush_rows: int = 500, flush_interval: float = 300.0,
+                 equity_interval: float = 300.0, compression: str = 'zstd'):
+        self.export_dir = export_dir or DEFAULT_EXPORT_DIR
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.equity_interval = equity_interval
+        self.compression = compression
+        self.enabled = True
+        self.files_written = 0
+
+        self._buffers: Dict[str, List[Dict[str, Any]]] = {name: [] for name in DATASETS}
+        self._last_flush = time.time()
+        self._last_equity: Optional[float] = None
+        self._sequence = 0
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Registro
+    # ------------------------------------------------------------------
+
+    def record_trade(self, position, exit_price: float, realized_pnl: float, reason: str = None,
+                     closed_at: Optional[datetime] = None):
+        """Registra uma posição encerrada"""
+        closed_at = closed_at or datetime.now()
+        opened_at = position.timestamp
+        notional = position.entry_price * position.size
+        self._add('trades', {
+            'timestamp': closed_at,
+            'symbol': position.symbol,
+            'side': position.side,
+            'size': float(position.size),
+            'entry_price': float(position.entry_price),
+            'exit_price': float(exit_price),
+            'stop_loss': _to_float(position.stop_loss),
+            'take_profit': _to_float(position.take_profit),
+            'risk_amount': float(position.risk_amount),
+            'realized_pnl': float(realized_pnl),
+            'return_pct': float(realized_pnl / notional) if notional else 0.0,
+            'reason': reason,
+            'opened_at': opened_at,
+            'holding_seconds': (closed_at - opened_at).total_seconds() if opened_at else None
+        })
+
+    def record_signal(self, signal, executed: bool = False):
+        """Registra um sinal com os dados da análise achatados em colunas"""
+        row = {
+            'timestamp': signal.timestamp,
+            'symbol': signal.symbol,
+            'strength': signal.strength.name,
+            'confidence': float(signal.confidence),
+            'entry_price': float(signal.entry_price),
+            'stop_loss': float(signal.stop_loss),
+            'take_profit': float(signal.take_profit),
+            'risk_amount': float(signal.risk_amount),
+            'risk_reward_ratio': float(signal.get_risk_reward_ratio()),
+            'executed': bool(executed),
+            'analysis_json': json.dumps(signal.analysis_data, default=str)
+        }
+        row.update(flatten_analysis(signal.analysis_data))
+        self._add('signals', row)
+
+    def record_equity(self, total_capital: float, available_capital: float, unrealized_pnl: float,
+                      daily_pnl: float, open_positions: int, exposure: float, force: bool = False) -> bool:
+        """Registra um snapshot de patrimônio (no máximo um a cada `equity_interval`)"""
+        now = time.time()
+        if not force and self._last_equity is not None and now - self._last_equity < self.equity_interval:
+            return False
+        self._last_equity = now
+        self._add('equity', {
+            'timestamp': datetime.fromtimestamp(now),
+            'total_capital': float(total_capital),
+            'available_capital': float(available_capital),
+            'unrealized_pnl': float(unrealized_pnl),
+            'equity': float(total_capital) + float(unrealized_pnl),
+            'daily_pnl': float(daily_pnl),
+            'open_positions': int(open_positions),
+            'exposure': float(exposure)
+        })
+        return True
+
+    # ------------------------------------------------------------------
+    # Gravação
+    # ------------------------------------------------------------------
+
+    def flush(self) -> int:
+        """Grava os registros pendentes; retorna quantos arquivos foram criados"""
+        with self._lock:
+            self._last_flush = time.time()
+            if not self.enabled or not any(self._buffers.values()):
+                return 0
+
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                logger.warning("pyarrow não instalado: exportação analítica desativada")
+                self.enabled = False
+                self._buffers = {name: [] for name in DATASETS}
+                return 0
+
+            written = 0
+            for name in DATASETS:
+                rows = self._buffers[name]
+                if not rows:
+                    continue
+                try:
+                    written += self._write_dataset(pa, pq, name, rows)
+                    self._buffers[name] = []
+                except Exception as e:
+                    logger.error(f"Erro exportando {name} para Parquet: {e}")
+            self.files_written += written
+            return written
+
+    def close(self):
+        """Grava tudo o que estiver pendente"""
+        self.flush()
+
+    def _add(self, dataset: str, row: Dict[str, Any]):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._buffers[dataset].append(row)
+            pending = sum(len(rows) for rows in self._buffers.values())
+            if pending >= self.flush_rows or time.time() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def _write_dataset(self, pa, pq, name: str, rows: List[Dict[str, Any]]) -> int:
+        df = pd.DataFrame(rows)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df['date'] = df['timestamp'].dt.strftime('%Y-%m-%d')
+
+        written = 0
+        for day, group in df.groupby('date', sort=True):
+            partition_dir = os.path.join(self.export_dir, name, f'date={day}')
+            os.makedirs(partition_dir, exist_ok=True)
+
+            self._sequence += 1
+            filename = f'part-{int(time.time() * 1000)}-{self._sequence:06d}.parquet'
+            path = os.path.join(partition_dir, filename)
+
+            # A data fica no nome do diretório (particionamento Hive)
+            table = pa.Table.from_pandas(group.drop(columns=['date']), preserve_index=False)
+            temp_path = f'{path}.tmp'
+            pq.write_table(table, temp_path, compression=self.compression)
+            os.replace(temp_path, path)
+            written += 1
+        return written
+
+
+def flatten_analysis(analysis_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Achata `analysis_data` em colunas `analysis.<tf>.<campo>` (numéricos como float)"""
+    if not analysis_data:
+        return {}
+    flat = pd.json_normalize(analysis_data, sep='.').to_dict(orient='records')[0]
+    columns = {}
+    for key, value in flat.items():
+        if isinstance(value, bool) or value is None:
+            columns[f'analysis.{key}'] = value
+        elif isinstance(value, (int, float)):
+            columns[f'analysis.{key}'] = float(value)
+        elif hasattr(value, 'item'):
+            # Escalares numpy vindos dos indicadores
+            columns[f'analysis.{key}'] = float(value.item())
+        elif isinstance(value, str):
+            columns[f'analysis.{key}'] = value
+    return columns
+
+
+def read_dataset(name: str, export_dir: str = None, columns: List[str] = None, filters=None) -> pd.DataFrame:
+    """Lê um dataset exportado unificando o schema entre os arquivos
+
+    Exemplo: `read_dataset('trades', columns=['symbol', 'realized_pnl'],
+    filters=[('date', '>=', '2024-01-01')])`
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    path = os.path.join(export_dir or DEFAULT_EXPORT_DIR, name)
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    # Sinais podem ganhar colunas novas de análise ao longo do tempo
+    schema = pa.unify_schemas(
+        [fragment.physical_schema for fragment in dataset.get_fragments()] + [dataset.schema]
+    )
+    dataset = ds.dataset(path, schema=schema, format='parquet', partitioning='hive')
+
+    expression = None
+    for column, op, value in filters or []:
+        field = ds.field(column)
+        condition = {
+            '==': field == value, '!=': field != value, '>': field > value,
+            '>=': field >= value, '<': field < value, '<=': field <= value
+        }[op]
+        expression = condition if expression is None else expression & condition
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def _to_float(value) -> Optional[float]:
+    return float(value) if value is not None else None
@@ -0,0 +1,201 @@
+import math
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PREFIX = 'binance_bot_'
+
+
+class _CounterCell:
+    """Valor de um contador para uma combinação de labels
+
+    Cada thread incrementa a própria célula (sem locks no caminho quente);
+    a leitura soma as células de todas as threads.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._cells: List[List[float]] = []
+        self._register = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        cell = getattr(self._local, 'cell', None)
+        if cell is None:
+            cell = self._local.cell = [0.0]
+            with self._register:
+                self._cells.append(cell)
+        cell[0] += amount
+
+    @property
+    def value(self) -> float:
+        return sum(cell[0] for cell in list(self._cells))
+
+
+class _GaugeCell:
+    """Valor instantâneo (atribuição simples, último escritor vence)"""
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = float(value)
+
+
+class _Metric:
+    cell_class = None
+    kind = None
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if not self.label_names:
+            self._default = self._children[()] = self.cell_class()
+
+    def labels(self, *values, **named):
+        """Célula da combinação de labels (criada no primeiro uso)"""
+        key = tuple(str(v) for v in values) or tuple(str(named[label]) for label in self.label_names)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self.cell_class())
+        return child
+
+    def collect(self) -> Dict[str, Any]:
+        samples = [
+            [dict(zip(self.label_names, key)), child.value]
+            for key, child in list(self._children.items())
+        ]
+        return family(self.name, self.kind, self.help, samples)
+
+
+class Counter(_Metric):
+    cell_class = _CounterCell
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    cell_class = _GaugeCell
+    kind = 'gauge'
+
+    def set(self, value: float):
+        self._default.set(value)
+
+
+class MetricsRegistry:
+    """Contadores e medidores do bot, exportados no formato do Prometheus
+
+    As métricas são atualizadas pelas threads do bot sem locks; `collect`
+    gera uma lista serializável (vai no snapshot compartilhado) e o servidor
+    web a converte em texto com `render_prometheus`, sem nunca tocar nas
+    threads de trading.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Counter:
+        return self._add(Counter(name, help_text, tuple(labels)))
+
+    def gauge(self, name: str, help_text: str, labels: Iterable[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help_text, tuple(labels)))
+
+    def collect(self) -> List[Dict[str, Any]]:
+        return [metric.collect() for metric in list(self._metrics.values())]
+
+    def _add(self, metric: _Metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+
+def family(name: str, kind: str, help_text: str, samples: List) -> Dict[str, Any]:
+    """Família de métricas: `samples` é uma lista de [labels, valor] ou [labels, valor, sufixo]"""
+    return {'name': name, 'type': kind, 'help': help_text, 'samples': samples}
+
+
+def span_families(tracing: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Latências do tracer como `summary` (quantis, contagem e soma em segundos)"""
+    spans = (tracing or {}).get('spans') or {}
+    samples = []
+    errors = []
+    for name, stats in spans.items():
+        for quantile in ('50', '95', '99'):
+            samples.append([{'span': name, 'quantile': f'0.{quantile}'}, stats[f'p{quantile}_ms'] / 1000])
+        samples.append([{'span': name}, stats['count'], '_count'])
+        samples.append([{'span': name}, stats['mean_ms'] * stats['count'] / 1000, '_sum'])
+        errors.append([{'span': name}, stats['errors']])
+    return [
+        family('span_seconds', 'summary', 'Duração das etapas do ciclo e das chamadas à corretora', samples),
+        family('span_errors_total', 'counter', 'Etapas e chamadas encerradas com exceção', errors)
+    ]
+
+
+def snapshot_families(snapshot: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Métricas derivadas do snapshot publicado pelo processo do bot"""
+    if not snapshot:
+        return [family('up', 'gauge', 'Processo do bot ativo', [[{}, 0]])]
+
+    status = snapshot.get('status') or {}
+    persistence = snapshot.get('persistence') or {}
+    families = [
+        family('up', 'gauge', 'Processo do bot ativo', [[{}, 1 if snapshot.get('running') else 0]]),
+        family('open_positions', 'gauge', 'Posições abertas', [[{}, snapshot.get('active_positions', 0)]]),
+        family('unrealized_pnl', 'gauge', 'PnL não realizado das posições abertas (USDT)',
+               [[{}, snapshot.get('daily_pnl') or 0]]),
+        family('balance', 'gauge', 'Saldo disponível (USDT)', [[{}, snapshot.get('balance') or 0]]),
+        family('persistence_write_seconds', 'gauge', 'Latência de gravação do estado das posições', [
+            [{'stat': stat}, (persistence.get(f'{stat}_write_ms') or 0) / 1000] for stat in ('last', 'avg', 'max')
+        ]),
+        family('persistence_queue_depth', 'gauge', 'Eventos aguardando gravação',
+               [[{}, persistence.get('queue_depth', 0)]]),
+        family('persistence_events_dropped_total', 'counter', 'Eventos de persistência descartados',
+               [[{}, persistence.get('events_dropped', 0)]]),
+    ]
+    families.extend(snapshot.get('metrics') or [])
+    families.extend(span_families(status.get('tracing')))
+    return families
+
+
+def render_prometheus(families: Iterable[Dict[str, Any]]) -> str:
+    """Formato de exposição em texto do Prometheus (versão 0.0.4)"""
+    lines = []
+    for metric in families:
+        name = PREFIX + metric['name']
+        lines.append(f"# HELP {name} {_escape_help(metric['help'])}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for sample in metric['samples']:
+            labels, value = sample[0], sample[1]
+            suffix = sample[2] if len(sample) > 2 else ''
+            lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ''
+    pairs = ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+    return '{' + pairs + '}'
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value) -> str:
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+
+
+def _escape_help(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
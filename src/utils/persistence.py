@@ -1,69 +1,214 @@
 import json
 import os
+import threading
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from src.models.position import Position
 
 class DataPersistence:
-    def __init__(self, data_dir: str = None):
+    """Persistência das posições com journal append-only e snapshots atômicos
+    
+    Cada alteração de posição é gravada como uma linha no journal (`positions.journal`)
+    com fsync, o que custa O(1) independente do número de posições. Periodicamente o
+    estado completo é compactado no snapshot (`positions.json`) através de arquivo
+    temporário + `os.replace`, e o journal é reiniciado. Na carga, o snapshot é lido e
+    os eventos do journal com sequência posterior são reaplicados.
+    """
+
+    def __init__(self, data_dir: str = None, compact_every: int = 100, max_backups: int = 10):
         if data_dir is None:
             # Usar diretório padrão
             self.data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'persistence')
         else:
             self.data_dir = data_dir
-            
+        
         # Criar diretório se não existir
         os.makedirs(self.data_dir, exist_ok=True)
         
         self.positions_file = os.path.join(self.data_dir, 'positions.json')
+        self.journal_file = os.path.join(self.data_dir, 'positions.journal')
         self.backup_dir = os.path.join(self.data_dir, 'backups')
         os.makedirs(self.backup_dir, exist_ok=True)
+        
+        self.compact_every = compact_every
+        self.max_backups = max_backups
+        self.sequence = 0
+        self.journal_events = 0
+        self._journal = None
+        self._lock = threading.RLock()
+
+    def append_event(self, op: str, symbol: str, position: Optional[Position] = None) -> bool:
+        """Grava um evento de posição no journal ('open', 'update' ou 'close')"""
+        return self.append_events([(op, symbol, position.to_dict() if position is not None else None)])
+
+    def append_events(self, events: List[Tuple[str, str, Optional[Dict[str, Any]]]]) -> bool:
+        """Grava um lote de eventos (op, símbolo, posição serializada) com um único fsync"""
+        try:
+            with self._lock:
+                timestamp = datetime.now().isoformat()
+                lines = []
+                for op, symbol, position_data in events:
+                    self.sequence += 1
+                    lines.append(json.dumps({
+                        'seq': self.sequence,
+                        'op': op,
+                        'symbol': symbol,
+                        'position': position_data,
+                        'timestamp': timestamp
+                    }, separators=(',', ':')) + '\n')
+                journal = self._open_journal()
+                journal.write(''.join(lines))
+                journal.flush()
+                os.fsync(journal.fileno())
+                self.journal_events += len(lines)
+            return True
+        
+        except Exception as e:
+            print(f"Erro ao gravar evento no journal: {e}")
+            return False
+
+    def should_compact(self) -> bool:
+        """Indica se o journal cresceu o suficiente para ser compactado"""
+        return self.journal_events >= self.compact_every
 
     def save_positions(self, positions: Dict[str, Position]) -> bool:
-        """Salva as posições em arquivo JSON"""
+        """Compacta o estado completo no snapshot JSON e reinicia o journal"""
         try:
-            # Criar backup do arquivo atual se existir
-            if os.path.exists(self.positions_file):
-                self._create_backup('positions')
-            
-            # Converter posições para dicionário
-            positions_data = {
-                'timestamp': datetime.now().isoformat(),
-                'positions': {
-                    symbol: pos.to_dict() for symbol, pos in positions.items()
+            with self._lock:
+                # Manter cópia do snapshot anterior (limitada a max_backups)
+                if os.path.exists(self.positions_file):
+                    self._create_backup('positions')
+                    self.cleanup_old_backups(self.max_backups)
+                
+                # Converter posições para dicionário
+                positions_data = {
+                    'timestamp': datetime.now().isoformat(),
+                    'sequence': self.sequence,
+                    'positions': {
+                        symbol: pos.to_dict() for symbol, pos in positions.items()
+                    }
                 }
-            }
-            
-            # Salvar em arquivo
-            with open(self.positions_file, 'w') as f:
-                json.dump(positions_data, f, indent=4)
+                
+                # Escrita atômica: arquivo temporário + fsync + replace
+                self._atomic_write(self.positions_file, json.dumps(positions_data, indent=4))
+                
+                # Eventos até `sequence` já estão no snapshot
+                self._reset_journal()
             
             return True
-            
+        
         except Exception as e:
             print(f"Erro ao salvar posições: {e}")
             return False
 
     def load_positions(self) -> Dict[str, Position]:
-        """Carrega posições do arquivo JSON"""
+        """Carrega o snapshot e reaplica os eventos do journal"""
         try:
-            if not os.path.exists(self.positions_file):
-                return {}
-            
-            with open(self.positions_file, 'r') as f:
-                data = json.load(f)
-            
-            # Reconstruir objetos Position
-            positions = {}
-            for symbol, pos_data in data['positions'].items():
-                positions[symbol] = Position.from_dict(pos_data)
-            
-            return positions
-            
+            with self._lock:
+                positions = {}
+                snapshot_sequence = 0
+                
+                if os.path.exists(self.positions_file):
+                    with open(self.positions_file, 'r') as f:
+                        data = json.load(f)
+                    
+                    snapshot_sequence = data.get('sequence', 0)
+                    
+                    # Reconstruir objetos Position
+                    for symbol, pos_data in data['positions'].items():
+                        positions[symbol] = Position.from_dict(pos_data)
+                
+                self.sequence = max(self.sequence, snapshot_sequence)
+                self.journal_events = self._replay_journal(positions, snapshot_sequence)
+                
+                return positions
+        
         except Exception as e:
             print(f"Erro ao carregar posições: {e}")
             return {}
 
+    def close(self):
+        """Fecha o arquivo do journal"""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def _replay_journal(self, positions: Dict[str, Position], after_sequence: int) -> int:
+        """Reaplica eventos com sequência maior que a do snapshot; retorna quantos aplicou
+        
+        Uma última linha incompleta (queda durante a escrita) é descartada e o
+        arquivo é truncado no último evento íntegro, para que os próximos
+        eventos não sejam gravados colados a ela.
+        """
+        if not os.path.exists(self.journal_file):
+            return 0
+        
+        applied = 0
+        good_offset = 0
+        with open(self.journal_file, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("linha sem terminador")
+                    event = json.loads(line)
+                except ValueError:
+                    break
+                good_offset += len(line)
+                
+                seq = event.get('seq', 0)
+                self.sequence = max(self.sequence, seq)
+                if seq <= after_sequence:
+                    continue
+                
+                if event['op'] == 'close':
+                    positions.pop(event['symbol'], None)
+                elif event.get('position'):
+                    positions[event['symbol']] = Position.from_dict(event['position'])
+                applied += 1
+        
+        if good_offset < os.path.getsize(self.journal_file):
+            print(f"Journal com escrita incompleta; descartando {os.path.getsize(self.journal_file) - good_offset} bytes")
+            self.close()
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(good_offset)
+                f.flush()
+                os.fsync(f.fileno())
+        
+        return applied
+
+    def _open_journal(self):
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'a')
+        return self._journal
+
+    def _reset_journal(self):
+        self.close()
+        self._atomic_write(self.journal_file, '')
+        self.journal_events = 0
+
+    def _atomic_write(self, path: str, content: str):
+        temp_file = f"{path}.tmp"
+        with open(temp_file, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, path)
+        self._fsync_dir()
+
+    def _fsync_dir(self):
+        """Garante que o rename foi persistido (não suportado em todas as plataformas)"""
+        try:
+            fd = os.open(self.data_dir, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
     def _create_backup(self, file_type: str):
         """Cria backup de um arquivo"""
         try:
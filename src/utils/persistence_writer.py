@@ -0,0 +1,171 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from src.models.position import Position
+from src.utils.persistence import DataPersistence
+
+logger = logging.getLogger(__name__)
+
+
+class PersistenceWriter:
+    """Grava os eventos de posição em segundo plano, fora do caminho das ordens
+
+    `submit` apenas serializa a posição e a coloca numa fila limitada, sem nunca
+    bloquear. Uma thread dedicada agrupa os eventos que chegam em rajada (até
+    `max_batch` eventos ou `flush_interval` segundos) e os grava no journal com um
+    único fsync. Se a fila encher, os eventos pendentes são descartados e substituídos
+    por um snapshot completo obtido de `snapshot_provider`, que já contém o estado
+    mais recente. A compactação do journal também acontece nesta thread.
+    """
+
+    def __init__(self, persistence: DataPersistence, snapshot_provider: Callable[[], Dict[str, Position]],
+                 max_queue: int = 1000, flush_interval: float = 0.05, max_batch: int = 100):
+        self.persistence = persistence
+        self.snapshot_provider = snapshot_provider
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._snapshot_requested = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.events_written = 0
+        self.batches_written = 0
+        self.events_dropped = 0
+        self.snapshots_written = 0
+        self.last_write_ms = 0.0
+        self.max_write_ms = 0.0
+        self._total_write_ms = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Inicia a thread de gravação"""
+        if self.is_running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='persistence-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Grava o que estiver na fila, compacta o snapshot e encerra a thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning("Thread de persistência não terminou a tempo")
+            self._thread = None
+        self._write_snapshot()
+
+    def submit(self, op: str, symbol: str, position: Optional[Position] = None):
+        """Enfileira um evento de posição ('open', 'update' ou 'close') sem bloquear"""
+        event = (op, symbol, position.to_dict() if position is not None else None)
+
+        if not self.is_running:
+            # Sem a thread (ex.: após stop) a gravação é feita diretamente
+            self._write_batch([event])
+            return
+
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.events_dropped += 1
+            self._snapshot_requested.set()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Aguarda até que todos os eventos enfileirados tenham sido gravados"""
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(
+                lambda: self._queue.unfinished_tasks == 0, timeout
+            )
+
+    def get_stats(self) -> Dict:
+        """Profundidade da fila e latência de gravação"""
+        return {
+            'queue_depth': self._queue.qsize(),
+            'max_queue': self.max_queue,
+            'events_written': self.events_written,
+            'batches_written': self.batches_written,
+            'events_dropped': self.events_dropped,
+            'snapshots_written': self.snapshots_written,
+            'last_write_ms': round(self.last_write_ms, 3),
+            'avg_write_ms': round(self._total_write_ms / self.batches_written, 3) if self.batches_written else 0.0,
+            'max_write_ms': round(self.max_write_ms, 3)
+        }
+
+    def _run(self):
+        while not self._stop_event.is_set() or not self._queue.empty():
+            if self._snapshot_requested.is_set():
+                self._replace_queue_with_snapshot()
+
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            # Agrupar eventos da mesma rajada
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    # Espera curta para que stop() não aguarde o intervalo inteiro
+                    batch.append(self._queue.get(timeout=min(remaining, 0.1)))
+                except queue.Empty:
+                    if self._stop_event.is_set():
+                        break
+
+            try:
+                self._write_batch(batch)
+                if self.persistence.should_compact():
+                    self._write_snapshot()
+            except Exception as e:
+                logger.error(f"Erro na thread de persistência: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch):
+        started = time.perf_counter()
+        if not self.persistence.append_events(batch):
+            logger.warning(f"Falha ao gravar {len(batch)} eventos no journal")
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        self.events_written += len(batch)
+        self.batches_written += 1
+        self.last_write_ms = elapsed
+        self.max_write_ms = max(self.max_write_ms, elapsed)
+        self._total_write_ms += elapsed
+
+    def _replace_queue_with_snapshot(self):
+        """Descarta os eventos pendentes; o snapshot tirado em seguida já os inclui"""
+        self._snapshot_requested.clear()
+        discarded = 0
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            discarded += 1
+        self.events_dropped += discarded
+        logger.warning(f"Fila de persistência cheia: {discarded} eventos substituídos por snapshot")
+        self._write_snapshot()
+
+    def _write_snapshot(self):
+        try:
+            if self.persistence.save_positions(self.snapshot_provider()):
+                self.snapshots_written += 1
+            else:
+                logger.warning("Falha ao salvar snapshot das posições")
+        except Exception as e:
+            logger.error(f"Erro salvando snapshot das posições: {e}")
@@ -0,0 +1,97 @@
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+# Deltas mantidos para clientes que voltam de uma desconexão curta
+DELTA_HISTORY = 50
+
+# Campos agregados enviados junto com as posições
+SUMMARY_FIELDS = ('running', 'active_positions', 'daily_pnl', 'balance')
+
+
+def diff_positions(old: Dict[str, Dict], new: Dict[str, Dict]) -> Dict[str, Any]:
+    """Diferença entre dois estados de posições (símbolo -> dicionário)
+
+    Posições novas vão completas em `upsert`; as existentes levam só os campos
+    alterados; as encerradas aparecem em `removed`.
+    """
+    upsert = {}
+    for symbol, fields in new.items():
+        previous = old.get(symbol)
+        if previous is None:
+            upsert[symbol] = dict(fields)
+            continue
+        changed = {key: value for key, value in fields.items() if previous.get(key) != value}
+        if changed:
+            upsert[symbol] = changed
+    removed = [symbol for symbol in old if symbol not in new]
+    return {'upsert': upsert, 'removed': removed}
+
+
+def merge_deltas(deltas: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Combina deltas consecutivos em um só (para reenvio após reconexão)"""
+    merged = None
+    for delta in deltas:
+        if merged is None:
+            merged = {'base': delta['base'], 'version': delta['version'], 'upsert': {},
+                      'removed': [], 'summary': {}}
+        for symbol in delta['removed']:
+            merged['upsert'].pop(symbol, None)
+            if symbol not in merged['removed']:
+                merged['removed'].append(symbol)
+        for symbol, fields in delta['upsert'].items():
+            if symbol in merged['removed']:
+                merged['removed'].remove(symbol)
+            merged['upsert'].setdefault(symbol, {}).update(fields)
+        merged['summary'].update(delta['summary'])
+        merged['version'] = delta['version']
+    return merged
+
+
+class PositionDeltaTracker:
+    """Estado versionado das posições enviado aos clientes em deltas
+
+    Cada `update` com mudanças gera um delta `{base, version, upsert, removed,
+    summary}`. Um cliente aplica o delta se `base` for a versão que ele tem;
+    caso contrário pede `resync` e recebe os deltas perdidos combinados ou,
+    se já saíram do histórico, o snapshot completo.
+    """
+
+    def __init__(self, history: int = DELTA_HISTORY):
+        self.version = 0
+        self.positions: Dict[str, Dict] = {}
+        self.summary: Dict[str, Any] = {}
+        self._history = deque(maxlen=history)
+
+    def update(self, positions: List[Dict], summary: Dict[str, Any], version: Optional[int] = None) -> Optional[Dict]:
+        """Aplica um novo estado; retorna o delta ou None se nada mudou"""
+        current = {position['symbol']: position for position in positions}
+        delta = diff_positions(self.positions, current)
+        summary = {key: summary.get(key) for key in SUMMARY_FIELDS}
+        changed_summary = {key: value for key, value in summary.items() if self.summary.get(key) != value}
+        if not delta['upsert'] and not delta['removed'] and not changed_summary:
+            return None
+
+        base = self.version
+        self.version = version if version is not None and version > base else base + 1
+        delta.update(base=base, version=self.version, summary=changed_summary)
+        self.positions = current
+        self.summary = summary
+        self._history.append(delta)
+        return delta
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'positions': list(self.positions.values()),
+            'summary': dict(self.summary)
+        }
+
+    def resync(self, version: Optional[int]) -> Dict[str, Any]:
+        """Mensagem para um cliente que está na `version` informada"""
+        if version == self.version:
+            return {'type': 'delta', 'delta': None}
+        if version is not None and self._history and self._history[0]['base'] <= version < self.version:
+            missed = [delta for delta in self._history if delta['version'] > version]
+            if missed and missed[0]['base'] == version:
+                return {'type': 'delta', 'delta': merge_deltas(missed)}
+        return {'type': 'snapshot', 'snapshot': self.snapshot()}
@@ -0,0 +1,227 @@
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from html import escape
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.005
+MIN_INTERVAL = 0.001
+MAX_DURATION = 300.0
+MAX_STACK_DEPTH = 128
+
+FORMATS = ('json', 'collapsed', 'svg')
+
+# Frames guardados por alocação no tracemalloc
+TRACEMALLOC_FRAMES = 10
+
+
+class ProfilerBusy(RuntimeError):
+    """Já existe uma captura em andamento"""
+
+
+class SamplingProfiler:
+    """Amostragem de pilhas das threads do processo por um tempo limitado
+
+    A thread que chama `capture` lê `sys._current_frames()` a cada `interval` e conta
+    as pilhas no formato "collapsed" (`thread;arquivo:função;... contagem`),
+    que alimenta flame graphs. Nada é instalado no interpretador: fora de
+    uma captura o custo é zero, e durante ela as threads medidas não são
+    interrompidas além da troca normal do GIL. Opcionalmente compara dois
+    snapshots do tracemalloc (início e fim) e devolve as maiores alocações.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def capture(self, duration: float, interval: float = DEFAULT_INTERVAL,
+                threads: Optional[List[str]] = None, allocations: bool = False,
+                top: int = 20) -> Dict[str, Any]:
+        """Amostra por `duration` segundos; `threads` filtra por prefixo do nome"""
+        if interval < MIN_INTERVAL:
+            raise ValueError(f"Intervalo de amostragem deve ser de pelo menos {MIN_INTERVAL}s")
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("Já existe uma captura de perfil em andamento")
+        started_tracemalloc = False
+        try:
+            baseline = None
+            if allocations:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(TRACEMALLOC_FRAMES)
+                    started_tracemalloc = True
+                baseline = tracemalloc.take_snapshot()
+
+            logger.info(f"🔬 Perfil por amostragem por {duration:.0f}s (intervalo {interval * 1000:.0f} ms)")
+            stacks, samples, elapsed = self._sample(duration, interval, threads)
+
+            result = {
+                'duration': elapsed,
+                'interval': interval,
+                'samples': samples,
+                'threads': threads,
+                'stacks': dict(stacks.most_common())
+            }
+            if allocations:
+                result['allocations'] = top_allocations(baseline, tracemalloc.take_snapshot(), top)
+            return result
+        finally:
+            if started_tracemalloc:
+                tracemalloc.stop()
+            self._lock.release()
+
+    def _sample(self, duration: float, interval: float, threads: Optional[List[str]]):
+        stacks: Counter = Counter()
+        own = threading.get_ident()
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + duration
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                name = names.get(ident, f'thread-{ident}')
+                if threads and not any(name.startswith(prefix) for prefix in threads):
+                    continue
+                stacks[collapse(name, frame)] += 1
+            samples += 1
+            time.sleep(max(0.0, interval - (time.perf_counter() - now)))
+        return stacks, samples, time.perf_counter() - started
+
+
+def profile_request(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Valida e normaliza os parâmetros de uma captura (ValueError se inválidos)
+
+    `seconds` é limitado a `MAX_DURATION`; `interval` precisa ser de pelo
+    menos `MIN_INTERVAL` (valores menores viram um laço ocupado no bot).
+    """
+    if not isinstance(params, dict):
+        raise ValueError("Parâmetros devem ser um objeto JSON")
+    try:
+        seconds = float(_given(params, 'seconds', 10))
+        interval = float(_given(params, 'interval', DEFAULT_INTERVAL))
+        top = int(_given(params, 'top', 20))
+    except (TypeError, ValueError):
+        raise ValueError("seconds, interval e top devem ser numéricos")
+    if not 0 < seconds < float('inf'):
+        raise ValueError("seconds deve ser maior que zero")
+    if not interval >= MIN_INTERVAL:
+        raise ValueError(f"interval deve ser de pelo menos {MIN_INTERVAL}s")
+    if top <= 0:
+        raise ValueError("top deve ser maior que zero")
+
+    threads = params.get('threads') or None
+    if threads is not None and (not isinstance(threads, list) or not all(isinstance(t, str) for t in threads)):
+        raise ValueError("threads deve ser uma lista de nomes")
+    output = params.get('format') or 'json'
+    if output not in FORMATS:
+        raise ValueError(f"format deve ser um de: {', '.join(FORMATS)}")
+    return {
+        'seconds': min(seconds, MAX_DURATION),
+        'interval': interval,
+        'threads': threads,
+        'allocations': bool(params.get('allocations')),
+        'top': min(top, 200),
+        'format': output
+    }
+
+
+def _given(params: Dict[str, Any], key: str, default):
+    value = params.get(key)
+    return default if value is None else value
+
+
+def collapse(thread_name: str, frame) -> str:
+    """Pilha de um frame como `thread;raiz;...;folha`"""
+    parts = []
+    while frame is not None and len(parts) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        parts.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+        frame = frame.f_back
+    parts.append(thread_name.replace(';', '_'))
+    return ';'.join(reversed(parts))
+
+
+def collapsed_text(stacks: Dict[str, int]) -> str:
+    """Formato aceito por flamegraph.pl, speedscope e afins"""
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.items())
+
+
+def top_allocations(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, top: int) -> List[Dict[str, Any]]:
+    """Maiores crescimentos de memória por linha entre dois snapshots"""
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ]
+    stats = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+    return [
+        {
+            'location': f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}',
+            'size_kb': stat.size / 1024,
+            'size_diff_kb': stat.size_diff / 1024,
+            'count': stat.count,
+            'count_diff': stat.count_diff
+        }
+        for stat in stats[:top]
+    ]
+
+
+def flamegraph_svg(stacks: Dict[str, int], width: int = 1200, row_height: int = 16) -> str:
+    """Flame graph simples em SVG (raiz embaixo, largura proporcional às amostras)"""
+    root: Dict[str, Any] = {'count': 0, 'children': {}}
+    for stack, count in stacks.items():
+        root['count'] += count
+        node = root
+        for name in stack.split(';'):
+            node = node['children'].setdefault(name, {'count': 0, 'children': {}})
+            node['count'] += count
+
+    rects = []
+    depth_max = [0]
+
+    def place(node, x, depth):
+        offset = x
+        for name, child in sorted(node['children'].items()):
+            child_width = width * child['count'] / root['count']
+            if child_width >= 0.5:
+                rects.append((name, child['count'], offset, depth, child_width))
+                depth_max[0] = max(depth_max[0], depth)
+                place(child, offset, depth + 1)
+            offset += child_width
+
+    if root['count']:
+        place(root, 0.0, 0)
+    height = (depth_max[0] + 1) * row_height
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="monospace" font-size="11">'
+    ]
+    for name, count, x, depth, rect_width in rects:
+        y = height - (depth + 1) * row_height
+        hue = 20 + sum(name.encode()) % 40
+        label = escape(name)
+        share = count / root['count']
+        parts.append(
+            f'<g><title>{label} ({count} amostras, {share:.1%})</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{rect_width:.1f}" height="{row_height - 1}" '
+            f'fill="hsl({hue},80%,60%)"/>'
+        )
+        if rect_width > 40:
+            chars = int(rect_width / 7)
+            text = label if len(name) <= chars else escape(name[:max(0, chars - 2)]) + '..'
+            parts.append(f'<text x="{x + 3:.1f}" y="{y + row_height - 4}">{text}</text>')
+        parts.append('</g>')
+    parts.append('</svg>')
+    return '\n'.join(parts)
@@ -0,0 +1,273 @@
+import logging
+import math
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Tolerância para absorver o erro de representação do float na conversão para
+# unidades: 0.29 * 100 = 28.999999999999996 deve virar 29 unidades. A parte
+# relativa cobre valores grandes, onde o erro passa de 1e-6 unidade.
+UNIT_EPSILON = 1e-6
+RELATIVE_EPSILON = 1e-14
+
+ROUND_DOWN = 'down'
+ROUND_UP = 'up'
+ROUND_NEAREST = 'nearest'
+
+
+def decimals_of(value: str) -> int:
+    """Casas decimais significativas de um valor textual da Binance ('0.00100000' -> 3)"""
+    if '.' not in value:
+        return 0
+    return len(value.split('.', 1)[1].rstrip('0'))
+
+
+def to_units(value: str, decimals: int) -> int:
+    """Converte um decimal textual em inteiro na escala 10**decimals, sem passar por float"""
+    negative = value.startswith('-')
+    value = value.lstrip('+-')
+    integer, _, fraction = value.partition('.')
+    fraction = (fraction + '0' * decimals)[:decimals]
+    units = int(integer or '0') * 10 ** decimals + int(fraction or '0')
+    return -units if negative else units
+
+
+def format_units(units: int, decimals: int) -> str:
+    """Formata unidades inteiras como decimal simples, sem zeros à direita"""
+    if decimals == 0:
+        return str(units)
+    sign = '-' if units < 0 else ''
+    integer, fraction = divmod(abs(units), 10 ** decimals)
+    fraction_str = str(fraction).rjust(decimals, '0').rstrip('0')
+    return f"{sign}{integer}.{fraction_str}" if fraction_str else f"{sign}{integer}"
+
+
+def float_to_units(value: float, scale: int) -> int:
+    """Converte um float em unidades inteiras (truncando), tolerando o erro do float"""
+    scaled = value * scale
+    return int(scaled + abs(scaled) * RELATIVE_EPSILON + UNIT_EPSILON)
+
+
+class OrderSize(NamedTuple):
+    """Resultado do dimensionamento de uma ordem"""
+    symbol: str
+    quantity: float
+    quantity_str: str
+    notional: float
+    valid: bool
+    reason: Optional[str] = None
+
+
+class SymbolRules:
+    """Regras de quantidade/preço de um símbolo pré-computadas como inteiros
+
+    Quantidades são representadas em unidades de 10**-qty_decimals e preços em
+    unidades de 10**-price_decimals. O arredondamento é aritmética inteira sobre
+    o step/tick; só a conversão de entrada (float -> unidades) usa multiplicação.
+    """
+
+    __slots__ = (
+        'symbol', 'base_asset', 'quote_asset',
+        'qty_decimals', 'qty_scale', 'step_units', 'min_qty_units', 'max_qty_units',
+        'market_step_units', 'market_min_qty_units', 'market_max_qty_units',
+        'price_decimals', 'price_scale', 'tick_units', 'min_price_units', 'max_price_units',
+        'min_notional', 'max_notional', 'min_notional_market'
+    )
+
+    def __init__(self, symbol_info: Dict):
+        self.symbol = symbol_info['symbol']
+        self.base_asset = symbol_info.get('baseAsset')
+        self.quote_asset = symbol_info.get('quoteAsset')
+        filters = {f['filterType']: f for f in symbol_info.get('filters', [])}
+
+        lot = filters.get('LOT_SIZE', {'stepSize': '0.000001', 'minQty': '0.000001', 'maxQty': '1000000'})
+        market_lot = filters.get('MARKET_LOT_SIZE', lot)
+        price = filters.get('PRICE_FILTER', {'tickSize': '0.00000001', 'minPrice': '0', 'maxPrice': '0'})
+
+        # Uma escala comum para LOT_SIZE e MARKET_LOT_SIZE
+        self.qty_decimals = max(
+            decimals_of(lot['stepSize']), decimals_of(lot['minQty']),
+            decimals_of(market_lot['stepSize']), decimals_of(market_lot['minQty'])
+        )
+        self.qty_scale = 10 ** self.qty_decimals
+        self.step_units = max(1, to_units(lot['stepSize'], self.qty_decimals))
+        self.min_qty_units = to_units(lot['minQty'], self.qty_decimals)
+        self.max_qty_units = to_units(lot['maxQty'], self.qty_decimals)
+
+        # MARKET_LOT_SIZE costuma vir zerado, significando "usar LOT_SIZE"
+        market_step = to_units(market_lot['stepSize'], self.qty_decimals)
+        market_max = to_units(market_lot['maxQty'], self.qty_decimals)
+        self.market_step_units = max(self.step_units, market_step)
+        self.market_min_qty_units = max(self.min_qty_units, to_units(market_lot['minQty'], self.qty_decimals))
+        self.market_max_qty_units = min(self.max_qty_units, market_max) if market_max > 0 else self.max_qty_units
+
+        self.price_decimals = max(decimals_of(price['tickSize']), decimals_of(price['minPrice']))
+        self.price_scale = 10 ** self.price_decimals
+        self.tick_units = max(1, to_units(price['tickSize'], self.price_decimals))
+        self.min_price_units = to_units(price['minPrice'], self.price_decimals)
+        self.max_price_units = to_units(price['maxPrice'], self.price_decimals)
+
+        # NOTIONAL substituiu MIN_NOTIONAL na API spot; aceitar os dois
+        notional = filters.get('NOTIONAL')
+        min_notional = filters.get('MIN_NOTIONAL')
+        if notional is not None:
+            self.min_notional = float(notional.get('minNotional', 0))
+            self.max_notional = float(notional.get('maxNotional', 0)) or None
+            self.min_notional_market = bool(notional.get('applyMinToMarket', True))
+        elif min_notional is not None:
+            self.min_notional = float(min_notional.get('minNotional', 0))
+            self.max_notional = None
+            self.min_notional_market = bool(min_notional.get('applyToMarket', True))
+        else:
+            self.min_notional, self.max_notional, self.min_notional_market = 0.0, None, False
+
+    # ------------------------------------------------------------------
+    # Quantidade
+    # ------------------------------------------------------------------
+
+    def quantity_units(self, quantity: float, market: bool = True) -> int:
+        """Quantidade arredondada para baixo ao step, em unidades inteiras"""
+        step = self.market_step_units if market else self.step_units
+        units = float_to_units(quantity, self.qty_scale)
+        return units - units % step
+
+    def floor_quantity(self, quantity: float, market: bool = True) -> float:
+        return self.quantity_units(quantity, market) / self.qty_scale
+
+    def format_quantity(self, quantity: float, market: bool = True) -> str:
+        return format_units(self.quantity_units(quantity, market), self.qty_decimals)
+
+    # ------------------------------------------------------------------
+    # Preço
+    # ------------------------------------------------------------------
+
+    def price_units(self, price: float, mode: str = ROUND_NEAREST) -> int:
+        """Preço arredondado ao tick, em unidades inteiras"""
+        tick = self.tick_units
+        if mode == ROUND_UP:
+            scaled = price * self.price_scale
+            units = math.ceil(scaled - abs(scaled) * RELATIVE_EPSILON - UNIT_EPSILON)
+            return -(-units // tick) * tick
+        if mode == ROUND_DOWN:
+            units = float_to_units(price, self.price_scale)
+            return units - units % tick
+        units = round(price * self.price_scale)
+        return (units + tick // 2) // tick * tick
+
+    def quantize_price(self, price: float, mode: str = ROUND_NEAREST) -> float:
+        return self.price_units(price, mode) / self.price_scale
+
+    def format_price(self, price: float, mode: str = ROUND_NEAREST) -> str:
+        return format_units(self.price_units(price, mode), self.price_decimals)
+
+    # ------------------------------------------------------------------
+    # Dimensionamento
+    # ------------------------------------------------------------------
+
+    def size_order(self, quantity: float, price: float, market: bool = True, clamp: bool = True) -> OrderSize:
+        """Ajusta uma quantidade às regras do símbolo e valida o notional
+
+        Com `clamp`, quantidades fora de [mínimo, máximo] são trazidas para o limite
+        (comportamento histórico do bot); sem ele, são rejeitadas.
+        """
+        min_units = self.market_min_qty_units if market else self.min_qty_units
+        max_units = self.market_max_qty_units if market else self.max_qty_units
+        step = self.market_step_units if market else self.step_units
+
+        units = self.quantity_units(quantity, market)
+        if clamp:
+            if units < min_units:
+                # Menor múltiplo do step que atinge o mínimo
+                units = -(-min_units // step) * step
+            if max_units and units > max_units:
+                units = max_units - max_units % step
+
+        qty = units / self.qty_scale
+        notional = qty * price
+        reason = None
+        if units <= 0:
+            reason = 'quantidade zero após arredondamento'
+        elif units < min_units:
+            reason = f'quantidade abaixo do mínimo ({format_units(min_units, self.qty_decimals)})'
+        elif max_units and units > max_units:
+            reason = f'quantidade acima do máximo ({format_units(max_units, self.qty_decimals)})'
+        elif (self.min_notional_market or not market) and notional < self.min_notional:
+            reason = f'notional {notional:.8f} abaixo do mínimo {self.min_notional}'
+        elif self.max_notional and notional > self.max_notional:
+            reason = f'notional {notional:.8f} acima do máximo {self.max_notional}'
+
+        return OrderSize(self.symbol, qty, format_units(units, self.qty_decimals), notional, reason is None, reason)
+
+
+class QuantizationTable:
+    """Tabela de regras por símbolo construída uma vez a partir do exchange info"""
+
+    def __init__(self, symbols_info: Dict[str, Dict]):
+        self.rules: Dict[str, SymbolRules] = {}
+        for symbol, info in symbols_info.items():
+            try:
+                self.rules[symbol] = SymbolRules(info)
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Filtros inválidos para {symbol}: {e}")
+
+        # Colunas para o dimensionamento em lote
+        self._index = {symbol: i for i, symbol in enumerate(self.rules)}
+        rules = list(self.rules.values())
+        self._qty_scale = np.array([r.qty_scale for r in rules], dtype=np.float64)
+        self._step = np.array([r.market_step_units for r in rules], dtype=np.int64)
+        self._min_units = np.array([r.market_min_qty_units for r in rules], dtype=np.int64)
+        self._max_units = np.array([r.market_max_qty_units for r in rules], dtype=np.int64)
+        self._min_notional = np.array(
+            [r.min_notional if r.min_notional_market else 0.0 for r in rules], dtype=np.float64
+        )
+        self._max_notional = np.array([r.max_notional or np.inf for r in rules], dtype=np.float64)
+
+    def get(self, symbol: str) -> Optional[SymbolRules]:
+        return self.rules.get(symbol)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.rules
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def size_orders(self, candidates: Iterable[Tuple[str, float, float]]) -> List[OrderSize]:
+        """Dimensiona várias ordens a mercado (símbolo, quantidade, preço) de uma vez
+
+        O arredondamento e as validações de LOT_SIZE/notional são vetorizados em
+        int64; quantidades fora dos limites são rejeitadas (sem ajuste).
+        """
+        candidates = list(candidates)
+        results = [OrderSize(symbol, 0.0, '0', 0.0, False, 'símbolo desconhecido')
+                   for symbol, _, _ in candidates]
+        known = [i for i, candidate in enumerate(candidates) if candidate[0] in self._index]
+        if not known:
+            return results
+
+        idx = np.fromiter((self._index[candidates[i][0]] for i in known), dtype=np.int64, count=len(known))
+        quantities = np.fromiter((candidates[i][1] for i in known), dtype=np.float64, count=len(known))
+        prices = np.fromiter((candidates[i][2] for i in known), dtype=np.float64, count=len(known))
+
+        scale = self._qty_scale[idx]
+        step = self._step[idx]
+        scaled = quantities * scale
+        units = np.floor(scaled + np.abs(scaled) * RELATIVE_EPSILON + UNIT_EPSILON).astype(np.int64)
+        units -= units % step
+        qty = units / scale
+        notional = qty * prices
+
+        max_units = self._max_units[idx]
+        valid = (units > 0) & (units >= self._min_units[idx]) & ((max_units == 0) | (units <= max_units))
+        valid &= (notional >= self._min_notional[idx]) & (notional <= self._max_notional[idx])
+
+        for row, i in enumerate(known):
+            symbol = candidates[i][0]
+            ok = bool(valid[row])
+            results[i] = OrderSize(
+                symbol, float(qty[row]),
+                format_units(int(units[row]), self.rules[symbol].qty_decimals),
+                float(notional[row]), ok, None if ok else 'fora das regras do símbolo'
+            )
+        return results
@@ -0,0 +1,179 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cabeçalho: marca, sequência, heartbeat (epoch), pid do publicador e tamanho do payload
+HEADER = struct.Struct('<4sQdII')
+HEADER_SIZE = 32
+MAGIC = b'BTS1'
+SEQ_OFFSET = 4
+HEARTBEAT_OFFSET = 12
+LENGTH_OFFSET = 24
+
+DEFAULT_CAPACITY = 4 * 1024 * 1024
+
+# Campos que mudam a cada publicação sem representar mudança de estado
+VOLATILE_KEYS = ('last_update',)
+
+# Tentativas de leitura consistente antes de desistir (escritor no meio de uma publicação)
+READ_RETRIES = 100
+
+
+def default_state_path() -> str:
+    """Arquivo do snapshot em memória (tmpfs quando disponível)"""
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, 'binance-bot-state')
+
+
+class SnapshotPublisher:
+    """Publica snapshots JSON do bot em um arquivo mapeado em memória
+
+    O arquivo tem tamanho fixo e segue o padrão seqlock: a sequência fica
+    ímpar durante a escrita e par quando o snapshot está completo, então os
+    leitores (outros processos) nunca bloqueiam o escritor nem uns aos outros.
+    A sequência só avança quando o conteúdo muda (ignorando `VOLATILE_KEYS`,
+    como o carimbo de hora); o heartbeat é atualizado a cada publicação e
+    indica se o processo do bot continua vivo.
+    """
+
+    def __init__(self, path: Optional[str] = None, capacity: int = DEFAULT_CAPACITY):
+        self.path = path or default_state_path()
+        self.capacity = capacity
+        self._last_state: Optional[bytes] = None
+
+        size = HEADER_SIZE + capacity
+        # Reaproveita o arquivo existente: leitores já mapeados continuam válidos
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self.capacity = os.fstat(fd).st_size - HEADER_SIZE
+            self._mm = mmap.mmap(fd, HEADER_SIZE + self.capacity)
+        finally:
+            os.close(fd)
+
+        # Continua a sequência de um bot anterior (ETags e caches dos leitores seguem válidos)
+        magic, seq, _, _, length = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            seq, length = 0, 0
+        self.seq = seq + (seq & 1)
+        HEADER.pack_into(self._mm, 0, MAGIC, self.seq, time.time(), os.getpid(), length)
+
+    def publish(self, snapshot: Dict[str, Any]) -> bool:
+        """Grava o snapshot; retorna False se não couber na área reservada"""
+        state = json.dumps(
+            {key: value for key, value in snapshot.items() if key not in VOLATILE_KEYS},
+            separators=(',', ':'), default=str
+        ).encode()
+        if state == self._last_state:
+            self.heartbeat()
+            return True
+        payload = json.dumps(snapshot, separators=(',', ':'), default=str).encode()
+        if len(payload) > self.capacity:
+            logger.error(f"Snapshot de {len(payload)} bytes excede a área compartilhada ({self.capacity} bytes)")
+            return False
+
+        # Sequência ímpar: escrita em andamento
+        struct.pack_into('<Q', self._mm, SEQ_OFFSET, self.seq + 1)
+        self._mm[HEADER_SIZE:HEADER_SIZE + len(payload)] = payload
+        HEADER.pack_into(self._mm, 0, MAGIC, self.seq + 1, time.time(), os.getpid(), len(payload))
+        self.seq += 2
+        struct.pack_into('<Q', self._mm, SEQ_OFFSET, self.seq)
+        self._last_state = state
+        return True
+
+    def heartbeat(self):
+        struct.pack_into('<d', self._mm, HEARTBEAT_OFFSET, time.time())
+
+    def close(self):
+        self._mm.close()
+
+
+class SnapshotReader:
+    """Leitura sem locks do snapshot publicado pelo processo do bot
+
+    Só o cabeçalho é consultado a cada chamada; o JSON é decodificado apenas
+    quando a sequência muda. Se o arquivo ainda não existe (bot nunca
+    iniciado), retorna None e tenta abrir de novo na próxima leitura.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_state_path()
+        self._mm: Optional[mmap.mmap] = None
+        self._cached: Tuple[int, Optional[Dict[str, Any]], bytes] = (-1, None, b'')
+
+    def header(self) -> Optional[Dict[str, Any]]:
+        """Sequência, heartbeat e pid do publicador (sem decodificar o snapshot)"""
+        if not self._open():
+            return None
+        _, seq, heartbeat, pid, length = HEADER.unpack_from(self._mm, 0)
+        return {'seq': seq, 'heartbeat': heartbeat, 'pid': pid, 'length': length}
+
+    def read_raw(self) -> Optional[Tuple[int, bytes]]:
+        """Sequência e JSON do último snapshot completo"""
+        if not self._open():
+            return None
+        mm = self._mm
+        for _ in range(READ_RETRIES):
+            seq = struct.unpack_from('<Q', mm, SEQ_OFFSET)[0]
+            if seq & 1:
+                time.sleep(0)
+                continue
+            if seq == self._cached[0]:
+                return seq, self._cached[2]
+            length = struct.unpack_from('<I', mm, LENGTH_OFFSET)[0]
+            if HEADER_SIZE + length > len(mm):
+                # Área ampliada por um novo publicador: mapeia de novo (o mapa
+                # antigo é liberado quando nenhuma thread o estiver usando)
+                self._mm = None
+                if not self._open():
+                    return None
+                mm = self._mm
+                continue
+            payload = mm[HEADER_SIZE:HEADER_SIZE + length]
+            if struct.unpack_from('<Q', mm, SEQ_OFFSET)[0] == seq:
+                return seq, payload
+        logger.warning("Snapshot do bot em escrita contínua; leitura abandonada")
+        return None
+
+    def read(self) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Sequência e snapshot decodificado (None se ainda não houver)"""
+        raw = self.read_raw()
+        if raw is None or not raw[1]:
+            return None
+        seq, payload = raw
+        if seq != self._cached[0]:
+            self._cached = (seq, json.loads(payload), payload)
+        return seq, self._cached[1]
+
+    def is_alive(self, max_age: float) -> bool:
+        """Se o publicador atualizou o heartbeat nos últimos `max_age` segundos"""
+        header = self.header()
+        return header is not None and time.time() - header['heartbeat'] <= max_age
+
+    def _open(self) -> bool:
+        if self._mm is not None:
+            return True
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        try:
+            size = os.fstat(fd).st_size
+            if size < HEADER_SIZE:
+                return False
+            self._mm = mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        if HEADER.unpack_from(self._mm, 0)[0] != MAGIC:
+            self._mm.close()
+            self._mm = None
+            return False
+        return True
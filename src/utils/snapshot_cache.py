@@ -0,0 +1,33 @@
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class SnapshotCache:
+    """JSON pré-serializado por versão para os endpoints de leitura
+
+    Cada chave guarda a última versão vista, o corpo já codificado e a ETag.
+    Enquanto a versão não muda, uma requisição custa só a comparação da
+    versão; o `build` roda uma única vez por versão. A ETag vem do conteúdo
+    servido, não da versão: se um novo snapshot não altera os dados do
+    endpoint, a ETag continua a mesma e o cliente recebe 304.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Hashable, bytes, str]] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def get(self, key: str, version: Hashable, build: Callable[[], Any]) -> Tuple[bytes, str]:
+        """Corpo JSON e ETag (sem aspas) da chave na versão informada"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1], entry[2]
+
+        body = json.dumps(build(), separators=(',', ':'), sort_keys=True, default=str).encode()
+        etag = f'{key}-{hashlib.blake2b(body, digest_size=8).hexdigest()}'
+        with self._lock:
+            self._entries[key] = (version, body, etag)
+            self.builds += 1
+        return body, etag
@@ -0,0 +1,182 @@
+import math
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, List
+
+# Faixa coberta pelos histogramas (segundos) e crescimento entre baldes (~5% de erro relativo)
+MIN_LATENCY = 1e-6
+MAX_LATENCY = 3600.0
+BUCKET_GROWTH = 1.1
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Peso de API consumido no minuto corrente, devolvido pela Binance em cada resposta
+USED_WEIGHT_HEADER = 'x-mbx-used-weight-1m'
+
+
+class LatencyHistogram:
+    """Histograma de latências em baldes logarítmicos (memória fixa)
+
+    Cada balde cobre um fator `BUCKET_GROWTH` do anterior, então qualquer
+    percentil é estimado com erro relativo de poucos por cento, independente
+    de quantas amostras já foram registradas.
+    """
+
+    _log_growth = math.log(BUCKET_GROWTH)
+    size = int(math.ceil(math.log(MAX_LATENCY / MIN_LATENCY) / math.log(BUCKET_GROWTH))) + 2
+
+    def __init__(self):
+        self.counts: List[int] = [0] * self.size
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+
+    def record(self, seconds: float, error: bool = False):
+        if seconds <= MIN_LATENCY:
+            index = 0
+        else:
+            index = min(self.size - 1, int(math.log(seconds / MIN_LATENCY) / self._log_growth) + 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if error:
+            self.errors += 1
+
+    def quantile(self, q: float) -> float:
+        """Latência (segundos) no quantil `q`: média geométrica do balde correspondente"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if index == 0:
+                    return MIN_LATENCY
+                if index == self.size - 1:
+                    return self.max
+                lower = MIN_LATENCY * BUCKET_GROWTH ** (index - 1)
+                return min(lower * math.sqrt(BUCKET_GROWTH), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        """Contagem e latências em milissegundos"""
+        result = {
+            'count': self.count,
+            'errors': self.errors,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'max_ms': self.max * 1000
+        }
+        for q in QUANTILES:
+            result[f'p{int(q * 100)}_ms'] = self.quantile(q) * 1000
+        return result
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'started')
+
+    def __init__(self, tracer: 'Tracer', name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.name, time.perf_counter() - self.started, error=exc_type is not None)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Tracer:
+    """Spans por etapa do bot com histogramas de latência por nome
+
+    `span(nome)` mede um bloco; `wrap` mede uma função. Cada nome
+    tem um `LatencyHistogram`, então a memória não cresce com o tempo de
+    execução. Desativado, `span` devolve um contexto vazio compartilhado.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.started_at = time.time()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str):
+        return _Span(self, name) if self.enabled else _NO_SPAN
+
+    def record(self, name: str, seconds: float, error: bool = False):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+            histogram.record(seconds, error)
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        @wraps(func)
+        def traced(*args, **kwargs):
+            with self.span(name):
+                return func(*args, **kwargs)
+        return traced
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = {name: histogram.summary() for name, histogram in sorted(self._histograms.items())}
+        return {'enabled': self.enabled, 'since': self.started_at, 'spans': spans}
+
+
+class TracedClient:
+    """Cliente da Binance com cada chamada de API medida como `exchange.<método>`
+
+    Com `weight_gauge`, registra após cada chamada o peso de API usado no
+    minuto corrente, informado pela Binance no cabeçalho da resposta.
+    """
+
+    def __init__(self, client, tracer: Tracer, weight_gauge=None):
+        self._client = client
+        self._tracer = tracer
+        self._weight_gauge = weight_gauge
+        self._wrapped: Dict[str, Callable] = {}
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._client, name)
+        if not callable(attribute) or name.startswith('_'):
+            return attribute
+        wrapped = self._wrapped.get(name)
+        if wrapped is None:
+            wrapped = self._wrapped[name] = self._wrap(f'exchange.{name}', attribute)
+        return wrapped
+
+    def _wrap(self, span: str, method: Callable) -> Callable:
+        @wraps(method)
+        def call(*args, **kwargs):
+            try:
+                with self._tracer.span(span):
+                    return method(*args, **kwargs)
+            finally:
+                if self._weight_gauge is not None:
+                    self._record_weight()
+        return call
+
+    def _record_weight(self):
+        response = getattr(self._client, 'response', None)
+        used = response.headers.get(USED_WEIGHT_HEADER) if response is not None else None
+        if used is not None:
+            self._weight_gauge.set(float(used))
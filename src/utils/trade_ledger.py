@@ -0,0 +1,329 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'data', 'persistence', 'ledger.db'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    order_type TEXT,
+    status TEXT,
+    order_id TEXT,
+    client_order_id TEXT,
+    quantity REAL,
+    executed_quantity REAL,
+    price REAL,
+    simulated INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_orders_symbol_ts ON orders (symbol, ts);
+CREATE INDEX IF NOT EXISTS idx_orders_ts ON orders (ts);
+
+CREATE TABLE IF NOT EXISTS fills (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    order_id TEXT,
+    trade_id TEXT,
+    price REAL NOT NULL,
+    quantity REAL NOT NULL,
+    commission REAL,
+    commission_asset TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_fills_symbol_ts ON fills (symbol, ts);
+CREATE INDEX IF NOT EXISTS idx_fills_ts ON fills (ts);
+
+CREATE TABLE IF NOT EXISTS position_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    event TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    side TEXT,
+    size REAL,
+    entry_price REAL,
+    price REAL,
+    stop_loss REAL,
+    take_profit REAL,
+    realized_pnl REAL,
+    reason TEXT,
+    opened_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_position_events_symbol_ts ON position_events (symbol, ts);
+CREATE INDEX IF NOT EXISTS idx_position_events_event_ts ON position_events (event, ts);
+"""
+
+INSERTS = {
+    'orders': (
+        "INSERT INTO orders (ts, symbol, side, order_type, status, order_id, client_order_id, "
+        "quantity, executed_quantity, price, simulated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    ),
+    'fills': (
+        "INSERT INTO fills (ts, symbol, side, order_id, trade_id, price, quantity, commission, "
+        "commission_asset) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    ),
+    'position_events': (
+        "INSERT INTO position_events (ts, event, symbol, side, size, entry_price, price, stop_loss, "
+        "take_profit, realized_pnl, reason, opened_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    ),
+}
+
+
+def _to_timestamp(value) -> Optional[float]:
+    """Converte datetime/ISO/epoch para epoch em segundos"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+class TradeLedger:
+    """Livro-razão SQLite de ordens, execuções e abertura/fechamento de posições
+
+    As gravações são acumuladas em memória e inseridas em lote (por quantidade ou
+    tempo: um timer grava a primeira pendência no máximo `flush_interval` segundos
+    depois, mesmo que nada mais seja registrado). O banco usa WAL, permitindo que o dashboard consulte o histórico enquanto
+    o bot grava. As consultas de análise são agregadas no próprio SQLite, usando os
+    índices por símbolo e horário.
+    """
+
+    def __init__(self, db_path: str = None, batch_size: int = 50, flush_interval: float = 5.0,
+                 read_only: bool = False):
+        self.db_path = db_path or DEFAULT_LEDGER_PATH
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.read_only = read_only
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        if read_only:
+            # Somente consultas nesta conexão (o bot grava no próprio processo)
+            self._conn.execute("PRAGMA query_only=ON")
+
+        self._pending: Dict[str, List[tuple]] = {table: [] for table in INSERTS}
+        self._pending_count = 0
+        self._oldest_pending: Optional[float] = None
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Gravação
+    # ------------------------------------------------------------------
+
+    def record_order(self, symbol: str, side: str, order: Optional[Dict] = None,
+                     quantity: float = None, price: float = None, simulated: bool = False,
+                     order_type: str = 'MARKET', status: str = 'FILLED'):
+        """Registra uma ordem (resposta da Binance ou ordem simulada)"""
+        order = order or {}
+        self._add('orders', (
+            order['transactTime'] / 1000 if order.get('transactTime') else time.time(),
+            symbol,
+            side,
+            order.get('type', order_type),
+            order.get('status', status),
+            str(order['orderId']) if order.get('orderId') is not None else None,
+            order.get('clientOrderId'),
+            float(order.get('origQty', quantity or 0)),
+            float(order.get('executedQty', quantity or 0)),
+            price,
+            1 if simulated else 0
+        ))
+
+        for fill in order.get('fills', []):
+            self.record_fill(
+                symbol=symbol,
+                side=side,
+                price=float(fill['price']),
+                quantity=float(fill['qty']),
+                order_id=order.get('orderId'),
+                trade_id=fill.get('tradeId'),
+                commission=float(fill.get('commission', 0)),
+                commission_asset=fill.get('commissionAsset')
+            )
+
+    def record_fill(self, symbol: str, side: str, price: float, quantity: float,
+                    order_id=None, trade_id=None, commission: float = 0.0,
+                    commission_asset: str = None, timestamp=None):
+        """Registra uma execução"""
+        self._add('fills', (
+            _to_timestamp(timestamp) or time.time(),
+            symbol,
+            side,
+            str(order_id) if order_id is not None else None,
+            str(trade_id) if trade_id is not None else None,
+            price,
+            quantity,
+            commission,
+            commission_asset
+        ))
+
+    def record_position_open(self, position):
+        """Registra a abertura de uma posição"""
+        opened_at = _to_timestamp(position.timestamp)
+        self._add('position_events', (
+            opened_at or time.time(), 'open', position.symbol, position.side, position.size,
+            position.entry_price, position.entry_price, position.stop_loss, position.take_profit,
+            None, None, opened_at
+        ))
+
+    def record_position_close(self, position, exit_price: float, realized_pnl: float, reason: str = None):
+        """Registra o fechamento de uma posição com o PnL realizado"""
+        self._add('position_events', (
+            time.time(), 'close', position.symbol, position.side, position.size,
+            position.entry_price, exit_price, position.stop_loss, position.take_profit,
+            realized_pnl, reason, _to_timestamp(position.timestamp)
+        ))
+
+    def flush(self):
+        """Grava em lote tudo o que estiver pendente"""
+        with self._lock:
+            self._cancel_timer()
+            if not self._pending_count:
+                return
+            try:
+                with self._conn:
+                    for table, rows in self._pending.items():
+                        if rows:
+                            self._conn.executemany(INSERTS[table], rows)
+            except Exception as e:
+                logger.error(f"Erro gravando lote no ledger: {e}")
+                return
+            for rows in self._pending.values():
+                rows.clear()
+            self._pending_count = 0
+            self._oldest_pending = None
+
+    def close(self):
+        """Grava pendências e fecha o banco"""
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+    def _add(self, table: str, row: tuple):
+        if self.read_only:
+            raise RuntimeError("Ledger aberto somente para leitura")
+        with self._lock:
+            self._pending[table].append(row)
+            self._pending_count += 1
+            now = time.time()
+            if self._oldest_pending is None:
+                self._oldest_pending = now
+            if self._pending_count >= self.batch_size or now - self._oldest_pending >= self.flush_interval:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _cancel_timer(self):
+        timer, self._timer = self._timer, None
+        if timer is not None and timer is not threading.current_thread():
+            timer.cancel()
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def get_trades(self, symbol: str = None, start=None, end=None,
+                   limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """Posições fechadas, mais recentes primeiro"""
+        where, params = self._filters("event = 'close'", symbol, start, end)
+        return self._query(
+            f"SELECT ts, symbol, side, size, entry_price, price AS exit_price, stop_loss, take_profit, "
+            f"realized_pnl, reason, opened_at FROM position_events WHERE {where} "
+            f"ORDER BY ts DESC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+            time_columns=('ts', 'opened_at')
+        )
+
+    def get_orders(self, symbol: str = None, start=None, end=None,
+                   limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """Ordens registradas, mais recentes primeiro"""
+        where, params = self._filters("1 = 1", symbol, start, end)
+        return self._query(
+            f"SELECT * FROM orders WHERE {where} ORDER BY ts DESC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+            time_columns=('ts',)
+        )
+
+    def pnl_by_day(self, symbol: str = None, start=None, end=None) -> List[Dict[str, Any]]:
+        """PnL realizado por dia (UTC)"""
+        where, params = self._filters("event = 'close'", symbol, start, end)
+        return self._query(
+            f"SELECT date(ts, 'unixepoch') AS day, SUM(realized_pnl) AS pnl, COUNT(*) AS trades, "
+            f"SUM(realized_pnl > 0) AS wins FROM position_events WHERE {where} "
+            f"GROUP BY day ORDER BY day",
+            params
+        )
+
+    def pnl_by_symbol(self, start=None, end=None) -> List[Dict[str, Any]]:
+        """PnL realizado por símbolo"""
+        where, params = self._filters("event = 'close'", None, start, end)
+        return self._query(
+            f"SELECT symbol, SUM(realized_pnl) AS pnl, COUNT(*) AS trades, "
+            f"SUM(realized_pnl > 0) AS wins FROM position_events WHERE {where} "
+            f"GROUP BY symbol ORDER BY pnl DESC",
+            params
+        )
+
+    def win_rate(self, symbol: str = None, start=None, end=None) -> Dict[str, Any]:
+        """Estatísticas agregadas de acerto"""
+        where, params = self._filters("event = 'close'", symbol, start, end)
+        rows = self._query(
+            f"SELECT COUNT(*) AS trades, COALESCE(SUM(realized_pnl > 0), 0) AS wins, "
+            f"COALESCE(SUM(realized_pnl < 0), 0) AS losses, COALESCE(SUM(realized_pnl), 0) AS total_pnl, "
+            f"AVG(CASE WHEN realized_pnl > 0 THEN realized_pnl END) AS avg_win, "
+            f"AVG(CASE WHEN realized_pnl < 0 THEN realized_pnl END) AS avg_loss "
+            f"FROM position_events WHERE {where}",
+            params
+        )
+        stats = rows[0]
+        stats['win_rate'] = stats['wins'] / stats['trades'] if stats['trades'] else 0.0
+        return stats
+
+    def _filters(self, base: str, symbol: Optional[str], start, end):
+        clauses, params = [base], []
+        if symbol:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(_to_timestamp(start))
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(_to_timestamp(end))
+        return " AND ".join(clauses), params
+
+    def _query(self, sql: str, params: list, time_columns=()) -> List[Dict[str, Any]]:
+        with self._lock:
+            # Consultas enxergam também o que ainda está no lote
+            self.flush()
+            rows = self._conn.execute(sql, params).fetchall()
+
+        result = []
+        for row in rows:
+            item = dict(row)
+            for column in time_columns:
+                if item.get(column) is not None:
+                    item[column] = datetime.fromtimestamp(item[column]).isoformat()
+            result.append(item)
+        return result
@@ -0,0 +1,81 @@
+from src.utils.analytics_export import AnalyticsExporter, flatten_analysis, read_dataset
+from src.models.position import Position
+from src.models.signal import MarketSignal
+from src.models.enums import SignalStrength
+from datetime import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+
+class TestAnalyticsExporter(unittest.TestCase):
+
+    def setUp(self):
+        self.export_dir = tempfile.mkdtemp()
+        self.exporter = AnalyticsExporter(self.export_dir, flush_rows=1000, flush_interval=3600)
+
+    def tearDown(self):
+        shutil.rmtree(self.export_dir)
+
+    def _signal(self, symbol, analysis, timestamp):
+        return MarketSignal(symbol, SignalStrength.STRONG, 0.8, 100.0, 95.0, 120.0, 1.0,
+                            analysis_data=analysis, timestamp=timestamp)
+
+    def test_flatten_analysis(self):
+        columns = flatten_analysis({'1h': {'score': np.float64(0.7), 'trend': 'up'}, '4h': {'score': 1}})
+        self.assertEqual(columns, {
+            'analysis.1h.score': 0.7,
+            'analysis.1h.trend': 'up',
+            'analysis.4h.score': 1.0
+        })
+        self.assertIsInstance(columns['analysis.4h.score'], float)
+
+    def test_partitioned_by_day(self):
+        for day in (1, 2):
+            position = Position('BTCUSDT', 'BUY', 2.0, 100.0, 100.0, timestamp=datetime(2024, 1, day, 10))
+            self.exporter.record_trade(position, 110.0, 20.0, 'Take Profit', closed_at=datetime(2024, 1, day, 12))
+
+        self.assertEqual(self.exporter.flush(), 2)
+        partitions = sorted(os.listdir(os.path.join(self.export_dir, 'trades')))
+        self.assertEqual(partitions, ['date=2024-01-01', 'date=2024-01-02'])
+
+        df = read_dataset('trades', self.export_dir, columns=['symbol', 'realized_pnl', 'return_pct', 'date'])
+        self.assertEqual(list(df.columns), ['symbol', 'realized_pnl', 'return_pct', 'date'])
+        self.assertEqual(len(df), 2)
+        self.assertAlmostEqual(df['return_pct'].iloc[0], 0.1)
+
+        df = read_dataset('trades', self.export_dir, filters=[('date', '>=', '2024-01-02')])
+        self.assertEqual(len(df), 1)
+        self.assertEqual(df['holding_seconds'].iloc[0], 7200)
+
+    def test_signal_schema_evolution(self):
+        day = datetime(2024, 3, 1, 9)
+        self.exporter.record_signal(self._signal('BTCUSDT', {'1h': {'score': 0.7}}, day))
+        self.exporter.flush()
+        self.exporter.record_signal(self._signal('ETHUSDT', {'1h': {'score': 0.6, 'rsi': 28.0}}, day), True)
+        self.exporter.flush()
+
+        df = read_dataset('signals', self.export_dir).sort_values('symbol')
+        self.assertEqual(list(df['symbol']), ['BTCUSDT', 'ETHUSDT'])
+        self.assertTrue(np.isnan(df['analysis.1h.rsi'].iloc[0]))
+        self.assertEqual(df['analysis.1h.rsi'].iloc[1], 28.0)
+        self.assertEqual(list(df['executed']), [False, True])
+
+    def test_equity_interval_and_auto_flush(self):
+        exporter = AnalyticsExporter(self.export_dir, flush_rows=2, equity_interval=3600)
+        self.assertTrue(exporter.record_equity(1000.0, 800.0, 5.0, -2.0, 1, 200.0))
+        self.assertFalse(exporter.record_equity(1000.0, 800.0, 6.0, -2.0, 1, 200.0))
+        self.assertEqual(exporter.files_written, 0)
+
+        self.assertTrue(exporter.record_equity(1000.0, 800.0, 7.0, -2.0, 1, 200.0, force=True))
+        self.assertEqual(exporter.files_written, 1)
+
+        df = read_dataset('equity', self.export_dir)
+        self.assertEqual(list(df['equity']), [1005.0, 1007.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+from benchmarks.fixtures import synthetic_klines, synthetic_universe
+from benchmarks.runner import Benchmark, compare
+import unittest
+
+
+class TestBenchmarkRunner(unittest.TestCase):
+
+    def test_run_reports_per_call_time(self):
+        calls = []
+        bench = Benchmark('noop', lambda value: calls.append(value), setup=lambda: (1,), repeat=3)
+        result = bench.run()
+        self.assertEqual(result['repeat'], 3)
+        self.assertGreater(result['number'], 1)
+        self.assertEqual(len(calls), 1 + result['number'] * 3)
+        self.assertLessEqual(result['min_s'], result['median_s'])
+
+    def test_compare_flags_regressions(self):
+        baseline = {'results': {'a': {'median_s': 1.0}, 'b': {'median_s': 1.0}, 'c': {'median_s': 1.0},
+                                'gone': {'median_s': 1.0}}}
+        current = {'results': {'a': {'median_s': 1.1}, 'b': {'median_s': 1.5}, 'c': {'median_s': 0.5},
+                               'novo': {'median_s': 1.0}}}
+        status = {row['name']: row['status'] for row in compare(current, baseline, threshold=0.2)}
+        self.assertEqual(status, {'a': 'ok', 'b': 'regression', 'c': 'improvement',
+                                  'gone': 'missing', 'novo': 'new'})
+
+    def test_synthetic_fixtures_are_reproducible(self):
+        self.assertEqual(synthetic_klines(3, 10), synthetic_klines(3, 10))
+        universe = synthetic_universe(3)
+        self.assertEqual(len(universe), 3)
+        self.assertEqual(sorted(universe['SYM0USDT']), ['15m', '1h', '4h'])
+        self.assertEqual(len(universe['SYM0USDT']['1h'][0]), 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
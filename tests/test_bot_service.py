@@ -0,0 +1,177 @@
+from src.bot.service import BotClient, BotService, InstanceLock, control_authkey
+from types import SimpleNamespace
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import unittest
+
+
+class FakePosition:
+
+    def __init__(self, symbol, pnl):
+        self.symbol = symbol
+        self.unrealized_pnl = pnl
+
+    def to_dict(self):
+        return {'symbol': self.symbol, 'unrealized_pnl': self.unrealized_pnl}
+
+
+class FakeBot:
+
+    def __init__(self):
+        self.is_running = False
+        self.execution_errors = []
+        self.closed = []
+        self.risk_manager = SimpleNamespace(
+            positions={'BTCUSDT': FakePosition('BTCUSDT', 5.0), 'ETHUSDT': FakePosition('ETHUSDT', -2.0)},
+            risk_metrics={'exposure': 100.0},
+            persistence_writer=SimpleNamespace(get_stats=lambda: {}),
+            update_risk_metrics=lambda: {'exposure': 100.0}
+        )
+
+    def start(self):
+        self.is_running = True
+
+    def stop(self):
+        self.is_running = False
+
+    def get_status(self):
+        return {'is_running': self.is_running, 'last_update': time.time()}
+
+    def get_balance(self):
+        return 1000.0
+
+    def _close_position(self, symbol, reason):
+        self.closed.append((symbol, reason))
+        del self.risk_manager.positions[symbol]
+
+
+class TestBotService(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.config = SimpleNamespace(
+            bot_state_path=os.path.join(self.tmp, 'state'),
+            bot_state_size=64 * 1024,
+            bot_control_address=os.path.join(self.tmp, 'control.sock'),
+            bot_control_authkey='secret',
+            bot_lock_path=os.path.join(self.tmp, 'bot.lock'),
+            state_publish_interval=0.05
+        )
+        self.bot = FakeBot()
+        self.service = BotService(self.config, lambda: self.bot)
+        self.thread = threading.Thread(target=self.service.run, daemon=True)
+        self.thread.start()
+        self.client = BotClient(self.config)
+        deadline = time.time() + 5
+        while not self.client.is_running() and time.time() < deadline:
+            time.sleep(0.02)
+
+    def tearDown(self):
+        self.service.stop()
+        self.thread.join(5)
+        shutil.rmtree(self.tmp)
+
+    def test_snapshot_published(self):
+        self.assertTrue(self.client.is_running())
+        snapshot = self.client.snapshot()
+        self.assertEqual(snapshot['active_positions'], 2)
+        self.assertAlmostEqual(snapshot['daily_pnl'], 3.0)
+        self.assertEqual(snapshot['balance'], 1000.0)
+        self.assertEqual(self.client.request('ping')['pid'], os.getpid())
+
+    def test_unchanged_state_keeps_sequence(self):
+        seq = self.client.seq
+        for _ in range(3):
+            self.service.publish()
+            time.sleep(0.01)
+        self.assertEqual(self.client.seq, seq)
+
+    def test_close_position_command(self):
+        seq = self.client.seq
+        self.assertEqual(self.client.request('close_position', symbol='BTCUSDT', reason='manual'), {'ok': True})
+        self.assertEqual(self.bot.closed, [('BTCUSDT', 'manual')])
+        self.assertGreater(self.client.seq, seq)
+        self.assertEqual(self.client.snapshot()['active_positions'], 1)
+        self.assertFalse(self.client.request('close_position', symbol='XRPUSDT')['ok'])
+        self.assertFalse(self.client.request('unknown')['ok'])
+
+    def test_single_instance(self):
+        other_bot_created = []
+        other = BotService(self.config, lambda: other_bot_created.append(True))
+        self.assertFalse(other.run())
+        self.assertEqual(other_bot_created, [])
+
+    def test_stop_command_ends_process(self):
+        self.assertEqual(self.client.request('stop'), {'ok': True})
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+        self.assertFalse(self.bot.is_running)
+        self.assertFalse(self.client.snapshot()['running'])
+        self.assertFalse(self.client.request('ping')['ok'])
+        # Lock liberado para o próximo processo
+        lock = InstanceLock(self.config.bot_lock_path)
+        self.assertTrue(lock.acquire())
+        lock.release()
+
+
+class TestControlAuthentication(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_tcp_requires_authkey(self):
+        config = SimpleNamespace(bot_control_address='127.0.0.1:7001', bot_control_authkey=None)
+        with self.assertRaises(ValueError):
+            BotService(config, FakeBot)
+        with self.assertRaises(ValueError):
+            BotClient(config)
+
+    def test_unix_socket_uses_private_host_key(self):
+        config = SimpleNamespace(
+            bot_state_path=os.path.join(self.tmp, 'state'),
+            bot_state_size=64 * 1024,
+            bot_control_address=os.path.join(self.tmp, 'control.sock'),
+            bot_control_authkey=None,
+            bot_lock_path=os.path.join(self.tmp, 'bot.lock'),
+            state_publish_interval=0.05
+        )
+        service = BotService(config, FakeBot)
+        thread = threading.Thread(target=service.run, daemon=True)
+        thread.start()
+        try:
+            client = BotClient(config)
+            deadline = time.time() + 5
+            while not client.is_running() and time.time() < deadline:
+                time.sleep(0.02)
+
+            self.assertEqual(client.authkey, service.authkey)
+            self.assertEqual(len(service.authkey), 64)
+            self.assertEqual(stat.S_IMODE(os.stat(config.bot_control_address + '.key').st_mode), 0o600)
+            self.assertEqual(stat.S_IMODE(os.stat(config.bot_control_address).st_mode), 0o600)
+            self.assertEqual(client.request('ping')['pid'], os.getpid())
+
+            # Chave de outro processo não autentica
+            intruder = SimpleNamespace(bot_control_address=config.bot_control_address, bot_control_authkey='guess')
+            self.assertFalse(BotClient(intruder).request('ping')['ok'])
+        finally:
+            service.stop()
+            thread.join(5)
+
+    def test_host_key_with_open_permissions_is_refused(self):
+        path = os.path.join(self.tmp, 'control.sock')
+        with open(path + '.key', 'w') as f:
+            f.write('leaked')
+        os.chmod(path + '.key', 0o644)
+        with self.assertRaises(PermissionError):
+            control_authkey(SimpleNamespace(bot_control_authkey=None), path)
+
+
+if __name__ == '__main__':
+    unittest.main()
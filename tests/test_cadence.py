@@ -0,0 +1,68 @@
+from src.analysis.cadence import CadenceController
+from types import SimpleNamespace
+import unittest
+
+
+def klines(range_pct, volumes, price=100.0):
+    rows = []
+    for i, volume in enumerate(volumes):
+        high = price * (1 + range_pct / 2)
+        low = price * (1 - range_pct / 2)
+        rows.append([i * 3600000, str(price), str(high), str(low), str(price), str(volume),
+                     i * 3600000 + 3599999, '0', 0, '0', '0', '0'])
+    return rows
+
+
+class TestCadenceController(unittest.TestCase):
+
+    def setUp(self):
+        config = SimpleNamespace(cadence_base_interval=1800.0, cadence_min_interval=300.0,
+                                 cadence_max_interval=14400.0)
+        self.cadence = CadenceController(config)
+
+    def test_fast_movers_reanalyzed_sooner(self):
+        flat = [100.0] * 30
+        quiet = self.cadence.update('BTCUSDT', klines(0.002, flat), score=0.1, now=0)
+        fast = self.cadence.update('PEPEUSDT', klines(0.04, flat[:-3] + [400.0] * 3), score=0.48, now=0)
+        self.assertLess(fast, quiet)
+        self.assertEqual(fast, 300.0)
+
+    def test_score_near_threshold_shortens_interval(self):
+        far = self.cadence.update('ADAUSDT', score=0.1, now=0)
+        near = self.cadence.update('SOLUSDT', score=0.5, now=0)
+        self.assertEqual(far, 1800.0)
+        self.assertAlmostEqual(near, 600.0)
+
+    def test_interval_bounds(self):
+        interval = self.cadence.update('BTCUSDT', klines(0.01, [100.0] * 27 + [10.0] * 3), score=0.0, now=0)
+        self.assertLessEqual(interval, 14400.0)
+        self.assertGreaterEqual(interval, 300.0)
+
+    def test_due_queue(self):
+        self.cadence.update('AAA', score=0.5, now=0)   # 600s
+        self.cadence.update('BBB', score=0.1, now=0)   # 1800s
+        self.cadence.update('CCC', score=0.45, now=0)  # 720s
+
+        self.assertFalse(self.cadence.is_due('AAA', now=100))
+        self.assertTrue(self.cadence.is_due('NEW', now=100))
+        self.assertEqual(self.cadence.due_symbols(now=1000), ['AAA', 'CCC'])
+        self.assertEqual(self.cadence.due_symbols(now=2000)[-1], 'BBB')
+
+        # Reanálise substitui o vencimento anterior
+        self.cadence.update('AAA', score=0.1, now=1000)
+        self.assertNotIn('AAA', self.cadence.due_symbols(now=2000))
+        self.assertEqual(self.cadence.order(['BBB', 'NEW', 'AAA'], now=2000), ['NEW', 'BBB'])
+
+    def test_order_follows_heap_with_limit(self):
+        for i, symbol in enumerate(['AAA', 'BBB', 'CCC', 'DDD']):
+            self.cadence.schedule(symbol, 100.0 * (4 - i))
+
+        # Excluídos (fora da lista) não ocupam vagas; vencidos em ordem de atraso
+        self.assertEqual(self.cadence.order(['AAA', 'CCC', 'DDD', 'NEW'], now=1000, limit=3), ['NEW', 'DDD', 'CCC'])
+        self.assertEqual(self.cadence.order(['NEW', 'OLD'], now=1000, limit=1), ['NEW'])
+        # O heap continua íntegro após a consulta
+        self.assertEqual(self.cadence.due_symbols(now=1000), ['DDD', 'CCC', 'BBB', 'AAA'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+from src.analysis.chart_data import ChartDataService, choose_interval, parse_indicators
+from src.analysis.downsample import aggregate_ohlcv, lttb
+from src.data.kline_store import INTERVAL_MS, KlineStore
+import numpy as np
+import os
+import tempfile
+import time
+import unittest
+
+MINUTE = INTERVAL_MS['1m']
+START = 1_700_000_000_000 - 1_700_000_000_000 % MINUTE
+
+
+def make_klines(start, count, step=MINUTE):
+    rng = np.random.default_rng(7)
+    closes = 100 + np.cumsum(rng.normal(0, 0.5, count))
+    return [
+        [start + i * step, closes[i] - 0.1, closes[i] + 1, closes[i] - 1, closes[i], 10.0, start + (i + 1) * step - 1]
+        for i in range(count)
+    ]
+
+
+class FakeClient:
+    """Cliente da Binance que serve klines de 1m a partir de uma lista fixa"""
+
+    def __init__(self, klines):
+        self.klines = klines
+        self.calls = 0
+
+    def get_klines(self, symbol, interval, startTime, endTime, limit):
+        self.calls += 1
+        rows = [k for k in self.klines if startTime <= k[0] <= endTime]
+        return rows[:limit]
+
+
+class TestDownsample(unittest.TestCase):
+
+    def test_aggregate_ohlcv(self):
+        data = {
+            't': np.arange(6), 'o': np.array([1., 2, 3, 4, 5, 6]), 'h': np.array([5., 9, 4, 4, 8, 6]),
+            'l': np.array([1., 0, 3, 2, 5, 1]), 'c': np.array([2., 3, 4, 5, 6, 7]), 'v': np.ones(6)
+        }
+        result = aggregate_ohlcv(data, 2)
+        self.assertEqual(result['t'].tolist(), [0, 3])
+        self.assertEqual(result['o'].tolist(), [1, 4])
+        self.assertEqual(result['h'].tolist(), [9, 8])
+        self.assertEqual(result['l'].tolist(), [0, 1])
+        self.assertEqual(result['c'].tolist(), [4, 7])
+        self.assertEqual(result['v'].tolist(), [3, 3])
+
+    def test_lttb_keeps_endpoints_and_spikes(self):
+        x = np.arange(1000, dtype=float)
+        y = np.zeros(1000)
+        y[437] = 50.0
+        dx, dy = lttb(x, y, 50)
+        self.assertEqual(len(dx), 50)
+        self.assertEqual((dx[0], dx[-1]), (0, 999))
+        self.assertIn(437, dx)
+        self.assertTrue(np.all(np.diff(dx) > 0))
+
+    def test_choose_interval(self):
+        day = INTERVAL_MS['1d']
+        self.assertEqual(choose_interval(0, day, 800), '1m')
+        self.assertEqual(choose_interval(0, 365 * day, 800), '4h')
+        self.assertEqual(choose_interval(0, day, 800, minimum='1h'), '1h')
+        self.assertEqual(parse_indicators('sma:20, BB'), [('sma', 20), ('bb', 20)])
+        with self.assertRaises(ValueError):
+            parse_indicators('foo:3')
+
+
+class TestChartDataService(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = KlineStore(os.path.join(self.tmp.name, 'klines.db'))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_backfill_only_fetches_missing_edges(self):
+        klines = make_klines(START, 3000)
+        self.store.upsert_klines('BTCUSDT', '1m', klines[1000:2000])
+        client = FakeClient(klines)
+
+        fetched = self.store.backfill(client, 'BTCUSDT', '1m', START, START + 3000 * MINUTE)
+        self.assertEqual(fetched, 2000)
+        self.assertEqual(self.store.bounds('BTCUSDT', '1m'), (START, START + 2999 * MINUTE))
+        data = self.store.get_klines('BTCUSDT', '1m', START, START + 3000 * MINUTE)
+        self.assertEqual(len(data['t']), 3000)
+        self.assertTrue(np.all(np.diff(data['t']) == MINUTE))
+
+    def test_backfill_repairs_interior_gaps(self):
+        klines = make_klines(START, 1000)
+        self.store.upsert_klines('BTCUSDT', '1m', klines[:100])
+        self.store.upsert_klines('BTCUSDT', '1m', klines[400:500])
+        self.store.upsert_klines('BTCUSDT', '1m', klines[900:])
+        self.assertEqual(
+            self.store.missing_ranges('BTCUSDT', '1m', START, START + 1000 * MINUTE),
+            [(START + 100 * MINUTE, START + 400 * MINUTE), (START + 500 * MINUTE, START + 900 * MINUTE)]
+        )
+
+        client = FakeClient(klines)
+        self.assertEqual(self.store.backfill(client, 'BTCUSDT', '1m', START, START + 1000 * MINUTE), 700)
+        self.assertEqual(client.calls, 2)
+        data = self.store.get_klines('BTCUSDT', '1m', START, START + 1000 * MINUTE)
+        self.assertEqual(len(data['t']), 1000)
+        self.assertEqual(self.store.missing_ranges('BTCUSDT', '1m', START, START + 1000 * MINUTE), [])
+
+    def test_backfill_skips_forming_candle(self):
+        klines = make_klines(START, 10)
+        client = FakeClient(klines)
+        now_ms = START + 9 * MINUTE + 30_000  # no meio do último candle
+        self.assertEqual(self.store.backfill(client, 'BTCUSDT', '1m', START, START + 10 * MINUTE, now_ms=now_ms), 9)
+        self.assertEqual(self.store.bounds('BTCUSDT', '1m'), (START, START + 8 * MINUTE))
+
+        # Depois do fechamento, o candle entra no histórico
+        now_ms = START + 10 * MINUTE
+        self.assertEqual(self.store.backfill(client, 'BTCUSDT', '1m', START, START + 10 * MINUTE, now_ms=now_ms), 1)
+
+    def test_chart_cache_sees_interior_fills(self):
+        klines = make_klines(START, 300)
+        self.store.upsert_klines('BTCUSDT', '1m', klines[:100] + klines[200:])
+        charts = ChartDataService(self.store)
+        end = START + 300 * MINUTE
+        self.assertEqual(charts.candles('BTCUSDT', START, end, interval='1m', width=1000)['source_points'], 200)
+
+        self.store.upsert_klines('BTCUSDT', '1m', klines[100:200])
+        self.assertEqual(charts.candles('BTCUSDT', START, end, interval='1m', width=1000)['source_points'], 300)
+
+    def test_candles_downsampled_with_overlays_and_cached(self):
+        klines = make_klines(START, 3000)
+        self.store.upsert_klines('BTCUSDT', '1m', klines)
+        charts = ChartDataService(self.store)
+
+        start, end = START + 100 * MINUTE, START + 2100 * MINUTE
+        result = charts.candles('BTCUSDT', start, end, width=500, indicators=[('sma', 20), ('bb', 20)])
+        self.assertEqual(result['interval'], '1m')
+        self.assertEqual(result['source_points'], 2000)
+        self.assertEqual(result['points'], 500)
+        self.assertEqual(result['candles']['t'][0], start)
+        self.assertEqual(max(result['candles']['h']), max(k[2] for k in klines[100:2100]))
+        # Aquecimento antes do início: a média já existe no primeiro ponto
+        self.assertEqual(len(result['overlays']['sma_20']), 500)
+        self.assertIsNotNone(result['overlays']['sma_20'][0])
+        self.assertIn('bb_20_upper', result['overlays'])
+
+        self.assertIs(charts.candles('BTCUSDT', start, end, width=500, indicators=[('sma', 20), ('bb', 20)]), result)
+        self.assertEqual(charts.get_stats()['hits'], 1)
+
+        # Candle novo invalida o cache do símbolo
+        self.store.upsert_klines('BTCUSDT', '1m', make_klines(START + 3000 * MINUTE, 1))
+        self.assertIsNot(charts.candles('BTCUSDT', start, end, width=500, indicators=[('sma', 20), ('bb', 20)]), result)
+
+    def test_long_range_stays_fast(self):
+        hour = INTERVAL_MS['1h']
+        self.store.upsert_klines('ETHUSDT', '1h', make_klines(START, 24 * 365 * 2, step=hour))
+        charts = ChartDataService(self.store)
+
+        started = time.perf_counter()
+        result = charts.candles('ETHUSDT', START, START + 2 * 365 * 24 * hour, width=1000,
+                                interval='1h', indicators=[('ema', 50), ('rsi', 14)])
+        elapsed = time.perf_counter() - started
+        # Sem cliente e sem candles de 8h gravados, agrega os de 1h
+        self.assertEqual(result['interval'], '1h')
+        self.assertEqual(result['source_points'], 24 * 365 * 2)
+        self.assertEqual(result['points'], 1000)
+        self.assertLess(elapsed, 0.1)
+
+    def test_equity_curve(self):
+        base = START / 1000
+        for i in range(5000):
+            self.store.record_equity(base + i * 60, 1000 + np.sin(i / 100) * 50)
+        charts = ChartDataService(self.store)
+        result = charts.equity(START, START + 5000 * MINUTE, width=300)
+        self.assertEqual(result['source_points'], 5000)
+        self.assertEqual(result['points'], 300)
+        self.assertEqual(result['t'][0], START)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+from src.risk.correlation import CorrelationEngine
+import numpy as np
+import unittest
+
+HOUR_MS = 3600000
+
+
+def make_klines(closes, start_ms=0):
+    """Gera klines no formato da Binance a partir de preços de fechamento"""
+    klines = []
+    for i, close in enumerate(closes):
+        open_time = start_ms + i * HOUR_MS
+        klines.append([open_time, close, close, close, close, 1.0,
+                       open_time + HOUR_MS - 1, 0, 0, 0, 0, 0])
+    return klines
+
+
+class TestCorrelationEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = CorrelationEngine(timeframe='1h', window=50, min_periods=10)
+        rng = np.random.default_rng(42)
+        self.base = rng.normal(0, 0.01, 80)
+        self.noise = rng.normal(0, 0.01, 80)
+
+    def _closes(self, returns):
+        return 100 * np.exp(np.cumsum(np.concatenate([[0.0], returns])))
+
+    def test_matches_numpy_correlation(self):
+        a = self.base
+        b = 0.8 * self.base + 0.6 * self.noise
+        self.engine.update('AAAUSDT', make_klines(self._closes(a)))
+        self.engine.update('BBBUSDT', make_klines(self._closes(b)))
+
+        # Janela de 50 retornos, até o último candle fechado
+        expected = np.corrcoef(a[30:80], b[30:80])[0, 1]
+        self.assertAlmostEqual(self.engine.correlation('AAAUSDT', 'BBBUSDT'), expected, places=9)
+
+    def test_window_advance_matches_full_recompute(self):
+        a, b = self.base, self.noise + 0.5 * self.base
+        self.engine.update('AAAUSDT', make_klines(self._closes(a[:60])))
+        self.engine.update('BBBUSDT', make_klines(self._closes(b[:60])))
+
+        # Novos candles para A deslocam a janela; B fica com dados até o retorno 59
+        self.engine.update('AAAUSDT', make_klines(self._closes(a[:75])))
+        overlap = slice(75 - 50, 60)
+        expected = np.corrcoef(a[overlap], b[overlap])[0, 1]
+        self.assertAlmostEqual(self.engine.correlation('AAAUSDT', 'BBBUSDT'), expected, places=9)
+
+    def test_forming_candle_is_discarded(self):
+        a = self.base
+        b = 0.8 * self.base + 0.6 * self.noise
+        klines_a = make_klines(self._closes(a))
+        klines_b = make_klines(self._closes(b))
+        # O último candle só fecha depois de now_ms
+        now_ms = klines_a[-1][6]
+        self.engine.update('AAAUSDT', klines_a, now_ms=now_ms)
+        self.engine.update('BBBUSDT', klines_b, now_ms=now_ms)
+
+        expected = np.corrcoef(a[29:79], b[29:79])[0, 1]
+        self.assertAlmostEqual(self.engine.correlation('AAAUSDT', 'BBBUSDT'), expected, places=9)
+
+    def test_insufficient_overlap_returns_none(self):
+        self.engine.update('AAAUSDT', make_klines(self._closes(self.base[:8])))
+        self.engine.update('BBBUSDT', make_klines(self._closes(self.noise[:8])))
+        self.assertIsNone(self.engine.correlation('AAAUSDT', 'BBBUSDT'))
+        self.assertIsNone(self.engine.correlation('AAAUSDT', 'UNKNOWN'))
+
+    def test_average_correlation(self):
+        self.engine.update('AAAUSDT', make_klines(self._closes(self.base)))
+        self.engine.update('BBBUSDT', make_klines(self._closes(self.base * 2)))
+        self.engine.update('CCCUSDT', make_klines(self._closes(self.noise)))
+
+        correlated = self.engine.average_correlation({'AAAUSDT': 10, 'BBBUSDT': 30})
+        self.assertAlmostEqual(correlated, 1.0, places=9)
+
+        mixed = self.engine.average_correlation({'AAAUSDT': 10, 'CCCUSDT': 10})
+        self.assertLess(abs(mixed), 0.5)
+        self.assertEqual(self.engine.average_correlation({'AAAUSDT': 10}), 0.0)
+
+    def test_capacity_grows(self):
+        engine = CorrelationEngine(timeframe='1h', window=20, min_periods=5, capacity=2)
+        for i in range(5):
+            engine.update(f'S{i}USDT', make_klines(self._closes(self.base[:30] * (i + 1))))
+        self.assertAlmostEqual(engine.correlation('S0USDT', 'S4USDT'), 1.0, places=9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+from src.bot.execution import ExecutionEngine, ALGO_TWAP, ALGO_ICEBERG
+from src.bot.order_manager import OrderManager
+from src.bot.simulated_exchange import SimulatedExchange
+from src.data.order_book import OrderBook
+from src.models.enums import ExecutionStatus
+from src.utils.quantization import QuantizationTable
+import threading
+import time
+import unittest
+
+
+SYMBOL_INFO = {
+    'ALTUSDT': {
+        'symbol': 'ALTUSDT', 'baseAsset': 'ALT', 'quoteAsset': 'USDT',
+        'filters': [
+            {'filterType': 'PRICE_FILTER', 'minPrice': '0.0001', 'maxPrice': '1000', 'tickSize': '0.0001'},
+            {'filterType': 'LOT_SIZE', 'minQty': '0.1', 'maxQty': '100000', 'stepSize': '0.1'},
+            {'filterType': 'NOTIONAL', 'minNotional': '5', 'applyMinToMarket': True}
+        ]
+    }
+}
+
+
+class Config:
+    api_key = 'key'
+    api_secret = 'secret'
+    testnet = False
+    order_retry_delay = 0
+    order_fill_timeout = 1.0
+    execution_algo = ALGO_TWAP
+    sliced_execution_min_notional = 100.0
+    twap_duration = 0.4
+    twap_slices = 4
+    iceberg_child_notional = 50.0
+    iceberg_child_delay = 0.05
+    max_slippage = 0.5
+
+
+class MarketData:
+    def get_quantization_table(self):
+        return QuantizationTable(SYMBOL_INFO)
+
+
+class ExchangeBooks:
+    """Livro sempre atualizado a partir do motor simulado"""
+
+    def __init__(self, exchange):
+        self.exchange = exchange
+
+    def get_book(self, symbol, allow_rest=True):
+        book = OrderBook(symbol)
+        book.load_snapshot(self.exchange.get_order_book(symbol))
+        return book
+
+
+def thin_book(exchange, levels=20, qty=20.0):
+    exchange.set_book(
+        'ALTUSDT',
+        bids=[(round(1.0 - i * 0.002, 4), qty) for i in range(levels)],
+        asks=[(round(1.002 + i * 0.002, 4), qty) for i in range(levels)]
+    )
+
+
+class TestSimulatedExchange(unittest.TestCase):
+
+    def test_market_order_walks_the_book(self):
+        exchange = SimulatedExchange()
+        thin_book(exchange, levels=3, qty=10.0)
+        response = exchange.create_order(symbol='ALTUSDT', side='BUY', type='MARKET', quantity='15',
+                                         newClientOrderId='a')
+        self.assertEqual(response['status'], 'FILLED')
+        self.assertEqual([fill['price'] for fill in response['fills']], ['1.002', '1.004'])
+        self.assertEqual(exchange.best_price('ALTUSDT', 'BUY'), 1.004)
+
+        with self.assertRaises(Exception):
+            exchange.create_order(symbol='ALTUSDT', side='BUY', type='MARKET', quantity='1', newClientOrderId='a')
+
+        response = exchange.create_order(symbol='ALTUSDT', side='BUY', type='MARKET', quantity='100',
+                                         newClientOrderId='b')
+        self.assertEqual(response['status'], 'EXPIRED')
+        self.assertEqual(float(response['executedQty']), 15.0)
+
+
+class TestExecutionEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.exchange = SimulatedExchange(replenish_rate=50.0)
+        thin_book(self.exchange)
+        self.order_manager = OrderManager(self.exchange, Config())
+        self.engine = ExecutionEngine(self.order_manager, MarketData(), Config(),
+                                      order_books=ExchangeBooks(self.exchange))
+
+    def test_should_slice(self):
+        self.assertTrue(self.engine.should_slice(150.0))
+        self.assertFalse(self.engine.should_slice(50.0))
+        self.assertFalse(self.engine.should_slice(150.0, algo='market'))
+
+    def test_exit_algo_is_opt_in(self):
+        # Sem EXIT_EXECUTION_ALGO as saídas vão a mercado, mesmo com TWAP nas entradas
+        self.assertEqual(self.engine.exit_algo, 'market')
+        self.assertFalse(self.engine.should_slice(150.0, self.engine.exit_algo))
+
+        config = Config()
+        config.exit_execution_algo = 'iceberg'
+        engine = ExecutionEngine(self.order_manager, MarketData(), config)
+        self.assertTrue(engine.should_slice(150.0, engine.exit_algo))
+
+    def test_twap_schedule(self):
+        parent = self.engine.execute('ALTUSDT', 'BUY', 100.0, 'entry', 'sig-1', 1.002, background=False)
+
+        self.assertEqual(parent.status, ExecutionStatus.COMPLETED)
+        self.assertEqual(len(parent.children), 4)
+        self.assertEqual([child.quantity for child in parent.children], [25.0] * 4)
+        self.assertAlmostEqual(parent.executed_quantity, 100.0)
+        # Fatias distribuídas ao longo da duração
+        times = self.exchange.order_times
+        self.assertGreaterEqual(times[-1] - times[0], 0.25)
+        self.assertEqual(len({child.client_order_id for child in parent.children}), 4)
+        self.assertEqual(self.engine.get_stats()['completed'], 1)
+
+    def test_iceberg_reduces_slippage(self):
+        single = SimulatedExchange()
+        thin_book(single)
+        response = single.create_order(symbol='ALTUSDT', side='BUY', type='MARKET', quantity='100',
+                                       newClientOrderId='x')
+        single_vwap = float(response['cummulativeQuoteQty']) / float(response['executedQty'])
+
+        parent = self.engine.execute('ALTUSDT', 'BUY', 100.0, 'entry', 'sig-2', 1.002,
+                                     algo=ALGO_ICEBERG, background=False)
+        self.assertEqual(parent.status, ExecutionStatus.COMPLETED)
+        self.assertAlmostEqual(parent.executed_quantity, 100.0)
+        # Fatias limitadas a 50 USDT; a sobra pequena vai junto com a última
+        self.assertGreaterEqual(len(parent.children), 2)
+        self.assertTrue(all(child.quantity <= 50.0 / 1.002 for child in parent.children[:-1]))
+        self.assertLess(parent.vwap, single_vwap)
+        single_bps = (single_vwap - 1.002) / 1.002 * 10000
+        self.assertLess(parent.slippage_bps(), single_bps / 2)
+
+    def test_background_with_callbacks_and_cancel(self):
+        fills = []
+        finished = threading.Event()
+        config = Config()
+        config.twap_duration = 5.0
+        engine = ExecutionEngine(self.order_manager, MarketData(), config)
+
+        parent = engine.execute(
+            'ALTUSDT', 'BUY', 100.0, 'entry', 'sig-3', 1.002,
+            on_child=lambda p, child: fills.append(child.executed_quantity),
+            on_complete=lambda p: finished.set()
+        )
+        self.assertIn('ALTUSDT', engine.active)
+        with self.assertRaises(RuntimeError):
+            engine.execute('ALTUSDT', 'BUY', 1.0, 'entry', 'sig-4', 1.002)
+
+        time.sleep(0.1)
+        engine.cancel('ALTUSDT')
+        self.assertTrue(finished.is_set())
+        self.assertEqual(parent.status, ExecutionStatus.CANCELED)
+        self.assertEqual(fills, [25.0])
+        self.assertNotIn('ALTUSDT', engine.active)
+
+    def test_fails_without_liquidity(self):
+        self.exchange.set_book('ALTUSDT', bids=[(1.0, 1.0)], asks=[])
+        parent = self.engine.execute('ALTUSDT', 'BUY', 100.0, 'entry', 'sig-5', 1.002,
+                                     algo=ALGO_TWAP, background=False)
+        self.assertEqual(parent.status, ExecutionStatus.FAILED)
+        self.assertEqual(parent.executed_quantity, 0)
+        self.assertEqual(len(parent.children), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+from src.bot.mass_close import MassCloseExecutor
+from src.utils.rate_limiter import TokenBucket
+import threading
+import time
+import unittest
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_burst_then_refill(self):
+        bucket = TokenBucket(rate=50, capacity=5)
+        for _ in range(5):
+            self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+        started = time.monotonic()
+        self.assertTrue(bucket.acquire())
+        self.assertGreaterEqual(time.monotonic() - started, 0.015)
+
+    def test_acquire_timeout(self):
+        bucket = TokenBucket(rate=1, capacity=1)
+        self.assertTrue(bucket.acquire())
+        self.assertFalse(bucket.acquire(timeout=0.05))
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestMassCloseExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.events = []
+        self.lock = threading.Lock()
+
+    def _cancel(self, symbol):
+        with self.lock:
+            self.events.append(('cancel', symbol))
+
+    def _close(self, symbol, reason):
+        time.sleep(0.2)
+        with self.lock:
+            self.events.append(('close', symbol))
+        if symbol == 'FAILUSDT':
+            raise RuntimeError('Venda de FAILUSDT não executada')
+
+    def test_closes_concurrently(self):
+        executor = MassCloseExecutor(self._cancel, self._close, max_workers=8)
+        symbols = ['BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'SOLUSDT', 'ADAUSDT']
+        report = executor.close_all(symbols, 'Proteção de capital')
+
+        self.assertEqual(sorted(report['closed']), sorted(symbols))
+        self.assertEqual(report['failed'], {})
+        # Sequencialmente seriam 5 x 200 ms
+        self.assertLess(report['total_latency'], 0.6)
+        self.assertEqual(set(report['latency']), set(symbols))
+        self.assertIs(executor.last_report, report)
+
+    def test_cancels_before_close(self):
+        executor = MassCloseExecutor(self._cancel, self._close, max_workers=2)
+        executor.close_all(['BTCUSDT', 'ETHUSDT', 'BTCUSDT'], 'Proteção de capital')
+        for symbol in ('BTCUSDT', 'ETHUSDT'):
+            self.assertLess(self.events.index(('cancel', symbol)), self.events.index(('close', symbol)))
+        self.assertEqual(len(self.events), 4)
+
+    def test_failures_are_reported(self):
+        def cancel(symbol):
+            raise RuntimeError('Unknown order list')
+
+        executor = MassCloseExecutor(cancel, self._close)
+        report = executor.close_all(['BTCUSDT', 'FAILUSDT'], 'Proteção de capital')
+        # Falha no cancelamento não impede a venda
+        self.assertEqual(report['closed'], ['BTCUSDT'])
+        self.assertIn('não executada', report['failed']['FAILUSDT'])
+
+    def test_position_still_open_is_not_counted(self):
+        # Encerramento já em andamento em outra thread: close_fn retorna sem vender
+        open_positions = {'BTCUSDT', 'ETHUSDT'}
+
+        def close(symbol, reason):
+            if symbol == 'BTCUSDT':
+                open_positions.discard(symbol)
+
+        executor = MassCloseExecutor(self._cancel, close, is_open_fn=lambda s: s in open_positions)
+        report = executor.close_all(['BTCUSDT', 'ETHUSDT'], 'Proteção de capital')
+        self.assertEqual(report['closed'], ['BTCUSDT'])
+        self.assertIn('ETHUSDT', report['failed'])
+
+    def test_empty(self):
+        executor = MassCloseExecutor(self._cancel, self._close)
+        report = executor.close_all([], 'Proteção de capital')
+        self.assertEqual(report['requested'], 0)
+        self.assertEqual(self.events, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+from src.utils.metrics import MetricsRegistry, render_prometheus, snapshot_families
+from src.utils.tracing import TracedClient, Tracer
+import threading
+import unittest
+
+
+class FakeResponse:
+    headers = {'x-mbx-used-weight-1m': '37'}
+
+
+class FakeClient:
+
+    response = None
+
+    def get_klines(self, **kwargs):
+        self.response = FakeResponse()
+        return []
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def test_counters_from_many_threads(self):
+        registry = MetricsRegistry()
+        signals = registry.counter('signals_total', 'Sinais', ('strength',))
+
+        def worker():
+            for _ in range(10000):
+                signals.labels('STRONG').inc()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        signals.labels(strength='WEAK').inc(2)
+
+        samples = {s[0]['strength']: s[1] for s in registry.collect()[0]['samples']}
+        self.assertEqual(samples, {'STRONG': 40000, 'WEAK': 2})
+        # Registrar de novo devolve a mesma métrica
+        self.assertIs(registry.counter('signals_total', 'Sinais', ('strength',)), signals)
+
+    def test_render_prometheus(self):
+        registry = MetricsRegistry()
+        registry.counter('scans_total', 'Varreduras').inc(3)
+        registry.gauge('api_weight_used_1m', 'Peso').set(120)
+        registry.counter('orders_total', 'Ordens', ('side', 'purpose')).labels('BUY', 'entry').inc()
+
+        text = render_prometheus(registry.collect())
+        self.assertIn('# TYPE binance_bot_scans_total counter\nbinance_bot_scans_total 3.0\n', text)
+        self.assertIn('binance_bot_api_weight_used_1m 120.0', text)
+        self.assertIn('binance_bot_orders_total{side="BUY",purpose="entry"} 1.0', text)
+
+    def test_snapshot_families(self):
+        self.assertEqual(render_prometheus(snapshot_families(None)),
+                         '# HELP binance_bot_up Processo do bot ativo\n# TYPE binance_bot_up gauge\nbinance_bot_up 0.0\n')
+
+        tracer = Tracer()
+        tracer.record('cycle.scan', 0.25)
+        registry = MetricsRegistry()
+        registry.counter('scans_total', 'Varreduras').inc()
+        snapshot = {
+            'running': True, 'active_positions': 2, 'daily_pnl': -1.5, 'balance': 900.0,
+            'persistence': {'last_write_ms': 2.0, 'avg_write_ms': 1.0, 'max_write_ms': 4.0, 'queue_depth': 0},
+            'status': {'tracing': tracer.get_stats()},
+            'metrics': registry.collect()
+        }
+        text = render_prometheus(snapshot_families(snapshot))
+        self.assertIn('binance_bot_open_positions 2.0', text)
+        self.assertIn('binance_bot_unrealized_pnl -1.5', text)
+        self.assertIn('binance_bot_persistence_write_seconds{stat="max"} 0.004', text)
+        self.assertIn('binance_bot_span_seconds_count{span="cycle.scan"} 1.0', text)
+        self.assertIn('binance_bot_span_seconds{span="cycle.scan",quantile="0.99"}', text)
+        self.assertIn('binance_bot_scans_total 1.0', text)
+
+    def test_traced_client_records_api_weight(self):
+        registry = MetricsRegistry()
+        weight = registry.gauge('api_weight_used_1m', 'Peso')
+        client = TracedClient(FakeClient(), Tracer(enabled=False), weight_gauge=weight)
+        client.get_klines(symbol='BTCUSDT')
+        self.assertEqual(weight.labels().value, 37.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+from src.data.order_book import OrderBook, OrderBookManager
+from src.risk.risk_manager import RiskManager
+from src.models.signal import MarketSignal
+from src.models.enums import SignalStrength
+from types import SimpleNamespace
+import os
+import tempfile
+import time
+import unittest
+
+
+SNAPSHOT = {
+    'lastUpdateId': 100,
+    'bids': [['99.0', '1.0'], ['99.5', '2.0'], ['98.0', '5.0']],
+    'asks': [['100.5', '1.5'], ['100.0', '1.0'], ['101.0', '4.0']]
+}
+
+
+def diff(first, last, bids=(), asks=()):
+    return {'e': 'depthUpdate', 's': 'BTCUSDT', 'U': first, 'u': last, 'b': list(bids), 'a': list(asks)}
+
+
+class TestOrderBookSync(unittest.TestCase):
+
+    def test_snapshot_with_buffered_events(self):
+        book = OrderBook('BTCUSDT')
+        book.on_event(diff(95, 99, bids=[['99.5', '9.0']]))       # anterior ao snapshot
+        book.on_event(diff(100, 102, asks=[['100.0', '0']]))      # cruza o lastUpdateId
+        book.on_event(diff(103, 103, bids=[['99.8', '0.5']]))
+        self.assertFalse(book.synced)
+
+        self.assertTrue(book.load_snapshot(SNAPSHOT))
+        self.assertEqual(book.last_update_id, 103)
+        self.assertEqual(book.best_bid(), 99.8)
+        self.assertEqual(book.best_ask(), 100.5)
+        self.assertEqual(book.bids.quantities[book.bids.prices.index(99.5)], 2.0)
+
+    def test_gap_requests_resync(self):
+        book = OrderBook('BTCUSDT')
+        book.load_snapshot(SNAPSHOT)
+        self.assertFalse(book.on_event(diff(101, 101, bids=[['99.6', '1.0']])))
+        self.assertFalse(book.on_event(diff(90, 101)))            # repetido
+        self.assertTrue(book.on_event(diff(105, 106)))
+        self.assertFalse(book.synced)
+        self.assertEqual(book.resyncs, 1)
+
+        # Snapshot defasado em relação ao evento guardado
+        self.assertFalse(book.load_snapshot(dict(SNAPSHOT, lastUpdateId=101)))
+        self.assertTrue(book.load_snapshot(dict(SNAPSHOT, lastUpdateId=104)))
+        self.assertEqual(book.last_update_id, 106)
+
+    def test_manager_routes_messages_and_falls_back_to_rest(self):
+        class Client:
+            calls = 0
+
+            def get_order_book(self, symbol, limit):
+                Client.calls += 1
+                return SNAPSHOT
+
+        manager = OrderBookManager(config=None, client=Client())
+        manager.set_symbols(['BTCUSDT'])
+        manager._handle_message({'stream': 'btcusdt@depth@100ms', 'data': diff(101, 101)})
+        self.assertEqual(manager.messages_received, 1)
+
+        # Livro ainda não sincronizado: usa o snapshot REST, reaproveitado por alguns segundos
+        self.assertIsNotNone(manager.get_book('BTCUSDT'))
+        self.assertIsNotNone(manager.get_book('BTCUSDT'))
+        self.assertEqual(Client.calls, 1)
+        self.assertIsNone(manager.get_book('BTCUSDT', allow_rest=False))
+
+        manager.books['BTCUSDT'].load_snapshot(SNAPSHOT)
+        self.assertIs(manager.get_book('BTCUSDT', allow_rest=False), manager.books['BTCUSDT'])
+        self.assertEqual(manager.get_stats()['synced'], 1)
+
+
+class TestOrderBookQueries(unittest.TestCase):
+
+    def setUp(self):
+        self.book = OrderBook('BTCUSDT')
+        self.book.load_snapshot(SNAPSHOT)
+
+    def test_spread(self):
+        self.assertAlmostEqual(self.book.spread_pct(), 0.5 / 99.75 * 100)
+        self.assertEqual(self.book.mid_price(), 99.75)
+
+    def test_available_quantity(self):
+        self.assertEqual(self.book.available_quantity('BUY', 0.0), 1.0)
+        self.assertEqual(self.book.available_quantity('BUY', 0.5), 2.5)
+        self.assertEqual(self.book.available_quantity('BUY', 5.0), 6.5)
+        self.assertEqual(self.book.available_quantity('SELL', 0.6), 3.0)
+
+    def test_average_fill_price(self):
+        self.assertAlmostEqual(self.book.average_fill_price('BUY', 2.0), (100.0 + 100.5) / 2)
+        self.assertAlmostEqual(self.book.average_fill_price('SELL', 2.5), (99.5 * 2 + 99.0 * 0.5) / 2.5)
+        self.assertIsNone(self.book.average_fill_price('BUY', 100.0))
+
+    def test_lookup_latency(self):
+        book = OrderBook('BTCUSDT')
+        book.load_snapshot({
+            'lastUpdateId': 1,
+            'bids': [[str(1000 - i * 0.01), '1.0'] for i in range(1000)],
+            'asks': [[str(1000.01 + i * 0.01), '1.0'] for i in range(1000)]
+        })
+        started = time.perf_counter()
+        for _ in range(1000):
+            book.spread_pct()
+            book.available_quantity('BUY', 0.5)
+        self.assertLess((time.perf_counter() - started) / 1000, 0.001)
+
+
+class FakeOrderBooks:
+    def __init__(self, book):
+        self.book = book
+
+    def get_book(self, symbol, allow_rest=True):
+        return self.book
+
+
+class TestDepthLimitedSize(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.risk_manager = RiskManager(SimpleNamespace(
+            persistence_dir=self.tmp.name,
+            ledger_path=os.path.join(self.tmp.name, 'ledger.db')
+        ))
+        self.risk_manager.update_capital(100000, 100000)
+
+    def tearDown(self):
+        self.risk_manager.persistence_writer.stop()
+        self.risk_manager.ledger.close()
+        self.tmp.cleanup()
+
+    def test_size_capped_by_depth(self):
+        signal = MarketSignal('BTCUSDT', SignalStrength.STRONG, 0.8, 100.0, 95.0, 120.0, 100.0)
+        uncapped = self.risk_manager._calculate_position_size(signal)
+
+        book = OrderBook('BTCUSDT')
+        book.load_snapshot(SNAPSHOT)
+        self.risk_manager.order_books = FakeOrderBooks(book)
+        self.risk_manager.max_slippage = 0.5
+        self.assertGreater(uncapped, 2.5)
+        self.assertEqual(self.risk_manager._calculate_position_size(signal), 2.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+from src.bot.order_manager import OrderManager, ManagedOrder
+from src.models.enums import OrderStatus
+from binance.exceptions import BinanceAPIException
+from requests.exceptions import ConnectionError as RequestsConnectionError
+import unittest
+
+
+class Config:
+    api_key = 'key'
+    api_secret = 'secret'
+    testnet = False
+    order_retry_delay = 0
+    order_fill_timeout = 0.1
+
+
+def api_error(code, message):
+    return BinanceAPIException(None, 400, f'{{"code": {code}, "msg": "{message}"}}')
+
+
+class FakeClient:
+    """Corretora mínima: registra ordens por client id e falha conforme o roteiro"""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.exchange_orders = {}
+        self.create_calls = 0
+        self.query_down = False
+
+    def create_order(self, **params):
+        self.create_calls += 1
+        failure = self.failures.pop(0) if self.failures else None
+        if failure == 'lost_response':
+            # A ordem chegou à corretora, mas a resposta se perdeu
+            self._fill(params)
+            raise RequestsConnectionError('timeout')
+        if failure == 'network':
+            raise RequestsConnectionError('timeout')
+        if failure == 'rejected':
+            raise api_error(-2010, 'Account has insufficient balance')
+        if failure == 'expired':
+            # Sem liquidez: a ordem expira na corretora sem execuções
+            response = {
+                'symbol': params['symbol'], 'orderId': len(self.exchange_orders) + 1,
+                'clientOrderId': params['newClientOrderId'], 'transactTime': 1700000000000,
+                'status': 'EXPIRED', 'executedQty': '0', 'cummulativeQuoteQty': '0', 'fills': []
+            }
+            self.exchange_orders[params['newClientOrderId']] = response
+            return response
+        return self._fill(params)
+
+    def get_order(self, symbol, origClientOrderId):
+        if self.query_down:
+            raise RequestsConnectionError('timeout')
+        if origClientOrderId not in self.exchange_orders:
+            raise api_error(-2013, 'Order does not exist.')
+        response = dict(self.exchange_orders[origClientOrderId])
+        response.pop('fills', None)
+        return response
+
+    def _fill(self, params):
+        response = {
+            'symbol': params['symbol'], 'orderId': len(self.exchange_orders) + 1,
+            'clientOrderId': params['newClientOrderId'], 'transactTime': 1700000000000,
+            'status': 'FILLED', 'executedQty': params['quantity'], 'cummulativeQuoteQty': '201.0',
+            'fills': [
+                {'price': '100.0', 'qty': '1.0', 'commission': '0', 'commissionAsset': 'BNB', 'tradeId': 1},
+                {'price': '101.0', 'qty': '1.0', 'commission': '0', 'commissionAsset': 'BNB', 'tradeId': 2}
+            ]
+        }
+        self.exchange_orders[params['newClientOrderId']] = response
+        return response
+
+
+class TestOrderManager(unittest.TestCase):
+
+    def test_deterministic_client_order_id(self):
+        a = OrderManager.client_order_id('BTCUSDT', 'BUY', 'entry', '2024-01-01T00:00:00')
+        b = OrderManager.client_order_id('BTCUSDT', 'BUY', 'entry', '2024-01-01T00:00:00')
+        c = OrderManager.client_order_id('BTCUSDT', 'BUY', 'entry', '2024-01-01T00:00:01')
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+        self.assertLessEqual(len(a), 36)
+
+    def test_vwap_across_fills(self):
+        client = FakeClient()
+        manager = OrderManager(client, Config())
+        order = manager.market_order('BTCUSDT', 'BUY', '2.0', 'entry', 'k')
+        self.assertEqual(order.status, OrderStatus.FILLED)
+        self.assertEqual(order.executed_quantity, 2.0)
+        self.assertAlmostEqual(order.vwap, 100.5)
+        self.assertEqual(len(order.as_response()['fills']), 2)
+
+    def test_repeated_intent_is_idempotent(self):
+        client = FakeClient()
+        manager = OrderManager(client, Config())
+        first = manager.market_order('BTCUSDT', 'BUY', '2.0', 'entry', 'k')
+        second = manager.market_order('BTCUSDT', 'BUY', '2.0', 'entry', 'k')
+        self.assertIs(first, second)
+        self.assertEqual(client.create_calls, 1)
+
+    def test_lost_response_is_recovered_without_resending(self):
+        client = FakeClient(failures=['lost_response'])
+        manager = OrderManager(client, Config())
+        order = manager.market_order('BTCUSDT', 'BUY', '2.0', 'entry', 'k')
+        self.assertEqual(client.create_calls, 1)
+        self.assertEqual(len(client.exchange_orders), 1)
+        self.assertEqual(order.status, OrderStatus.FILLED)
+        # Consulta traz apenas os acumulados
+        self.assertAlmostEqual(order.vwap, 100.5)
+
+    def test_network_failure_is_retried(self):
+        client = FakeClient(failures=['network', 'network'])
+        manager = OrderManager(client, Config())
+        order = manager.market_order('BTCUSDT', 'BUY', '2.0', 'entry', 'k')
+        self.assertEqual(client.create_calls, 3)
+        self.assertEqual(order.status, OrderStatus.FILLED)
+
+    def test_rejection(self):
+        client = FakeClient(failures=['rejected'])
+        manager = OrderManager(client, Config())
+        order = manager.market_order('BTCUSDT', 'BUY', '2.0', 'entry', 'k')
+        self.assertEqual(order.status, OrderStatus.REJECTED)
+        self.assertEqual(order.executed_quantity, 0)
+        self.assertIn('insufficient', order.error)
+
+    def test_unknown_outcome_is_reconciled_before_resending(self):
+        # Executada na corretora, mas nem o envio nem a consulta respondem
+        client = FakeClient(failures=['lost_response', 'network', 'network'])
+        client.query_down = True
+        manager = OrderManager(client, Config())
+        order = manager.market_order('BTCUSDT', 'BUY', '2.0', 'entry', 'k')
+        self.assertTrue(order.unknown)
+        self.assertFalse(order.is_final)
+        self.assertEqual(order.executed_quantity, 0)
+
+        # Enquanto a consulta falha, a intenção não é reenviada
+        self.assertIs(manager.market_order('BTCUSDT', 'BUY', '2.0', 'entry', 'k'), order)
+        self.assertEqual(client.create_calls, 3)
+
+        client.query_down = False
+        again = manager.market_order('BTCUSDT', 'BUY', '2.0', 'entry', 'k')
+        self.assertIs(again, order)
+        self.assertFalse(order.unknown)
+        self.assertEqual(order.status, OrderStatus.FILLED)
+        self.assertEqual(client.create_calls, 3)
+        self.assertEqual(len(client.exchange_orders), 1)
+
+    def test_unknown_outcome_confirmed_missing_is_resent(self):
+        client = FakeClient(failures=['network', 'network', 'network'])
+        manager = OrderManager(client, Config())
+        first = manager.market_order('BTCUSDT', 'BUY', '2.0', 'entry', 'k')
+        self.assertTrue(first.unknown)
+
+        # A corretora confirma que a ordem não existe: nova tentativa com sufixo
+        second = manager.market_order('BTCUSDT', 'BUY', '2.0', 'entry', 'k')
+        self.assertEqual(first.status, OrderStatus.REJECTED)
+        self.assertEqual(second.client_order_id, f'{first.client_order_id}-2')
+        self.assertEqual(second.status, OrderStatus.FILLED)
+
+    def test_rejected_order_is_resent_with_new_id(self):
+        client = FakeClient(failures=['rejected'])
+        manager = OrderManager(client, Config())
+        first = manager.market_order('BTCUSDT', 'BUY', '2.0', 'entry', 'k')
+        second = manager.market_order('BTCUSDT', 'BUY', '2.0', 'entry', 'k')
+        self.assertIsNot(first, second)
+        self.assertEqual(second.client_order_id, f'{first.client_order_id}-2')
+        self.assertEqual(list(client.exchange_orders), [second.client_order_id])
+
+    def test_unfilled_final_order_is_resent(self):
+        client = FakeClient(failures=['expired'])
+        manager = OrderManager(client, Config())
+        first = manager.market_order('BTCUSDT', 'SELL', '2.0', 'exit', 'k')
+        self.assertEqual(first.status, OrderStatus.EXPIRED)
+
+        second = manager.market_order('BTCUSDT', 'SELL', '2.0', 'exit', 'k')
+        self.assertIsNot(first, second)
+        self.assertEqual(second.client_order_id, f'{first.client_order_id}-2')
+        self.assertEqual(second.status, OrderStatus.FILLED)
+        self.assertEqual(client.create_calls, 2)
+
+        # A tentativa executada passa a ser a ordem da intenção
+        self.assertIs(manager.market_order('BTCUSDT', 'SELL', '2.0', 'exit', 'k'), second)
+        self.assertEqual(client.create_calls, 2)
+
+    def test_user_stream_partial_fills(self):
+        manager = OrderManager(FakeClient(), Config())
+        order = ManagedOrder('ETHUSDT', 'SELL', 3.0, 'cid')
+        manager.orders['cid'] = order
+
+        def report(status, trade_id, qty, price, cumulative):
+            manager.handle_user_event({
+                'e': 'executionReport', 's': 'ETHUSDT', 'c': 'cid', 'X': status, 'x': 'TRADE',
+                'i': 9, 't': trade_id, 'l': str(qty), 'L': str(price), 'z': str(cumulative), 'n': '0', 'N': 'BNB'
+            })
+
+        report('PARTIALLY_FILLED', 1, 1.0, 10.0, 1.0)
+        report('PARTIALLY_FILLED', 1, 1.0, 10.0, 1.0)  # duplicado
+        self.assertEqual(order.status, OrderStatus.PARTIALLY_FILLED)
+        self.assertEqual(order.executed_quantity, 1.0)
+
+        report('FILLED', 2, 2.0, 13.0, 3.0)
+        self.assertTrue(order.done.is_set())
+        self.assertAlmostEqual(order.vwap, 12.0)
+
+        # Atualização atrasada não volta o estado
+        report('PARTIALLY_FILLED', 1, 1.0, 10.0, 1.0)
+        self.assertEqual(order.status, OrderStatus.FILLED)
+
+    def test_simulated_order(self):
+        manager = OrderManager(None, Config(), simulated=True)
+        order = manager.market_order('BTCUSDT', 'BUY', '0.5', 'entry', 'k', reference_price=200.0)
+        self.assertEqual(order.status, OrderStatus.FILLED)
+        self.assertEqual(order.vwap, 200.0)
+        self.assertTrue(order.simulated)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+from src.utils.persistence import DataPersistence
+from src.models.position import Position
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestDataPersistence(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.persistence = DataPersistence(self.data_dir, compact_every=3, max_backups=2)
+
+    def tearDown(self):
+        self.persistence.close()
+        shutil.rmtree(self.data_dir)
+
+    def _position(self, symbol, size=1.0):
+        return Position(symbol, 'BUY', size, 100.0, 100.0, stop_loss=95.0, take_profit=110.0)
+
+    def _reload(self):
+        self.persistence.close()
+        return DataPersistence(self.data_dir).load_positions()
+
+    def test_journal_replay(self):
+        self.persistence.append_event('open', 'BTCUSDT', self._position('BTCUSDT'))
+        self.persistence.append_event('open', 'ETHUSDT', self._position('ETHUSDT'))
+        self.persistence.append_event('close', 'BTCUSDT')
+
+        positions = self._reload()
+        self.assertEqual(list(positions), ['ETHUSDT'])
+        self.assertFalse(os.path.exists(self.persistence.positions_file))
+
+    def test_snapshot_plus_journal(self):
+        positions = {'BTCUSDT': self._position('BTCUSDT')}
+        self.persistence.append_event('open', 'BTCUSDT', positions['BTCUSDT'])
+        self.assertTrue(self.persistence.save_positions(positions))
+        self.assertEqual(os.path.getsize(self.persistence.journal_file), 0)
+
+        self.persistence.append_event('open', 'ETHUSDT', self._position('ETHUSDT', size=2.0))
+        loaded = self._reload()
+        self.assertEqual(sorted(loaded), ['BTCUSDT', 'ETHUSDT'])
+        self.assertEqual(loaded['ETHUSDT'].size, 2.0)
+
+    def test_events_already_in_snapshot_are_skipped(self):
+        # Queda entre o replace do snapshot e a limpeza do journal
+        self.persistence.append_event('open', 'BTCUSDT', self._position('BTCUSDT'))
+        self.persistence.append_event('close', 'BTCUSDT')
+        with open(self.persistence.journal_file) as f:
+            journal = f.read()
+        self.persistence.save_positions({})
+        with open(self.persistence.journal_file, 'w') as f:
+            f.write(journal)
+
+        self.assertEqual(self._reload(), {})
+
+    def test_torn_write_is_ignored(self):
+        self.persistence.append_event('open', 'BTCUSDT', self._position('BTCUSDT'))
+        self.persistence.close()
+        with open(self.persistence.journal_file, 'a') as f:
+            f.write('{"seq": 2, "op": "close", "sym')
+
+        self.assertEqual(list(self._reload()), ['BTCUSDT'])
+
+    def test_appends_after_torn_write_survive_reload(self):
+        self.persistence.append_event('open', 'BTCUSDT', self._position('BTCUSDT'))
+        self.persistence.close()
+        with open(self.persistence.journal_file, 'a') as f:
+            f.write('{"seq": 2, "op": "close", "sym')
+
+        persistence = DataPersistence(self.data_dir)
+        self.assertEqual(list(persistence.load_positions()), ['BTCUSDT'])
+        persistence.append_event('open', 'ETHUSDT', self._position('ETHUSDT'))
+        persistence.append_event('open', 'SOLUSDT', self._position('SOLUSDT'))
+        persistence.close()
+
+        self.assertEqual(sorted(self._reload()), ['BTCUSDT', 'ETHUSDT', 'SOLUSDT'])
+
+    def test_sequence_continues_after_reload(self):
+        self.persistence.append_event('open', 'BTCUSDT', self._position('BTCUSDT'))
+        self.persistence.close()
+
+        persistence = DataPersistence(self.data_dir)
+        persistence.load_positions()
+        persistence.append_event('close', 'BTCUSDT')
+        persistence.close()
+
+        with open(self.persistence.journal_file) as f:
+            sequences = [json.loads(line)['seq'] for line in f]
+        self.assertEqual(sequences, [1, 2])
+
+    def test_should_compact_and_backups_are_bounded(self):
+        positions = {}
+        for i in range(3):
+            symbol = f'S{i}USDT'
+            positions[symbol] = self._position(symbol)
+            self.persistence.append_event('open', symbol, positions[symbol])
+        self.assertTrue(self.persistence.should_compact())
+
+        for _ in range(4):
+            self.persistence.save_positions(positions)
+        self.assertFalse(self.persistence.should_compact())
+        self.assertLessEqual(len(os.listdir(self.persistence.backup_dir)), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+from src.utils.persistence import DataPersistence
+from src.utils.persistence_writer import PersistenceWriter
+from src.models.position import Position
+import shutil
+import tempfile
+import threading
+import unittest
+
+
+class TestPersistenceWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.persistence = DataPersistence(self.data_dir, compact_every=1000)
+        self.positions = {}
+
+    def tearDown(self):
+        self.persistence.close()
+        shutil.rmtree(self.data_dir)
+
+    def _writer(self, **kwargs):
+        return PersistenceWriter(self.persistence, lambda: dict(self.positions), **kwargs)
+
+    def _open(self, writer, symbol):
+        position = Position(symbol, 'BUY', 1.0, 100.0, 100.0, stop_loss=95.0, take_profit=110.0)
+        self.positions[symbol] = position
+        writer.submit('open', symbol, position)
+
+    def _close(self, writer, symbol):
+        del self.positions[symbol]
+        writer.submit('close', symbol)
+
+    def _pause(self, writer):
+        """Simula a thread ativa sem consumir a fila"""
+        release = threading.Event()
+        writer._thread = threading.Thread(target=release.wait, daemon=True)
+        writer._thread.start()
+        return release
+
+    def _resume(self, writer, release):
+        release.set()
+        writer._thread.join()
+        writer._thread = None
+        writer.start()
+
+    def _reload(self):
+        self.persistence.close()
+        return DataPersistence(self.data_dir).load_positions()
+
+    def test_burst_is_coalesced(self):
+        writer = self._writer(flush_interval=0.2, max_batch=100)
+        writer.start()
+        for i in range(20):
+            self._open(writer, f'SYM{i}USDT')
+        self.assertTrue(writer.flush())
+
+        stats = writer.get_stats()
+        self.assertEqual(stats['events_written'], 20)
+        self.assertLess(stats['batches_written'], 20)
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertGreater(stats['max_write_ms'], 0)
+
+        writer.stop()
+        self.assertEqual(set(self._reload()), set(self.positions))
+
+    def test_batch_size_limit(self):
+        writer = self._writer(flush_interval=1.0, max_batch=5)
+        release = self._pause(writer)
+        for i in range(12):
+            self._open(writer, f'SYM{i}USDT')
+        self._resume(writer, release)
+
+        self.assertTrue(writer.flush())
+        writer.stop()
+        self.assertEqual(writer.get_stats()['batches_written'], 3)
+
+    def test_stop_flushes_and_snapshots(self):
+        writer = self._writer(flush_interval=10.0)
+        writer.start()
+        self._open(writer, 'BTCUSDT')
+        self._open(writer, 'ETHUSDT')
+        self._close(writer, 'BTCUSDT')
+        writer.stop()
+
+        self.assertEqual(writer.get_stats()['snapshots_written'], 1)
+        self.assertEqual(list(self._reload()), ['ETHUSDT'])
+
+    def test_full_queue_falls_back_to_snapshot(self):
+        writer = self._writer(max_queue=3)
+        release = self._pause(writer)
+        for i in range(5):
+            self._open(writer, f'SYM{i}USDT')
+        self._close(writer, 'SYM0USDT')
+        self.assertEqual(writer.get_stats()['queue_depth'], 3)
+        self._resume(writer, release)
+
+        self.assertTrue(writer.flush())
+        writer.stop()
+
+        stats = writer.get_stats()
+        self.assertEqual(stats['events_dropped'], 6)
+        self.assertEqual(stats['snapshots_written'], 2)
+        self.assertEqual(set(self._reload()), set(self.positions))
+
+    def test_submit_without_thread_writes_directly(self):
+        writer = self._writer()
+        self._open(writer, 'BTCUSDT')
+        self.assertEqual(writer.get_stats()['events_written'], 1)
+        self.assertEqual(list(self._reload()), ['BTCUSDT'])
+
+
+if __name__ == '__main__':
+    unittest.main()
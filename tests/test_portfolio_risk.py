@@ -0,0 +1,128 @@
+from src.risk.correlation import CorrelationEngine
+from src.risk.portfolio_risk import PortfolioRiskCalculator
+from src.models.position import Position
+from tests.test_correlation import make_klines
+from statistics import NormalDist
+import numpy as np
+import threading
+import unittest
+
+
+class TestPortfolioRiskCalculator(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = CorrelationEngine(timeframe='1h', window=60, min_periods=10)
+        rng = np.random.default_rng(7)
+        self.returns = {
+            'AAAUSDT': rng.normal(0, 0.02, 80),
+            'BBBUSDT': rng.normal(0, 0.01, 80),
+        }
+        for symbol, returns in self.returns.items():
+            closes = 100 * np.exp(np.cumsum(np.concatenate([[0.0], returns])))
+            self.engine.update(symbol, make_klines(closes))
+        self.calculator = PortfolioRiskCalculator(self.engine, confidence=0.95)
+        self.positions = {
+            'AAAUSDT': Position('AAAUSDT', 'BUY', 2.0, 100.0, 100.0),
+            'BBBUSDT': Position('BBBUSDT', 'BUY', 1.0, 50.0, 50.0),
+        }
+
+    def _scenarios(self):
+        # Mesma janela do motor: os últimos 60 retornos de candles fechados
+        return np.column_stack([np.expm1(self.returns[s][20:80]) for s in ['AAAUSDT', 'BBBUSDT']])
+
+    def test_historical_var_and_es(self):
+        metrics = self.calculator.compute(self.positions)
+        pnl = self._scenarios() @ np.array([200.0, 50.0])
+        worst = np.sort(pnl)[:3]  # 5% de 60 cenários
+        self.assertAlmostEqual(metrics['historical_var'], -worst[-1], places=9)
+        self.assertAlmostEqual(metrics['historical_es'], -worst.mean(), places=9)
+        self.assertEqual(metrics['scenarios'], 60)
+        self.assertAlmostEqual(metrics['coverage'], 1.0)
+
+    def test_parametric_var(self):
+        metrics = self.calculator.compute(self.positions)
+        scenarios = self._scenarios()
+        exposures = np.array([200.0, 50.0])
+        sigma = np.sqrt(exposures @ np.cov(scenarios, rowvar=False) @ exposures)
+        mean = scenarios.mean(axis=0) @ exposures
+        expected = NormalDist().inv_cdf(0.95) * sigma - mean
+        self.assertAlmostEqual(metrics['parametric_var'], expected, places=9)
+        self.assertGreater(metrics['parametric_es'], metrics['parametric_var'])
+
+    def test_price_change_reuses_scenarios(self):
+        self.calculator.compute(self.positions)
+        scenarios = self.calculator._scenarios
+        self.positions['AAAUSDT'].update_price(110.0)
+        metrics = self.calculator.compute(self.positions)
+        self.assertIs(self.calculator._scenarios, scenarios)
+        self.assertAlmostEqual(metrics['exposure'], 270.0)
+
+    def test_uncovered_symbol_is_flagged_not_zero_filled(self):
+        self.positions['NEWUSDT'] = Position('NEWUSDT', 'BUY', 10.0, 30.0, 30.0)
+        metrics = self.calculator.compute(self.positions)
+
+        pnl = self._scenarios() @ np.array([200.0, 50.0])
+        self.assertAlmostEqual(metrics['historical_var'], -np.sort(pnl)[:3][-1], places=9)
+        self.assertAlmostEqual(metrics['exposure'], 550.0)
+        self.assertAlmostEqual(metrics['uncovered_exposure'], 300.0)
+        self.assertEqual(metrics['uncovered_symbols'], ['NEWUSDT'])
+        self.assertAlmostEqual(metrics['coverage'], 250.0 / 550.0)
+
+    def test_partial_history_uses_only_complete_rows(self):
+        # CCC só tem os últimos 30 retornos da janela: cenários são os candles em comum
+        recent = np.random.default_rng(11).normal(0, 0.03, 30)
+        closes = 100 * np.exp(np.cumsum(np.concatenate([[0.0], recent])))
+        self.engine.update('CCCUSDT', make_klines(closes, start_ms=50 * 3_600_000))
+        self.positions['CCCUSDT'] = Position('CCCUSDT', 'BUY', 1.0, 100.0, 100.0)
+        metrics = self.calculator.compute(self.positions)
+
+        scenarios = np.column_stack([self._scenarios()[-30:], np.expm1(recent)])
+        pnl = scenarios @ np.array([200.0, 50.0, 100.0])
+        worst = np.sort(pnl)[:2]  # 5% de 30 cenários
+        self.assertEqual(metrics['scenarios'], 30)
+        self.assertAlmostEqual(metrics['historical_var'], -worst[-1], places=9)
+        self.assertAlmostEqual(metrics['coverage'], 1.0)
+
+    def test_only_uncovered_positions(self):
+        metrics = self.calculator.compute({'NEWUSDT': Position('NEWUSDT', 'BUY', 1.0, 30.0, 30.0)})
+        self.assertEqual(metrics['historical_var'], 0.0)
+        self.assertEqual(metrics['coverage'], 0.0)
+        self.assertEqual(metrics['uncovered_exposure'], 30.0)
+
+    def test_unchanged_inputs_return_previous_result(self):
+        first = self.calculator.compute(self.positions)
+        self.assertIs(self.calculator.compute(self.positions), first)
+        self.positions['AAAUSDT'].update_price(101.0)
+        self.assertIsNot(self.calculator.compute(self.positions), first)
+
+    def test_concurrent_compute(self):
+        # Ciclo de monitoramento e publicador calculam ao mesmo tempo
+        expected = self.calculator.compute(self.positions)['historical_var']
+        results, errors = [], []
+
+        def worker():
+            try:
+                for _ in range(200):
+                    self.calculator._cache_key = None
+                    results.append(self.calculator.compute(self.positions)['historical_var'])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        for value in results:
+            self.assertAlmostEqual(value, expected, places=9)
+
+    def test_empty_portfolio(self):
+        metrics = self.calculator.compute({})
+        self.assertEqual(metrics['historical_var'], 0.0)
+        self.assertEqual(metrics['scenarios'], 0)
+        # Sem posições o resultado não muda a cada chamada (snapshot/ETag estáveis)
+        self.assertIs(self.calculator.compute({}), metrics)
+
+if __name__ == '__main__':
+    unittest.main()
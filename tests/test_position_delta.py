@@ -0,0 +1,94 @@
+from src.utils.position_delta import PositionDeltaTracker, diff_positions, merge_deltas
+import unittest
+
+
+def position(symbol, price, pnl, size=1.0):
+    return {'symbol': symbol, 'size': size, 'entry_price': 100.0, 'current_price': price,
+            'unrealized_pnl': pnl, 'status': 'OPEN'}
+
+
+def summary(count, pnl):
+    return {'running': True, 'active_positions': count, 'daily_pnl': pnl, 'balance': 1000.0}
+
+
+def apply(state, delta):
+    """Mesma lógica do cliente (dashboard.html)"""
+    assert delta['base'] == state['version']
+    for symbol in delta['removed']:
+        state['positions'].pop(symbol, None)
+    for symbol, fields in delta['upsert'].items():
+        state['positions'].setdefault(symbol, {}).update(fields)
+    state['summary'].update(delta['summary'])
+    state['version'] = delta['version']
+
+
+class TestPositionDelta(unittest.TestCase):
+
+    def test_diff_only_changed_fields(self):
+        old = {'BTCUSDT': position('BTCUSDT', 101.0, 1.0), 'ETHUSDT': position('ETHUSDT', 50.0, 0.0)}
+        new = {'BTCUSDT': position('BTCUSDT', 102.0, 2.0), 'SOLUSDT': position('SOLUSDT', 20.0, 0.0)}
+        delta = diff_positions(old, new)
+        self.assertEqual(delta['upsert']['BTCUSDT'], {'current_price': 102.0, 'unrealized_pnl': 2.0})
+        self.assertEqual(delta['upsert']['SOLUSDT'], new['SOLUSDT'])
+        self.assertEqual(delta['removed'], ['ETHUSDT'])
+
+    def test_unchanged_state_produces_no_delta(self):
+        tracker = PositionDeltaTracker()
+        positions = [position('BTCUSDT', 101.0, 1.0)]
+        self.assertIsNotNone(tracker.update(positions, summary(1, 1.0), version=10))
+        self.assertIsNone(tracker.update(positions, summary(1, 1.0), version=12))
+        self.assertEqual(tracker.version, 10)
+
+    def test_client_follows_deltas(self):
+        tracker = PositionDeltaTracker()
+        client = {'version': 0, 'positions': {}, 'summary': {}}
+        states = [
+            [position('BTCUSDT', 101.0, 1.0)],
+            [position('BTCUSDT', 103.0, 3.0), position('ETHUSDT', 50.0, 0.0)],
+            [position('ETHUSDT', 49.0, -1.0)],
+        ]
+        for i, positions in enumerate(states):
+            delta = tracker.update(positions, summary(len(positions), sum(p['unrealized_pnl'] for p in positions)))
+            apply(client, delta)
+        self.assertEqual(client['positions'], {'ETHUSDT': position('ETHUSDT', 49.0, -1.0)})
+        self.assertEqual(client['summary']['daily_pnl'], -1.0)
+        self.assertEqual(client['version'], tracker.version)
+
+    def test_resync_with_missed_deltas(self):
+        tracker = PositionDeltaTracker(history=3)
+        tracker.update([position('BTCUSDT', 101.0, 1.0)], summary(1, 1.0))
+        client = {'version': tracker.version, 'positions': {'BTCUSDT': position('BTCUSDT', 101.0, 1.0)},
+                  'summary': summary(1, 1.0)}
+
+        tracker.update([position('BTCUSDT', 102.0, 2.0), position('ETHUSDT', 50.0, 0.0)], summary(2, 2.0))
+        tracker.update([position('ETHUSDT', 51.0, 1.0)], summary(1, 1.0))
+
+        reply = tracker.resync(client['version'])
+        self.assertEqual(reply['type'], 'delta')
+        apply(client, reply['delta'])
+        self.assertEqual(client['positions'], {'ETHUSDT': position('ETHUSDT', 51.0, 1.0)})
+        self.assertEqual(tracker.resync(tracker.version), {'type': 'delta', 'delta': None})
+
+        # Versão fora do histórico: snapshot completo
+        for price in (52.0, 53.0, 54.0, 55.0):
+            tracker.update([position('ETHUSDT', price, 1.0)], summary(1, 1.0))
+        reply = tracker.resync(client['version'])
+        self.assertEqual(reply['type'], 'snapshot')
+        self.assertEqual(reply['snapshot']['positions'], [position('ETHUSDT', 55.0, 1.0)])
+        self.assertEqual(tracker.resync(None)['type'], 'snapshot')
+
+    def test_merge_removed_then_reopened(self):
+        merged = merge_deltas([
+            {'base': 1, 'version': 2, 'upsert': {}, 'removed': ['BTCUSDT'], 'summary': {'active_positions': 0}},
+            {'base': 2, 'version': 3, 'upsert': {'BTCUSDT': position('BTCUSDT', 90.0, 0.0)}, 'removed': [],
+             'summary': {'active_positions': 1}},
+        ])
+        self.assertEqual(merged['base'], 1)
+        self.assertEqual(merged['version'], 3)
+        self.assertEqual(merged['removed'], [])
+        self.assertEqual(merged['upsert']['BTCUSDT']['current_price'], 90.0)
+        self.assertEqual(merged['summary'], {'active_positions': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
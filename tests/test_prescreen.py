@@ -0,0 +1,54 @@
+from src.analysis.prescreen import Prescreener
+from types import SimpleNamespace
+import unittest
+
+
+def ticker(symbol, change, volume, high=110.0, low=90.0, avg=100.0):
+    return {
+        'symbol': symbol, 'priceChangePercent': str(change), 'quoteVolume': str(volume),
+        'highPrice': str(high), 'lowPrice': str(low), 'weightedAvgPrice': str(avg)
+    }
+
+
+class TestPrescreener(unittest.TestCase):
+
+    def setUp(self):
+        self.screener = Prescreener(SimpleNamespace(min_volume_usdt=1000000, prescreen_top_k=2))
+
+    def test_filters_like_volume_list(self):
+        tickers = [
+            ticker('BTCUSDT', 1.0, 5e8),
+            ticker('ETHBTC', 9.0, 5e8),
+            ticker('BTCUPUSDT', 20.0, 5e8),
+            ticker('DOGEUSDT', 5.0, 1e5),
+            ticker('SOLUSDT', 3.0, 2e7),
+        ]
+        ranked = self.screener.screen(tickers, exclude={'SOLUSDT'})
+        self.assertEqual(ranked['symbol'].tolist(), ['BTCUSDT'])
+
+    def test_ranks_by_combined_score(self):
+        tickers = [
+            ticker('BTCUSDT', 0.5, 9e8, high=101, low=99),
+            ticker('ETHUSDT', 8.0, 3e8, high=120, low=95),
+            ticker('ADAUSDT', 2.0, 2e7, high=104, low=97),
+        ]
+        self.assertEqual(self.screener.candidates(tickers), ['ETHUSDT', 'ADAUSDT'])
+
+    def test_volume_surge_against_previous_snapshots(self):
+        base = [ticker('BTCUSDT', 2.0, 1e8), ticker('ETHUSDT', 2.0, 1e8)]
+        first = self.screener.screen(base)
+        self.assertTrue((first['volume_surge'] == 1.0).all())
+
+        surge = [ticker('BTCUSDT', 2.0, 1e8), ticker('ETHUSDT', 2.0, 4e8)]
+        ranked = self.screener.screen(surge).set_index('symbol')
+        self.assertAlmostEqual(ranked.loc['ETHUSDT', 'volume_surge'], 4.0)
+        self.assertAlmostEqual(ranked.loc['BTCUSDT', 'volume_surge'], 1.0)
+        self.assertEqual(ranked['score'].idxmax(), 'ETHUSDT')
+
+    def test_empty_or_invalid_snapshot(self):
+        self.assertTrue(self.screener.screen([]).empty)
+        self.assertEqual(self.screener.candidates([ticker('BTCUSDT', 1.0, 5e8, avg=0)]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
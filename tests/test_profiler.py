@@ -0,0 +1,100 @@
+from src.utils.profiler import (
+    MAX_DURATION, ProfilerBusy, SamplingProfiler, collapsed_text, flamegraph_svg, profile_request
+)
+import threading
+import time
+import tracemalloc
+import unittest
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+class TestSamplingProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.stop = threading.Event()
+        self.worker = threading.Thread(target=busy_loop, args=(self.stop,), name='bot-worker', daemon=True)
+        self.worker.start()
+
+    def tearDown(self):
+        self.stop.set()
+        self.worker.join(timeout=2)
+
+    def test_capture_samples_selected_threads(self):
+        profile = SamplingProfiler().capture(0.3, interval=0.005, threads=['bot-worker'])
+
+        self.assertGreater(profile['samples'], 0)
+        self.assertTrue(profile['stacks'])
+        for stack in profile['stacks']:
+            self.assertTrue(stack.startswith('bot-worker;'))
+        self.assertTrue(any('busy_loop' in stack for stack in profile['stacks']))
+
+    def test_concurrent_capture_is_rejected(self):
+        profiler = SamplingProfiler()
+        worker = threading.Thread(target=profiler.capture, args=(0.5,))
+        worker.start()
+        time.sleep(0.1)
+
+        self.assertTrue(profiler.busy)
+        with self.assertRaises(ProfilerBusy):
+            profiler.capture(0.1)
+        worker.join()
+        self.assertFalse(profiler.busy)
+
+    def test_allocations_stop_tracemalloc(self):
+        profile = SamplingProfiler().capture(0.1, allocations=True, top=5)
+
+        self.assertIsInstance(profile['allocations'], list)
+        self.assertLessEqual(len(profile['allocations']), 5)
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+class TestProfileRequest(unittest.TestCase):
+
+    def test_defaults(self):
+        params = profile_request({})
+        self.assertEqual(params['seconds'], 10)
+        self.assertEqual(params['format'], 'json')
+        self.assertIsNone(params['threads'])
+
+    def test_duration_is_capped(self):
+        self.assertEqual(profile_request({'seconds': 10 ** 6})['seconds'], MAX_DURATION)
+
+    def test_invalid_values_are_rejected(self):
+        for params in ({'seconds': 'abc'}, {'seconds': -1}, {'seconds': 'inf'}, {'interval': -0.01},
+                       {'interval': 0.00001}, {'threads': 'bot'}, {'format': 'xml'}, {'top': 0}, {'seconds': 0}, {'interval': 0}, []):
+            with self.assertRaises(ValueError):
+                profile_request(params)
+
+    def test_capture_rejects_tiny_interval(self):
+        with self.assertRaises(ValueError):
+            SamplingProfiler().capture(0.1, interval=-1)
+
+
+class TestProfileOutput(unittest.TestCase):
+
+    def test_collapsed_text(self):
+        text = collapsed_text({'main;a.py:run;b.py:work': 7, 'main;a.py:run': 3})
+
+        self.assertEqual(text, 'main;a.py:run;b.py:work 7\nmain;a.py:run 3\n')
+
+    def test_flamegraph_svg(self):
+        svg = flamegraph_svg({'main;a.py:<module>;b.py:work': 4, 'main;a.py:<module>': 1})
+
+        self.assertTrue(svg.startswith('<svg'))
+        self.assertTrue(svg.endswith('</svg>'))
+        self.assertIn('a.py:&lt;module&gt;', svg)
+        self.assertNotIn('<module>', svg)
+
+    def test_flamegraph_svg_empty(self):
+        svg = flamegraph_svg({})
+
+        self.assertTrue(svg.startswith('<svg'))
+        self.assertNotIn('<rect', svg)
+
+
+if __name__ == '__main__':
+    unittest.main()
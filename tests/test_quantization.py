@@ -0,0 +1,150 @@
+from src.utils.quantization import (
+    QuantizationTable, SymbolRules, ROUND_DOWN, ROUND_UP, ROUND_NEAREST, format_units, to_units
+)
+from decimal import Decimal
+import random
+import unittest
+
+
+def symbol_info(symbol, step, min_qty, max_qty, tick, min_notional, notional_filter='NOTIONAL'):
+    filters = [
+        {'filterType': 'PRICE_FILTER', 'minPrice': tick, 'maxPrice': '1000000.00000000', 'tickSize': tick},
+        {'filterType': 'LOT_SIZE', 'minQty': min_qty, 'maxQty': max_qty, 'stepSize': step},
+        {'filterType': 'MARKET_LOT_SIZE', 'minQty': '0.00000000', 'maxQty': '0.00000000', 'stepSize': '0.00000000'}
+    ]
+    if notional_filter == 'NOTIONAL':
+        filters.append({'filterType': 'NOTIONAL', 'minNotional': min_notional, 'applyMinToMarket': True,
+                        'maxNotional': '9000000.00000000', 'applyMaxToMarket': False})
+    else:
+        filters.append({'filterType': 'MIN_NOTIONAL', 'minNotional': min_notional, 'applyToMarket': True})
+    return {'symbol': symbol, 'baseAsset': symbol[:-4], 'quoteAsset': 'USDT', 'filters': filters}
+
+
+SYMBOLS = {
+    'BTCUSDT': symbol_info('BTCUSDT', '0.00001000', '0.00001000', '9000.00000000', '0.01000000', '5.00000000'),
+    'ETHUSDT': symbol_info('ETHUSDT', '0.00010000', '0.00010000', '9000.00000000', '0.01000000', '5.00000000'),
+    'DOGEUSDT': symbol_info('DOGEUSDT', '1.00000000', '1.00000000', '9000000.00000000', '0.00001000', '1.00000000',
+                            notional_filter='MIN_NOTIONAL'),
+    'SHIBUSDT': symbol_info('SHIBUSDT', '1.00000000', '1.00000000', '90000000000.00000000', '0.00000001', '5.00000000'),
+    'XYZUSDT': symbol_info('XYZUSDT', '0.05000000', '0.10000000', '100000.00000000', '0.00500000', '10.00000000')
+}
+
+
+class TestSymbolRules(unittest.TestCase):
+
+    def setUp(self):
+        self.table = QuantizationTable(SYMBOLS)
+        self.rng = random.Random(1234)
+
+    def test_units_helpers(self):
+        self.assertEqual(to_units('0.00100000', 3), 1)
+        self.assertEqual(to_units('12.5', 2), 1250)
+        self.assertEqual(format_units(1250, 2), '12.5')
+        self.assertEqual(format_units(100, 2), '1')
+        self.assertEqual(format_units(5, 8), '0.00000005')
+
+    def test_float_representation_error(self):
+        rules = self.table.get('XYZUSDT')
+        # 0.3 / 0.05 em float fica abaixo de 6; a conversão para unidades não pode perder um step
+        self.assertEqual(rules.format_quantity(0.3), '0.3')
+        self.assertEqual(rules.format_quantity(0.29), '0.25')
+        self.assertEqual(self.table.get('ETHUSDT').format_quantity(1.0003), '1.0003')
+
+    def test_quantity_properties(self):
+        for symbol, rules in self.table.rules.items():
+            step = Decimal(SYMBOLS[symbol]['filters'][1]['stepSize'])
+            for _ in range(500):
+                quantity = self.rng.uniform(0, 50) * 10 ** self.rng.randint(-4, 4)
+                formatted = rules.format_quantity(quantity)
+                result = Decimal(formatted)
+                self.assertEqual(result % step, 0, (symbol, quantity, formatted))
+                self.assertLessEqual(result, Decimal(repr(quantity)) + Decimal('1e-12'))
+                self.assertLess(Decimal(repr(quantity)) - result, step)
+                self.assertEqual(float(formatted), rules.floor_quantity(quantity))
+                self.assertFalse(formatted.endswith('.') or 'e' in formatted)
+
+    def test_size_order_respects_filters(self):
+        for symbol, rules in self.table.rules.items():
+            for _ in range(300):
+                price = self.rng.uniform(0.00001, 50000)
+                quantity = self.rng.uniform(0, 100) / price * 10 ** self.rng.randint(-1, 2)
+                sized = rules.size_order(quantity, price, clamp=False)
+                if not sized.valid:
+                    continue
+                self.assertGreaterEqual(sized.quantity, float(SYMBOLS[symbol]['filters'][1]['minQty']))
+                self.assertLessEqual(sized.quantity, float(SYMBOLS[symbol]['filters'][1]['maxQty']))
+                self.assertGreaterEqual(sized.notional, rules.min_notional)
+                self.assertLessEqual(sized.quantity, quantity + 1e-12)
+
+    def test_size_order_clamps_and_rejects(self):
+        rules = self.table.get('XYZUSDT')
+        sized = rules.size_order(0.01, 200.0)
+        self.assertTrue(sized.valid)
+        self.assertEqual(sized.quantity_str, '0.1')
+
+        sized = rules.size_order(0.01, 200.0, clamp=False)
+        self.assertFalse(sized.valid)
+
+        sized = rules.size_order(0.2, 10.0)
+        self.assertFalse(sized.valid)
+        self.assertIn('notional', sized.reason)
+
+    def test_notional_filter_variants(self):
+        self.assertEqual(self.table.get('DOGEUSDT').min_notional, 1.0)
+        self.assertIsNone(self.table.get('DOGEUSDT').max_notional)
+        self.assertEqual(self.table.get('BTCUSDT').max_notional, 9000000.0)
+        self.assertTrue(self.table.get('BTCUSDT').min_notional_market)
+
+    def test_price_rounding_modes(self):
+        rules = self.table.get('XYZUSDT')
+        self.assertEqual(rules.format_price(1.2349, ROUND_DOWN), '1.23')
+        self.assertEqual(rules.format_price(1.2301, ROUND_UP), '1.235')
+        self.assertEqual(rules.format_price(1.2330), '1.235')
+        self.assertEqual(rules.format_price(1.2320), '1.23')
+        self.assertEqual(rules.format_price(1.235, ROUND_UP), '1.235')
+
+        tick = Decimal('0.005')
+        for _ in range(500):
+            price = self.rng.uniform(0.01, 1000)
+            down = Decimal(rules.format_price(price, ROUND_DOWN))
+            up = Decimal(rules.format_price(price, ROUND_UP))
+            nearest = Decimal(rules.format_price(price, ROUND_NEAREST))
+            self.assertEqual(down % tick, 0)
+            self.assertEqual(up % tick, 0)
+            self.assertLessEqual(up - down, tick)
+            self.assertIn(nearest, (down, up))
+
+    def test_batch_matches_scalar(self):
+        symbols = list(SYMBOLS) + ['UNKNOWN']
+        candidates = []
+        for _ in range(1000):
+            price = self.rng.uniform(0.00001, 50000)
+            candidates.append((self.rng.choice(symbols), self.rng.uniform(0, 100) / price, price))
+
+        results = self.table.size_orders(candidates)
+        self.assertEqual(len(results), len(candidates))
+        for (symbol, quantity, price), result in zip(candidates, results):
+            rules = self.table.get(symbol)
+            if rules is None:
+                self.assertFalse(result.valid)
+                continue
+            expected = rules.size_order(quantity, price, clamp=False)
+            self.assertEqual(result.quantity_str, expected.quantity_str)
+            self.assertEqual(result.valid, expected.valid)
+
+    def test_batch_checks_max_notional(self):
+        candidates = [('BTCUSDT', 1.0, 10_000_000.0), ('BTCUSDT', 1.0, 50_000.0), ('DOGEUSDT', 1e6, 100.0)]
+        results = self.table.size_orders(candidates)
+        self.assertEqual([r.valid for r in results], [False, True, True])
+        for (symbol, quantity, price), result in zip(candidates, results):
+            self.assertEqual(result.valid, self.table.get(symbol).size_order(quantity, price, clamp=False).valid)
+
+    def test_invalid_symbol_info_is_skipped(self):
+        table = QuantizationTable({'BAD': {'symbol': 'BAD', 'filters': [{'filterType': 'LOT_SIZE'}]}})
+        self.assertNotIn('BAD', table)
+        self.assertEqual(len(table), 0)
+        self.assertIsInstance(SymbolRules(SYMBOLS['BTCUSDT']), SymbolRules)
+
+
+if __name__ == '__main__':
+    unittest.main()
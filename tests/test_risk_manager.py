@@ -1,6 +1,10 @@
 from src.risk.risk_manager import RiskManager
 from src.models.signal import MarketSignal
 from src.models.position import Position
+from datetime import date
+from types import SimpleNamespace
+import os
+import tempfile
 import unittest
 
 class TestRiskManager(unittest.TestCase):
@@ -64,5 +68,153 @@ class TestRiskManager(unittest.TestCase):
         positions_to_close = self.risk_manager.check_capital_protection()
         self.assertIn('BTCUSDT', positions_to_close)
 
+
+class TestDailyLossLimit(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        config = SimpleNamespace(
+            max_positions=3,
+            max_daily_loss=0.05,
+            persistence_dir=self.tmp.name,
+            ledger_path=os.path.join(self.tmp.name, 'ledger.db')
+        )
+        self.risk_manager = RiskManager(config)
+        self.risk_manager.update_capital(1000.0, 1000.0)
+
+    def tearDown(self):
+        self.risk_manager.persistence_writer.stop()
+        self.risk_manager.ledger.close()
+        self.tmp.cleanup()
+
+    def close_with_pnl(self, pnl):
+        self.risk_manager.add_position('BTCUSDT', 'BUY', 1.0, 100.0, 90.0, 120.0, 10.0)
+        self.risk_manager.remove_position('BTCUSDT', realized_pnl=pnl)
+
+    def test_profits_do_not_trigger_limit(self):
+        self.close_with_pnl(60.0)
+        self.assertFalse(self.risk_manager._check_daily_loss_limit())
+        self.assertTrue(self.risk_manager.can_open_position(None))
+
+    def test_losses_trigger_limit(self):
+        self.close_with_pnl(-60.0)
+        self.assertTrue(self.risk_manager._check_daily_loss_limit())
+        self.assertFalse(self.risk_manager.can_open_position(None))
+
+    def test_stats_reset_on_new_day(self):
+        self.close_with_pnl(-60.0)
+        self.risk_manager.daily_date = date(2000, 1, 1)
+        self.assertFalse(self.risk_manager._check_daily_loss_limit())
+        self.assertEqual(self.risk_manager.daily_pnl, 0)
+        self.assertEqual(self.risk_manager.daily_trades, 0)
+
+
+class TestPositionsSummary(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.risk_manager = RiskManager(SimpleNamespace(
+            persistence_dir=self.tmp.name,
+            ledger_path=os.path.join(self.tmp.name, 'ledger.db')
+        ))
+
+    def tearDown(self):
+        self.risk_manager.persistence_writer.stop()
+        self.risk_manager.ledger.close()
+        self.tmp.cleanup()
+
+    def test_summary_does_not_recompute_risk(self):
+        calls = []
+        self.risk_manager.portfolio_risk.compute = lambda positions: calls.append(1) or {'exposure': 1.0}
+        self.risk_manager.add_position('BTCUSDT', 'BUY', 1.0, 100.0, 90.0, 120.0, 10.0)
+
+        self.assertEqual(self.risk_manager.get_positions_summary()['risk_metrics'], {})
+        self.assertEqual(calls, [])
+        self.risk_manager.update_risk_metrics()
+        self.assertEqual(self.risk_manager.get_positions_summary()['risk_metrics'], {'exposure': 1.0})
+        self.assertEqual(calls, [1])
+
+
+class FakeClient:
+    def __init__(self, balances, oco_orders):
+        self.balances = balances
+        self.oco_orders = oco_orders
+        self.calls = 0
+
+    def get_account(self):
+        self.calls += 1
+        return {'balances': [
+            {'asset': asset, 'free': str(amount), 'locked': '0'} for asset, amount in self.balances.items()
+        ]}
+
+    def get_open_oco_orders(self):
+        self.calls += 1
+        return self.oco_orders
+
+
+class FakeMarketData:
+    def __init__(self, prices, symbols):
+        self.prices = prices
+        self.symbols = symbols
+        self.calls = 0
+
+    def get_all_prices(self):
+        self.calls += 1
+        return self.prices
+
+    def get_exchange_info(self):
+        self.calls += 1
+        return self.symbols
+
+
+class TestRehydratePositions(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.risk_manager = RiskManager(SimpleNamespace(
+            persistence_dir=self.tmp.name,
+            ledger_path=os.path.join(self.tmp.name, 'ledger.db')
+        ))
+        self.risk_manager.positions = {
+            symbol: Position(symbol, 'BUY', 1.0, 100.0, 100.0, stop_loss=90.0, take_profit=120.0)
+            for symbol in ('BTCUSDT', 'ETHUSDT', 'XRPUSDT', 'OLDUSDT')
+        }
+        symbols = {
+            symbol: {'symbol': symbol, 'status': 'TRADING', 'baseAsset': symbol[:-4]}
+            for symbol in ('BTCUSDT', 'ETHUSDT', 'XRPUSDT')
+        }
+        self.market_data = FakeMarketData({'BTCUSDT': 110.0, 'ETHUSDT': 95.0, 'XRPUSDT': 100.0}, symbols)
+
+    def tearDown(self):
+        self.risk_manager.persistence_writer.stop()
+        self.risk_manager.ledger.close()
+        self.tmp.cleanup()
+
+    def test_bulk_price_update(self):
+        client = FakeClient({}, [])
+        result = self.risk_manager.rehydrate_positions(client, self.market_data, reconcile=False)
+
+        self.assertEqual(result, {'restored': 3, 'removed': 1, 'adjusted': 0})
+        self.assertNotIn('OLDUSDT', self.risk_manager.positions)
+        self.assertAlmostEqual(self.risk_manager.positions['BTCUSDT'].unrealized_pnl, 10.0)
+        self.assertEqual(self.market_data.calls, 2)
+        self.assertEqual(client.calls, 0)
+
+    def test_reconcile_with_account(self):
+        client = FakeClient(
+            {'BTC': 0.999, 'ETH': 0.5, 'XRP': 0.0},
+            [{'symbol': 'BTCUSDT', 'orderListId': 77}]
+        )
+        result = self.risk_manager.rehydrate_positions(client, self.market_data)
+
+        self.assertEqual(result, {'restored': 2, 'removed': 2, 'adjusted': 1})
+        positions = self.risk_manager.positions
+        self.assertEqual(sorted(positions), ['BTCUSDT', 'ETHUSDT'])
+        self.assertEqual(positions['BTCUSDT'].size, 1.0)
+        self.assertEqual(positions['BTCUSDT'].protective_order_id, 77)
+        self.assertEqual(positions['ETHUSDT'].size, 0.5)
+        self.assertIsNone(positions['ETHUSDT'].protective_order_id)
+        self.assertEqual(client.calls, 2)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,138 @@
+from src.bot.scheduler import (
+    Scheduler, ScheduledTask, candle_period, last_candle_close, next_candle_close
+)
+from datetime import datetime, timezone
+import random
+import threading
+import time
+import unittest
+
+
+def epoch(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+class TestCandleAlignment(unittest.TestCase):
+
+    def test_next_close(self):
+        now = epoch(2024, 5, 6, 13, 7, 30)
+        self.assertEqual(next_candle_close('15m', now), epoch(2024, 5, 6, 13, 15))
+        self.assertEqual(next_candle_close('1h', now), epoch(2024, 5, 6, 14))
+        self.assertEqual(next_candle_close('4h', now), epoch(2024, 5, 6, 16))
+        self.assertEqual(next_candle_close('1d', now), epoch(2024, 5, 7))
+        self.assertEqual(last_candle_close('15m', now), epoch(2024, 5, 6, 13))
+
+    def test_weekly_candles_close_on_monday(self):
+        now = epoch(2024, 5, 8, 10)  # quarta-feira
+        self.assertEqual(next_candle_close('1w', now), epoch(2024, 5, 13))
+        self.assertEqual(last_candle_close('1w', now), epoch(2024, 5, 6))
+
+    def test_unknown_timeframe(self):
+        with self.assertRaises(ValueError):
+            candle_period('1M')
+
+    def test_closed_timeframes_and_jitter(self):
+        task = ScheduledTask('scan', lambda closed: None, timeframes=['15m', '1h', '4h'], offset=2.0, jitter=1.5)
+        rng = random.Random(7)
+
+        task.schedule(epoch(2024, 5, 6, 15, 50), rng)
+        self.assertEqual(task.nominal_run, epoch(2024, 5, 6, 16, 0, 2))
+        self.assertGreaterEqual(task.next_run, task.nominal_run)
+        self.assertLessEqual(task.next_run, task.nominal_run + 1.5)
+        self.assertEqual(task.closed_timeframes(task.next_run), ['15m', '1h', '4h'])
+
+        task.schedule(epoch(2024, 5, 6, 16, 10), rng)
+        self.assertEqual(task.closed_timeframes(task.next_run), ['15m'])
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = Scheduler(seed=1)
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_interval_task(self):
+        runs = []
+        self.scheduler.add_interval('tick', lambda: runs.append(time.time()), interval=0.05, run_immediately=True)
+        self.scheduler.start()
+        time.sleep(0.28)
+        self.assertGreaterEqual(len(runs), 4)
+        stats = self.scheduler.get_stats()['tick']
+        self.assertEqual(stats['errors'], 0)
+        self.assertLess(stats['lateness_max'], 0.05)
+
+    def test_events_are_coalesced(self):
+        runs = []
+        self.scheduler.add_event('monitor', lambda: runs.append(time.time()), min_interval=0.1)
+        self.scheduler.start()
+        for _ in range(50):
+            self.scheduler.trigger('monitor')
+            time.sleep(0.005)
+        time.sleep(0.15)
+        # 50 disparos em ~250 ms viram poucas execuções espaçadas
+        self.assertGreaterEqual(len(runs), 2)
+        self.assertLessEqual(len(runs), 4)
+        self.assertTrue(all(b - a >= 0.09 for a, b in zip(runs, runs[1:])))
+        self.assertEqual(self.scheduler.get_stats()['monitor']['triggers'], 50)
+
+    def test_no_overlap_and_deadline_tracking(self):
+        active = []
+        overlaps = []
+        lock = threading.Lock()
+
+        def slow():
+            with lock:
+                if active:
+                    overlaps.append(True)
+                active.append(1)
+            time.sleep(0.15)
+            with lock:
+                active.pop()
+
+        self.scheduler.add_interval('slow', slow, interval=0.05, deadline=0.1, run_immediately=True)
+        self.scheduler.start()
+        time.sleep(0.4)
+        stats = self.scheduler.get_stats()['slow']
+        self.assertEqual(overlaps, [])
+        self.assertGreater(stats['skipped'], 0)
+        self.assertGreater(stats['deadline_misses'], 0)
+
+    def test_overrunning_task_does_not_spin(self):
+        runs = []
+
+        def slow():
+            runs.append(time.time())
+            time.sleep(0.5)
+
+        self.scheduler.add_interval('monitor', slow, interval=0.1, run_immediately=True)
+        self.scheduler.add_event('capital', lambda: time.sleep(0.5), interval=0.1, run_immediately=True)
+        self.scheduler.start()
+        time.sleep(0.7)
+        stats = self.scheduler.get_stats()
+        # Um ciclo pulado por intervalo durante a execução, não um por volta do laço
+        self.assertLessEqual(stats['monitor']['skipped'], 6)
+        self.assertLessEqual(stats['capital']['skipped'], 6)
+        self.assertEqual(len(runs), 2)
+
+    def test_errors_are_counted(self):
+        def failing():
+            raise RuntimeError('boom')
+
+        self.scheduler.add_event('capital', failing)
+        self.scheduler.start()
+        self.scheduler.trigger('capital')
+        time.sleep(0.1)
+        stats = self.scheduler.get_stats()['capital']
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['last_error'], 'boom')
+
+    def test_duplicate_task(self):
+        self.scheduler.add_event('capital', lambda: None)
+        with self.assertRaises(ValueError):
+            self.scheduler.add_event('capital', lambda: None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+from src.bot.sharding import ShardCoordinator, ShardWorker, parse_address, partition, shard_owner
+from src.models.enums import SignalStrength
+from src.models.signal import MarketSignal
+from datetime import datetime
+import threading
+import time
+import unittest
+
+
+class FakeCadence:
+
+    def next_due(self, symbol):
+        return 1000.0
+
+
+class FakePipeline:
+    """Pipeline de análise que gera um sinal por símbolo com confiança fixa"""
+
+    def __init__(self, confidences, delay=0.0):
+        self.confidences = confidences
+        self.delay = delay
+        self.cadence = FakeCadence()
+        self.last_analysis_time = {}
+        self.on_klines = None
+        self.scanned = []
+
+    def scan(self, symbols):
+        time.sleep(self.delay)
+        signals = []
+        for symbol in symbols:
+            self.scanned.append(symbol)
+            self.last_analysis_time[symbol] = datetime.now()
+            if self.on_klines:
+                self.on_klines(symbol, {'1h': [[0, '1', '1', '1', '1']]})
+            confidence = self.confidences.get(symbol)
+            if confidence is not None:
+                signals.append(MarketSignal(symbol, SignalStrength.MODERATE, confidence, 1.0, 0.9, 1.2, 0.1))
+        return sorted(signals, key=lambda s: s.confidence, reverse=True)
+
+
+class TestPartition(unittest.TestCase):
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address('127.0.0.1:7400'), ('127.0.0.1', 7400))
+        self.assertEqual(parse_address(':7400'), ('0.0.0.0', 7400))
+        self.assertEqual(parse_address('/tmp/bot-shards.sock'), '/tmp/bot-shards.sock')
+
+    def test_every_symbol_has_one_owner(self):
+        symbols = [f'SYM{i}USDT' for i in range(200)]
+        shards = partition(symbols, ['w1', 'w2', 'w3'])
+        self.assertEqual(sorted(sum(shards.values(), [])), sorted(symbols))
+        self.assertTrue(all(len(shard) > 30 for shard in shards.values()))
+        self.assertEqual(partition(symbols, []), {})
+
+    def test_worker_leaving_only_moves_its_symbols(self):
+        symbols = [f'SYM{i}USDT' for i in range(200)]
+        before = {s: shard_owner(s, ['w1', 'w2', 'w3']) for s in symbols}
+        after = {s: shard_owner(s, ['w1', 'w3']) for s in symbols}
+        moved = [s for s in symbols if before[s] != after[s]]
+        self.assertTrue(moved)
+        self.assertTrue(all(before[s] == 'w2' for s in moved))
+
+
+class TestCoordinatorWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.coordinator = ShardCoordinator('127.0.0.1:0', 'secret', scan_timeout=5.0)
+        self.coordinator.start()
+        host, port = self.coordinator._listener.address
+        self.address = f'{host}:{port}'
+        self.workers = []
+
+    def tearDown(self):
+        for worker, _ in self.workers:
+            worker.stop()
+        self.coordinator.stop()
+
+    def start_worker(self, worker_id, pipeline, authkey='secret'):
+        worker = ShardWorker(None, pipeline, self.address, authkey, worker_id=worker_id)
+        thread = threading.Thread(target=worker.run, daemon=True)
+        thread.start()
+        self.workers.append((worker, thread))
+        return worker
+
+    def wait_workers(self, count, timeout=5.0):
+        deadline = time.time() + timeout
+        while len(self.coordinator.worker_ids) < count and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(len(self.coordinator.worker_ids), count)
+
+    def test_scan_merges_signals_from_all_shards(self):
+        confidences = {'BTCUSDT': 0.55, 'ETHUSDT': 0.9, 'SOLUSDT': 0.7, 'ADAUSDT': None}
+        pipelines = [FakePipeline(confidences), FakePipeline(confidences)]
+        self.start_worker('w1', pipelines[0])
+        self.start_worker('w2', pipelines[1])
+        self.wait_workers(2)
+
+        symbols = list(confidences)
+        result = self.coordinator.scan(symbols, correlation_timeframe='1h')
+
+        self.assertEqual([s.symbol for s in result['signals']], ['ETHUSDT', 'SOLUSDT', 'BTCUSDT'])
+        self.assertEqual(sorted(result['analyzed']), sorted(symbols))
+        self.assertEqual(sorted(result['correlation']), sorted(symbols))
+        self.assertEqual(result['missing'], [])
+        # Cada símbolo analisado por exatamente um worker
+        self.assertEqual(sorted(pipelines[0].scanned + pipelines[1].scanned), sorted(symbols))
+
+    def test_slow_worker_does_not_block_cycle(self):
+        symbols = [f'SYM{i}USDT' for i in range(20)]
+        self.start_worker('fast', FakePipeline({s: 0.6 for s in symbols}))
+        self.start_worker('slow', FakePipeline({s: 0.6 for s in symbols}, delay=2.0))
+        self.wait_workers(2)
+
+        started = time.time()
+        result = self.coordinator.scan(symbols, timeout=0.5)
+        self.assertLess(time.time() - started, 1.5)
+        self.assertEqual(sorted(result['missing']), sorted(partition(symbols, ['fast', 'slow'])['slow']))
+        self.assertEqual(self.coordinator.get_stats()['workers']['slow']['late'], 1)
+
+    def test_wrong_authkey_rejected(self):
+        self.start_worker('intruder', FakePipeline({}), authkey='wrong')
+        time.sleep(0.3)
+        self.assertEqual(self.coordinator.worker_ids, [])
+
+    def test_requires_authkey(self):
+        with self.assertRaises(ValueError):
+            ShardCoordinator('127.0.0.1:0', '')
+
+
+if __name__ == '__main__':
+    unittest.main()
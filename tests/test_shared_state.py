@@ -0,0 +1,107 @@
+from src.utils.shared_state import SnapshotPublisher, SnapshotReader
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+
+def publish_many(path, count):
+    publisher = SnapshotPublisher(path, capacity=64 * 1024)
+    for i in range(count):
+        publisher.publish({'counter': i, 'positions': [{'symbol': 'BTCUSDT', 'size': i}] * (i % 50)})
+    publisher.close()
+
+
+class TestSharedState(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'state')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_reader_before_publisher(self):
+        reader = SnapshotReader(self.path)
+        self.assertIsNone(reader.read())
+        self.assertFalse(reader.is_alive(5))
+
+        publisher = SnapshotPublisher(self.path, capacity=1024)
+        publisher.publish({'running': True})
+        seq, snapshot = reader.read()
+        self.assertEqual(snapshot, {'running': True})
+        self.assertEqual(seq, publisher.seq)
+        self.assertTrue(reader.is_alive(5))
+
+    def test_sequence_only_moves_on_change(self):
+        publisher = SnapshotPublisher(self.path, capacity=1024)
+        reader = SnapshotReader(self.path)
+        publisher.publish({'a': 1})
+        first = reader.read()[0]
+        heartbeat = reader.header()['heartbeat']
+
+        time.sleep(0.01)
+        publisher.publish({'a': 1})
+        self.assertEqual(reader.read()[0], first)
+        self.assertGreater(reader.header()['heartbeat'], heartbeat)
+
+        publisher.publish({'a': 2})
+        seq, snapshot = reader.read()
+        self.assertEqual(seq, first + 2)
+        self.assertEqual(snapshot, {'a': 2})
+
+    def test_timestamp_alone_does_not_move_sequence(self):
+        publisher = SnapshotPublisher(self.path, capacity=1024)
+        reader = SnapshotReader(self.path)
+        publisher.publish({'a': 1, 'last_update': '2024-01-01T00:00:00'})
+        first = reader.read()[0]
+
+        publisher.publish({'a': 1, 'last_update': '2024-01-01T00:00:01'})
+        publisher.publish({'a': 1, 'last_update': '2024-01-01T00:00:02'})
+        self.assertEqual(reader.read()[0], first)
+
+        publisher.publish({'a': 2, 'last_update': '2024-01-01T00:00:03'})
+        seq, snapshot = reader.read()
+        self.assertGreater(seq, first)
+        self.assertEqual(snapshot['last_update'], '2024-01-01T00:00:03')
+
+    def test_oversized_snapshot_rejected(self):
+        publisher = SnapshotPublisher(self.path, capacity=64)
+        publisher.publish({'ok': True})
+        self.assertFalse(publisher.publish({'data': 'x' * 100}))
+        self.assertEqual(SnapshotReader(self.path).read()[1], {'ok': True})
+
+    def test_new_publisher_continues_sequence(self):
+        first = SnapshotPublisher(self.path, capacity=1024)
+        first.publish({'run': 1})
+        seq = first.seq
+        first.close()
+
+        second = SnapshotPublisher(self.path, capacity=1024)
+        second.publish({'run': 2})
+        self.assertGreater(second.seq, seq)
+        self.assertEqual(SnapshotReader(self.path).read()[1], {'run': 2})
+
+    def test_consistent_reads_while_another_process_writes(self):
+        SnapshotPublisher(self.path, capacity=64 * 1024).publish({'counter': -1, 'positions': []})
+        writer = multiprocessing.get_context('fork').Process(target=publish_many, args=(self.path, 3000))
+        writer.start()
+        reader = SnapshotReader(self.path)
+        reads = 0
+        while writer.is_alive() or reads == 0:
+            result = reader.read()
+            if result:
+                snapshot = result[1]
+                counter = snapshot['counter']
+                if counter >= 0:
+                    self.assertEqual(len(snapshot['positions']), counter % 50)
+                    self.assertTrue(all(p['size'] == counter for p in snapshot['positions']))
+                reads += 1
+        writer.join()
+        self.assertEqual(reader.read()[1]['counter'], 2999)
+
+
+if __name__ == '__main__':
+    unittest.main()
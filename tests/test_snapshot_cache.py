@@ -0,0 +1,54 @@
+from src.utils.snapshot_cache import SnapshotCache
+import json
+import unittest
+
+
+class TestSnapshotCache(unittest.TestCase):
+
+    def test_builds_once_per_version(self):
+        cache = SnapshotCache()
+        calls = []
+
+        def build():
+            calls.append(1)
+            return {'positions': len(calls)}
+
+        body, etag = cache.get('status', (4, 1), build)
+        self.assertEqual(json.loads(body), {'positions': 1})
+        self.assertTrue(etag.startswith('status-'))
+
+        for _ in range(100):
+            self.assertEqual(cache.get('status', (4, 1), build), (body, etag))
+        self.assertEqual(len(calls), 1)
+
+        body, new_etag = cache.get('status', (6, 1), build)
+        self.assertEqual(json.loads(body), {'positions': 2})
+        self.assertNotEqual(new_etag, etag)
+
+    def test_etag_follows_served_content(self):
+        cache = SnapshotCache()
+        state = {'positions': []}
+        etag = cache.get('positions', 2, lambda: state)[1]
+
+        # Novo snapshot sem mudança nos dados do endpoint: mesma ETag (304 no cliente)
+        self.assertEqual(cache.get('positions', 4, lambda: state)[1], etag)
+        self.assertEqual(cache.builds, 2)
+
+        state = {'positions': [{'symbol': 'BTCUSDT'}]}
+        self.assertNotEqual(cache.get('positions', 6, lambda: state)[1], etag)
+
+        # Mesmo conteúdo em outra instância (reinício do servidor) gera a mesma ETag
+        self.assertEqual(SnapshotCache().get('positions', 0, lambda: state)[1],
+                         cache.get('positions', 6, lambda: state)[1])
+
+    def test_keys_are_independent(self):
+        cache = SnapshotCache()
+        cache.get('positions', 2, lambda: [])
+        body, etag = cache.get('signals', 2, lambda: [])
+        self.assertNotEqual(etag, cache.get('positions', 2, lambda: None)[1])
+        self.assertEqual(cache.get('positions', 2, lambda: None)[0], b'[]')
+        self.assertEqual(cache.builds, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
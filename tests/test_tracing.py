@@ -0,0 +1,87 @@
+from src.utils.tracing import LatencyHistogram, TracedClient, Tracer
+import random
+import time
+import unittest
+
+
+class FakeClient:
+
+    API_URL = 'https://api.binance.com/api'
+
+    def get_klines(self, **kwargs):
+        return [[0]]
+
+    def get_account(self):
+        raise RuntimeError('falha')
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_quantiles_within_bucket_error(self):
+        histogram = LatencyHistogram()
+        rng = random.Random(1)
+        samples = sorted(rng.lognormvariate(-4, 1) for _ in range(20000))
+        for sample in samples:
+            histogram.record(sample)
+
+        for q in (0.5, 0.95, 0.99):
+            exact = samples[int(q * len(samples)) - 1]
+            self.assertAlmostEqual(histogram.quantile(q) / exact, 1.0, delta=0.06)
+        self.assertEqual(histogram.count, 20000)
+        self.assertEqual(len(histogram.counts), LatencyHistogram.size)
+
+    def test_extremes_are_clamped(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.0)
+        histogram.record(10_000.0)
+        self.assertEqual(histogram.counts[0], 1)
+        self.assertEqual(histogram.counts[-1], 1)
+        self.assertEqual(histogram.quantile(1.0), 10_000.0)
+
+
+class TestTracer(unittest.TestCase):
+
+    def test_spans_and_errors(self):
+        tracer = Tracer()
+        with tracer.span('cycle.monitor'):
+            time.sleep(0.01)
+        with self.assertRaises(ValueError):
+            with tracer.span('cycle.monitor'):
+                raise ValueError()
+
+        stats = tracer.get_stats()['spans']['cycle.monitor']
+        self.assertEqual(stats['count'], 2)
+        self.assertEqual(stats['errors'], 1)
+        self.assertGreaterEqual(stats['max_ms'], 9.0)
+
+    def test_disabled_records_nothing(self):
+        tracer = Tracer(enabled=False)
+        with tracer.span('cycle.scan'):
+            pass
+        tracer.wrap('cycle.capital', lambda: None)()
+        self.assertEqual(tracer.get_stats()['spans'], {})
+
+    def test_traced_client(self):
+        tracer = Tracer()
+        client = TracedClient(FakeClient(), tracer)
+        self.assertEqual(client.get_klines(symbol='BTCUSDT'), [[0]])
+        with self.assertRaises(RuntimeError):
+            client.get_account()
+        self.assertEqual(client.API_URL, FakeClient.API_URL)
+
+        spans = tracer.get_stats()['spans']
+        self.assertEqual(spans['exchange.get_klines']['count'], 1)
+        self.assertEqual(spans['exchange.get_account']['errors'], 1)
+
+    def test_overhead_is_small(self):
+        tracer = Tracer()
+        started = time.perf_counter()
+        for _ in range(10000):
+            with tracer.span('overhead'):
+                pass
+        per_span = (time.perf_counter() - started) / 10000
+        self.assertLess(per_span, 20e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+from src.utils.trade_ledger import TradeLedger
+from src.models.position import Position
+from datetime import datetime
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+
+class TestTradeLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.ledger = TradeLedger(os.path.join(self.data_dir, 'ledger.db'), batch_size=10)
+
+    def tearDown(self):
+        self.ledger.close()
+        shutil.rmtree(self.data_dir)
+
+    def _trade(self, symbol, exit_price, opened):
+        position = Position(symbol, 'BUY', 2.0, 100.0, 100.0, stop_loss=95.0,
+                            take_profit=110.0, timestamp=opened)
+        self.ledger.record_position_open(position)
+        pnl = (exit_price - position.entry_price) * position.size
+        self.ledger.record_position_close(position, exit_price, pnl, 'Take Profit')
+        return pnl
+
+    def test_record_order_with_fills(self):
+        order = {
+            'orderId': 42, 'clientOrderId': 'abc', 'transactTime': 1700000000000,
+            'type': 'MARKET', 'status': 'FILLED', 'origQty': '1.5', 'executedQty': '1.5',
+            'fills': [
+                {'price': '100.0', 'qty': '1.0', 'commission': '0.001', 'commissionAsset': 'BNB', 'tradeId': 1},
+                {'price': '101.0', 'qty': '0.5', 'commission': '0.0005', 'commissionAsset': 'BNB', 'tradeId': 2}
+            ]
+        }
+        self.ledger.record_order('BTCUSDT', 'BUY', order, price=100.333)
+        self.ledger.record_order('ETHUSDT', 'BUY', quantity=3.0, price=10.0, simulated=True)
+
+        orders = self.ledger.get_orders()
+        self.assertEqual(len(orders), 2)
+        by_symbol = {o['symbol']: o for o in orders}
+        self.assertEqual(by_symbol['BTCUSDT']['order_id'], '42')
+        self.assertEqual(by_symbol['BTCUSDT']['executed_quantity'], 1.5)
+        self.assertEqual(by_symbol['ETHUSDT']['simulated'], 1)
+        self.assertEqual(by_symbol['ETHUSDT']['quantity'], 3.0)
+
+        fills = self.ledger._conn.execute("SELECT COUNT(*) FROM fills").fetchone()[0]
+        self.assertEqual(fills, 2)
+
+    def test_batching(self):
+        self.ledger.record_order('BTCUSDT', 'BUY', quantity=1.0, price=1.0, simulated=True)
+        count = self.ledger._conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+        self.assertEqual(count, 0)
+
+        for _ in range(9):
+            self.ledger.record_order('BTCUSDT', 'BUY', quantity=1.0, price=1.0, simulated=True)
+        count = self.ledger._conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+        self.assertEqual(count, 10)
+
+    def test_single_record_is_flushed_by_timer(self):
+        self.ledger.close()
+        self.ledger = TradeLedger(os.path.join(self.data_dir, 'ledger.db'), batch_size=10, flush_interval=0.05)
+        self.ledger.record_order('BTCUSDT', 'SELL', quantity=1.0, price=1.0, simulated=True)
+
+        time.sleep(0.3)
+        reader = TradeLedger(os.path.join(self.data_dir, 'ledger.db'), read_only=True)
+        self.assertEqual(len(reader.get_orders()), 1)
+        reader.close()
+
+    def test_read_only_ledger_rejects_writes(self):
+        reader = TradeLedger(os.path.join(self.data_dir, 'ledger.db'), read_only=True)
+        with self.assertRaises(RuntimeError):
+            reader.record_order('BTCUSDT', 'BUY', quantity=1.0, price=1.0, simulated=True)
+        reader.close()
+
+    def test_trades_and_analytics(self):
+        self._trade('BTCUSDT', 110.0, datetime(2024, 1, 1, 10))
+        self._trade('BTCUSDT', 95.0, datetime(2024, 1, 1, 11))
+        self._trade('ETHUSDT', 105.0, datetime(2024, 1, 2, 10))
+
+        trades = self.ledger.get_trades()
+        self.assertEqual(len(trades), 3)
+        self.assertEqual(trades[0]['symbol'], 'ETHUSDT')
+        self.assertEqual(len(self.ledger.get_trades(symbol='BTCUSDT')), 2)
+        self.assertEqual(len(self.ledger.get_trades(limit=1, offset=1)), 1)
+
+        stats = self.ledger.win_rate()
+        self.assertEqual(stats['trades'], 3)
+        self.assertEqual(stats['wins'], 2)
+        self.assertEqual(stats['losses'], 1)
+        self.assertAlmostEqual(stats['total_pnl'], 20.0)
+        self.assertAlmostEqual(stats['win_rate'], 2 / 3)
+
+        by_symbol = {row['symbol']: row for row in self.ledger.pnl_by_symbol()}
+        self.assertAlmostEqual(by_symbol['BTCUSDT']['pnl'], 10.0)
+        self.assertEqual(by_symbol['ETHUSDT']['trades'], 1)
+
+        days = self.ledger.pnl_by_day()
+        self.assertEqual(sum(row['trades'] for row in days), 3)
+
+    def test_time_filters(self):
+        self._trade('BTCUSDT', 110.0, datetime(2024, 1, 1, 10))
+        self.assertEqual(len(self.ledger.get_trades(start='2000-01-01', end='2100-01-01')), 1)
+        self.assertEqual(len(self.ledger.get_trades(end='2000-01-01')), 0)
+        self.assertEqual(self.ledger.win_rate(start='2100-01-01')['trades'], 0)
+
+    def test_reopen_keeps_history(self):
+        self._trade('BTCUSDT', 110.0, datetime(2024, 1, 1, 10))
+        self.ledger.close()
+        self.ledger = TradeLedger(os.path.join(self.data_dir, 'ledger.db'))
+        self.assertEqual(len(self.ledger.get_trades()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+from src.risk.trigger_engine import TriggerEngine, TriggerBook, Trigger
+from src.models.position import Position
+import unittest
+
+class TestTriggerEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.fired = []
+        self.engine = TriggerEngine(lambda symbol, reason: self.fired.append((symbol, reason)))
+
+    def _position(self, symbol='BTCUSDT', side='BUY', entry=100.0, stop_loss=95.0, take_profit=110.0):
+        return Position(
+            symbol=symbol,
+            side=side,
+            size=1.0,
+            entry_price=entry,
+            current_price=entry,
+            stop_loss=stop_loss,
+            take_profit=take_profit
+        )
+
+    def test_no_trigger_between_levels(self):
+        self.engine.register_position(self._position())
+        self.assertIsNone(self.engine.on_price('BTCUSDT', 100.0))
+        self.assertIsNone(self.engine.on_price('BTCUSDT', 109.99))
+        self.assertEqual(self.fired, [])
+
+    def test_stop_loss_fires_once(self):
+        self.engine.register_position(self._position())
+        trigger = self.engine.on_price('BTCUSDT', 94.0)
+        self.assertEqual(trigger.kind, 'stop_loss')
+        self.assertEqual(self.fired, [('BTCUSDT', 'Stop Loss acionado')])
+        # Gatilhos removidos após o disparo
+        self.assertIsNone(self.engine.on_price('BTCUSDT', 90.0))
+        self.assertEqual(len(self.fired), 1)
+
+    def test_take_profit_fires(self):
+        self.engine.register_position(self._position())
+        self.engine.on_price('BTCUSDT', 110.0)
+        self.assertEqual(self.fired, [('BTCUSDT', 'Take Profit acionado')])
+
+    def test_short_position_levels_are_inverted(self):
+        self.engine.register_position(self._position(side='SELL', stop_loss=105.0, take_profit=90.0))
+        self.assertIsNone(self.engine.on_price('BTCUSDT', 95.0))
+        self.engine.on_price('BTCUSDT', 106.0)
+        self.assertEqual(self.fired, [('BTCUSDT', 'Stop Loss acionado')])
+
+    def test_trailing_stop_follows_price(self):
+        engine = TriggerEngine(lambda symbol, reason: self.fired.append((symbol, reason)),
+                               trailing_stop_pct=0.02)
+        engine.register_position(self._position(stop_loss=90.0, take_profit=200.0))
+        self.assertAlmostEqual(engine.get_levels('BTCUSDT')['trailing_stop'], 98.0)
+
+        engine.on_price('BTCUSDT', 120.0)
+        self.assertAlmostEqual(engine.get_levels('BTCUSDT')['trailing_stop'], 117.6)
+
+        # Recuo menor que 2% não dispara
+        self.assertIsNone(engine.on_price('BTCUSDT', 118.0))
+        engine.on_price('BTCUSDT', 117.0)
+        self.assertEqual(self.fired, [('BTCUSDT', 'Trailing Stop acionado')])
+
+    def test_unregister_position(self):
+        self.engine.register_position(self._position())
+        self.engine.unregister_position('BTCUSDT')
+        self.assertIsNone(self.engine.on_price('BTCUSDT', 50.0))
+        self.assertEqual(self.engine.symbols(), [])
+
+    def test_book_returns_levels_in_crossing_order(self):
+        book = TriggerBook()
+        for level in [90.0, 95.0, 80.0]:
+            book.add(Trigger('BTCUSDT', 'stop_loss', level), fires_below=True)
+        self.assertEqual(book.floor, 95.0)
+        crossed = book.crossed(85.0)
+        self.assertEqual([trigger.level for trigger in crossed], [95.0, 90.0])
+
+if __name__ == '__main__':
+    unittest.main()